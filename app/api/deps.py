@@ -5,13 +5,13 @@ from typing import Generator
 
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from app.core.security import SecurityManager
+from app.core.session_cache import CachedSession, session_cache
 from app.db.base import SessionLocal
 from app.db.models import Session as UserSession
 from app.db.models import User
-from app.core.security import SecurityManager
-
 
 security = SecurityManager()
 
@@ -24,18 +24,31 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def _detached_copy(user: User) -> User:
+    """Column snapshot of `user` that can outlive the request's session."""
+    copy = User(id=user.id, email=user.email, password_hash=user.password_hash, mfa_enabled=user.mfa_enabled, created_at=user.created_at)
+    make_transient_to_detached(copy)
+    return copy
+
+
 def current_user(request: Request, db: Session = Depends(get_db)) -> User:
     token = request.cookies.get("cb_session")
     if not token:
         raise HTTPException(status_code=401)
     token_hash = security.hash_token(token)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    cached = session_cache.get(token_hash, now)
+    if cached is not None:
+        # merge(load=False) attaches the snapshot without a query.
+        return db.merge(cached.user, load=False)
     sess = db.scalar(select(UserSession).where(UserSession.token_hash == token_hash))
     if not sess:
         raise HTTPException(status_code=401)
     expiry = sess.expires_at if sess.expires_at.tzinfo is None else sess.expires_at.astimezone(UTC).replace(tzinfo=None)
-    if expiry < datetime.now(UTC).replace(tzinfo=None):
+    if expiry < now:
         raise HTTPException(status_code=401)
     user = db.get(User, sess.user_id)
     if not user:
         raise HTTPException(status_code=401)
+    session_cache.put(token_hash, CachedSession(user.id, _detached_copy(user), expiry))
     return user
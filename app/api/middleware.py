@@ -0,0 +1,95 @@
+"""CSRF enforcement and the CSRF cookie, as plain ASGI middleware.
+
+`@app.middleware("http")` runs every request through BaseHTTPMiddleware, which moves the
+response through an extra task and memory stream. That costs time on every page and static
+file, and it delays streamed responses. This middleware only inspects the request scope and
+adds a header to `http.response.start`, so responses pass straight through.
+"""
+
+from __future__ import annotations
+
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.security import SecurityManager, require_csrf_async, set_csrf_cookie
+
+security = SecurityManager()
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def csrf_cookie_header(token: str) -> str:
+    """The Set-Cookie value `set_csrf_cookie` would add for `token`."""
+    response = Response()
+    set_csrf_cookie(response, token)
+    return response.headers["set-cookie"]
+
+
+def _rejection(request: Request, exc: HTTPException, cookie_token: str | None) -> Response:
+    if "text/html" in request.headers.get("accept", ""):
+        # Browsers go back to the page they came from with a fresh token.
+        referer = request.headers.get("referer")
+        target = "/auth/login?error=csrf"
+        if referer:
+            parsed = urlparse(referer)
+            if parsed.path and parsed.path != request.url.path:
+                target = parsed.path
+                if parsed.query:
+                    target = f"{target}?{parsed.query}"
+            elif parsed.path and parsed.path != "/":
+                target = parsed.path
+        elif not request.url.path.startswith("/auth"):
+            target = "/"
+        redirect = RedirectResponse(target, status_code=303)
+        set_csrf_cookie(redirect, security.new_csrf_token())
+        return redirect
+
+    response = PlainTextResponse(exc.detail, status_code=exc.status_code)
+    if not cookie_token:
+        set_csrf_cookie(response, request.state.csrf_token)
+    return response
+
+
+class CsrfMiddleware:
+    """Rejects unsafe requests without a matching CSRF token and issues the cookie to new clients.
+
+    The request's token (the cookie's, or a new one) is put in `request.state.csrf_token` for
+    the templates.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        cookie_token = request.cookies.get("cb_csrf")
+        token = cookie_token or security.new_csrf_token()
+        request.state.csrf_token = token
+
+        if scope["method"] in UNSAFE_METHODS:
+            try:
+                receive = await require_csrf_async(request)
+            except HTTPException as exc:
+                await _rejection(request, exc, cookie_token)(scope, receive, send)
+                return
+
+        if cookie_token:
+            await self.app(scope, receive, send)
+            return
+
+        cookie = csrf_cookie_header(token)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -11,7 +11,9 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.core.audit import write_audit_event
-from app.core.security import SecurityManager, set_csrf_cookie
+from app.core.hashing_pool import HashingPoolBusy
+from app.core.security import SecurityManager, login_limiter, set_csrf_cookie
+from app.core.session_cache import session_cache
 from app.db.models import Session as UserSession, User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -48,11 +50,24 @@ def register_templates(templates: Jinja2Templates) -> None:
         if not _valid_pin(resolved_pin):
             return RedirectResponse("/auth/login?error=pin", status_code=303)
 
+        source = request.client.host if request.client else "unknown"
+        # Locked-out sources are turned away before any Argon2 work. The attempt counts as a
+        # failure until it succeeds, so concurrent guesses cannot get past the limit.
+        attempt = login_limiter.begin_attempt(source)
+        if attempt is None:
+            return RedirectResponse("/auth/login?error=locked", status_code=303)
         user = db.scalar(select(User).order_by(User.id.asc()).limit(1))
-        if not user or not security.verify_password(resolved_pin, user.password_hash):
-            write_audit_event(db, "login_failed", "user", "local-user", None, {"reason": "invalid_credentials"})
+        try:
+            verified = user is not None and security.verify_password(resolved_pin, user.password_hash)
+        except HashingPoolBusy:
+            login_limiter.cancel_attempt(source, attempt)
+            return RedirectResponse("/auth/login?error=busy", status_code=303)
+        if user is None or not verified:
+            locked = login_limiter.retry_after(source) > 0
+            write_audit_event(db, "login_failed", "user", "local-user", None, {"reason": "invalid_credentials", "locked": locked})
             db.commit()
-            return RedirectResponse("/auth/login?error=invalid", status_code=303)
+            return RedirectResponse(f"/auth/login?error={'locked' if locked else 'invalid'}", status_code=303)
+        login_limiter.reset(source)
         if not os.getenv("CB_ORGANIZER_PASSPHRASE"):
             os.environ["CB_ORGANIZER_PASSPHRASE"] = resolved_pin
 
@@ -77,11 +92,14 @@ def register_templates(templates: Jinja2Templates) -> None:
         token = request.cookies.get("cb_session")
         if token:
             token_hash = security.hash_token(token)
+            session_cache.invalidate(token_hash)
             sess = db.scalar(select(UserSession).where(UserSession.token_hash == token_hash))
             if sess:
                 write_audit_event(db, "logout", "user", str(sess.user_id), sess.user_id, {})
                 db.delete(sess)
                 db.commit()
+                # Again now the row is gone: a request in between may have cached it from the old row.
+                session_cache.invalidate(token_hash)
         resp = RedirectResponse("/auth/login", status_code=303)
         security.clear_session_cookie(resp)
         resp.delete_cookie("cb_csrf")
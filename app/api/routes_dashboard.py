@@ -1,29 +1,44 @@
 from __future__ import annotations
 
-from calendar import monthrange
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
 
 from app.api.deps import current_user, get_db
 from app.core.audit import write_audit_event
-from app.db.models import Appointment, Document, ExpenseLineItem, InsuranceProvider, Policy, ProviderAddress
+from app.db.models import (
+    Appointment,
+    AppointmentSeries,
+    AppointmentSeriesException,
+    Document,
+    ExpenseLineItem,
+    InsuranceProvider,
+    Policy,
+    ProviderAddress,
+)
 from app.domain.money import parse_money_to_cents
+from app.services.calendar.grid import build_month_grid
+from app.services.calendar.recurrence import (
+    RecurrenceRule,
+    is_occurrence,
+    materialize_occurrence,
+    parse_rrule,
+    skip_occurrence,
+)
+from app.services.calendar.series_totals import series_totals
+from app.services.calendar.versions import SERIES_KEY, bump_counter, calendar_etag, etag_matches
+from app.services.reporting.accumulators import policy_progress
+from app.services.reporting.rollups import apply_appointment_delta, get_rollup
+from app.services.search.entities import index_appointment, index_series
+from app.services.search.index import KIND_APPOINTMENT, KIND_SERIES, remove_entry
 
 router = APIRouter(tags=["dashboard"])
-
-
-def _month_bounds(year: int, month: int) -> tuple[date, date]:
-    start = date(year, month, 1)
-    if month == 12:
-        end = date(year + 1, 1, 1)
-    else:
-        end = date(year, month + 1, 1)
-    return start, end
+# Let browsers keep month views but revalidate them against the ETag on every use.
+CALENDAR_CACHE_CONTROL = "private, no-cache"
 
 
 def _safe_month_year(year_raw: str | None, month_raw: str | None) -> tuple[int, int]:
@@ -58,6 +73,69 @@ def _coerce_cents(usd_value: str | None, cents_value: int | None, default_cents:
     return max(0, default_cents)
 
 
+def _recurrence_rule(repeat: str, interval: int | None, count: int | None, until: str) -> RecurrenceRule | None:
+    freq = repeat.strip().upper()
+    if not freq:
+        return None
+    until_date = None
+    if until.strip():
+        until_date = date.fromisoformat(until.strip())
+    rule = RecurrenceRule(freq=freq, interval=interval or 1, count=count or None, until=until_date)
+    # Round-trip through the parser so form input gets the same validation as stored rules.
+    return parse_rrule(rule.to_text())
+
+
+def _resolve_appointment(
+    db: Session,
+    appointment_id: int | None,
+    series_id: int | None,
+    occurrence_at: str,
+) -> Appointment | AppointmentSeries | None:
+    """Find the edited appointment; a virtual occurrence resolves to its series."""
+    if appointment_id is not None:
+        return db.get(Appointment, appointment_id)
+    if series_id is None or not occurrence_at:
+        return None
+    series = db.get(AppointmentSeries, series_id)
+    try:
+        occurrence = datetime.fromisoformat(occurrence_at)
+    except ValueError:
+        return None
+    if series is None or not is_occurrence(series, occurrence):
+        return None
+    return series
+
+
+def _month_summary(db: Session, year: int, month: int) -> dict[str, int]:
+    month_rollup = get_rollup(db, year, month)
+    monthly_premium = db.scalar(select(func.coalesce(func.sum(Policy.monthly_premium_cents), 0))) or 0
+    # Rollups only count stored rows; recurring occurrences stay virtual until edited.
+    virtual_count, _ = series_totals.month(db, year, month)
+    return {
+        "month_appointment_count": month_rollup.appointment_count + virtual_count,
+        "monthly_expense": month_rollup.expense_total_cents,
+        "monthly_premium": monthly_premium,
+        "monthly_total": month_rollup.expense_total_cents + monthly_premium,
+    }
+
+
+@router.get("/api/calendar/{year}/{month}")
+def calendar_month_api(
+    year: int,
+    month: int,
+    request: Request,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> Response:
+    if not (1900 <= year <= 2100 and 1 <= month <= 12):
+        raise HTTPException(status_code=404, detail="Unknown month")
+    etag = calendar_etag(db, year, month)
+    headers = {"ETag": etag, "Cache-Control": CALENDAR_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build_month_grid(db, year, month), headers=headers)
+
+
 def register_templates(templates: Jinja2Templates) -> None:
     @router.get("/dev/cats/duo", response_class=HTMLResponse)
     def dev_duo_cats(request: Request, user=Depends(current_user)) -> HTMLResponse:
@@ -72,84 +150,9 @@ def register_templates(templates: Jinja2Templates) -> None:
     @router.get("/", response_class=HTMLResponse)
     def dashboard(request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> HTMLResponse:
         year, month = _safe_month_year(request.query_params.get("year"), request.query_params.get("month"))
-        month_start, month_end = _month_bounds(year, month)
 
         provider_count = db.scalar(select(func.count()).select_from(InsuranceProvider)) or 0
         docs_count = db.scalar(select(func.count()).select_from(Document)) or 0
-        monthly_expense = db.scalar(
-            select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
-                ExpenseLineItem.incurred_at >= month_start,
-                ExpenseLineItem.incurred_at < month_end,
-            )
-        ) or 0
-        monthly_premium = db.scalar(select(func.coalesce(func.sum(Policy.monthly_premium_cents), 0))) or 0
-        month_appointment_count = db.scalar(
-            select(func.count())
-            .select_from(Appointment)
-            .where(
-                Appointment.scheduled_at >= datetime.combine(month_start, time.min),
-                Appointment.scheduled_at < datetime.combine(month_end, time.min),
-            )
-        ) or 0
-
-        first_weekday = month_start.weekday()
-        month_last_day = monthrange(year, month)[1]
-        last_date = date(year, month, month_last_day)
-        grid_start = month_start - timedelta(days=first_weekday)
-        grid_end = last_date + timedelta(days=6 - last_date.weekday())
-        grid_end_exclusive = grid_end + timedelta(days=1)
-
-        rows = db.execute(
-            select(Appointment, InsuranceProvider)
-            .join(InsuranceProvider, Appointment.provider_id == InsuranceProvider.id)
-            .where(
-                Appointment.scheduled_at >= datetime.combine(grid_start, time.min),
-                Appointment.scheduled_at < datetime.combine(grid_end_exclusive, time.min),
-            )
-            .order_by(Appointment.scheduled_at.asc())
-        ).all()
-
-        by_day: dict[date, list[dict[str, object]]] = {}
-        for appt, provider in rows:
-            appt_day = appt.scheduled_at.date()
-            by_day.setdefault(appt_day, []).append(
-                {
-                    "id": appt.id,
-                    "provider_id": provider.id,
-                    "provider_name": provider.name,
-                    "provider_specialty": provider.specialty or "",
-                    "provider_color": provider.selector_color,
-                    "time": appt.scheduled_at.strftime("%I:%M %p").lstrip("0"),
-                    "scheduled_at_iso": appt.scheduled_at.isoformat(timespec="minutes"),
-                    "scheduled_date": appt.scheduled_at.strftime("%Y-%m-%d"),
-                    "scheduled_time": appt.scheduled_at.strftime("%H:%M"),
-                    "estimated_invoice_cents": appt.estimated_invoice_cents,
-                    "estimated_invoice_usd": f"{appt.estimated_invoice_cents / 100:.2f}",
-                    "location_name": appt.location_name or "",
-                    "facility_address": appt.facility_address or "",
-                    "prep_notes": appt.prep_notes or "",
-                    "notes": appt.notes or "",
-                }
-            )
-
-        weeks: list[list[dict[str, object]]] = []
-        cursor = grid_start
-        while cursor <= grid_end:
-            week: list[dict[str, object]] = []
-            for _ in range(7):
-                week.append(
-                    {
-                        "date": cursor,
-                        "day_num": cursor.day,
-                        "in_month": cursor.month == month,
-                        "appointments": by_day.get(cursor, []),
-                    }
-                )
-                cursor += timedelta(days=1)
-            weeks.append(week)
-
-        prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
-        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
         providers = db.scalars(select(InsuranceProvider).order_by(InsuranceProvider.name.asc())).all()
         address_rows = db.scalars(select(ProviderAddress).order_by(ProviderAddress.provider_id.asc(), ProviderAddress.id.asc())).all()
         provider_addresses_by_id: dict[int, list[str]] = {}
@@ -164,23 +167,33 @@ def register_templates(templates: Jinja2Templates) -> None:
                 "user": user,
                 "provider_count": provider_count,
                 "docs_count": docs_count,
-                "monthly_expense": monthly_expense,
-                "monthly_premium": monthly_premium,
-                "monthly_total": monthly_expense + monthly_premium,
-                "month_appointment_count": month_appointment_count,
-                "current_month_label": month_start.strftime("%B %Y"),
-                "current_year": year,
-                "current_month": month,
-                "prev_year": prev_year,
-                "prev_month": prev_month,
-                "next_year": next_year,
-                "next_month": next_month,
-                "weeks": weeks,
+                "calendar": build_month_grid(db, year, month),
+                "summary": _month_summary(db, year, month),
                 "providers": providers,
                 "provider_addresses_by_id": provider_addresses_by_id,
                 "recent": recent,
+                "coverage_progress": policy_progress(db, date.today()),
+            },
+        )
+
+    @router.get("/calendar/grid", response_class=HTMLResponse)
+    def calendar_grid_partial(request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> Response:
+        year, month = _safe_month_year(request.query_params.get("year"), request.query_params.get("month"))
+        etag = calendar_etag(db, year, month)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CALENDAR_CACHE_CONTROL})
+        response = templates.TemplateResponse(
+            request,
+            "partials/calendar_grid.html",
+            {
+                "calendar": build_month_grid(db, year, month),
+                "summary": _month_summary(db, year, month),
+                "summary_oob": True,
             },
         )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CALENDAR_CACHE_CONTROL
+        return response
 
     @router.post("/appointments/add")
     def add_appointment(
@@ -193,6 +206,10 @@ def register_templates(templates: Jinja2Templates) -> None:
         facility_address: str = Form(""),
         prep_notes: str = Form(""),
         notes: str = Form(""),
+        repeat: str = Form(""),
+        repeat_interval: int | None = Form(None),
+        repeat_count: int | None = Form(None),
+        repeat_until: str = Form(""),
         user=Depends(current_user),
         db: Session = Depends(get_db),
     ):
@@ -202,10 +219,37 @@ def register_templates(templates: Jinja2Templates) -> None:
 
         try:
             scheduled_at = datetime.strptime(f"{appointment_date} {appointment_time}", "%Y-%m-%d %H:%M")
+            rule = _recurrence_rule(repeat, repeat_interval, repeat_count, repeat_until)
         except ValueError:
             return RedirectResponse("/", status_code=303)
 
         invoice_cents = _coerce_cents(estimated_invoice_usd, estimated_invoice_cents, provider.estimated_copay_cents)
+        if rule is not None:
+            series = AppointmentSeries(
+                provider_id=provider.id,
+                rrule=rule.to_text(),
+                dtstart=scheduled_at,
+                estimated_invoice_cents=invoice_cents,
+                location_name=location_name.strip() or None,
+                facility_address=facility_address.strip() or None,
+                prep_notes=prep_notes.strip() or None,
+                notes=notes.strip() or None,
+            )
+            db.add(series)
+            db.flush()
+            index_series(db, series)
+            bump_counter(db, SERIES_KEY)
+            write_audit_event(
+                db,
+                "create",
+                "appointment_series",
+                str(series.id),
+                user.id,
+                {"provider_id": provider.id, "dtstart": scheduled_at.isoformat(timespec="minutes"), "rrule": series.rrule},
+            )
+            db.commit()
+            return RedirectResponse(f"/?year={scheduled_at.year}&month={scheduled_at.month}", status_code=303)
+
         appointment = Appointment(
             provider_id=provider.id,
             scheduled_at=scheduled_at,
@@ -217,6 +261,8 @@ def register_templates(templates: Jinja2Templates) -> None:
         )
         db.add(appointment)
         db.flush()
+        apply_appointment_delta(db, scheduled_at, invoice_cents)
+        index_appointment(db, appointment)
         write_audit_event(
             db,
             "create",
@@ -230,7 +276,9 @@ def register_templates(templates: Jinja2Templates) -> None:
 
     @router.post("/appointments/update")
     def update_appointment(
-        appointment_id: int = Form(...),
+        appointment_id: int | None = Form(None),
+        series_id: int | None = Form(None),
+        occurrence_at: str = Form(""),
         provider_id: int = Form(...),
         appointment_date: str = Form(...),
         appointment_time: str = Form(...),
@@ -243,7 +291,7 @@ def register_templates(templates: Jinja2Templates) -> None:
         user=Depends(current_user),
         db: Session = Depends(get_db),
     ):
-        appointment = db.get(Appointment, appointment_id)
+        appointment = _resolve_appointment(db, appointment_id, series_id, occurrence_at)
         provider = db.get(InsuranceProvider, provider_id)
         if not appointment or not provider:
             return RedirectResponse("/", status_code=303)
@@ -253,7 +301,13 @@ def register_templates(templates: Jinja2Templates) -> None:
         except ValueError:
             return RedirectResponse("/", status_code=303)
 
+        if isinstance(appointment, AppointmentSeries):
+            appointment = materialize_occurrence(db, appointment, datetime.fromisoformat(occurrence_at))
+            bump_counter(db, SERIES_KEY)
+
         invoice_cents = _coerce_cents(estimated_invoice_usd, estimated_invoice_cents, provider.estimated_copay_cents)
+        apply_appointment_delta(db, appointment.scheduled_at, -appointment.estimated_invoice_cents, count=-1)
+        apply_appointment_delta(db, scheduled_at, invoice_cents)
         appointment.provider_id = provider.id
         appointment.scheduled_at = scheduled_at
         appointment.estimated_invoice_cents = invoice_cents
@@ -262,6 +316,7 @@ def register_templates(templates: Jinja2Templates) -> None:
         appointment.prep_notes = prep_notes.strip() or None
         appointment.notes = notes.strip() or None
         db.flush()
+        index_appointment(db, appointment)
         write_audit_event(
             db,
             "update",
@@ -275,15 +330,34 @@ def register_templates(templates: Jinja2Templates) -> None:
 
     @router.post("/appointments/delete")
     def delete_appointment(
-        appointment_id: int = Form(...),
+        appointment_id: int | None = Form(None),
+        series_id: int | None = Form(None),
+        occurrence_at: str = Form(""),
         user=Depends(current_user),
         db: Session = Depends(get_db),
     ):
-        appointment = db.get(Appointment, appointment_id)
+        appointment = _resolve_appointment(db, appointment_id, series_id, occurrence_at)
         if not appointment:
             return RedirectResponse("/", status_code=303)
+        if isinstance(appointment, AppointmentSeries):
+            occurrence = datetime.fromisoformat(occurrence_at)
+            skip_occurrence(db, appointment, occurrence)
+            bump_counter(db, SERIES_KEY)
+            write_audit_event(
+                db,
+                "delete",
+                "appointment_occurrence",
+                f"{appointment.id}:{occurrence.isoformat(timespec='minutes')}",
+                user.id,
+                {"series_id": appointment.id},
+            )
+            db.commit()
+            return RedirectResponse(f"/?year={occurrence.year}&month={occurrence.month}", status_code=303)
         scheduled_at = appointment.scheduled_at
+        deleted_id = appointment.id
+        apply_appointment_delta(db, scheduled_at, -appointment.estimated_invoice_cents, count=-1)
         db.delete(appointment)
+        remove_entry(db, KIND_APPOINTMENT, deleted_id)
         write_audit_event(
             db,
             "delete",
@@ -294,3 +368,22 @@ def register_templates(templates: Jinja2Templates) -> None:
         )
         db.commit()
         return RedirectResponse(f"/?year={scheduled_at.year}&month={scheduled_at.month}", status_code=303)
+
+    @router.post("/appointments/series/delete")
+    def delete_appointment_series(
+        series_id: int = Form(...),
+        user=Depends(current_user),
+        db: Session = Depends(get_db),
+    ):
+        series = db.get(AppointmentSeries, series_id)
+        if not series:
+            return RedirectResponse("/", status_code=303)
+        # Occurrences that were already edited keep their own rows.
+        db.execute(update(Appointment).where(Appointment.series_id == series.id).values(series_id=None))
+        db.execute(delete(AppointmentSeriesException).where(AppointmentSeriesException.series_id == series.id))
+        db.delete(series)
+        remove_entry(db, KIND_SERIES, series_id)
+        bump_counter(db, SERIES_KEY)
+        write_audit_event(db, "delete", "appointment_series", str(series_id), user.id, {"provider_id": series.provider_id})
+        db.commit()
+        return RedirectResponse("/", status_code=303)
@@ -1,29 +1,72 @@
 from __future__ import annotations
 
-from datetime import date, datetime, time
+import csv
+from collections.abc import AsyncIterator
+from datetime import date, datetime
 from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from pydantic import ValidationError
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import current_user, get_db
-from app.api.schemas import ExpenseCreate, ExpenseOut
+from app.api.routes_policies import text_jobs
+from app.api.schemas import (
+    BulkExpenseOut,
+    BulkExpenseResultOut,
+    ExpenseCreate,
+    ExpenseOut,
+    ProjectionComparisonOut,
+    ProjectionMonthOut,
+    ProjectionOut,
+    ReconcileRunOut,
+    ReconciliationMatchOut,
+)
 from app.core.audit import write_audit_event
 from app.core.config import get_settings
-from app.db.models import Appointment, Document, ExpenseLineItem, Policy
+from app.db.models import Document, ExpenseLineItem, ReconciliationMatch, ServiceEvent
 from app.domain.enums import DocumentType
 from app.domain.money import parse_money_to_cents
+from app.services.calendar.series_totals import series_totals
 from app.services.documents.store import DocumentStore
+from app.services.ledger.ingest import (
+    MAX_ROWS,
+    STATUS_CREATED,
+    STATUS_DUPLICATE,
+    STATUS_ERROR,
+    IngestResult,
+    NewExpense,
+    ingest_expenses,
+    iter_ndjson,
+    parse_json_array,
+)
+from app.services.ledger.pages import LedgerFilters, LedgerPage, ledger_page, list_categories
+from app.services.ledger.reconcile import STATUS_SUGGESTED, accept_match, reconcile, reject_match
+from app.services.providers.manual_import import (
+    DATE_FORMATS,
+    ColumnMapping,
+    ImportSummary,
+    PaymentCsv,
+    import_payment_rows,
+)
+from app.services.reporting.accumulators import apply_expense
+from app.services.reporting.projection import ProjectionEngine, YearProjection
+from app.services.reporting.rollups import apply_expense_delta, get_year_rollups, sum_rollups
 from app.services.sync.dedupe import make_idempotency_key
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 settings = get_settings()
 store = DocumentStore(settings.docs_dir)
+projections = ProjectionEngine()
 ALLOWED_MIME_TYPES = {"application/pdf"}
 ALLOWED_EXTENSIONS = {".pdf"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonlines"}
 
 
 def _has_file(upload: UploadFile | None) -> bool:
@@ -40,89 +83,397 @@ def _is_allowed_file(upload: UploadFile) -> bool:
     return True
 
 
+def _projection_out(projection: YearProjection) -> ProjectionOut:
+    return ProjectionOut(
+        year=projection.year,
+        deductible_cents=projection.plan.deductible_cents,
+        oop_max_cents=projection.plan.oop_max_cents,
+        coinsurance_bps=projection.plan.coinsurance_bps,
+        monthly_premium_cents=projection.plan.monthly_premium_cents,
+        gross_cents=projection.gross_cents,
+        patient_cents=projection.patient_cents,
+        premium_cents=projection.premium_cents,
+        total_cents=projection.total_cents,
+        months=[
+            ProjectionMonthOut(
+                month=m.month,
+                actual=m.actual,
+                expense_cents=m.expense_cents,
+                appointment_cents=m.appointment_cents,
+                patient_cents=m.patient_cents,
+                premium_cents=m.premium_cents,
+            )
+            for m in projection.months
+        ],
+    )
+
+
+@router.get("/projection", response_model=ProjectionComparisonOut)
+def projection_what_if(
+    year: int | None = Query(None, ge=1900, le=2100),
+    deductible_usd: str | None = Query(None),
+    oop_max_usd: str | None = Query(None),
+    coinsurance_pct: float | None = Query(None, ge=0, le=100),
+    monthly_premium_usd: str | None = Query(None),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> ProjectionComparisonOut:
+    """Compare this year's projected cost under the current plan with a what-if plan, e.g. an HDHP."""
+    changes: dict[str, int] = {}
+    try:
+        for field, raw in (
+            ("deductible_cents", deductible_usd),
+            ("oop_max_cents", oop_max_usd),
+            ("monthly_premium_cents", monthly_premium_usd),
+        ):
+            if raw is not None and raw.strip():
+                changes[field] = max(0, parse_money_to_cents(raw))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid amount") from exc
+    if coinsurance_pct is not None:
+        changes["coinsurance_bps"] = int(round(coinsurance_pct * 100))
+
+    today = date.today()
+    baseline, scenario = projections.what_if(db, year or today.year, today, **changes)
+    return ProjectionComparisonOut(
+        baseline=_projection_out(baseline),
+        scenario=_projection_out(scenario),
+        delta_cents=scenario.total_cents - baseline.total_cents,
+    )
+
+
+def _match_out(match: ReconciliationMatch) -> ReconciliationMatchOut:
+    return ReconciliationMatchOut(
+        id=match.id,
+        expense_id=match.expense_id,
+        payment_id=match.payment_id,
+        claim_id=match.claim_id,
+        eob_id=match.eob_id,
+        amount_cents=match.amount_cents,
+        confidence=match.confidence,
+        status=match.status,
+    )
+
+
+@router.post("/reconcile", response_model=ReconcileRunOut)
+def run_reconciliation(
+    full: bool = Query(False),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> ReconcileRunOut:
+    """Suggest payment-to-claim matches for rows added since the last run (`full=true` rescans everything)."""
+    run = reconcile(db, full=full)
+    db.commit()
+    return ReconcileRunOut(run_id=run.id, full=run.full, suggestions=run.suggestions)
+
+
+@router.get("/reconcile/matches", response_model=list[ReconciliationMatchOut])
+def list_reconciliation_matches(
+    status: str = Query(STATUS_SUGGESTED),
+    limit: int = Query(100, ge=1, le=500),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> list[ReconciliationMatchOut]:
+    matches = db.scalars(
+        select(ReconciliationMatch)
+        .where(ReconciliationMatch.status == status)
+        .order_by(ReconciliationMatch.confidence.desc(), ReconciliationMatch.id.asc())
+        .limit(limit)
+    ).all()
+    return [_match_out(match) for match in matches]
+
+
+@router.post("/reconcile/matches/{match_id}/{decision}", response_model=ReconciliationMatchOut)
+def decide_reconciliation_match(
+    match_id: int,
+    decision: str,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> ReconciliationMatchOut:
+    if decision not in {"accept", "reject"}:
+        raise HTTPException(status_code=404, detail="Unknown decision")
+    match = db.get(ReconciliationMatch, match_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+    if match.status != STATUS_SUGGESTED:
+        raise HTTPException(status_code=409, detail="Match already decided")
+    try:
+        if decision == "accept":
+            accept_match(db, match)
+        else:
+            reject_match(db, match)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    write_audit_event(
+        db,
+        decision,
+        "reconciliation_match",
+        str(match.id),
+        user.id,
+        {"expense_id": match.expense_id, "claim_id": match.claim_id},
+    )
+    db.commit()
+    return _match_out(match)
+
+
+async def _request_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _validate_bulk_record(index: int, record: Any, rows: list[tuple[int, NewExpense]], errors: list[IngestResult]) -> None:
+    if index >= MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_ROWS} expenses per request")
+    if isinstance(record, Exception):
+        errors.append(IngestResult(index, STATUS_ERROR, error="Invalid JSON"))
+        return
+    try:
+        payload = ExpenseCreate.model_validate(record)
+    except ValidationError as exc:
+        first = exc.errors()[0]
+        field = ".".join(str(part) for part in first["loc"]) or "row"
+        errors.append(IngestResult(index, STATUS_ERROR, error=f"{field}: {first['msg']}"))
+        return
+    rows.append((index, NewExpense(**payload.model_dump())))
+
+
+@router.post("/api/bulk", response_model=BulkExpenseOut)
+async def add_expenses_bulk(request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> BulkExpenseOut:
+    """Create expenses from a JSON array or an NDJSON stream (one expense per line).
+
+    Rows are validated as they arrive and written in chunked transactions; every input row gets a
+    result, and rows already on file (same idempotency key) are reported as duplicates.
+    """
+    rows: list[tuple[int, NewExpense]] = []
+    errors: list[IngestResult] = []
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        index = 0
+        async for line in _request_lines(request):
+            for record in iter_ndjson([line]):
+                _validate_bulk_record(index, record, rows, errors)
+                index += 1
+    else:
+        try:
+            records = parse_json_array(await request.body())
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body") from exc
+        for index, record in enumerate(records):
+            _validate_bulk_record(index, record, rows, errors)
+
+    results = errors + await run_in_threadpool(ingest_expenses, db, rows, user.id)
+    results.sort(key=lambda result: result.index)
+    statuses = [result.status for result in results]
+    return BulkExpenseOut(
+        created=statuses.count(STATUS_CREATED),
+        duplicates=statuses.count(STATUS_DUPLICATE),
+        errors=statuses.count(STATUS_ERROR),
+        results=[
+            BulkExpenseResultOut(index=result.index, status=result.status, id=result.id, error=result.error)
+            for result in results
+        ],
+    )
+
+
+def _parse_date(raw: str | None) -> date | None:
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        return None
+
+
+def _ledger_filters(request: Request) -> LedgerFilters:
+    params = request.query_params
+    return LedgerFilters(
+        category=(params.get("category") or "").strip() or None,
+        date_from=_parse_date(params.get("date_from")),
+        date_to=_parse_date(params.get("date_to")),
+    )
+
+
+def _ledger_context(db: Session, filters: LedgerFilters, cursor: str | None) -> dict[str, object]:
+    try:
+        page = ledger_page(db, filters, cursor)
+    except ValueError:
+        page = LedgerPage()
+    next_url = None
+    if page.next_cursor:
+        next_url = "/expenses/rows?" + urlencode({**filters.query_params(), "cursor": page.next_cursor})
+    return {
+        "expense_rows": [{"expense": expense, "receipt": receipt} for expense, receipt in page.rows],
+        "next_url": next_url,
+    }
+
+
+def _chosen_mapping(date_column: str, amount_column: str, description_column: str) -> ColumnMapping | None:
+    if not (date_column and amount_column):
+        return None
+    return ColumnMapping(date_column, amount_column, description_column or None)
+
+
+def _open_payment_csv(upload: UploadFile, category: str) -> PaymentCsv:
+    return PaymentCsv(upload.file, category=category.strip() or "medical")
+
+
+def _payment_import_preview(
+    upload: UploadFile,
+    category: str,
+    mapping: ColumnMapping | None,
+    date_format: str | None,
+) -> dict[str, object]:
+    context: dict[str, object] = {
+        "date_formats": DATE_FORMATS,
+        "header": [],
+        "mapping": None,
+        "date_format": None,
+        "rows": [],
+        "error": None,
+    }
+    try:
+        csv_file = _open_payment_csv(upload, category)
+        context["header"] = csv_file.header
+        chosen = {mapping.date, mapping.amount, mapping.description or mapping.date} if mapping is not None else set()
+        if not chosen <= set(csv_file.header):
+            # Choices left over from a previously selected file; start from detection again.
+            mapping, date_format = None, None
+        csv_file.configure(mapping, date_format)
+        context.update(mapping=csv_file.mapping, date_format=csv_file.date_format, rows=csv_file.preview())
+    except (ValueError, csv.Error) as exc:
+        context["error"] = str(exc)
+    return context
+
+
+def _run_payment_import(
+    db: Session,
+    upload: UploadFile,
+    category: str,
+    mapping: ColumnMapping | None,
+    date_format: str | None,
+    user_id: int,
+) -> ImportSummary:
+    csv_file = _open_payment_csv(upload, category)
+    csv_file.configure(mapping, date_format)
+    return import_payment_rows(db, csv_file, user_id)
+
+
 def register_templates(templates: Jinja2Templates) -> None:
     @router.get("", response_class=HTMLResponse)
     def list_expenses(request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> HTMLResponse:
         today = date.today()
-        month_start = today.replace(day=1)
-        year_start = date(today.year, 1, 1)
-        next_year_start = date(today.year + 1, 1, 1)
+        next_month_start = date(today.year + 1, 1, 1) if today.month == 12 else date(today.year, today.month + 1, 1)
         months_elapsed = max(1, today.month)
 
-        expenses = db.scalars(select(ExpenseLineItem).order_by(ExpenseLineItem.id.desc()).limit(200)).all()
-        expense_ids = [expense.id for expense in expenses]
-        documents = (
-            db.scalars(
-                select(Document)
-                .where(Document.expense_id.in_(expense_ids))
-                .order_by(Document.created_at.desc())
-            ).all()
-            if expense_ids
-            else []
-        )
-        receipt_by_expense_id: dict[int, Document] = {}
-        for doc in documents:
-            if doc.expense_id is None or doc.expense_id in receipt_by_expense_id:
-                continue
-            receipt_by_expense_id[doc.expense_id] = doc
+        filters = _ledger_filters(request)
+        ledger = _ledger_context(db, filters, None)
 
-        monthly_expenses_so_far = db.scalar(
+        year_rollups = get_year_rollups(db, today.year)
+        current_month = year_rollups.get(today.month)
+        # Rollups cover whole months; only future-dated rows in the current month need backing out.
+        later_this_month = db.scalar(
             select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
-                ExpenseLineItem.incurred_at >= month_start,
-                ExpenseLineItem.incurred_at <= today,
+                ExpenseLineItem.incurred_at > today,
+                ExpenseLineItem.incurred_at < next_month_start,
             )
         ) or 0
-        yearly_expenses_so_far = db.scalar(
-            select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
-                ExpenseLineItem.incurred_at >= year_start,
-                ExpenseLineItem.incurred_at <= today,
-            )
-        ) or 0
-        monthly_premium_cents = db.scalar(select(func.coalesce(func.sum(Policy.monthly_premium_cents), 0))) or 0
-        appointments_ytd = db.scalar(
-            select(func.count())
-            .select_from(Appointment)
-            .where(
-                Appointment.scheduled_at >= datetime.combine(year_start, time.min),
-                Appointment.scheduled_at < datetime.combine(next_year_start, time.min),
-            )
-        ) or 0
-        appointment_invoice_ytd = db.scalar(
-            select(func.coalesce(func.sum(Appointment.estimated_invoice_cents), 0)).where(
-                Appointment.scheduled_at >= datetime.combine(year_start, time.min),
-                Appointment.scheduled_at < datetime.combine(next_year_start, time.min),
-            )
-        ) or 0
-
+        monthly_expenses_so_far = (current_month.expense_total_cents if current_month else 0) - later_this_month
+        yearly_expenses_so_far = monthly_expenses_so_far + sum_rollups(
+            totals for month, totals in year_rollups.items() if month < today.month
+        ).expense_total_cents
+        year_totals = sum_rollups(year_rollups.values())
+        # Rollups only count stored rows; add the year's virtual series occurrences, as the dashboard does.
+        virtual_months = series_totals.year(db, today.year)
+        appointments_ytd = year_totals.appointment_count + sum(count for count, _ in virtual_months)
+        appointment_invoice_ytd = year_totals.appointment_invoice_cents + sum(cents for _, cents in virtual_months)
         avg_monthly_expenses_cents = int(round(yearly_expenses_so_far / months_elapsed))
-        avg_monthly_appointments = appointments_ytd / months_elapsed
         avg_invoice_per_appointment_cents = int(round(appointment_invoice_ytd / appointments_ytd)) if appointments_ytd else 0
-        projected_appointment_cost_cents = int(round(avg_monthly_appointments * avg_invoice_per_appointment_cents * 12))
-        estimated_total_yearly_cents = int(round(monthly_premium_cents * 12 + avg_monthly_expenses_cents * 12 + projected_appointment_cost_cents))
+        projection = projections.project(db, today.year, today)
 
-        expense_rows = [
-            {
-                "expense": expense,
-                "receipt": receipt_by_expense_id.get(expense.id),
-            }
-            for expense in expenses
-        ]
         return templates.TemplateResponse(
             "expenses.html",
             {
                 "request": request,
-                "expense_rows": expense_rows,
+                **ledger,
+                "filters": filters,
+                "categories": list_categories(db),
                 "monthly_expenses_so_far": monthly_expenses_so_far,
                 "yearly_expenses_so_far": yearly_expenses_so_far,
-                "estimated_total_yearly_cents": estimated_total_yearly_cents,
-                "monthly_premium_cents": monthly_premium_cents,
+                "estimated_total_yearly_cents": projection.total_cents,
+                "monthly_premium_cents": projection.plan.monthly_premium_cents,
                 "avg_monthly_expenses_cents": avg_monthly_expenses_cents,
                 "appointments_ytd": appointments_ytd,
                 "avg_invoice_per_appointment_cents": avg_invoice_per_appointment_cents,
                 "upload_error": request.query_params.get("upload"),
+                "import_error": request.query_params.get("import"),
+                "import_result": {
+                    key: request.query_params[key]
+                    for key in ("imported", "duplicates", "import_errors")
+                    if key in request.query_params
+                },
             },
         )
 
+    @router.get("/rows", response_class=HTMLResponse)
+    def expense_rows(request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> HTMLResponse:
+        context = _ledger_context(db, _ledger_filters(request), request.query_params.get("cursor"))
+        return templates.TemplateResponse(request, "partials/expense_rows.html", context)
+
+    @router.post("/import/preview", response_class=HTMLResponse)
+    async def preview_payment_import(
+        request: Request,
+        csv_file: UploadFile = File(...),
+        category: str = Form("medical"),
+        date_column: str = Form(""),
+        amount_column: str = Form(""),
+        description_column: str = Form(""),
+        date_format: str = Form(""),
+        user=Depends(current_user),
+    ) -> HTMLResponse:
+        context = await run_in_threadpool(
+            _payment_import_preview,
+            csv_file,
+            category,
+            _chosen_mapping(date_column, amount_column, description_column),
+            date_format if date_format in DATE_FORMATS else None,
+        )
+        return templates.TemplateResponse(request, "partials/import_preview.html", context)
+
+    @router.post("/import")
+    async def import_payments(
+        csv_file: UploadFile = File(...),
+        category: str = Form("medical"),
+        date_column: str = Form(""),
+        amount_column: str = Form(""),
+        description_column: str = Form(""),
+        date_format: str = Form(""),
+        user=Depends(current_user),
+        db: Session = Depends(get_db),
+    ):
+        try:
+            summary = await run_in_threadpool(
+                _run_payment_import,
+                db,
+                csv_file,
+                category,
+                _chosen_mapping(date_column, amount_column, description_column),
+                date_format if date_format in DATE_FORMATS else None,
+                user.id,
+            )
+        except (ValueError, csv.Error):
+            db.rollback()
+            return RedirectResponse("/expenses?import=invalid", status_code=303)
+        query = urlencode(
+            {"imported": summary.created, "duplicates": summary.duplicates, "import_errors": summary.errors}
+        )
+        return RedirectResponse(f"/expenses?{query}", status_code=303)
+
     @router.post("/add")
     async def add_expense(
         amount_usd: str = Form(""),
@@ -155,8 +506,10 @@ def register_templates(templates: Jinja2Templates) -> None:
             )
             db.add(expense)
             db.flush()
+            apply_expense_delta(db, expense.incurred_at, cents)
             write_audit_event(db, "create", "expense", idem, user.id, {"amount_cents": cents})
 
+        doc: Document | None = None
         if _has_file(receipt_file) and receipt_file is not None:
             payload = await receipt_file.read()
             safe_name = receipt_file.filename or "expense-receipt.pdf"
@@ -178,6 +531,8 @@ def register_templates(templates: Jinja2Templates) -> None:
                 mime_type=receipt_file.content_type or "application/pdf",
             )
             db.add(doc)
+            db.flush()
+            text_jobs.create_job(db, doc.id)
             write_audit_event(
                 db,
                 "create",
@@ -188,6 +543,8 @@ def register_templates(templates: Jinja2Templates) -> None:
             )
 
         db.commit()
+        if doc is not None:
+            text_jobs.submit(doc.id)
         return RedirectResponse("/expenses", status_code=303)
 
     @router.post("/api", response_model=ExpenseOut)
@@ -195,13 +552,18 @@ def register_templates(templates: Jinja2Templates) -> None:
         idem = make_idempotency_key(payload.incurred_at.isoformat(), str(payload.amount_cents), payload.category, payload.memo)
         expense = db.scalar(select(ExpenseLineItem).where(ExpenseLineItem.idempotency_key == idem))
         if not expense:
+            if payload.service_event_id is not None and db.get(ServiceEvent, payload.service_event_id) is None:
+                raise HTTPException(status_code=400, detail="Unknown service event")
             expense = ExpenseLineItem(
                 amount_cents=payload.amount_cents,
                 incurred_at=payload.incurred_at,
                 category=payload.category,
                 idempotency_key=idem,
+                service_event_id=payload.service_event_id,
             )
             db.add(expense)
+            apply_expense_delta(db, payload.incurred_at, payload.amount_cents)
+            apply_expense(db, expense)
             write_audit_event(db, "create", "expense", idem, user.id, {"amount_cents": payload.amount_cents})
             db.commit()
             db.refresh(expense)
@@ -1,84 +1,151 @@
 from __future__ import annotations
 
 import io
-import json
+import re
+from collections.abc import Iterator
 from pathlib import Path
-from zipfile import ZIP_DEFLATED, ZipFile
 
-from fastapi import APIRouter, Depends, Form
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.deps import current_user, get_db
+from app.api.schemas import ExportJobOut
 from app.core.audit import write_audit_event
 from app.core.config import get_settings
-from app.db.models import Appointment, Document, ExpenseLineItem, InsuranceProvider, Policy
+from app.db.models import ExportJob
+from app.services.exports.jobs import (
+    EXPORT_KINDS,
+    ExportJobQueue,
+    collect_archive_payload,
+    write_archive,
+)
 
 router = APIRouter(prefix="/exports", tags=["exports"])
 settings = get_settings()
+export_jobs = ExportJobQueue(settings)
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_BYTES = 64 * 1024
 
 
-def _stable_json(data: object) -> bytes:
-    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+def _job_out(job: ExportJob) -> ExportJobOut:
+    return ExportJobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        size_bytes=job.size_bytes,
+        sha256=job.artifact_sha256,
+        error=job.error,
+        expires_at=job.expires_at,
+        download_url=f"/exports/jobs/{job.id}/download" if job.status == "done" else None,
+    )
 
 
-@router.get("/archive.zip")
-def export_archive(user=Depends(current_user), db: Session = Depends(get_db)) -> Response:
-    providers = db.scalars(select(InsuranceProvider).order_by(InsuranceProvider.id.asc())).all()
-    policies = db.scalars(select(Policy).order_by(Policy.id.asc())).all()
-    appointments = db.scalars(select(Appointment).order_by(Appointment.id.asc())).all()
-    expenses = db.scalars(select(ExpenseLineItem).order_by(ExpenseLineItem.id.asc())).all()
-    docs = db.scalars(select(Document).order_by(Document.id.asc())).all()
-
-    payload = {
-        "providers": [
-            {
-                "id": p.id,
-                "name": p.name,
-                "specialty": p.specialty,
-                "selector_color": p.selector_color,
-                "estimated_copay_cents": p.estimated_copay_cents,
-                "adapter_type": p.adapter_type.value,
-            }
-            for p in providers
-        ],
-        "policies": [
-            {
-                "id": p.id,
-                "provider_id": p.provider_id,
-                "plan_type": p.plan_type.value,
-                "monthly_premium_cents": p.monthly_premium_cents,
-            }
-            for p in policies
-        ],
-        "expenses": [{"id": e.id, "amount_cents": e.amount_cents, "incurred_at": e.incurred_at.isoformat()} for e in expenses],
-        "appointments": [
-            {
-                "id": a.id,
-                "provider_id": a.provider_id,
-                "scheduled_at": a.scheduled_at.isoformat(timespec="minutes"),
-                "estimated_invoice_cents": a.estimated_invoice_cents,
-            }
-            for a in appointments
-        ],
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Return an inclusive (start, end) for a single byte range, or None if unsatisfiable."""
+    match = RANGE_RE.fullmatch(header.strip())
+    if not match or size == 0:
+        return None
+    start_raw, end_raw = match.groups()
+    if not start_raw:
+        if not end_raw:
+            return None
+        suffix = int(end_raw)
+        if suffix == 0:
+            return None
+        return max(0, size - suffix), size - 1
+    start = int(start_raw)
+    end = int(end_raw) if end_raw else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_file(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _artifact_response(request: Request, path: Path, etag: str, filename: str) -> Response:
+    size = path.stat().st_size
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename={filename}",
     }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        length = end - start + 1
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(length)})
+        return StreamingResponse(_iter_file(path, start, length), status_code=206, media_type="application/zip", headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_iter_file(path, 0, size), media_type="application/zip", headers=headers)
 
+
+@router.get("/archive.zip")
+def export_archive(user=Depends(current_user), db: Session = Depends(get_db)) -> Response:
+    payload, docs = collect_archive_payload(db)
     buffer = io.BytesIO()
-    with ZipFile(buffer, "w", compression=ZIP_DEFLATED) as zf:
-        zf.writestr("data.json", _stable_json(payload))
-        for doc in docs:
-            path = settings.docs_dir / doc.storage_path
-            if path.exists():
-                zf.write(path, arcname=str(Path("documents") / f"{doc.id}-{doc.filename}.bin"))
+    write_archive(buffer, payload, docs, settings.docs_dir)
 
     write_audit_event(db, "export", "archive", "zip", user.id, {"items": len(docs)})
     db.commit()
     return Response(buffer.getvalue(), media_type="application/zip", headers={"Content-Disposition": "attachment; filename=cb-archive.zip"})
 
 
+@router.post("/jobs", response_model=ExportJobOut, status_code=202)
+def create_export_job(kind: str = Form("archive"), user=Depends(current_user), db: Session = Depends(get_db)) -> ExportJobOut:
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=400, detail="Unknown export kind")
+    job = export_jobs.create_job(db, user.id, kind)
+    write_audit_event(db, "create", "export_job", str(job.id), user.id, {"kind": kind})
+    db.commit()
+    export_jobs.submit(job.id)
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobOut)
+def export_job_status(job_id: int, user=Depends(current_user), db: Session = Depends(get_db)) -> ExportJobOut:
+    job = db.get(ExportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(job_id: int, request: Request, user=Depends(current_user), db: Session = Depends(get_db)) -> Response:
+    job = db.get(ExportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    path = export_jobs.artifact_path(job)
+    if job.status != "done" or path is None or not path.exists() or not job.artifact_sha256:
+        raise HTTPException(status_code=409 if job.status in {"queued", "running"} else 410, detail="Export not available")
+
+    if "range" not in request.headers and request.headers.get("if-none-match") is None:
+        write_audit_event(db, "export", "archive", f"job:{job.id}", user.id, {"size_bytes": job.size_bytes})
+        db.commit()
+    return _artifact_response(request, path, f'"{job.artifact_sha256}"', "cb-archive.zip")
+
+
 @router.post("/reimbursement.pdf")
 def reimbursement_packet(service_ids: str = Form(""), user=Depends(current_user), db: Session = Depends(get_db)) -> Response:
     selected = [x for x in service_ids.split(",") if x.strip()]
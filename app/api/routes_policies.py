@@ -16,12 +16,15 @@ from app.core.crypto import FieldEncryptor
 from app.db.models import Document, InsuranceProvider, Policy, PolicyCoverageTerm
 from app.domain.enums import DocumentType, NetworkTier, PlanType
 from app.domain.money import parse_money_to_cents
+from app.services.calendar.versions import POLICIES_KEY, bump_counter
 from app.services.documents.store import DocumentStore
+from app.services.documents.text_jobs import DocumentTextQueue
 
 router = APIRouter(prefix="/policies", tags=["policies"])
 encryptor = FieldEncryptor()
 settings = get_settings()
 store = DocumentStore(settings.docs_dir)
+text_jobs = DocumentTextQueue(settings)
 ALLOWED_MIME_TYPES = {"application/pdf", "image/jpeg", "image/png"}
 ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png"}
 DOCUMENT_TYPE_VALUES = {item.value for item in DocumentType}
@@ -104,6 +107,7 @@ def register_templates(templates: Jinja2Templates) -> None:
                 oop_max_cents=policy.oop_max_cents,
             )
         )
+        bump_counter(db, POLICIES_KEY)
         write_audit_event(db, "create", "policy", str(policy.id), user.id, {"provider_id": provider_id})
         db.commit()
         return RedirectResponse("/policies", status_code=303)
@@ -140,6 +144,8 @@ def register_templates(templates: Jinja2Templates) -> None:
             mime_type=file.content_type or "application/octet-stream",
         )
         db.add(doc)
+        db.flush()
+        text_jobs.create_job(db, doc.id)
         write_audit_event(
             db,
             "create",
@@ -149,6 +155,7 @@ def register_templates(templates: Jinja2Templates) -> None:
             {"doc_type": doc_type, "policy_id": linked_policy_id},
         )
         db.commit()
+        text_jobs.submit(doc.id)
         return RedirectResponse("/policies", status_code=303)
 
     @router.get("/documents/{doc_id}/view")
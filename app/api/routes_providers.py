@@ -11,9 +11,22 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import current_user, get_db
 from app.core.audit import write_audit_event
-from app.db.models import Appointment, Document, InsuranceProvider, Policy, PolicyCoverageTerm, ProviderAddress
+from app.db.models import (
+    Appointment,
+    AppointmentSeries,
+    AppointmentSeriesException,
+    Document,
+    InsuranceProvider,
+    Policy,
+    PolicyCoverageTerm,
+    ProviderAddress,
+)
 from app.domain.money import parse_money_to_cents
 from app.domain.enums import ProviderAdapterType
+from app.services.calendar.versions import POLICIES_KEY, PROVIDERS_KEY, SERIES_KEY, bump_counter
+from app.services.reporting.rollups import back_out_provider_appointments
+from app.services.search.entities import index_provider
+from app.services.search.index import KIND_APPOINTMENT, KIND_PROVIDER, KIND_SERIES, remove_entries, remove_entry
 
 router = APIRouter(prefix="/providers", tags=["providers"])
 COLOR_RE = re.compile(r"^#[0-9A-Fa-f]{6}$")
@@ -104,6 +117,7 @@ def register_templates(templates: Jinja2Templates) -> None:
             db.flush()
             for address_text in address_values:
                 db.add(ProviderAddress(provider_id=provider.id, label=None, address_text=address_text))
+            index_provider(db, provider)
             write_audit_event(
                 db,
                 "create",
@@ -155,6 +169,8 @@ def register_templates(templates: Jinja2Templates) -> None:
         db.execute(delete(ProviderAddress).where(ProviderAddress.provider_id == provider.id))
         for address_text in address_values:
             db.add(ProviderAddress(provider_id=provider.id, label=None, address_text=address_text))
+        index_provider(db, provider)
+        bump_counter(db, PROVIDERS_KEY)
         write_audit_event(
             db,
             "update",
@@ -190,10 +206,25 @@ def register_templates(templates: Jinja2Templates) -> None:
             db.execute(delete(PolicyCoverageTerm).where(PolicyCoverageTerm.policy_id.in_(policy_ids)))
             db.execute(delete(Policy).where(Policy.id.in_(policy_ids)))
 
-        deleted_appointments = db.execute(delete(Appointment).where(Appointment.provider_id == provider.id)).rowcount or 0
+        series_ids = db.scalars(select(AppointmentSeries.id).where(AppointmentSeries.provider_id == provider.id)).all()
+        if series_ids:
+            db.execute(update(Appointment).where(Appointment.series_id.in_(series_ids)).values(series_id=None))
+            db.execute(delete(AppointmentSeriesException).where(AppointmentSeriesException.series_id.in_(series_ids)))
+            db.execute(delete(AppointmentSeries).where(AppointmentSeries.id.in_(series_ids)))
+            remove_entries(db, KIND_SERIES, series_ids)
+            bump_counter(db, SERIES_KEY)
+
+        back_out_provider_appointments(db, provider.id)
+        appointment_ids = db.scalars(delete(Appointment).where(Appointment.provider_id == provider.id).returning(Appointment.id)).all()
+        remove_entries(db, KIND_APPOINTMENT, appointment_ids)
+        deleted_appointments = len(appointment_ids)
         deleted_addresses = db.execute(delete(ProviderAddress).where(ProviderAddress.provider_id == provider.id)).rowcount or 0
         provider_name = provider.name
         db.delete(provider)
+        remove_entry(db, KIND_PROVIDER, provider_id)
+        bump_counter(db, PROVIDERS_KEY)
+        if policy_ids:
+            bump_counter(db, POLICIES_KEY)
         write_audit_event(
             db,
             "delete",
@@ -204,6 +235,7 @@ def register_templates(templates: Jinja2Templates) -> None:
                 "name": provider_name,
                 "deleted_policy_count": len(policy_ids),
                 "deleted_appointment_count": deleted_appointments,
+                "deleted_series_count": len(series_ids),
                 "deleted_address_count": deleted_addresses,
             },
         )
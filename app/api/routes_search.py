@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import current_user, get_db
+from app.api.schemas import SearchOut, SearchResultOut
+from app.services.search.entities import MAX_RESULTS, search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchOut)
+def search_vault(
+    q: str = Query("", max_length=256),
+    limit: int = Query(20, ge=1, le=MAX_RESULTS),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+) -> SearchOut:
+    """Documents, appointments and providers containing every word of `q`, best match first."""
+    hits = search(db, q, limit=limit)
+    return SearchOut(query=q, results=[SearchResultOut(**asdict(hit)) for hit in hits])
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import UTC, datetime
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -10,6 +12,8 @@ from app.core.audit import write_audit_event
 from app.core.backups import BackupManager
 from app.core.config import get_settings
 from app.core.integrity import verify_audit_chain, verify_document_hashes
+from app.core.session_cache import session_cache
+from app.core.session_reaper import session_counts, session_reaper
 
 router = APIRouter(prefix="/health", tags=["health"])
 settings = get_settings()
@@ -29,6 +33,9 @@ def register_templates(templates: Jinja2Templates) -> None:
                 "doc_failures": doc_failures,
                 "audit_failures": audit_failures,
                 "backup_count": len(backups),
+                "session_cache": session_cache.stats(),
+                "sessions": session_counts(db, datetime.now(UTC).replace(tzinfo=None)),
+                "session_reap": session_reaper.last,
             },
         )
 
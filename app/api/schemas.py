@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
@@ -10,6 +10,7 @@ class ExpenseCreate(BaseModel):
     incurred_at: date
     category: str = "medical"
     memo: str = ""
+    service_event_id: int | None = None
 
 
 class ExpenseOut(BaseModel):
@@ -26,3 +27,88 @@ class ProviderOut(BaseModel):
     selector_color: str
     estimated_copay_cents: int = 0
     adapter_type: str
+
+
+class ExportJobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    size_bytes: int = 0
+    sha256: str | None = None
+    error: str | None = None
+    expires_at: datetime | None = None
+    download_url: str | None = None
+
+
+class ProjectionMonthOut(BaseModel):
+    month: int
+    actual: bool
+    expense_cents: int
+    appointment_cents: int
+    patient_cents: int
+    premium_cents: int
+
+
+class ProjectionOut(BaseModel):
+    year: int
+    deductible_cents: int
+    oop_max_cents: int
+    coinsurance_bps: int
+    monthly_premium_cents: int
+    gross_cents: int
+    patient_cents: int
+    premium_cents: int
+    total_cents: int
+    months: list[ProjectionMonthOut]
+
+
+class ProjectionComparisonOut(BaseModel):
+    baseline: ProjectionOut
+    scenario: ProjectionOut
+    delta_cents: int
+
+
+class BulkExpenseResultOut(BaseModel):
+    index: int
+    status: str
+    id: int | None = None
+    error: str | None = None
+
+
+class BulkExpenseOut(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    results: list[BulkExpenseResultOut]
+
+
+class ReconcileRunOut(BaseModel):
+    run_id: int
+    full: bool
+    suggestions: int
+
+
+class ReconciliationMatchOut(BaseModel):
+    id: int
+    expense_id: int
+    payment_id: int | None
+    claim_id: int
+    eob_id: int | None
+    amount_cents: int
+    confidence: float
+    status: str
+
+
+class SearchResultOut(BaseModel):
+    kind: str
+    id: int
+    title: str
+    snippet: str
+    url: str
+    rank: float
+    when: datetime | None
+
+
+class SearchOut(BaseModel):
+    query: str
+    results: list[SearchResultOut]
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import hashlib
 import json
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db.models import AuditEvent
@@ -20,6 +21,13 @@ def compute_event_hash(prev_hash: str, event_without_hash: dict[str, Any]) -> st
     return hashlib.sha256((prev_hash + canonical).encode("utf-8")).hexdigest()
 
 
+def _last_event_hash(db: Session) -> str:
+    pending = [obj for obj in db.new if isinstance(obj, AuditEvent)]
+    if pending:
+        return pending[-1].event_hash
+    return db.scalar(select(AuditEvent.event_hash).order_by(AuditEvent.id.desc()).limit(1)) or "0" * 64
+
+
 def write_audit_event(
     db: Session,
     event_type: str,
@@ -28,11 +36,7 @@ def write_audit_event(
     actor_user_id: int | None,
     payload: dict[str, Any],
 ) -> AuditEvent:
-    pending = [obj for obj in db.new if isinstance(obj, AuditEvent)]
-    if pending:
-        prev_hash = pending[-1].event_hash
-    else:
-        prev_hash = db.scalar(select(AuditEvent.event_hash).order_by(AuditEvent.id.desc()).limit(1)) or "0" * 64
+    prev_hash = _last_event_hash(db)
     created_at = datetime.now(UTC).replace(tzinfo=None)
     event_without_hash = {
         "timestamp": created_at.isoformat(),
@@ -55,3 +59,46 @@ def write_audit_event(
     )
     db.add(event)
     return event
+
+
+def write_audit_events(
+    db: Session,
+    event_type: str,
+    entity_type: str,
+    actor_user_id: int | None,
+    events: Iterable[tuple[str, dict[str, Any]]],
+) -> int:
+    """Chain a batch of (entity_id, payload) events and insert them in one executemany.
+
+    Looks up the previous hash once instead of per event; returns the number written.
+    """
+    db.flush()
+    prev_hash = _last_event_hash(db)
+    created_at = datetime.now(UTC).replace(tzinfo=None)
+    rows: list[dict[str, Any]] = []
+    for entity_id, payload in events:
+        event_without_hash = {
+            "timestamp": created_at.isoformat(),
+            "event_type": event_type,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "actor_user_id": actor_user_id,
+            "payload": payload,
+        }
+        event_hash = compute_event_hash(prev_hash, event_without_hash)
+        rows.append(
+            {
+                "created_at": created_at,
+                "actor_user_id": actor_user_id,
+                "event_type": event_type,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "payload_json": canonical_json(payload),
+                "prev_hash": prev_hash,
+                "event_hash": event_hash,
+            }
+        )
+        prev_hash = event_hash
+    if rows:
+        db.connection().execute(insert(AuditEvent), rows)
+    return len(rows)
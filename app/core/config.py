@@ -19,7 +19,28 @@ class Settings:
     backup_dir_name: str = "backups"
     docs_dir_name: str = "documents"
     config_dir_name: str = "config"
+    exports_dir_name: str = "exports"
+    imports_dir_name: str = "imports"
+    export_ttl_hours: int = field(default_factory=lambda: int(os.getenv("CB_EXPORT_TTL_HOURS", "24")))
     environment: str = field(default_factory=lambda: os.getenv("CB_ENV", "dev"))
+    # Base URL of an HTTP insurer API (e.g. the local mock insurer); empty disables the adapter.
+    insurer_api_url: str = field(default_factory=lambda: os.getenv("CB_INSURER_API_URL", ""))
+    insurer_api_timeout_seconds: float = field(default_factory=lambda: float(os.getenv("CB_INSURER_API_TIMEOUT", "10")))
+    # How long a validated login session is trusted without a database check; 0 disables the cache.
+    session_cache_ttl_seconds: float = field(default_factory=lambda: float(os.getenv("CB_SESSION_CACHE_TTL_SECONDS", "30")))
+    # Oldest logins beyond this many unexpired sessions per user are removed by the session reaper.
+    max_sessions_per_user: int = field(default_factory=lambda: int(os.getenv("CB_MAX_SESSIONS_PER_USER", "10")))
+    # Concurrent Argon2 operations (64 MiB each) and how many more may wait before logins are refused.
+    hashing_workers: int = field(default_factory=lambda: int(os.getenv("CB_HASHING_WORKERS", "2")))
+    hashing_queue_limit: int = field(default_factory=lambda: int(os.getenv("CB_HASHING_QUEUE_LIMIT", "8")))
+    # Failed logins allowed per client address within the window before it is locked out.
+    login_max_failures: int = field(default_factory=lambda: int(os.getenv("CB_LOGIN_MAX_FAILURES", "5")))
+    login_failure_window_seconds: float = field(default_factory=lambda: float(os.getenv("CB_LOGIN_FAILURE_WINDOW_SECONDS", "300")))
+    # Per-connection SQLite tuning: minimal, balanced or performance (see app/db/base.py).
+    sqlite_profile: str = field(default_factory=lambda: os.getenv("CB_SQLITE_PROFILE", "balanced"))
+    # Pooled connections; matches the 40 worker threads sync routes run on.
+    db_pool_size: int = field(default_factory=lambda: int(os.getenv("CB_DB_POOL_SIZE", "40")))
+    insurer_api_page_size: int = field(default_factory=lambda: int(os.getenv("CB_INSURER_API_PAGE_SIZE", "500")))
 
     @property
     def db_path(self) -> Path:
@@ -41,6 +62,14 @@ class Settings:
     def config_dir(self) -> Path:
         return self.data_dir / self.config_dir_name
 
+    @property
+    def exports_dir(self) -> Path:
+        return self.data_dir / self.exports_dir_name
+
+    @property
+    def imports_dir(self) -> Path:
+        return self.data_dir / self.imports_dir_name
+
 
 def get_settings() -> Settings:
     settings = Settings()
@@ -62,4 +91,6 @@ def get_settings() -> Settings:
     settings.docs_dir.mkdir(parents=True, exist_ok=True)
     settings.backup_dir.mkdir(parents=True, exist_ok=True)
     settings.config_dir.mkdir(parents=True, exist_ok=True)
+    settings.exports_dir.mkdir(parents=True, exist_ok=True)
+    settings.imports_dir.mkdir(parents=True, exist_ok=True)
     return settings
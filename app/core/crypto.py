@@ -4,7 +4,7 @@ import base64
 import hashlib
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Protocol
 
 import keyring
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
@@ -83,6 +83,22 @@ class KeyManager:
         return kek
 
 
+class KekSource(Protocol):
+    """Anything that hands out the KEK: KeyManager, or UnlockedKeyManager once it is unwrapped."""
+
+    def get_or_create_kek(self) -> bytes: ...
+
+
+class UnlockedKeyManager:
+    """KeyManager stand-in for an already unwrapped KEK, so loops over many fields skip the passphrase KDF."""
+
+    def __init__(self, kek: bytes) -> None:
+        self._kek = kek
+
+    def get_or_create_kek(self) -> bytes:
+        return self._kek
+
+
 def encrypt_bytes(plaintext: bytes, key: bytes, aad: bytes | None = None) -> CipherBlob:
     nonce = os.urandom(12)
     ciphertext = AESGCM(key).encrypt(nonce, plaintext, aad)
@@ -102,8 +118,8 @@ def unwrap_key(wrapped_dek: bytes, kek: bytes) -> bytes:
 
 
 class FieldEncryptor:
-    def __init__(self, key_manager: Optional[KeyManager] = None) -> None:
-        self.key_manager = key_manager or KeyManager()
+    def __init__(self, key_manager: KekSource | None = None) -> None:
+        self.key_manager: KekSource = key_manager or KeyManager()
 
     def encrypt(self, value: str) -> str:
         key = self.key_manager.get_or_create_kek()
@@ -0,0 +1,61 @@
+"""Bounded executor for Argon2 password hashing.
+
+Each Argon2 operation takes 64 MiB and most of a core for a few hundred milliseconds. Running
+them inline let every concurrent login hold a request worker and its own 64 MiB. Here they run
+on a small dedicated pool (argon2-cffi releases the GIL, so threads give real parallelism), and
+once `max_workers + max_pending` operations are in flight further ones are refused with
+`HashingPoolBusy` instead of queueing without limit.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class HashingPoolBusy(RuntimeError):
+    """Raised when the hashing pool's queue is full."""
+
+
+class HashingPool:
+    def __init__(self, max_workers: int = 2, max_pending: int = 8) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._rejected = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="argon2")
+            return self._executor
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """Run `fn(*args)` on the pool and wait for it; raises HashingPoolBusy when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolBusy("Too many password checks in progress")
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+"""Per-source limit on failed logins.
+
+The PIN is four digits, so without a limit it can be guessed in a few thousand requests. Each
+source (client address) may fail `max_failures` times within `window_seconds`. After that its
+attempts are refused without running a password check until the oldest failure leaves the
+window. A successful login clears the source's failures.
+
+`begin_attempt` counts an attempt as a failure before the password check runs, in the same
+locked step as the block decision. Checking and recording separately would let every request
+already waiting for a hashing worker through, however many failures they add up to.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+
+class FailedLoginLimiter:
+    def __init__(self, max_failures: int = 5, window_seconds: float = 300.0, max_sources: int = 4096) -> None:
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.max_sources = max_sources
+        self._failures: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, source: str, now: float) -> deque[float] | None:
+        failures = self._failures.get(source)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[source]
+            return None
+        return failures
+
+    def retry_after(self, source: str, now: float | None = None) -> float:
+        """Seconds until `source` may try again; 0 when it is not blocked."""
+        if self.max_failures <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            failures = self._recent(source, now)
+            if failures is None or len(failures) < self.max_failures:
+                return 0.0
+            return failures[-self.max_failures] + self.window_seconds - now
+
+    def _record(self, source: str, failures: deque[float] | None, now: float) -> None:
+        if failures is None:
+            if len(self._failures) >= self.max_sources:
+                # Forget the source whose last failure is oldest rather than grow without bound.
+                stale = min(self._failures, key=lambda key: self._failures[key][-1])
+                del self._failures[stale]
+            failures = self._failures[source] = deque()
+        failures.append(now)
+        # Only the newest max_failures timestamps decide whether the source is blocked.
+        while len(failures) > max(self.max_failures, 1):
+            failures.popleft()
+
+    def record_failure(self, source: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._record(source, self._recent(source, now), now)
+
+    def begin_attempt(self, source: str, now: float | None = None) -> float | None:
+        """Count an attempt from `source` as failed up front; returns its timestamp, or None when blocked.
+
+        A successful login then calls `reset`; an attempt that never reached the password check
+        is handed back with `cancel_attempt`.
+        """
+        now = time.monotonic() if now is None else now
+        if self.max_failures <= 0:
+            return now
+        with self._lock:
+            failures = self._recent(source, now)
+            if failures is not None and len(failures) >= self.max_failures:
+                return None
+            self._record(source, failures, now)
+        return now
+
+    def cancel_attempt(self, source: str, attempt: float) -> None:
+        with self._lock:
+            failures = self._failures.get(source)
+            if failures is not None and attempt in failures:
+                failures.remove(attempt)
+                if not failures:
+                    del self._failures[source]
+
+    def reset(self, source: str) -> None:
+        with self._lock:
+            self._failures.pop(source, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._failures.clear()
@@ -3,18 +3,31 @@ from __future__ import annotations
 import hashlib
 import secrets
 from datetime import UTC, datetime, timedelta
-from urllib.parse import parse_qs
 from typing import Optional
 
 import pyotp
 from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import HTTPException, Request, Response
+from starlette.types import Receive
 
 from app.core.config import get_settings
 from app.core.crypto import FieldEncryptor
+from app.core.csrf import read_body_token
+from app.core.hashing_pool import HashingPool
+from app.core.rate_limit import FailedLoginLimiter
 
 password_hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=2)
 settings = get_settings()
+hashing_pool = HashingPool(max_workers=settings.hashing_workers, max_pending=settings.hashing_queue_limit)
+login_limiter = FailedLoginLimiter(max_failures=settings.login_max_failures, window_seconds=settings.login_failure_window_seconds)
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 class SecurityManager:
@@ -22,13 +35,20 @@ class SecurityManager:
         self.field_encryptor = FieldEncryptor()
 
     def hash_password(self, password: str) -> str:
-        return password_hasher.hash(password)
+        return hashing_pool.run(password_hasher.hash, password)
 
     def verify_password(self, password: str, password_hash: str) -> bool:
+        """Argon2 check on the hashing pool; raises HashingPoolBusy when too many are queued."""
+        return hashing_pool.run(_verify, password_hash, password)
+
+    def password_current(self, password: str, password_hash: str) -> bool:
+        """Whether `password_hash` is for `password` and uses the current Argon2 parameters."""
         try:
-            return password_hasher.verify(password_hash, password)
-        except Exception:
+            if password_hasher.check_needs_rehash(password_hash):
+                return False
+        except InvalidHashError:
             return False
+        return self.verify_password(password, password_hash)
 
     def new_session_token(self) -> str:
         return secrets.token_urlsafe(48)
@@ -79,26 +99,24 @@ def require_csrf(request: Request) -> None:
     raise RuntimeError("Use require_csrf_async in async request handling.")
 
 
-async def require_csrf_async(request: Request) -> None:
+async def require_csrf_async(request: Request) -> Receive:
+    """Raise 403 unless the request echoes the CSRF cookie; returns the receive to read its body from.
+
+    The token is taken from the X-CSRF-Token header, the query string or the body's csrf_token
+    field. Only the start of a body is read for it, and the returned receive replays that part.
+    """
     if request.method not in {"POST", "PUT", "PATCH", "DELETE"}:
-        return
+        return request.receive
 
+    receive = request.receive
     form_token = request.headers.get("x-csrf-token") or request.query_params.get("csrf_token")
     if not form_token:
-        content_type = request.headers.get("content-type", "")
-        if "application/x-www-form-urlencoded" in content_type:
-            try:
-                body = await request.body()
-                parsed = parse_qs(body.decode("utf-8"), keep_blank_values=True)
-                token_values = parsed.get("csrf_token")
-                if token_values:
-                    form_token = token_values[0]
-            except Exception:
-                form_token = None
+        form_token, receive = await read_body_token(request.receive, request.headers.get("content-type", ""))
 
     cookie_token = request.cookies.get("cb_csrf")
     if not form_token or not cookie_token or not secrets.compare_digest(form_token, cookie_token):
         raise HTTPException(status_code=403, detail="Invalid CSRF token")
+    return receive
 
 
 def set_csrf_cookie(response: Response, token: Optional[str] = None) -> str:
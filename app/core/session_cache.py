@@ -0,0 +1,100 @@
+"""In-process cache of validated login sessions.
+
+Every authenticated request used to look its session up by token hash and then load the user.
+Validated sessions are kept here for a short TTL (never past the session's own expiry), so the
+common request does no auth queries. Anything that deletes or shortens a session must call
+`invalidate` / `invalidate_user`; the TTL bounds how long a missed invalidation can linger.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    from app.db.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSession:
+    user_id: int
+    # Detached snapshot of the user row; callers merge it into their session before use.
+    user: User
+    expires_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    hits: int
+    misses: int
+    invalidations: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SessionCache:
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, CachedSession]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._invalidations = self._evictions = 0
+
+    def get(self, token_hash: str, now: datetime) -> CachedSession | None:
+        """The cached session if it is fresh and not past its expiry (`now` is naive UTC)."""
+        with self._lock:
+            item = self._entries.get(token_hash)
+            if item is not None:
+                cached_until, entry = item
+                if cached_until > time.monotonic() and entry.expires_at >= now:
+                    self._entries.move_to_end(token_hash)
+                    self._hits += 1
+                    return entry
+                del self._entries[token_hash]
+            self._misses += 1
+            return None
+
+    def put(self, token_hash: str, entry: CachedSession) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[token_hash] = (time.monotonic() + self.ttl_seconds, entry)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, token_hash: str) -> None:
+        with self._lock:
+            if self._entries.pop(token_hash, None) is not None:
+                self._invalidations += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [key for key, (_, entry) in self._entries.items() if entry.user_id == user_id]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._invalidations, self._evictions, len(self._entries))
+
+
+session_cache = SessionCache(ttl_seconds=get_settings().session_cache_ttl_seconds)
@@ -0,0 +1,133 @@
+"""Scheduled cleanup of login sessions.
+
+Every login inserts a session row and only logout removes one, so expired rows and logins that
+were never logged out would otherwise pile up along with the token_hash index. The reaper deletes
+expired sessions and, per user, all but the newest unexpired ones, in small batches that each
+commit on their own so logins are never blocked for long. Afterwards freed pages are handed
+back with an incremental vacuum once the database is in incremental auto-vacuum mode. The first
+run switches a small older database to that mode with a one-off full VACUUM; larger ones are
+converted offline with scripts/enable_incremental_vacuum.py.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.session_cache import SessionCache, session_cache
+from app.db.base import (
+    SMALL_DATABASE_BYTES,
+    db_session,
+    ensure_incremental_vacuum,
+    incremental_vacuum,
+    incremental_vacuum_enabled,
+)
+from app.db.models import Session as UserSession
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 500
+
+
+@dataclass(frozen=True, slots=True)
+class ReapResult:
+    ran_at: datetime
+    expired: int
+    over_limit: int
+    pages_freed: int
+
+
+@dataclass(frozen=True, slots=True)
+class SessionCounts:
+    active: int
+    expired: int
+
+
+def session_counts(db: Session, now: datetime) -> SessionCounts:
+    """Unexpired and expired session rows (`now` is naive UTC)."""
+    active, expired = db.execute(
+        select(
+            func.count(case((UserSession.expires_at >= now, 1))),
+            func.count(case((UserSession.expires_at < now, 1))),
+        )
+    ).one()
+    return SessionCounts(active=active, expired=expired)
+
+
+def delete_expired(db: Session, now: datetime, limit: int = BATCH_SIZE) -> int:
+    """Delete up to `limit` expired sessions; returns how many went."""
+    batch = select(UserSession.id).where(UserSession.expires_at < now).order_by(UserSession.id.asc()).limit(limit)
+    return db.execute(delete(UserSession).where(UserSession.id.in_(batch))).rowcount or 0
+
+
+def delete_over_limit(db: Session, now: datetime, max_per_user: int, limit: int = BATCH_SIZE) -> list[str]:
+    """Delete up to `limit` unexpired sessions beyond each user's newest `max_per_user`; returns their token hashes."""
+    ranked = (
+        select(
+            UserSession.id,
+            UserSession.token_hash,
+            func.row_number()
+            .over(partition_by=UserSession.user_id, order_by=(UserSession.created_at.desc(), UserSession.id.desc()))
+            .label("position"),
+        )
+        .where(UserSession.expires_at >= now)
+        .subquery()
+    )
+    rows = db.execute(select(ranked.c.id, ranked.c.token_hash).where(ranked.c.position > max_per_user).limit(limit)).all()
+    if rows:
+        db.execute(delete(UserSession).where(UserSession.id.in_([row.id for row in rows])))
+    return [row.token_hash for row in rows]
+
+
+class SessionReaper:
+    def __init__(
+        self,
+        max_per_user: int | None = None,
+        batch_size: int = BATCH_SIZE,
+        cache: SessionCache | None = None,
+    ) -> None:
+        self.max_per_user = max_per_user if max_per_user is not None else get_settings().max_sessions_per_user
+        self.batch_size = batch_size
+        self.cache = cache or session_cache
+        self.last: ReapResult | None = None
+        self._auto_vacuum_checked = False
+        self._lock = threading.Lock()
+
+    def run(self, now: datetime | None = None) -> ReapResult:
+        now = now or datetime.now(UTC).replace(tzinfo=None)
+        with self._lock:
+            expired = 0
+            while True:
+                with db_session() as db:
+                    count = delete_expired(db, now, self.batch_size)
+                expired += count
+                if count < self.batch_size:
+                    break
+            over_limit = 0
+            while self.max_per_user > 0:
+                with db_session() as db:
+                    token_hashes = delete_over_limit(db, now, self.max_per_user, self.batch_size)
+                # Still unexpired, so a cached copy would keep authenticating until its TTL ran out.
+                for token_hash in token_hashes:
+                    self.cache.invalidate(token_hash)
+                over_limit += len(token_hashes)
+                if len(token_hashes) < self.batch_size:
+                    break
+            if not self._auto_vacuum_checked:
+                ensure_incremental_vacuum(max_bytes=SMALL_DATABASE_BYTES)
+                self._auto_vacuum_checked = True
+            # Without incremental mode the pragma does nothing; freed pages are reused in place.
+            pages_freed = incremental_vacuum() if (expired or over_limit) and incremental_vacuum_enabled() else 0
+            self.last = ReapResult(ran_at=now, expired=expired, over_limit=over_limit, pages_freed=pages_freed)
+        if expired or over_limit:
+            logger.info("Reaped %s expired and %s surplus sessions; freed %s pages.", expired, over_limit, pages_freed)
+        return self.last
+
+
+session_reaper = SessionReaper()
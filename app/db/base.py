@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import sqlite3
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import Generator
 
 from sqlalchemy import create_engine, event, text
@@ -8,14 +11,83 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class SqliteProfile:
+    """Per-connection tuning applied on top of the durability pragmas every connection gets.
+
+    Every pooled connection keeps its own page cache, so the memory it can take is the cache size
+    times the number of connections (pool size plus overflow, 50 by default). The profile sets a
+    budget for the whole pool instead, split evenly between connections and never below SQLite's
+    default of 2000 KiB each. The mmap window is not multiplied: every connection maps the same
+    file, so its pages are shared through the OS page cache.
+    """
+
+    mmap_size: int
+    # KiB of page cache across all of the pool's connections.
+    cache_budget_kib: int
+    temp_store: str
+    wal_autocheckpoint: int
+    # pysqlite's per-connection prepared statement cache.
+    cached_statements: int
+
+    def cache_size(self, connections: int) -> int:
+        """The PRAGMA cache_size value (negative, so KiB) for one of `connections` connections."""
+        return -max(self.cache_budget_kib // max(connections, 1), MIN_CACHE_KIB)
+
+    def pragmas(self, connections: int) -> tuple[str, ...]:
+        return (
+            f"PRAGMA mmap_size={self.mmap_size};",
+            f"PRAGMA cache_size={self.cache_size(connections)};",
+            f"PRAGMA temp_store={self.temp_store};",
+            f"PRAGMA wal_autocheckpoint={self.wal_autocheckpoint};",
+        )
+
+
+# SQLite's default page cache per connection, in KiB.
+MIN_CACHE_KIB = 2000
+SQLITE_PROFILES = {
+    # SQLite's and pysqlite's own defaults.
+    "minimal": SqliteProfile(mmap_size=0, cache_budget_kib=0, temp_store="DEFAULT", wal_autocheckpoint=1000, cached_statements=128),
+    "balanced": SqliteProfile(
+        mmap_size=64 * 1024 * 1024, cache_budget_kib=128 * 1024, temp_store="MEMORY", wal_autocheckpoint=1000, cached_statements=256
+    ),
+    "performance": SqliteProfile(
+        mmap_size=256 * 1024 * 1024, cache_budget_kib=512 * 1024, temp_store="MEMORY", wal_autocheckpoint=4000, cached_statements=512
+    ),
+}
+# Background jobs (the scheduler's own thread pool) on top of the request threadpool.
+DB_MAX_OVERFLOW = 10
+OPTIMIZE_INTERVAL_SECONDS = 3600
+# Rows sampled per index when PRAGMA optimize decides to analyze; keeps it to milliseconds.
+OPTIMIZE_ANALYSIS_LIMIT = 1000
+
+
+def sqlite_profile(name: str) -> SqliteProfile:
+    try:
+        return SQLITE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown SQLite profile {name!r}; expected one of {', '.join(SQLITE_PROFILES)}") from None
+
+
 settings = get_settings()
-engine = create_engine(settings.db_url, connect_args={"check_same_thread": False})
+profile = sqlite_profile(settings.sqlite_profile)
+pool_connections = settings.db_pool_size + DB_MAX_OVERFLOW
+# One pooled connection per request worker thread, so requests never queue for a connection.
+engine = create_engine(
+    settings.db_url,
+    connect_args={"check_same_thread": False, "cached_statements": profile.cached_statements},
+    pool_size=settings.db_pool_size,
+    max_overflow=DB_MAX_OVERFLOW,
+)
 
 
 @event.listens_for(Engine, "connect")
@@ -25,9 +97,43 @@ def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
     cursor.execute("PRAGMA journal_mode=WAL;")
     cursor.execute("PRAGMA busy_timeout=5000;")
     cursor.execute("PRAGMA synchronous=NORMAL;")
+    for pragma in profile.pragmas(pool_connections):
+        cursor.execute(pragma)
     cursor.close()
 
 
+def optimize_connection(dbapi_connection) -> None:
+    """PRAGMA optimize, which re-analyzes the tables this connection has queried if their statistics look stale."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA analysis_limit={OPTIMIZE_ANALYSIS_LIMIT};")
+        cursor.execute("PRAGMA optimize;")
+        cursor.execute("PRAGMA analysis_limit=0;")
+    except sqlite3.Error as exc:
+        # Only statistics; a busy database just means trying again next time.
+        logger.debug("PRAGMA optimize skipped: %s", exc)
+    finally:
+        cursor.close()
+
+
+@event.listens_for(engine, "checkin")
+def optimize_periodically(dbapi_connection, connection_record) -> None:
+    # SQLite only considers tables the connection itself has queried, so pooled connections
+    # optimize themselves, at most once per interval, when they return to the pool.
+    if dbapi_connection is None:
+        return
+    now = time.monotonic()
+    last = connection_record.info.setdefault("optimized_at", now)
+    if now - last >= OPTIMIZE_INTERVAL_SECONDS:
+        connection_record.info["optimized_at"] = now
+        optimize_connection(dbapi_connection)
+
+
+@event.listens_for(engine, "close")
+def optimize_on_close(dbapi_connection, connection_record) -> None:
+    optimize_connection(dbapi_connection)
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
 
 
@@ -36,6 +142,29 @@ def _sqlite_columns(conn, table: str) -> set[str]:
     return {str(row[1]) for row in rows}
 
 
+# Composite/covering indexes for the dashboard and expense queries, plus the
+# single-column indexes they make redundant.
+QUERY_INDEXES = (
+    ("ix_expense_line_items_incurred_amount", "expense_line_items", "incurred_at, amount_cents"),
+    ("ix_expense_line_items_category_incurred", "expense_line_items", "category, incurred_at"),
+    ("ix_appointments_scheduled_provider_invoice", "appointments", "scheduled_at, provider_id, estimated_invoice_cents"),
+    ("ix_documents_expense_created", "documents", "expense_id, created_at"),
+)
+SUPERSEDED_INDEXES = ("ix_appointments_scheduled_at", "ix_documents_expense_id", "ix_expense_line_items_incurred")
+
+
+def _ensure_query_indexes(conn) -> None:
+    existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).fetchall()}
+    missing = [spec for spec in QUERY_INDEXES if spec[0] not in existing]
+    for name, table, columns in missing:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})"))
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if missing:
+        # Refresh planner statistics so the new indexes are costed against real row counts.
+        conn.execute(text("ANALYZE"))
+
+
 def ensure_runtime_schema() -> None:
     """Apply additive schema updates for local appliance upgrades."""
     with engine.begin() as conn:
@@ -48,6 +177,12 @@ def ensure_runtime_schema() -> None:
             conn.execute(text("ALTER TABLE insurance_providers ADD COLUMN estimated_copay_cents INTEGER NOT NULL DEFAULT 0"))
         if "notes" not in provider_cols:
             conn.execute(text("ALTER TABLE insurance_providers ADD COLUMN notes TEXT"))
+        if "circuit_failures" not in provider_cols:
+            conn.execute(text("ALTER TABLE insurance_providers ADD COLUMN circuit_failures INTEGER NOT NULL DEFAULT 0"))
+        if "circuit_open_until" not in provider_cols:
+            conn.execute(text("ALTER TABLE insurance_providers ADD COLUMN circuit_open_until DATETIME"))
+        if "last_checked_at" not in provider_cols:
+            conn.execute(text("ALTER TABLE insurance_providers ADD COLUMN last_checked_at DATETIME"))
 
         conn.execute(
             text(
@@ -84,6 +219,12 @@ def ensure_runtime_schema() -> None:
             conn.execute(text("ALTER TABLE expense_line_items ADD COLUMN idempotency_key VARCHAR(128)"))
         if "reconciled" not in expense_cols:
             conn.execute(text("ALTER TABLE expense_line_items ADD COLUMN reconciled BOOLEAN NOT NULL DEFAULT 0"))
+        # Change stamps for incremental reconciliation; rows from before the column stay NULL.
+        for table in ("expense_line_items", "claims", "eobs"):
+            stamped_cols = _sqlite_columns(conn, table)
+            if stamped_cols and "updated_at" not in stamped_cols:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table}(updated_at)"))
         conn.execute(
             text(
                 """
@@ -93,13 +234,19 @@ def ensure_runtime_schema() -> None:
             )
         )
 
+        # Blind-index tokens only (see app/services/search/index.py); rowid encodes the indexed entity.
+        conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(tokens)"))
+
+        payment_cols = _sqlite_columns(conn, "patient_payments")
+        if payment_cols and "payee" not in payment_cols:
+            conn.execute(text("ALTER TABLE patient_payments ADD COLUMN payee VARCHAR(255)"))
+
         document_cols = _sqlite_columns(conn, "documents")
         if "policy_id" not in document_cols:
             conn.execute(text("ALTER TABLE documents ADD COLUMN policy_id INTEGER"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS ix_documents_policy_id ON documents(policy_id)"))
         if "expense_id" not in document_cols:
             conn.execute(text("ALTER TABLE documents ADD COLUMN expense_id INTEGER"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_documents_expense_id ON documents(expense_id)"))
 
         appointment_cols = _sqlite_columns(conn, "appointments")
         if appointment_cols:
@@ -111,6 +258,10 @@ def ensure_runtime_schema() -> None:
                 conn.execute(text("ALTER TABLE appointments ADD COLUMN prep_notes TEXT"))
             if "notes" not in appointment_cols:
                 conn.execute(text("ALTER TABLE appointments ADD COLUMN notes TEXT"))
+            if "series_id" not in appointment_cols:
+                conn.execute(text("ALTER TABLE appointments ADD COLUMN series_id INTEGER REFERENCES appointment_series(id)"))
+            if "series_occurrence_at" not in appointment_cols:
+                conn.execute(text("ALTER TABLE appointments ADD COLUMN series_occurrence_at DATETIME"))
         else:
             conn.execute(
                 text(
@@ -124,14 +275,73 @@ def ensure_runtime_schema() -> None:
                         facility_address TEXT,
                         prep_notes TEXT,
                         notes TEXT,
+                        series_id INTEGER,
+                        series_occurrence_at DATETIME,
                         created_at DATETIME NOT NULL,
-                        FOREIGN KEY(provider_id) REFERENCES insurance_providers(id)
+                        FOREIGN KEY(provider_id) REFERENCES insurance_providers(id),
+                        FOREIGN KEY(series_id) REFERENCES appointment_series(id)
                     )
                     """
                 )
             )
+        rollup_cols = _sqlite_columns(conn, "monthly_rollups")
+        if rollup_cols and "revision" not in rollup_cols:
+            conn.execute(text("ALTER TABLE monthly_rollups ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+
         conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appointments_provider_id ON appointments(provider_id)"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appointments_scheduled_at ON appointments(scheduled_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appointments_series_id ON appointments(series_id)"))
+        _ensure_query_indexes(conn)
+
+
+AUTO_VACUUM_INCREMENTAL = 2
+# A VACUUM of a file this size holds the write lock for well under a second.
+SMALL_DATABASE_BYTES = 16 * 1024 * 1024
+
+
+def incremental_vacuum_enabled() -> bool:
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA auto_vacuum")).scalar() == AUTO_VACUUM_INCREMENTAL
+
+
+def ensure_incremental_vacuum(max_bytes: int | None = None) -> bool:
+    """Switch the database to incremental auto-vacuum so deleted pages can be handed back to the OS.
+
+    The mode only takes effect through a full VACUUM, which holds the write lock for as long as it
+    takes; returns True when that rebuild happened. With `max_bytes`, a larger database is left
+    alone: those are converted offline with scripts/enable_incremental_vacuum.py.
+    """
+    # VACUUM and the vacuum pragmas cannot run inside a transaction.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.execute(text("PRAGMA auto_vacuum")).scalar() == AUTO_VACUUM_INCREMENTAL:
+            return False
+        if max_bytes is not None:
+            size = (conn.execute(text("PRAGMA page_count")).scalar() or 0) * (conn.execute(text("PRAGMA page_size")).scalar() or 0)
+            if size > max_bytes:
+                logger.info(
+                    "Database is %s bytes; run scripts/enable_incremental_vacuum.py to enable incremental auto-vacuum", size
+                )
+                return False
+        logger.info("Rebuilding the database with VACUUM to enable incremental auto-vacuum")
+        started = time.perf_counter()
+        conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+    logger.info("Database rebuilt for incremental auto-vacuum in %.1fs", time.perf_counter() - started)
+    return True
+
+
+def incremental_vacuum(max_pages: int | None = None) -> int:
+    """Release up to `max_pages` free pages (all when None); returns how many were released."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        before = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+        pragma = "PRAGMA incremental_vacuum" if max_pages is None else f"PRAGMA incremental_vacuum({int(max_pages)})"
+        # The pragma frees one page per step and pysqlite's execute() only steps once;
+        # executescript() runs it to completion.
+        driver_connection = conn.connection.driver_connection
+        if driver_connection is None:
+            raise RuntimeError("incremental_vacuum needs a live DBAPI connection")
+        driver_connection.executescript(f"{pragma};")
+        after = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+    return before - after
 
 
 @contextmanager
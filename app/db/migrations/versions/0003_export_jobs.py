@@ -0,0 +1,39 @@
+"""background export jobs"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_export_jobs"
+down_revision = "0002_provider_appointments"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "export_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("requested_by_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("source_sha256", sa.String(length=64), nullable=True),
+        sa.Column("artifact_name", sa.String(length=128), nullable=True),
+        sa.Column("artifact_sha256", sa.String(length=64), nullable=True),
+        sa.Column("size_bytes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_export_jobs_status", "export_jobs", ["status"], unique=False)
+    op.create_index("ix_export_jobs_source_sha256", "export_jobs", ["source_sha256"], unique=False)
+    op.create_index("ix_export_jobs_expires_at", "export_jobs", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_export_jobs_expires_at", table_name="export_jobs")
+    op.drop_index("ix_export_jobs_source_sha256", table_name="export_jobs")
+    op.drop_index("ix_export_jobs_status", table_name="export_jobs")
+    op.drop_table("export_jobs")
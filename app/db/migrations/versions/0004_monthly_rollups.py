@@ -0,0 +1,30 @@
+"""materialized monthly rollups"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_monthly_rollups"
+down_revision = "0003_export_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expense_total_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("appointment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("appointment_invoice_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("year", "month", name="uq_monthly_rollups_year_month"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_rollups")
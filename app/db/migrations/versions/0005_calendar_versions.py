@@ -0,0 +1,27 @@
+"""calendar month revisions and change counters"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005_calendar_versions"
+down_revision = "0004_monthly_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("monthly_rollups", sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+    op.create_table(
+        "change_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("change_counters")
+    op.drop_column("monthly_rollups", "revision")
@@ -0,0 +1,49 @@
+"""recurring appointment series"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006_appointment_series"
+down_revision = "0005_calendar_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "appointment_series",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("insurance_providers.id"), nullable=False),
+        sa.Column("rrule", sa.String(length=255), nullable=False),
+        sa.Column("dtstart", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("estimated_invoice_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("location_name", sa.String(length=255), nullable=True),
+        sa.Column("facility_address", sa.Text(), nullable=True),
+        sa.Column("prep_notes", sa.Text(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_appointment_series_provider_id", "appointment_series", ["provider_id"])
+    op.create_index("ix_appointment_series_dtstart", "appointment_series", ["dtstart"])
+    op.create_table(
+        "appointment_series_exceptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("series_id", sa.Integer(), sa.ForeignKey("appointment_series.id"), nullable=False),
+        sa.Column("occurrence_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("series_id", "occurrence_at", name="uq_series_exception_occurrence"),
+    )
+    op.create_index("ix_appointment_series_exceptions_series_id", "appointment_series_exceptions", ["series_id"])
+    op.add_column("appointments", sa.Column("series_id", sa.Integer(), nullable=True))
+    op.add_column("appointments", sa.Column("series_occurrence_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_appointments_series_id", "appointments", ["series_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointments_series_id", table_name="appointments")
+    op.drop_column("appointments", "series_occurrence_at")
+    op.drop_column("appointments", "series_id")
+    op.drop_table("appointment_series_exceptions")
+    op.drop_table("appointment_series")
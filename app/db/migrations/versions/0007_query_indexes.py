@@ -0,0 +1,31 @@
+"""composite and covering indexes for dashboard/expense queries"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007_query_indexes"
+down_revision = "0006_appointment_series"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_expense_line_items_incurred_amount", "expense_line_items", ["incurred_at", "amount_cents"])
+    op.create_index(
+        "ix_appointments_scheduled_provider_invoice",
+        "appointments",
+        ["scheduled_at", "provider_id", "estimated_invoice_cents"],
+    )
+    op.create_index("ix_documents_expense_created", "documents", ["expense_id", "created_at"])
+    op.drop_index("ix_appointments_scheduled_at", table_name="appointments")
+    op.execute("DROP INDEX IF EXISTS ix_documents_expense_id")
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.create_index("ix_appointments_scheduled_at", "appointments", ["scheduled_at"])
+    op.create_index("ix_documents_expense_id", "documents", ["expense_id"])
+    op.drop_index("ix_documents_expense_created", table_name="documents")
+    op.drop_index("ix_appointments_scheduled_provider_invoice", table_name="appointments")
+    op.drop_index("ix_expense_line_items_incurred_amount", table_name="expense_line_items")
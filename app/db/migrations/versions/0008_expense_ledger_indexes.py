@@ -0,0 +1,21 @@
+"""indexes for keyset expense ledger pagination"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0008_expense_ledger_indexes"
+down_revision = "0007_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_expense_line_items_incurred", "expense_line_items", ["incurred_at"])
+    op.create_index("ix_expense_line_items_category_incurred", "expense_line_items", ["category", "incurred_at"])
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expense_line_items_category_incurred", table_name="expense_line_items")
+    op.drop_index("ix_expense_line_items_incurred", table_name="expense_line_items")
@@ -0,0 +1,30 @@
+"""deductible and out-of-pocket accumulators"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0009_policy_accumulators"
+down_revision = "0008_expense_ledger_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "policy_accumulators",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("policy_id", sa.Integer(), sa.ForeignKey("policies.id"), nullable=False),
+        sa.Column("coverage_term_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("patient_responsibility_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expense_paid_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("eob_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("policy_id", "coverage_term_id", name="uq_policy_accumulators_policy_term"),
+    )
+    op.create_index("ix_policy_accumulators_policy_id", "policy_accumulators", ["policy_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("policy_accumulators")
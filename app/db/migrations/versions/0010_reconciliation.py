@@ -0,0 +1,48 @@
+"""payment payee and reconciliation matches"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0010_reconciliation"
+down_revision = "0009_policy_accumulators"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("patient_payments", sa.Column("payee", sa.String(length=255), nullable=True))
+    op.create_table(
+        "reconciliation_matches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("expense_id", sa.Integer(), sa.ForeignKey("expense_line_items.id"), nullable=False),
+        sa.Column("payment_id", sa.Integer(), sa.ForeignKey("patient_payments.id"), nullable=True),
+        sa.Column("claim_id", sa.Integer(), sa.ForeignKey("claims.id"), nullable=False),
+        sa.Column("eob_id", sa.Integer(), sa.ForeignKey("eobs.id"), nullable=True),
+        sa.Column("amount_cents", sa.Integer(), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="suggested"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("expense_id", "claim_id", name="uq_reconciliation_matches_expense_claim"),
+    )
+    op.create_index("ix_reconciliation_matches_expense_id", "reconciliation_matches", ["expense_id"])
+    op.create_index("ix_reconciliation_matches_claim_id", "reconciliation_matches", ["claim_id"])
+    op.create_index("ix_reconciliation_matches_status", "reconciliation_matches", ["status"])
+    op.create_table(
+        "reconciliation_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("expense_watermark", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("claim_watermark", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("eob_watermark", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("suggestions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("reconciliation_runs")
+    op.drop_table("reconciliation_matches")
+    op.drop_column("patient_payments", "payee")
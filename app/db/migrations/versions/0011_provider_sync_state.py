@@ -0,0 +1,21 @@
+"""persisted provider sync circuit state"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0011_provider_sync_state"
+down_revision = "0010_reconciliation"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("insurance_providers", sa.Column("circuit_failures", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("insurance_providers", sa.Column("circuit_open_until", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("insurance_providers", "circuit_open_until")
+    op.drop_column("insurance_providers", "circuit_failures")
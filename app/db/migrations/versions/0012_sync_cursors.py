@@ -0,0 +1,29 @@
+"""resumable sync cursors"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0012_sync_cursors"
+down_revision = "0011_provider_sync_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_cursors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("adapter_key", sa.String(length=64), nullable=False),
+        sa.Column("scope", sa.String(length=128), nullable=False, server_default=""),
+        sa.Column("cursor", sa.Text(), nullable=True),
+        sa.Column("records", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("adapter_key", "scope", name="uq_sync_cursors_adapter_scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_cursors")
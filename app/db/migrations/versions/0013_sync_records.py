@@ -0,0 +1,30 @@
+"""sync record ledger"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013_sync_records"
+down_revision = "0012_sync_cursors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_records",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("adapter_key", sa.String(length=64), nullable=False),
+        sa.Column("scope", sa.String(length=128), nullable=False, server_default=""),
+        sa.Column("external_id", sa.String(length=255), nullable=False),
+        sa.Column("payload_hash", sa.String(length=64), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("adapter_key", "scope", "external_id", name="uq_sync_records_adapter_scope_external"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_records")
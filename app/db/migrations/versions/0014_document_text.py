@@ -0,0 +1,35 @@
+"""extracted document text and blind search index"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014_document_text"
+down_revision = "0013_sync_records"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "document_texts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id"), nullable=False, unique=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="queued"),
+        sa.Column("method", sa.String(length=16), nullable=True),
+        sa.Column("text_enc", sa.Text(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("pages", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_document_texts_status", "document_texts", ["status"])
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(tokens)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS search_index")
+    op.drop_index("ix_document_texts_status", table_name="document_texts")
+    op.drop_table("document_texts")
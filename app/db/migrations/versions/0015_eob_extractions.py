@@ -0,0 +1,33 @@
+"""structured EOB extraction results"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0015_eob_extractions"
+down_revision = "0014_document_text"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "eob_extractions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id"), nullable=False, unique=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("template", sa.String(length=32), nullable=False, server_default="generic"),
+        sa.Column("confidence", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("fields", sa.JSON(), nullable=False),
+        sa.Column("claim_id", sa.Integer(), sa.ForeignKey("claims.id"), nullable=True),
+        sa.Column("eob_id", sa.Integer(), sa.ForeignKey("eobs.id"), nullable=True),
+        sa.Column("error", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_eob_extractions_status", "eob_extractions", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_eob_extractions_status", table_name="eob_extractions")
+    op.drop_table("eob_extractions")
@@ -0,0 +1,19 @@
+"""drop the incurred_at index that (incurred_at, amount_cents) already covers"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0016_drop_incurred_index"
+down_revision = "0015_eob_extractions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_expense_line_items_incurred", table_name="expense_line_items")
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.create_index("ix_expense_line_items_incurred", "expense_line_items", ["incurred_at"])
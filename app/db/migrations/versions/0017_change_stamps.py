@@ -0,0 +1,25 @@
+"""updated_at change stamps on expenses, claims and EOBs for incremental reconciliation"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0017_change_stamps"
+down_revision = "0016_drop_incurred_index"
+branch_labels = None
+depends_on = None
+
+TABLES = ("expense_line_items", "claims", "eobs")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+        op.drop_column(table, "updated_at")
@@ -0,0 +1,19 @@
+"""last_checked_at on insurance providers, set by probe-only sync runs"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0018_provider_checked_at"
+down_revision = "0017_change_stamps"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("insurance_providers", sa.Column("last_checked_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("insurance_providers", "last_checked_at")
@@ -0,0 +1,23 @@
+"""drop the unused id watermarks from reconciliation runs; passes key off started_at"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0019_drop_reconcile_watermarks"
+down_revision = "0018_provider_checked_at"
+branch_labels = None
+depends_on = None
+
+WATERMARKS = ("expense_watermark", "claim_watermark", "eob_watermark")
+
+
+def upgrade() -> None:
+    for column in WATERMARKS:
+        op.drop_column("reconciliation_runs", column)
+
+
+def downgrade() -> None:
+    for column in WATERMARKS:
+        op.add_column("reconciliation_runs", sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
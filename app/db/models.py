@@ -8,18 +8,25 @@ from sqlalchemy import (
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     LargeBinary,
     String,
     Text,
     UniqueConstraint,
+    func,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 from app.domain.enums import ClaimStatus, DocumentType, NetworkTier, PlanType, ProviderAdapterType
 
+# Change stamps come from SQLite's clock inside the writing statement, i.e. while the writer holds
+# the database write lock, so a reader that holds the lock sees every row stamped before it.
+DB_NOW = func.strftime("%Y-%m-%d %H:%M:%f000", "now")
+
 
 class User(Base):
     __tablename__ = "users"
@@ -86,8 +93,12 @@ class InsuranceProvider(Base):
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     adapter_type: Mapped[ProviderAdapterType] = mapped_column(Enum(ProviderAdapterType))
     status: Mapped[str] = mapped_column(String(32), default="active")
+    # Last run whose records reached a sink; last_checked_at is any successful run, probes included.
     last_sync_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_checked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Consecutive failed sync runs; the circuit opens once it reaches the engine's threshold.
     circuit_failures: Mapped[int] = mapped_column(Integer, default=0)
+    circuit_open_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class ProviderAddress(Base):
@@ -118,11 +129,38 @@ class Policy(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Serves the calendar window scan and covers the monthly rollup aggregate.
+    __table_args__ = (Index("ix_appointments_scheduled_provider_invoice", "scheduled_at", "provider_id", "estimated_invoice_cents"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     provider_id: Mapped[int] = mapped_column(ForeignKey("insurance_providers.id"), index=True)
     # PHI classification: appointment timestamp and schedule metadata
-    scheduled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    scheduled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    estimated_invoice_cents: Mapped[int] = mapped_column(Integer, default=0)
+    # PHI classification: location/facility details
+    location_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # PHI classification: facility address
+    facility_address: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # PHI classification: free-form preparation notes
+    prep_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # PHI classification: appointment notes
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Set when this row was materialized from a recurring series occurrence.
+    series_id: Mapped[int | None] = mapped_column(ForeignKey("appointment_series.id"), nullable=True, index=True)
+    # PHI classification: originally scheduled occurrence timestamp
+    series_occurrence_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
+class AppointmentSeries(Base):
+    __tablename__ = "appointment_series"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    provider_id: Mapped[int] = mapped_column(ForeignKey("insurance_providers.id"), index=True)
+    # RRULE subset, e.g. "FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,TH;COUNT=20"
+    rrule: Mapped[str] = mapped_column(String(255))
+    # PHI classification: first occurrence timestamp
+    dtstart: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
     estimated_invoice_cents: Mapped[int] = mapped_column(Integer, default=0)
     # PHI classification: location/facility details
     location_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -135,6 +173,19 @@ class Appointment(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
 
 
+class AppointmentSeriesException(Base):
+    """An occurrence that is no longer generated: cancelled, or materialized into an Appointment row."""
+
+    __tablename__ = "appointment_series_exceptions"
+    __table_args__ = (UniqueConstraint("series_id", "occurrence_at", name="uq_series_exception_occurrence"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    series_id: Mapped[int] = mapped_column(ForeignKey("appointment_series.id"), index=True)
+    # PHI classification: skipped occurrence timestamp
+    occurrence_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
 class PolicyCoverageTerm(Base):
     __tablename__ = "policy_coverage_terms"
 
@@ -184,6 +235,7 @@ class Claim(Base):
     insurer_claim_id_enc: Mapped[str] = mapped_column(Text)
     allowed_amount_cents: Mapped[int] = mapped_column(Integer, default=0)
     paid_amount_cents: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, default=DB_NOW, onupdate=DB_NOW, nullable=True, index=True)
 
 
 class EOB(Base):
@@ -194,11 +246,19 @@ class EOB(Base):
     issued_date: Mapped[date] = mapped_column(Date)
     patient_responsibility_cents: Mapped[int] = mapped_column(Integer, default=0)
     raw_json: Mapped[dict] = mapped_column(JSON, default=dict)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, default=DB_NOW, onupdate=DB_NOW, nullable=True, index=True)
 
 
 class ExpenseLineItem(Base):
     __tablename__ = "expense_line_items"
-    __table_args__ = (UniqueConstraint("idempotency_key", name="uq_expense_idempotency_key"),)
+    __table_args__ = (
+        UniqueConstraint("idempotency_key", name="uq_expense_idempotency_key"),
+        # Covers date-range sums and the per-month rollup aggregate without touching the table, and
+        # keyset pagination walks it by incurred_at, sorting only each day's ties by id.
+        Index("ix_expense_line_items_incurred_amount", "incurred_at", "amount_cents"),
+        # Keyset pagination within one category.
+        Index("ix_expense_line_items_category_incurred", "category", "incurred_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     service_event_id: Mapped[int | None] = mapped_column(ForeignKey("service_events.id"), nullable=True)
@@ -207,6 +267,7 @@ class ExpenseLineItem(Base):
     incurred_at: Mapped[date] = mapped_column(Date)
     idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
     reconciled: Mapped[bool] = mapped_column(Boolean, default=False)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, default=DB_NOW, onupdate=DB_NOW, nullable=True, index=True)
 
 
 class PatientPayment(Base):
@@ -218,6 +279,8 @@ class PatientPayment(Base):
     amount_cents: Mapped[int] = mapped_column(Integer)
     source: Mapped[str] = mapped_column(String(64))
     last4: Mapped[str | None] = mapped_column(String(4), nullable=True)
+    # PHI classification: payee/merchant name from the statement (may identify a provider)
+    payee: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
 
 class AccountTag(Base):
@@ -230,11 +293,13 @@ class AccountTag(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    # Receipt lookups filter by expense and take the newest upload.
+    __table_args__ = (Index("ix_documents_expense_created", "expense_id", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     owner_user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     policy_id: Mapped[int | None] = mapped_column(ForeignKey("policies.id"), index=True, nullable=True)
-    expense_id: Mapped[int | None] = mapped_column(ForeignKey("expense_line_items.id"), index=True, nullable=True)
+    expense_id: Mapped[int | None] = mapped_column(ForeignKey("expense_line_items.id"), nullable=True)
     doc_type: Mapped[DocumentType] = mapped_column(Enum(DocumentType), default=DocumentType.RECEIPT)
     filename: Mapped[str] = mapped_column(String(255))
     storage_path: Mapped[str] = mapped_column(String(512), unique=True)
@@ -247,3 +312,169 @@ class Document(Base):
     mime_type: Mapped[str] = mapped_column(String(128), default="application/octet-stream")
     size_bytes: Mapped[int] = mapped_column(Integer)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True)
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    requested_by_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    kind: Mapped[str] = mapped_column(String(32), default="archive")
+    status: Mapped[str] = mapped_column(String(16), default="queued", index=True)
+    # Fingerprint of the exported source rows; identical vault state reuses the same artifact.
+    source_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    artifact_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    artifact_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+    __table_args__ = (UniqueConstraint("year", "month", name="uq_monthly_rollups_year_month"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer)
+    month: Mapped[int] = mapped_column(Integer)
+    expense_count: Mapped[int] = mapped_column(Integer, default=0)
+    expense_total_cents: Mapped[int] = mapped_column(Integer, default=0)
+    appointment_count: Mapped[int] = mapped_column(Integer, default=0)
+    appointment_invoice_cents: Mapped[int] = mapped_column(Integer, default=0)
+    # Bumped on every write touching the month; feeds calendar ETags.
+    revision: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
+class ChangeCounter(Base):
+    __tablename__ = "change_counters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(64), unique=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
+class PolicyAccumulator(Base):
+    """Running patient-responsibility totals per policy and coverage term, maintained on write."""
+
+    __tablename__ = "policy_accumulators"
+    __table_args__ = (UniqueConstraint("policy_id", "coverage_term_id", name="uq_policy_accumulators_policy_term"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    policy_id: Mapped[int] = mapped_column(ForeignKey("policies.id"), index=True)
+    # 0 when the service date falls outside every coverage term (NULLs would defeat the unique key).
+    coverage_term_id: Mapped[int] = mapped_column(Integer, default=0)
+    patient_responsibility_cents: Mapped[int] = mapped_column(Integer, default=0)
+    expense_paid_cents: Mapped[int] = mapped_column(Integer, default=0)
+    eob_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
+class ReconciliationMatch(Base):
+    """A suggested link between a payment-side expense and the claim/EOB it likely settles."""
+
+    __tablename__ = "reconciliation_matches"
+    __table_args__ = (UniqueConstraint("expense_id", "claim_id", name="uq_reconciliation_matches_expense_claim"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    expense_id: Mapped[int] = mapped_column(ForeignKey("expense_line_items.id"), index=True)
+    payment_id: Mapped[int | None] = mapped_column(ForeignKey("patient_payments.id"), nullable=True)
+    claim_id: Mapped[int] = mapped_column(ForeignKey("claims.id"), index=True)
+    eob_id: Mapped[int | None] = mapped_column(ForeignKey("eobs.id"), nullable=True)
+    amount_cents: Mapped[int] = mapped_column(Integer)
+    confidence: Mapped[float] = mapped_column(Float)
+    # suggested | accepted | rejected
+    status: Mapped[str] = mapped_column(String(16), default="suggested", index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
+class ReconciliationRun(Base):
+    """A reconciliation pass; the next incremental pass looks at rows stamped since this one started.
+
+    started_at is read from the database clock (see DB_NOW).
+    """
+
+    __tablename__ = "reconciliation_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    full: Mapped[bool] = mapped_column(Boolean, default=False)
+    suggestions: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class SyncCursor(Base):
+    """Resume point of a paginated adapter sync, committed after every page."""
+
+    __tablename__ = "sync_cursors"
+    __table_args__ = (UniqueConstraint("adapter_key", "scope", name="uq_sync_cursors_adapter_scope"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    adapter_key: Mapped[str] = mapped_column(String(64))
+    # PHI classification: sync scope identifier (e.g. provider:12), non-sensitive
+    scope: Mapped[str] = mapped_column(String(128), default="")
+    # PHI classification: opaque adapter page token (may encode upstream ids)
+    cursor: Mapped[str | None] = mapped_column(Text, nullable=True)
+    records: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class SyncRecord(Base):
+    """Last seen version of every upstream record, so re-syncs only forward what changed."""
+
+    __tablename__ = "sync_records"
+    __table_args__ = (UniqueConstraint("adapter_key", "scope", "external_id", name="uq_sync_records_adapter_scope_external"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    adapter_key: Mapped[str] = mapped_column(String(64))
+    # PHI classification: sync scope identifier (e.g. provider:12), non-sensitive
+    scope: Mapped[str] = mapped_column(String(128), default="")
+    # PHI classification: upstream record id (hashed by adapters that see account numbers)
+    external_id: Mapped[str] = mapped_column(String(255))
+    # PHI classification: SHA-256 of the canonical payload, no payload content is stored
+    payload_hash: Mapped[str] = mapped_column(String(64))
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class DocumentText(Base):
+    """Extracted text of a document, produced by the background OCR queue."""
+
+    __tablename__ = "document_texts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), unique=True)
+    status: Mapped[str] = mapped_column(String(16), default="queued", index=True)
+    method: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    # PHI classification: full document text, encrypted with the field key
+    text_enc: Mapped[str | None] = mapped_column(Text, nullable=True)
+    confidence: Mapped[float] = mapped_column(Float, default=0.0)
+    pages: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class EobExtraction(Base):
+    """Structured fields parsed from an EOB document, and the claim rows they were applied to."""
+
+    __tablename__ = "eob_extractions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), unique=True)
+    # "applied", "needs_review" or "failed".
+    status: Mapped[str] = mapped_column(String(16), index=True)
+    template: Mapped[str] = mapped_column(String(32), default="generic")
+    confidence: Mapped[float] = mapped_column(Float, default=0.0)
+    # PHI classification: extracted amounts, dates and provider name with a confidence per field;
+    # claim and member identifiers are recorded as found but never stored here.
+    fields: Mapped[dict] = mapped_column(JSON, default=dict)
+    claim_id: Mapped[int | None] = mapped_column(ForeignKey("claims.id"), nullable=True)
+    eob_id: Mapped[int | None] = mapped_column(ForeignKey("eobs.id"), nullable=True)
+    error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
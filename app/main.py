@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import os
 import webbrowser
-from urllib.parse import urlparse
 from pathlib import Path
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -18,17 +17,32 @@ from app.api import (
     routes_exports,
     routes_policies,
     routes_providers,
+    routes_search,
     routes_system_health,
 )
+from app.api.middleware import CsrfMiddleware
 from app.core.backups import BackupManager
 from app.core.config import get_settings
 from app.core.crypto import KeyManager
 from app.core.integrity import verify_audit_chain, verify_document_hashes
 from app.core.keystore import KeystoreError
 from app.core.logging import get_logger
-from app.core.security import SecurityManager, require_csrf_async, set_csrf_cookie
+from app.core.security import SecurityManager, hashing_pool
+from app.core.session_cache import session_cache
+from app.core.session_reaper import session_reaper
 from app.db.base import Base, db_session, engine, ensure_runtime_schema
 from app.db.models import User
+from app.services.documents.eob_jobs import EobExtractionBatch
+from app.services.ledger.reconcile import reconcile
+from app.services.providers.ofx_import import OfxImportAdapter
+from app.services.reporting.accumulators import ensure_accumulators
+from app.services.reporting.rollups import ensure_monthly_rollups
+from app.services.search.entities import ensure_search_index
+from app.services.sync.cursors import SyncCursorStore
+from app.services.sync.engine import SyncEngine
+from app.services.sync.payments import PaymentSink
+from app.services.sync.records import SyncRecordLedger
+from app.services.sync.scheduler import STATUS_OK, ProviderSyncScheduler
 
 logger = get_logger()
 settings = get_settings()
@@ -40,6 +54,7 @@ def csrf_context_processor(request: Request) -> dict[str, str]:
     return {"csrf_token": token}
 
 app = FastAPI(title="CB Organizer")
+app.add_middleware(CsrfMiddleware)
 app.mount("/static", StaticFiles(directory=str(Path(__file__).parent / "ui" / "static")), name="static")
 templates = Jinja2Templates(
     directory=str(Path(__file__).parent / "ui" / "templates"),
@@ -59,47 +74,15 @@ app.include_router(routes_providers.router)
 app.include_router(routes_policies.router)
 app.include_router(routes_expenses.router)
 app.include_router(routes_exports.router)
+app.include_router(routes_search.router)
 app.include_router(routes_system_health.router)
 
 scheduler = BackgroundScheduler()
-
-
-@app.middleware("http")
-async def csrf_middleware(request: Request, call_next) -> Response:
-    cookie_token = request.cookies.get("cb_csrf")
-    request.state.csrf_token = cookie_token or security.new_csrf_token()
-
-    if request.method in {"POST", "PUT", "PATCH", "DELETE"}:
-        try:
-            await require_csrf_async(request)
-        except HTTPException as exc:
-            accept = request.headers.get("accept", "")
-            if "text/html" in accept:
-                referer = request.headers.get("referer")
-                target = "/auth/login?error=csrf"
-                if referer:
-                    parsed = urlparse(referer)
-                    if parsed.path and parsed.path != request.url.path:
-                        target = parsed.path
-                        if parsed.query:
-                            target = f"{target}?{parsed.query}"
-                    elif parsed.path and parsed.path != "/":
-                        target = parsed.path
-                elif not request.url.path.startswith("/auth"):
-                    target = "/"
-                response = RedirectResponse(target, status_code=303)
-                set_csrf_cookie(response, security.new_csrf_token())
-                return response
-
-            response = PlainTextResponse(exc.detail, status_code=exc.status_code)
-            if not cookie_token:
-                set_csrf_cookie(response, request.state.csrf_token)
-            return response
-
-    response = await call_next(request)
-    if not cookie_token:
-        set_csrf_cookie(response, request.state.csrf_token)
-    return response
+sync_engine = SyncEngine()
+# Provider adapters return plan metadata that nothing stores yet, so without a sink these runs
+# only probe each adapter and keep circuit state; no cursors or ledger rows are written.
+provider_sync = ProviderSyncScheduler(sink=None)
+eob_extraction = EobExtractionBatch()
 
 
 @app.exception_handler(KeystoreError)
@@ -138,14 +121,27 @@ def startup() -> None:
             logger.info("Created default local user with default PIN.")
         else:
             existing_user.email = "local-user"
-            existing_user.password_hash = security.hash_password(default_pin)
-            logger.info("Reset single-user PIN to configured default.")
+            # One verify instead of a fresh hash and write when the PIN and Argon2 parameters are unchanged.
+            if not security.password_current(default_pin, existing_user.password_hash):
+                existing_user.password_hash = security.hash_password(default_pin)
+                session_cache.invalidate_user(existing_user.id)
+                logger.info("Reset single-user PIN to configured default.")
+
+    with db_session() as db:
+        if ensure_monthly_rollups(db):
+            logger.info("Rebuilt monthly rollups from ledger.")
+        if ensure_accumulators(db):
+            logger.info("Rebuilt deductible/OOP accumulators from claims.")
 
     if not os.getenv("CB_ORGANIZER_PASSPHRASE"):
         os.environ["CB_ORGANIZER_PASSPHRASE"] = default_pin
     km = KeyManager(passphrase=os.getenv("CB_ORGANIZER_PASSPHRASE"))
     if km.keystore.load() is None:
         km.get_or_create_kek()
+    with db_session() as db:
+        indexed = ensure_search_index(db)
+        if indexed:
+            logger.info("Added %s records to the search index.", indexed)
     
     def docs_integrity_job() -> None:
         with db_session() as db:
@@ -155,9 +151,47 @@ def startup() -> None:
         with db_session() as db:
             verify_audit_chain(db)
 
+    def statement_import_job() -> None:
+        with db_session() as db:
+            sink = PaymentSink(db, source=OfxImportAdapter.name)
+            sync_engine.run_once(OfxImportAdapter.name, sink, cursors=SyncCursorStore(db), ledger=SyncRecordLedger(db))
+            summary = sink.flush()
+        if summary.created:
+            logger.info("Imported %s payments from statements.", summary.created)
+
+    def provider_sync_job() -> None:
+        outcomes = provider_sync.run()
+        synced = sum(1 for outcome in outcomes if outcome.status == STATUS_OK)
+        if outcomes:
+            logger.info("Synced %s of %s providers.", synced, len(outcomes))
+
+    def eob_extraction_job() -> None:
+        processed = eob_extraction.run()
+        if processed:
+            logger.info("Parsed %s EOB documents.", processed)
+
+    def reconciliation_job() -> None:
+        with db_session() as db:
+            reconcile(db)
+
+    routes_exports.export_jobs.resume_pending()
+    routes_policies.text_jobs.resume_pending()
+
     scheduler.add_job(backup_manager.create_backup, "cron", hour=2, minute=0, id="nightly_backup", replace_existing=True)
     scheduler.add_job(docs_integrity_job, "interval", hours=6, id="integrity_docs", replace_existing=True)
     scheduler.add_job(audit_integrity_job, "interval", hours=6, id="integrity_audit", replace_existing=True)
+    scheduler.add_job(routes_exports.export_jobs.expire_artifacts, "interval", hours=1, id="export_expiry", replace_existing=True)
+    scheduler.add_job(statement_import_job, "interval", minutes=15, id="statement_import", replace_existing=True)
+    scheduler.add_job(
+        provider_sync_job, "interval", minutes=30, id="provider_sync", replace_existing=True, max_instances=1, coalesce=True
+    )
+    scheduler.add_job(
+        eob_extraction_job, "interval", minutes=10, id="eob_extraction", replace_existing=True, max_instances=1, coalesce=True
+    )
+    scheduler.add_job(reconciliation_job, "interval", hours=1, id="reconciliation", replace_existing=True)
+    scheduler.add_job(
+        session_reaper.run, "interval", hours=1, id="session_reaper", replace_existing=True, max_instances=1, coalesce=True
+    )
     scheduler.start()
     logger.info("Application started")
 
@@ -166,6 +200,12 @@ def startup() -> None:
 def shutdown() -> None:
     if scheduler.running:
         scheduler.shutdown(wait=False)
+    routes_exports.export_jobs.shutdown()
+    routes_policies.text_jobs.shutdown()
+    eob_extraction.shutdown()
+    hashing_pool.shutdown()
+    # Closing pooled connections runs PRAGMA optimize on each.
+    engine.dispose()
 
 
 def open_browser() -> None:
@@ -0,0 +1 @@
+# calendar package
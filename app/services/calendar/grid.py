@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Appointment, AppointmentSeries, InsuranceProvider
+from app.services.calendar.recurrence import series_occurrences
+
+
+def adjacent_months(year: int, month: int) -> tuple[tuple[int, int], tuple[int, int]]:
+    prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+    next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return prev_month, next_month
+
+
+def grid_bounds(year: int, month: int) -> tuple[date, date]:
+    """First and last (inclusive) day shown in a Monday-first month grid."""
+    month_start = date(year, month, 1)
+    last_date = date(year, month, monthrange(year, month)[1])
+    grid_start = month_start - timedelta(days=month_start.weekday())
+    grid_end = last_date + timedelta(days=6 - last_date.weekday())
+    return grid_start, grid_end
+
+
+def _visit_payload(
+    visit: Appointment | AppointmentSeries,
+    provider: InsuranceProvider,
+    scheduled_at: datetime,
+) -> dict[str, Any]:
+    return {
+        "provider_id": provider.id,
+        "provider_name": provider.name,
+        "provider_specialty": provider.specialty or "",
+        "provider_color": provider.selector_color,
+        "time": scheduled_at.strftime("%I:%M %p").lstrip("0"),
+        "scheduled_at_iso": scheduled_at.isoformat(timespec="minutes"),
+        "scheduled_date": scheduled_at.strftime("%Y-%m-%d"),
+        "scheduled_time": scheduled_at.strftime("%H:%M"),
+        "estimated_invoice_cents": visit.estimated_invoice_cents,
+        "estimated_invoice_usd": f"{visit.estimated_invoice_cents / 100:.2f}",
+        "location_name": visit.location_name or "",
+        "facility_address": visit.facility_address or "",
+        "prep_notes": visit.prep_notes or "",
+        "notes": visit.notes or "",
+    }
+
+
+def appointment_payload(appt: Appointment, provider: InsuranceProvider) -> dict[str, Any]:
+    return {
+        "id": appt.id,
+        "series_id": appt.series_id,
+        "occurrence_at": "",
+        **_visit_payload(appt, provider, appt.scheduled_at),
+    }
+
+
+def occurrence_payload(series: AppointmentSeries, provider: InsuranceProvider, occurrence_at: datetime) -> dict[str, Any]:
+    """Payload for a recurring occurrence that has no Appointment row yet."""
+    return {
+        "id": None,
+        "series_id": series.id,
+        "occurrence_at": occurrence_at.isoformat(timespec="minutes"),
+        **_visit_payload(series, provider, occurrence_at),
+    }
+
+
+def build_month_grid(db: Session, year: int, month: int) -> dict[str, Any]:
+    """Week rows for the calendar view, with appointments bucketed by day."""
+    grid_start, grid_end = grid_bounds(year, month)
+    rows = db.execute(
+        select(Appointment, InsuranceProvider)
+        .join(InsuranceProvider, Appointment.provider_id == InsuranceProvider.id)
+        .where(
+            Appointment.scheduled_at >= datetime.combine(grid_start, time.min),
+            Appointment.scheduled_at < datetime.combine(grid_end + timedelta(days=1), time.min),
+        )
+        .order_by(Appointment.scheduled_at.asc())
+    ).all()
+
+    by_day: dict[date, list[tuple[datetime, dict[str, Any]]]] = {}
+    for appt, provider in rows:
+        by_day.setdefault(appt.scheduled_at.date(), []).append((appt.scheduled_at, appointment_payload(appt, provider)))
+
+    occurrences = series_occurrences(db, grid_start, grid_end)
+    if occurrences:
+        provider_ids = {series.provider_id for series, _ in occurrences}
+        providers = {p.id: p for p in db.scalars(select(InsuranceProvider).where(InsuranceProvider.id.in_(provider_ids))).all()}
+        for series, occurrence_at in occurrences:
+            provider = providers.get(series.provider_id)
+            if provider is not None:
+                by_day.setdefault(occurrence_at.date(), []).append(
+                    (occurrence_at, occurrence_payload(series, provider, occurrence_at))
+                )
+        for entries in by_day.values():
+            entries.sort(key=lambda entry: entry[0])
+
+    weeks: list[list[dict[str, Any]]] = []
+    cursor = grid_start
+    while cursor <= grid_end:
+        week: list[dict[str, Any]] = []
+        for _ in range(7):
+            week.append(
+                {
+                    "date": cursor.isoformat(),
+                    "day_num": cursor.day,
+                    "in_month": cursor.month == month,
+                    "appointments": [payload for _, payload in by_day.get(cursor, [])],
+                }
+            )
+            cursor += timedelta(days=1)
+        weeks.append(week)
+
+    (prev_year, prev_month), (next_year, next_month) = adjacent_months(year, month)
+    return {
+        "year": year,
+        "month": month,
+        "label": date(year, month, 1).strftime("%B %Y"),
+        "prev": {"year": prev_year, "month": prev_month},
+        "next": {"year": next_year, "month": next_month},
+        "weeks": weeks,
+    }
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from calendar import monthrange
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Appointment, AppointmentSeries, AppointmentSeriesException
+from app.services.reporting.rollups import apply_appointment_delta
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+MAX_COUNT = 1000
+MAX_INTERVAL = 366
+
+
+@dataclass(frozen=True, slots=True)
+class RecurrenceRule:
+    freq: str
+    interval: int = 1
+    count: int | None = None
+    until: date | None = None
+    byday: tuple[int, ...] = ()
+
+    def to_text(self) -> str:
+        parts = [f"FREQ={self.freq}", f"INTERVAL={self.interval}"]
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.strftime('%Y%m%d')}")
+        return ";".join(parts)
+
+
+def parse_rrule(text: str) -> RecurrenceRule:
+    """Parse the RRULE subset we store: FREQ, INTERVAL, COUNT, UNTIL (date) and weekly BYDAY."""
+    fields: dict[str, str] = {}
+    for part in text.strip().removeprefix("RRULE:").split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed RRULE part: {part}")
+        fields[key.strip().upper()] = value.strip().upper()
+
+    freq = fields.pop("FREQ", "")
+    if freq not in FREQUENCIES:
+        raise ValueError("RRULE requires FREQ=DAILY|WEEKLY|MONTHLY|YEARLY")
+    interval = int(fields.pop("INTERVAL", "1"))
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError("RRULE INTERVAL out of range")
+    count = int(fields.pop("COUNT")) if "COUNT" in fields else None
+    if count is not None and not 1 <= count <= MAX_COUNT:
+        raise ValueError("RRULE COUNT out of range")
+    until = datetime.strptime(fields.pop("UNTIL")[:8], "%Y%m%d").date() if "UNTIL" in fields else None
+    if count is not None and until is not None:
+        raise ValueError("RRULE cannot combine COUNT and UNTIL")
+    byday: tuple[int, ...] = ()
+    if "BYDAY" in fields:
+        if freq != "WEEKLY":
+            raise ValueError("RRULE BYDAY is only supported for WEEKLY rules")
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(day) for day in fields.pop("BYDAY").split(",")}))
+        except ValueError as exc:
+            raise ValueError("RRULE BYDAY has an unknown weekday") from exc
+    if fields:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(fields))}")
+    return RecurrenceRule(freq=freq, interval=interval, count=count, until=until, byday=byday)
+
+
+def _months_between(start: date, end: date) -> int:
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def _shift_months(start: datetime, months: int) -> datetime | None:
+    total = start.month - 1 + months
+    year, month = start.year + total // 12, total % 12 + 1
+    if start.day > monthrange(year, month)[1]:
+        # RFC 5545: an occurrence that would land on a nonexistent date is skipped.
+        return None
+    return start.replace(year=year, month=month)
+
+
+def _period_occurrences(rule: RecurrenceRule, dtstart: datetime, period: int) -> list[datetime]:
+    step = period * rule.interval
+    if rule.freq == "DAILY":
+        return [dtstart + timedelta(days=step)]
+    if rule.freq == "WEEKLY":
+        if not rule.byday:
+            return [dtstart + timedelta(weeks=step)]
+        week_start = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=step)
+        return [week_start + timedelta(days=day) for day in rule.byday if week_start + timedelta(days=day) >= dtstart]
+    shifted = _shift_months(dtstart, step if rule.freq == "MONTHLY" else step * 12)
+    return [shifted] if shifted is not None else []
+
+
+def _first_period(rule: RecurrenceRule, dtstart: datetime, window_start: date) -> int:
+    """Index of the first period that can reach the window, so open-ended rules skip ahead in O(1)."""
+    if rule.count is not None or window_start <= dtstart.date():
+        # COUNT rules have to be walked from the start to know which occurrences still exist.
+        return 0
+    if rule.freq == "DAILY":
+        elapsed = (window_start - dtstart.date()).days
+    elif rule.freq == "WEEKLY":
+        elapsed = (window_start - (dtstart.date() - timedelta(days=dtstart.weekday()))).days // 7
+    elif rule.freq == "MONTHLY":
+        elapsed = _months_between(dtstart.date(), window_start)
+    else:
+        elapsed = window_start.year - dtstart.year
+    return max(0, elapsed // rule.interval - 1)
+
+
+def iter_occurrences(rule: RecurrenceRule, dtstart: datetime, window_start: date, window_end: date) -> Iterator[datetime]:
+    """Yield occurrences whose date falls within [window_start, window_end]."""
+    emitted = 0
+    period = _first_period(rule, dtstart, window_start)
+    while True:
+        for occurrence in _period_occurrences(rule, dtstart, period):
+            if occurrence.date() > window_end or (rule.until is not None and occurrence.date() > rule.until):
+                return
+            emitted += 1
+            if rule.count is not None and emitted > rule.count:
+                return
+            if occurrence.date() >= window_start:
+                yield occurrence
+        period += 1
+
+
+@lru_cache(maxsize=4096)
+def expand_month(rule_text: str, dtstart: datetime, year: int, month: int) -> tuple[datetime, ...]:
+    """Occurrences of one rule inside one calendar month; cached because rules are immutable once stored."""
+    rule = parse_rrule(rule_text)
+    first = date(year, month, 1)
+    last = date(year, month, monthrange(year, month)[1])
+    return tuple(iter_occurrences(rule, dtstart, first, last))
+
+
+def _months_in(start: date, end: date) -> Iterator[tuple[int, int]]:
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def series_occurrences(
+    db: Session,
+    window_start: date,
+    window_end: date,
+) -> list[tuple[AppointmentSeries, datetime]]:
+    """Virtual occurrences in the window, minus cancelled or materialized ones."""
+    series_rows = db.scalars(
+        select(AppointmentSeries).where(AppointmentSeries.dtstart < datetime.combine(window_end + timedelta(days=1), time.min))
+    ).all()
+    if not series_rows:
+        return []
+
+    skipped = set(
+        db.execute(
+            select(AppointmentSeriesException.series_id, AppointmentSeriesException.occurrence_at).where(
+                AppointmentSeriesException.series_id.in_([series.id for series in series_rows]),
+                AppointmentSeriesException.occurrence_at >= datetime.combine(window_start, time.min),
+                AppointmentSeriesException.occurrence_at < datetime.combine(window_end + timedelta(days=1), time.min),
+            )
+        ).all()
+    )
+
+    results: list[tuple[AppointmentSeries, datetime]] = []
+    for series in series_rows:
+        for year, month in _months_in(window_start, window_end):
+            for occurrence in expand_month(series.rrule, series.dtstart, year, month):
+                if window_start <= occurrence.date() <= window_end and (series.id, occurrence) not in skipped:
+                    results.append((series, occurrence))
+    results.sort(key=lambda item: item[1])
+    return results
+
+
+def is_occurrence(series: AppointmentSeries, occurrence_at: datetime) -> bool:
+    return occurrence_at in expand_month(series.rrule, series.dtstart, occurrence_at.year, occurrence_at.month)
+
+
+def skip_occurrence(db: Session, series: AppointmentSeries, occurrence_at: datetime) -> None:
+    db.add(AppointmentSeriesException(series_id=series.id, occurrence_at=occurrence_at))
+
+
+def materialize_occurrence(db: Session, series: AppointmentSeries, occurrence_at: datetime) -> Appointment:
+    """Turn a virtual occurrence into a real Appointment row so it can be edited on its own."""
+    appointment = Appointment(
+        provider_id=series.provider_id,
+        scheduled_at=occurrence_at,
+        estimated_invoice_cents=series.estimated_invoice_cents,
+        location_name=series.location_name,
+        facility_address=series.facility_address,
+        prep_notes=series.prep_notes,
+        notes=series.notes,
+        series_id=series.id,
+        series_occurrence_at=occurrence_at,
+        created_at=datetime.now(UTC),
+    )
+    db.add(appointment)
+    skip_occurrence(db, series, occurrence_at)
+    db.flush()
+    apply_appointment_delta(db, occurrence_at, appointment.estimated_invoice_cents)
+    return appointment
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.services.calendar.recurrence import series_occurrences
+from app.services.calendar.versions import SERIES_KEY, read_counters
+
+# Index month - 1 -> (virtual occurrence count, estimated invoice cents).
+YearTotals = tuple[tuple[int, int], ...]
+
+
+class SeriesTotals:
+    """Per-month totals of virtual series occurrences, cached until the series counter moves.
+
+    Rollups only count stored rows, so month and year summaries add these on top. Every series,
+    exception and materialization change bumps SERIES_KEY, which retires the cached years.
+    """
+
+    def __init__(self, max_years: int = 16) -> None:
+        self.max_years = max_years
+        self._years: OrderedDict[tuple[int, int], YearTotals] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def year(self, db: Session, year: int) -> YearTotals:
+        key = (read_counters(db, [SERIES_KEY])[SERIES_KEY], year)
+        with self._lock:
+            cached = self._years.get(key)
+            if cached is not None:
+                self._years.move_to_end(key)
+                return cached
+        counts = [0] * 12
+        cents = [0] * 12
+        for series, occurrence in series_occurrences(db, date(year, 1, 1), date(year, 12, 31)):
+            counts[occurrence.month - 1] += 1
+            cents[occurrence.month - 1] += series.estimated_invoice_cents
+        totals = tuple(zip(counts, cents, strict=True))
+        with self._lock:
+            self._years[key] = totals
+            while len(self._years) > self.max_years:
+                self._years.popitem(last=False)
+        return totals
+
+    def month(self, db: Session, year: int, month: int) -> tuple[int, int]:
+        return self.year(db, year)[month - 1]
+
+
+series_totals = SeriesTotals()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import ChangeCounter
+from app.services.calendar.grid import adjacent_months
+from app.services.reporting.rollups import get_revisions
+
+PROVIDERS_KEY = "providers"
+POLICIES_KEY = "policies"
+SERIES_KEY = "appointment_series"
+
+
+def bump_counter(db: Session, key: str) -> None:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    stmt = insert(ChangeCounter).values(key=key, value=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChangeCounter.key],
+        set_={"value": ChangeCounter.value + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+
+
+def read_counters(db: Session, keys: Iterable[str]) -> dict[str, int]:
+    wanted = list(keys)
+    rows = db.execute(select(ChangeCounter.key, ChangeCounter.value).where(ChangeCounter.key.in_(wanted))).all()
+    found = {key: value for key, value in rows}
+    return {key: found.get(key, 0) for key in wanted}
+
+
+def calendar_etag(db: Session, year: int, month: int) -> str:
+    """Version tag for a month view; the grid also shows spill-over days of both neighbours."""
+    prev_month, next_month = adjacent_months(year, month)
+    months = [prev_month, (year, month), next_month]
+    revisions = get_revisions(db, months)
+    counters = read_counters(db, [PROVIDERS_KEY, POLICIES_KEY, SERIES_KEY])
+    parts = [f"{y}-{m}:{revisions.get((y, m), 0)}" for y, m in months]
+    parts.extend(f"{key}:{value}" for key, value in sorted(counters.items()))
+    digest = hashlib.sha256("|".join(parts).encode()).hexdigest()[:20]
+    return f'"cal-{year:04d}{month:02d}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor
+from datetime import date
+from typing import Any
+
+from cryptography.exceptions import InvalidTag
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.crypto import FieldEncryptor, KeyManager, UnlockedKeyManager
+from app.core.logging import get_logger
+from app.db.base import db_session
+from app.db.models import (
+    EOB,
+    Claim,
+    Document,
+    DocumentText,
+    EobExtraction,
+    Member,
+    Policy,
+    ServiceEvent,
+)
+from app.domain.enums import ClaimStatus, DocumentType
+from app.services.documents.eob_parse import (
+    FIELD_ALLOWED,
+    FIELD_BILLED,
+    FIELD_CLAIM_ID,
+    FIELD_ISSUED_DATE,
+    FIELD_MEMBER,
+    FIELD_PAID,
+    FIELD_PATIENT,
+    FIELD_PROVIDER,
+    FIELD_SERVICE_DATE,
+    parse_eob,
+)
+from app.services.documents.eob_parse import (
+    EobExtraction as ParsedEob,
+)
+from app.services.ledger.reconcile import name_similarity
+from app.services.reporting.accumulators import apply_claim_change, apply_eob
+
+logger = get_logger(__name__)
+
+STATUS_APPLIED = "applied"
+STATUS_NEEDS_REVIEW = "needs_review"
+STATUS_FAILED = "failed"
+MIN_CONFIDENCE = 0.6
+MIN_MEMBER_SIMILARITY = 0.6
+BATCH_SIZE = 200
+# Identifiers are stored encrypted on the claim or member; the extraction row only notes they were found.
+REDACTED_FIELDS = {FIELD_CLAIM_ID, FIELD_MEMBER}
+# Failures that mark one document's extraction as failed; anything else is a bug and propagates.
+APPLY_ERRORS = (InvalidTag, LookupError, TypeError, ValueError, SQLAlchemyError)
+
+
+def _fields_json(parsed: ParsedEob) -> dict[str, dict[str, Any]]:
+    out: dict[str, dict[str, Any]] = {}
+    for name, extracted in parsed.fields.items():
+        value: str | int | None = None
+        if name not in REDACTED_FIELDS:
+            value = extracted.value.isoformat() if isinstance(extracted.value, date) else extracted.value
+        out[name] = {"value": value, "confidence": extracted.confidence}
+    return out
+
+
+def _policy_for(db: Session, doc: Document) -> Policy | None:
+    if doc.policy_id is not None:
+        return db.get(Policy, doc.policy_id)
+    # A vault with a single policy has only one place an EOB can belong.
+    policies = db.scalars(select(Policy).limit(2)).all()
+    return policies[0] if len(policies) == 1 else None
+
+
+def _member_for(db: Session, policy: Policy, name: str | None) -> Member | None:
+    members = db.scalars(select(Member).where(Member.policy_id == policy.id).order_by(Member.id.asc())).all()
+    if name:
+        scored = sorted(((name_similarity(name, member.full_name), member.id, member) for member in members), reverse=True)
+        if scored and scored[0][0] >= MIN_MEMBER_SIMILARITY:
+            return scored[0][2]
+    return members[0] if len(members) == 1 else None
+
+
+def _claims_by_insurer_id(db: Session, policy: Policy, encryptor: FieldEncryptor) -> dict[str, Claim]:
+    # Claim ids are encrypted with random nonces, so they can only be compared after decrypting.
+    claims: dict[str, Claim] = {}
+    for claim in db.scalars(select(Claim).where(Claim.policy_id == policy.id).order_by(Claim.id.asc())):
+        try:
+            insurer_claim_id = encryptor.decrypt(claim.insurer_claim_id_enc) if claim.insurer_claim_id_enc else ""
+        except (ValueError, InvalidTag):
+            continue
+        if insurer_claim_id:
+            claims.setdefault(insurer_claim_id, claim)
+    return claims
+
+
+def _claim_status(parsed: ParsedEob) -> ClaimStatus:
+    paid = parsed.value(FIELD_PAID) or 0
+    if paid > 0:
+        return ClaimStatus.PAID
+    return ClaimStatus.DENIED if parsed.denied else ClaimStatus.PROCESSING
+
+
+def apply_extraction(
+    db: Session,
+    doc: Document,
+    parsed: ParsedEob,
+    encryptor: FieldEncryptor,
+    claims: dict[int, dict[str, Claim]] | None = None,
+) -> EobExtraction:
+    """Record what was parsed and, when it is complete and confident enough, the Claim/EOB rows for it.
+
+    An EOB for a claim id already on the policy adds an EOB to that claim and updates its amounts;
+    otherwise a service event and claim are created. Accumulators are adjusted as for manual entry.
+    `claims` maps policy id to its claims by decrypted insurer claim id; a batch passes the same
+    dict for every document so each policy's claim ids are decrypted once.
+    """
+    row = EobExtraction(
+        document_id=doc.id,
+        status=STATUS_NEEDS_REVIEW,
+        template=parsed.template,
+        confidence=parsed.confidence,
+        fields=_fields_json(parsed),
+    )
+    db.add(row)
+    service_date = parsed.value(FIELD_SERVICE_DATE)
+    owed = parsed.value(FIELD_PATIENT)
+    policy = _policy_for(db, doc)
+    member = _member_for(db, policy, parsed.value(FIELD_MEMBER)) if policy is not None else None
+    if service_date is None or owed is None:
+        row.error = "missing_fields"
+    elif parsed.confidence < MIN_CONFIDENCE:
+        row.error = "low_confidence"
+    elif policy is None:
+        row.error = "unknown_policy"
+    elif member is None:
+        row.error = "unknown_member"
+    if row.error:
+        db.flush()
+        return row
+    assert policy is not None and member is not None
+
+    allowed = parsed.value(FIELD_ALLOWED)
+    paid = parsed.value(FIELD_PAID)
+    insurer_claim_id = parsed.value(FIELD_CLAIM_ID)
+    if claims is None:
+        claims = {}
+    if policy.id not in claims:
+        claims[policy.id] = _claims_by_insurer_id(db, policy, encryptor)
+    claim = claims[policy.id].get(insurer_claim_id) if insurer_claim_id else None
+    if claim is None:
+        event = ServiceEvent(
+            member_id=member.id,
+            service_date=service_date,
+            provider_name=parsed.value(FIELD_PROVIDER) or "Unknown provider",
+            description=f"From EOB {doc.filename}",
+            total_billed_cents=parsed.value(FIELD_BILLED) or 0,
+        )
+        db.add(event)
+        db.flush()
+        claim = Claim(
+            service_event_id=event.id,
+            policy_id=policy.id,
+            claim_status=_claim_status(parsed),
+            insurer_claim_id_enc=encryptor.encrypt(insurer_claim_id or ""),
+            allowed_amount_cents=allowed or 0,
+            paid_amount_cents=paid or 0,
+        )
+        db.add(claim)
+        db.flush()
+        apply_claim_change(db, claim)
+        if insurer_claim_id:
+            claims[policy.id][insurer_claim_id] = claim
+    else:
+        before = (claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents)
+        claim.claim_status = _claim_status(parsed)
+        claim.allowed_amount_cents = allowed if allowed is not None else claim.allowed_amount_cents
+        claim.paid_amount_cents = paid if paid is not None else claim.paid_amount_cents
+        db.flush()
+        apply_claim_change(db, claim, before)
+
+    eob = EOB(
+        claim_id=claim.id,
+        issued_date=parsed.value(FIELD_ISSUED_DATE) or date.today(),
+        patient_responsibility_cents=owed,
+        raw_json={"document_id": doc.id, "template": parsed.template, "confidence": parsed.confidence, "fields": row.fields},
+    )
+    db.add(eob)
+    db.flush()
+    apply_eob(db, eob)
+    row.status, row.claim_id, row.eob_id = STATUS_APPLIED, claim.id, eob.id
+    db.flush()
+    return row
+
+
+class EobExtractionBatch:
+    """Parses extracted EOB text into claims in batches.
+
+    Documents typed as EOBs become eligible once their text extraction is done. Each batch decrypts
+    its texts with one unlocked key, parses them on a process pool and applies the results in a
+    single transaction, so a scheduled run over a large backlog stays cheap per document.
+    """
+
+    def __init__(self, max_workers: int = 2, batch_size: int = BATCH_SIZE, executor: Executor | None = None) -> None:
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor = executor
+        self._lock = threading.Lock()
+
+    def _pool(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that holds SQLite connections and running threads is unsafe.
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def pending(self, db: Session, limit: int | None = None) -> list[tuple[Document, DocumentText]]:
+        stmt = (
+            select(Document, DocumentText)
+            .join(DocumentText, DocumentText.document_id == Document.id)
+            .where(
+                Document.doc_type == DocumentType.EOB,
+                DocumentText.status == "done",
+                ~select(EobExtraction.id).where(EobExtraction.document_id == Document.id).exists(),
+            )
+            .order_by(Document.id.asc())
+            .limit(limit or self.batch_size)
+        )
+        return [(doc, text_row) for doc, text_row in db.execute(stmt).all()]
+
+    def run_batch(self, db: Session) -> int:
+        """Parse and apply one batch; returns how many documents were processed."""
+        batch = self.pending(db)
+        if not batch:
+            return 0
+        encryptor = FieldEncryptor(UnlockedKeyManager(KeyManager().get_or_create_kek()))
+        pool = self._pool()
+        # Every document is decrypted and parsed on its own, so one corrupt text or parser error
+        # fails that document and not the batch.
+        parsing: list[tuple[Document, Future[ParsedEob] | Exception]] = []
+        for doc, text_row in batch:
+            try:
+                text = encryptor.decrypt(text_row.text_enc) if text_row.text_enc else ""
+            except (ValueError, InvalidTag) as exc:
+                parsing.append((doc, exc))
+                continue
+            parsing.append((doc, pool.submit(parse_eob, text, text_row.confidence)))
+        claims: dict[int, dict[str, Claim]] = {}
+        for doc, parse in parsing:
+            template = "generic"
+            try:
+                if isinstance(parse, Exception):
+                    raise parse
+                result = parse.result()
+                template = result.template
+                with db.begin_nested():
+                    apply_extraction(db, doc, result, encryptor, claims)
+            except BrokenExecutor:
+                # The pool is gone, not the document; the batch is retried on the next run.
+                raise
+            except APPLY_ERRORS as exc:
+                logger.warning("EOB extraction for document %s failed (%s)", doc.id, type(exc).__name__)
+                self._record_failure(db, doc, template, exc, claims)
+            except Exception as exc:
+                logger.exception("EOB extraction for document %s failed unexpectedly", doc.id)
+                self._record_failure(db, doc, template, exc, claims)
+        return len(batch)
+
+    @staticmethod
+    def _record_failure(db: Session, doc: Document, template: str, exc: Exception, claims: dict[int, dict[str, Claim]]) -> None:
+        # Only this document's savepoint was rolled back; the failure is recorded so it is not retried forever.
+        # A claim it created may be in `claims`, so the map is rebuilt for the next document.
+        claims.clear()
+        db.add(EobExtraction(document_id=doc.id, status=STATUS_FAILED, template=template, fields={}, error=type(exc).__name__))
+        db.flush()
+
+    def run(self) -> int:
+        processed = 0
+        while True:
+            with db_session() as db:
+                count = self.run_batch(db)
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,257 @@
+"""Explanation-of-benefits parsing: extracted text in, claim fields with per-field confidence out.
+
+Insurers lay EOBs out as label/value pairs ("Date of service: 03/14/2024"), labels stacked above
+their values, or a line-item table whose "Total" row carries the amounts in header order. Each
+field is looked up with the detected insurer's labels first, then the generic ones, and each
+layout gets its own confidence. Pure functions only, so batches can be parsed in worker processes.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from app.services.providers.manual_import import DATE_FORMATS, parse_amount_cents
+
+FIELD_CLAIM_ID = "insurer_claim_id"
+FIELD_MEMBER = "member_name"
+FIELD_PROVIDER = "provider_name"
+FIELD_SERVICE_DATE = "service_date"
+FIELD_ISSUED_DATE = "issued_date"
+FIELD_BILLED = "billed_cents"
+FIELD_ALLOWED = "allowed_cents"
+FIELD_PAID = "paid_cents"
+FIELD_PATIENT = "patient_responsibility_cents"
+AMOUNT_FIELDS = (FIELD_BILLED, FIELD_ALLOWED, FIELD_PAID, FIELD_PATIENT)
+DATE_FIELDS = (FIELD_SERVICE_DATE, FIELD_ISSUED_DATE)
+
+# Confidence by how the value was found, before the text source and consistency adjustments.
+CONFIDENCE_TEMPLATE = 0.95
+CONFIDENCE_SAME_LINE = 0.85
+CONFIDENCE_NEXT_LINE = 0.7
+CONFIDENCE_TABLE = 0.6
+CONSISTENT_BONUS = 0.05
+INCONSISTENT_PENALTY = 0.7
+
+GENERIC_LABELS: dict[str, str] = {
+    FIELD_CLAIM_ID: r"claim\s*(?:number|no\.?|#|id)",
+    # Name labels need a colon: "Patient responsibility" and "Provider charges" are amounts.
+    FIELD_MEMBER: r"(?:patient|member)(?:\s*name)?\s*:",
+    FIELD_PROVIDER: r"(?:rendering\s+|service\s+)?(?:provider|doctor|physician|facility)(?:\s*name)?\s*:",
+    FIELD_SERVICE_DATE: r"(?:date\(?s?\)?\s*of\s*service|service\s*dates?|dos)",
+    FIELD_ISSUED_DATE: r"(?:statement\s*date|date\s*processed|processed\s*(?:on|date)|issue\s*date|date\s*issued|notice\s*date)",
+    FIELD_BILLED: r"(?:amount\s*billed|billed\s*amount|total\s*charges|provider\s*charges?|amount\s*charged)",
+    FIELD_ALLOWED: r"(?:allowed\s*amount|amount\s*allowed|plan\s*allowance|approved\s*amount)",
+    FIELD_PAID: r"(?:plan\s*paid|paid\s*by\s*plan|plan\s*payment|insurance\s*paid|amount\s*paid|we\s*paid)",
+    FIELD_PATIENT: (
+        r"(?:patient\s*responsibility|member\s*responsibility|your\s*responsibility|amount\s*you\s*owe|"
+        r"what\s*you\s*owe|you\s*owe|your\s*share)"
+    ),
+}
+
+# Line-item table headers are terse ("Billed", "Allowed", "You owe").
+TABLE_COLUMNS: dict[str, str] = {
+    FIELD_BILLED: r"(?:billed|charges?)",
+    FIELD_ALLOWED: r"(?:allowed|allowance)",
+    FIELD_PAID: r"(?:plan\s*paid|paid\s*by\s*plan|plan\s*pays|paid)",
+    FIELD_PATIENT: r"(?:you\s*owe|your\s*share|patient\s*resp\w*|member\s*resp\w*)",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class InsurerTemplate:
+    name: str
+    detect: str
+    labels: dict[str, str] = field(default_factory=dict)
+
+
+TEMPLATES: tuple[InsurerTemplate, ...] = (
+    InsurerTemplate(
+        "aetna",
+        r"\baetna\b",
+        {FIELD_PAID: r"aetna\s*paid", FIELD_PATIENT: r"your\s*share", FIELD_ALLOWED: r"negotiated\s*(?:rate|amount)"},
+    ),
+    InsurerTemplate(
+        "bcbs",
+        r"\b(?:blue\s*cross|blue\s*shield|bcbs|anthem)\b",
+        {FIELD_PAID: r"(?:bcbs|plan)\s*(?:paid|pays)", FIELD_PATIENT: r"your\s*total\s*cost", FIELD_ALLOWED: r"blue\s*cross\s*allowance"},
+    ),
+    InsurerTemplate(
+        "uhc",
+        r"\b(?:unitedhealthcare|united\s*healthcare|uhc)\b",
+        {FIELD_PATIENT: r"amount\s*you\s*may\s*owe", FIELD_PAID: r"your\s*plan\s*paid", FIELD_ALLOWED: r"amount\s*your\s*plan\s*allows"},
+    ),
+    InsurerTemplate(
+        "cigna",
+        r"\bcigna\b",
+        {FIELD_PATIENT: r"what\s*i\s*owe", FIELD_PAID: r"cigna\s*paid", FIELD_ALLOWED: r"discounted\s*charges?"},
+    ),
+    InsurerTemplate(
+        "humana",
+        r"\bhumana\b",
+        {FIELD_PATIENT: r"patient\s*balance", FIELD_PAID: r"humana\s*paid"},
+    ),
+    InsurerTemplate(
+        "kaiser",
+        r"\bkaiser\s*permanente\b",
+        {FIELD_PATIENT: r"member\s*cost\s*share", FIELD_PAID: r"kaiser\s*paid"},
+    ),
+)
+
+_AMOUNT_RE = re.compile(r"\(?-?\$\s?[\d,]+(?:\.\d{2})?\)?|\(?-?[\d,]*\d\.\d{2}\)?")
+_DATE_RE = re.compile(
+    r"\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|"
+    r"\d{1,2}[ -][A-Za-z]{3}[ -]\d{4}|[A-Za-z]{3}\s+\d{1,2},\s*\d{4}"
+)
+_ID_RE = re.compile(r"[A-Z0-9][A-Z0-9-]{4,}", re.IGNORECASE)
+_TOTAL_RE = re.compile(r"^\s*totals?\b", re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r"^[\s:#.\-]*")
+
+
+@dataclass(slots=True)
+class ExtractedField:
+    value: str | int | date
+    confidence: float
+
+
+@dataclass(slots=True)
+class EobExtraction:
+    template: str
+    fields: dict[str, ExtractedField]
+    denied: bool = False
+
+    def value(self, name: str):
+        extracted = self.fields.get(name)
+        return None if extracted is None else extracted.value
+
+    @property
+    def confidence(self) -> float:
+        """Mean confidence of the fields found; 0 when nothing was."""
+        if not self.fields:
+            return 0.0
+        return round(sum(item.confidence for item in self.fields.values()) / len(self.fields), 4)
+
+
+def parse_date(raw: str) -> date | None:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _value(name: str, text: str) -> str | int | date | None:
+    """The first value of the field's type at the start of `text`, or None."""
+    text = _SEPARATOR_RE.sub("", text, count=1)
+    if not text:
+        return None
+    if name in AMOUNT_FIELDS:
+        match = _AMOUNT_RE.match(text)
+        if match is None:
+            return None
+        try:
+            cents = abs(parse_amount_cents(match.group()))
+        except ValueError:
+            return None
+        return cents
+    if name in DATE_FIELDS:
+        match = _DATE_RE.match(text)
+        return parse_date(match.group()) if match else None
+    if name == FIELD_CLAIM_ID:
+        match = _ID_RE.match(text)
+        return match.group().upper() if match and any(char.isdigit() for char in match.group()) else None
+    # Names run to the end of the line or to the next wide gap (two-column layouts).
+    value = re.split(r"\s{3,}|\t", text.strip(), maxsplit=1)[0].strip(" :")
+    return value if len(value) >= 2 and any(char.isalpha() for char in value) else None
+
+
+def _find_label(name: str, pattern: str, lines: list[str]) -> tuple[str | int | date, bool] | None:
+    """Value after the first matching label: (value, True) on the same line, (value, False) on the next."""
+    label = re.compile(rf"(?<![a-z]){pattern}(?![a-z])\s*[:#]?", re.IGNORECASE)
+    for index, line in enumerate(lines):
+        for match in label.finditer(line):
+            same_line = _value(name, line[match.end() :])
+            if same_line is not None:
+                return same_line, True
+            if not line[match.end() :].strip() and index + 1 < len(lines):
+                next_line = _value(name, lines[index + 1])
+                if next_line is not None:
+                    return next_line, False
+    return None
+
+
+def _table_totals(lines: list[str], labels: dict[str, str]) -> dict[str, int]:
+    """Amounts from a "Total" row, assigned to the amount columns named by the nearest header above it."""
+    for index, line in enumerate(lines):
+        if not _TOTAL_RE.match(line):
+            continue
+        amounts = _AMOUNT_RE.findall(line)
+        if len(amounts) < 2:
+            continue
+        for header in reversed(lines[max(0, index - 30) : index]):
+            columns = []
+            for name in AMOUNT_FIELDS:
+                match = re.search(labels[name], header, re.IGNORECASE)
+                if match:
+                    columns.append((match.start(), name))
+            if len(columns) >= 2:
+                columns.sort()
+                # Tables may lead with non-amount columns; totals line up from the right.
+                if len(amounts) < len(columns):
+                    break
+                found: dict[str, int] = {}
+                for (_, name), raw in zip(columns, amounts[-len(columns) :]):
+                    try:
+                        found[name] = abs(parse_amount_cents(raw))
+                    except ValueError:
+                        continue
+                return found
+    return {}
+
+
+def detect_template(text: str) -> InsurerTemplate | None:
+    head = text[:4000]
+    return next((template for template in TEMPLATES if re.search(template.detect, head, re.IGNORECASE)), None)
+
+
+def parse_eob(text: str, source_confidence: float = 1.0) -> EobExtraction:
+    """Fields found in an EOB's text; confidences are scaled by how trustworthy the text itself is."""
+    template = detect_template(text)
+    lines = [line for line in text.splitlines() if line.strip()]
+    fields: dict[str, ExtractedField] = {}
+    for name, generic in GENERIC_LABELS.items():
+        attempts = [(template.labels[name], True)] if template and name in template.labels else []
+        attempts.append((generic, False))
+        for pattern, specific in attempts:
+            found = _find_label(name, pattern, lines)
+            if found is None:
+                continue
+            value, same_line = found
+            confidence = CONFIDENCE_TEMPLATE if specific and same_line else CONFIDENCE_SAME_LINE if same_line else CONFIDENCE_NEXT_LINE
+            fields[name] = ExtractedField(value, confidence)
+            break
+
+    columns = {
+        name: f"(?:{template.labels[name]})|{column}" if template and name in template.labels else column
+        for name, column in TABLE_COLUMNS.items()
+    }
+    for name, cents in _table_totals(lines, columns).items():
+        # A totals row beats a label hit on a single line item when they disagree.
+        current = fields.get(name)
+        if current is None or current.value != cents:
+            fields[name] = ExtractedField(cents, CONFIDENCE_TABLE)
+        else:
+            current.confidence = min(1.0, current.confidence + CONSISTENT_BONUS)
+
+    allowed, paid, owed = (fields.get(name) for name in (FIELD_ALLOWED, FIELD_PAID, FIELD_PATIENT))
+    if allowed and paid and owed:
+        consistent = abs(allowed.value - paid.value - owed.value) <= 1  # type: ignore[operator]
+        for item in (allowed, paid, owed):
+            item.confidence = min(1.0, item.confidence + CONSISTENT_BONUS) if consistent else item.confidence * INCONSISTENT_PENALTY
+
+    for item in fields.values():
+        item.confidence = round(item.confidence * source_confidence, 4)
+    denied = bool(re.search(r"\b(?:claim\s+(?:was\s+)?denied|denied|not\s+covered)\b", text, re.IGNORECASE))
+    return EobExtraction(template=template.name if template else "generic", fields=fields, denied=denied)
@@ -1,13 +1,260 @@
+"""Local text extraction for uploaded documents.
+
+PDFs are read from their embedded text layer first (pypdf when installed, otherwise a small
+built-in parser that handles the uncompressed and Flate-compressed content streams that scanners
+and statement generators produce). Images, and PDFs without a usable text layer, fall back to
+the `tesseract` binary when it is on PATH, rasterizing PDF pages with `pdftoppm`. Both tools get
+the document over stdin and answer on stdout, so the plaintext is never written to disk. If one
+fails or times out, the text layer is used as far as it goes. Nothing here touches the database
+or the network, so it can run in a worker process.
+"""
+
 from __future__ import annotations
 
+import base64
+import io
+import re
+import shutil
+import subprocess
+import zlib
+from collections.abc import Iterator
 from dataclasses import dataclass
 
+from app.core.logging import get_logger
+
+try:  # Optional: much better coverage of fonts and encodings than the built-in parser.
+    import pypdf
+except ImportError:  # pragma: no cover - depends on the install
+    pypdf = None
+
+logger = get_logger(__name__)
+
+METHOD_PDF_TEXT = "pdf_text"
+METHOD_OCR = "ocr"
+METHOD_NONE = "none"
+
+# A text layer shorter than this is treated as a scan (page numbers, a stray header).
+MIN_TEXT_CHARS = 40
+MAX_OCR_PAGES = 50
+OCR_TIMEOUT_SECONDS = 120
+IMAGE_TYPES = {"image/png", "image/jpeg", "image/jpg", "image/tiff"}
+
+_FILTER_RE = re.compile(rb"/(\w+Decode)\b")
+_DECODERS = {
+    b"FlateDecode": zlib.decompress,
+    b"ASCII85Decode": lambda data: base64.a85decode(data.strip().removeprefix(b"<~").removesuffix(b"~>")),
+    b"ASCIIHexDecode": lambda data: bytes.fromhex(re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0]).decode()),
+}
+_STREAM_RE = re.compile(rb"<<(?P<dict>(?:(?!>>).)*?)>>\s*stream\r?\n", re.DOTALL)
+_DELIMITERS = b"()<>[]{}/%"
+_WHITESPACE = b" \t\r\n\f\x00"
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+
 
 @dataclass(slots=True)
 class OCRResult:
     text: str
     confidence: float
+    method: str = METHOD_NONE
+    pages: int = 0
+
+
+def _content_streams(pdf: bytes) -> Iterator[bytes]:
+    for match in _STREAM_RE.finditer(pdf):
+        start = match.end()
+        end = pdf.find(b"endstream", start)
+        if end == -1:
+            return
+        data = pdf[start:end].rstrip(b"\r\n")
+        header = match.group("dict")
+        if b"/Subtype/Image" in header.replace(b" ", b"") or b"/Type/XObject" in header.replace(b" ", b""):
+            continue
+        try:
+            for name in _FILTER_RE.findall(header.split(b"/DecodeParms")[0]):
+                data = _DECODERS[name](data)
+        except (KeyError, ValueError, zlib.error):
+            continue  # DCT, JBIG2 and friends are images, not text; corrupt streams are skipped.
+        yield data
+
+
+def _literal_string(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Parse a (...) string starting after the opening paren; returns (value, next position)."""
+    out = bytearray()
+    depth = 1
+    while pos < len(data):
+        char = data[pos]
+        if char == 0x5C and pos + 1 < len(data):  # backslash
+            nxt = data[pos + 1]
+            if nxt in _ESCAPES:
+                out += _ESCAPES[nxt]
+                pos += 2
+            elif (digits := re.match(rb"[0-7]{1,3}", data[pos + 1 : pos + 4])) is not None:
+                out.append(int(digits.group(), 8) & 0xFF)
+                pos += 1 + len(digits.group())
+            elif nxt in b"\r\n":
+                pos += 2
+            else:
+                out.append(nxt)
+                pos += 2
+            continue
+        if char == 0x28:
+            depth += 1
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos + 1
+        out.append(char)
+        pos += 1
+    return bytes(out), pos
+
+
+def _tokens(data: bytes) -> Iterator[tuple[str, bytes | float]]:
+    """("str", bytes), ("num", float), ("op", bytes) and ("[" / "]") tokens of a content stream."""
+    pos, size = 0, len(data)
+    while pos < size:
+        char = data[pos]
+        if char in _WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # % comment
+            end = data.find(b"\n", pos)
+            pos = size if end == -1 else end + 1
+        elif char == 0x28:
+            value, pos = _literal_string(data, pos + 1)
+            yield "str", value
+        elif char == 0x3C and data[pos + 1 : pos + 2] != b"<":
+            end = data.find(b">", pos)
+            end = size if end == -1 else end
+            digits = re.sub(rb"[^0-9A-Fa-f]", b"", data[pos + 1 : end])
+            yield "str", bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+            pos = end + 1
+        elif char in b"[]":
+            yield chr(char), b""
+            pos += 1
+        elif char in _DELIMITERS:
+            # Names, dictionaries and inline-image markers carry no text.
+            pos += 1
+            while pos < size and data[pos] not in _WHITESPACE and data[pos] not in _DELIMITERS:
+                pos += 1
+        else:
+            end = pos
+            while end < size and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+                end += 1
+            word = data[pos:end]
+            try:
+                yield "num", float(word)
+            except ValueError:
+                yield "op", word
+            pos = end
+
+
+def _decode(value: bytes) -> str:
+    if value.startswith(b"\xfe\xff"):
+        return value[2:].decode("utf-16-be", errors="ignore")
+    return value.decode("cp1252", errors="ignore")
+
+
+def _stream_text(data: bytes) -> str:
+    parts: list[str] = []
+    operands: list[tuple[str, bytes | float | list[tuple[str, bytes | float]]]] = []
+    array: list[tuple[str, bytes | float]] | None = None
+    for kind, value in _tokens(data):
+        if kind == "[":
+            array = []
+        elif kind == "]":
+            operands.append(("array", array or []))
+            array = None
+        elif array is not None:
+            array.append((kind, value))
+        elif kind != "op":
+            operands.append((kind, value))
+        else:
+            if value in (b"Tj", b"'", b'"'):
+                if value != b"Tj":
+                    parts.append("\n")
+                strings = [v for _, v in operands if isinstance(v, bytes)]
+                if strings:
+                    parts.append(_decode(strings[-1]))
+            elif value == b"TJ" and operands and isinstance(operands[-1][1], list):
+                for _, item in operands[-1][1]:
+                    if isinstance(item, bytes):
+                        parts.append(_decode(item))
+                    elif item < -200:
+                        parts.append(" ")  # a large negative kern is a word gap
+            elif value in (b"T*", b"ET"):
+                parts.append("\n")
+            elif value in (b"Td", b"TD") and len(operands) >= 2 and operands[-1][0] == "num":
+                parts.append("\n" if operands[-1][1] != 0 else " ")
+            operands = []
+    return "".join(parts)
+
+
+def _normalize(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def pdf_text_layer(payload: bytes) -> tuple[str, int]:
+    """Embedded text of a PDF and its page count (0 when unknown)."""
+    if pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(payload))
+            return _normalize("\n".join(page.extract_text() or "" for page in reader.pages)), len(reader.pages)
+        except (pypdf.errors.PyPdfError, ValueError, KeyError, TypeError) as exc:
+            # Fall through to the built-in parser on malformed files.
+            logger.debug("pypdf could not read the text layer: %s", type(exc).__name__)
+    pages = len(re.findall(rb"/Type\s*/Page[^s]", payload))
+    return _normalize("\n".join(_stream_text(stream) for stream in _content_streams(payload))), pages
+
+
+def ocr_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+def _pipe(args: list[str], payload: bytes) -> bytes:
+    return subprocess.run(args, input=payload, capture_output=True, timeout=OCR_TIMEOUT_SECONDS, check=True).stdout
+
+
+def _tesseract(image: bytes) -> str:
+    return _pipe(["tesseract", "stdin", "stdout"], image).decode("utf-8", errors="ignore")
+
+
+def ocr_image(payload: bytes) -> str:
+    return _normalize(_tesseract(payload))
+
+
+def ocr_pdf(payload: bytes, pages: int) -> tuple[str, int]:
+    """OCR of the first `pages` rasterized PDF pages (at least one); needs both pdftoppm and tesseract."""
+    if shutil.which("pdftoppm") is None:
+        return "", 0
+    count = min(max(pages, 1), MAX_OCR_PAGES)
+    texts = []
+    for page in range(1, count + 1):
+        # One page per call: with -singlefile and no output root, pdftoppm writes the image to stdout.
+        image = _pipe(["pdftoppm", "-r", "300", "-gray", "-png", "-f", str(page), "-l", str(page), "-singlefile", "-"], payload)
+        texts.append(_tesseract(image))
+    return _normalize("\n".join(texts)), count
 
 
-def extract_text_locally(_pdf_bytes: bytes) -> OCRResult:
+def extract_text_locally(payload: bytes, mime_type: str = "application/pdf") -> OCRResult:
+    """Best local text for a document; empty text with method "none" when nothing applies."""
+    if payload.startswith(b"%PDF"):
+        text, pages = pdf_text_layer(payload)
+        if len(text) >= MIN_TEXT_CHARS:
+            return OCRResult(text=text, confidence=1.0, method=METHOD_PDF_TEXT, pages=pages)
+        if ocr_available():
+            try:
+                ocr_text, ocr_pages = ocr_pdf(payload, pages)
+            except (subprocess.SubprocessError, OSError) as exc:
+                logger.warning("OCR of a scanned PDF failed, keeping its text layer (%s)", type(exc).__name__)
+                ocr_text, ocr_pages = "", 0
+            if ocr_text:
+                return OCRResult(text=ocr_text, confidence=0.7, method=METHOD_OCR, pages=ocr_pages or pages)
+        return OCRResult(text=text, confidence=0.5 if text else 0.0, method=METHOD_PDF_TEXT if text else METHOD_NONE, pages=pages)
+    if mime_type.lower() in IMAGE_TYPES and ocr_available():
+        try:
+            text = ocr_image(payload)
+        except (subprocess.SubprocessError, OSError) as exc:
+            logger.warning("OCR of an image failed (%s)", type(exc).__name__)
+            return OCRResult(text="", confidence=0.0)
+        return OCRResult(text=text, confidence=0.7 if text else 0.0, method=METHOD_OCR, pages=1)
     return OCRResult(text="", confidence=0.0)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import multiprocessing
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import UTC, datetime
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings
+from app.core.crypto import FieldEncryptor
+from app.core.logging import get_logger
+from app.db.base import db_session
+from app.db.models import Document, DocumentText
+from app.services.documents.ocr import extract_text_locally
+from app.services.documents.store import DocumentStore
+from app.services.search.index import KIND_DOCUMENT, index_entry
+
+logger = get_logger(__name__)
+
+PENDING_STATUSES = ("queued", "running")
+# Expected failures for one document; anything else is logged with its traceback as a bug.
+EXTRACTION_ERRORS = (
+    InvalidTag,
+    InvalidUnwrap,
+    LookupError,
+    OSError,
+    RuntimeError,
+    ValueError,
+    SQLAlchemyError,
+    subprocess.SubprocessError,
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class DocumentTextQueue:
+    """Extracts document text after upload, so requests only enqueue.
+
+    Decryption, storage and indexing happen on coordinator threads; the CPU-bound parsing and
+    OCR run on a bounded process pool, so a backlog of scans never competes with request
+    handling for the GIL. Plaintext never touches disk: workers get bytes over a pipe and the
+    result is stored encrypted.
+    """
+
+    def __init__(self, settings: Settings, max_workers: int = 2) -> None:
+        self.settings = settings
+        self.max_workers = max_workers
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executors(self) -> tuple[ThreadPoolExecutor, ProcessPoolExecutor]:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cb-ocr")
+            if self._processes is None:
+                # spawn: forking a process that holds SQLite connections and running threads is unsafe.
+                self._processes = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._threads, self._processes
+
+    def create_job(self, db: Session, document_id: int) -> DocumentText:
+        job = db.scalar(select(DocumentText).where(DocumentText.document_id == document_id))
+        if job is None:
+            job = DocumentText(document_id=document_id, status="queued")
+            db.add(job)
+        else:
+            job.status, job.error, job.finished_at = "queued", None, None
+        db.flush()
+        return job
+
+    def submit(self, document_id: int) -> None:
+        threads, _ = self._executors()
+        threads.submit(self._run, document_id)
+
+    def _extract(self, db: Session, job: DocumentText) -> None:
+        doc = db.get(Document, job.document_id)
+        if doc is None:
+            raise LookupError("Document is gone")
+        payload = DocumentStore(self.settings.docs_dir).decrypt_and_verify(
+            doc.storage_path,
+            doc.nonce,
+            doc.wrapped_dek,
+            doc.sha256_ciphertext,
+            doc.sha256_plaintext,
+            doc.size_bytes,
+            doc.encryption_version,
+        )
+        _, processes = self._executors()
+        result = processes.submit(extract_text_locally, payload, doc.mime_type).result()
+        job.text_enc = FieldEncryptor().encrypt(result.text) if result.text else None
+        job.method = result.method
+        job.confidence = result.confidence
+        job.pages = result.pages
+        index_entry(db, KIND_DOCUMENT, doc.id, f"{doc.filename}\n{result.text}")
+
+    def _run(self, document_id: int) -> None:
+        with db_session() as db:
+            job = db.scalar(select(DocumentText).where(DocumentText.document_id == document_id))
+            if job is None or job.status not in PENDING_STATUSES:
+                return
+            job.status = "running"
+            db.commit()
+            try:
+                self._extract(db, job)
+            except EXTRACTION_ERRORS as exc:
+                logger.warning("Text extraction for document %s failed (%s)", document_id, type(exc).__name__)
+                self._mark_failed(db, document_id, exc)
+                return
+            except Exception as exc:
+                # Still marked failed: a job left "running" would be retried after every restart.
+                logger.exception("Text extraction for document %s failed unexpectedly", document_id)
+                self._mark_failed(db, document_id, exc)
+                return
+            job.status = "done"
+            job.finished_at = _utcnow()
+
+    @staticmethod
+    def _mark_failed(db: Session, document_id: int, exc: Exception) -> None:
+        db.rollback()
+        job = db.scalar(select(DocumentText).where(DocumentText.document_id == document_id))
+        if job is not None:
+            job.status = "failed"
+            job.error = type(exc).__name__
+            job.finished_at = _utcnow()
+
+    def resume_pending(self) -> int:
+        """Requeue jobs interrupted by a restart and queue documents uploaded before extraction existed."""
+        with db_session() as db:
+            jobs = db.scalars(select(DocumentText).where(DocumentText.status.in_(PENDING_STATUSES))).all()
+            document_ids = []
+            for job in jobs:
+                job.status = "queued"
+                document_ids.append(job.document_id)
+            missing = db.scalars(
+                select(Document.id).where(~select(DocumentText.id).where(DocumentText.document_id == Document.id).exists())
+            ).all()
+            for document_id in missing:
+                db.add(DocumentText(document_id=document_id, status="queued"))
+                document_ids.append(document_id)
+        for document_id in document_ids:
+            self.submit(document_id)
+        return len(document_ids)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, None
+            processes, self._processes = self._processes, None
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+        if processes is not None:
+            processes.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1 @@
+# exports package
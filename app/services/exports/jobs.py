@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, BinaryIO
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings
+from app.core.logging import get_logger
+from app.db.base import db_session
+from app.db.models import (
+    Appointment,
+    AppointmentSeries,
+    Document,
+    ExpenseLineItem,
+    ExportJob,
+    InsuranceProvider,
+    Policy,
+)
+
+logger = get_logger(__name__)
+
+KIND_ARCHIVE = "archive"
+EXPORT_KINDS = {KIND_ARCHIVE}
+PENDING_STATUSES = ("queued", "running")
+# Expected failures; anything else is logged with its traceback as a bug.
+EXPORT_ERRORS = (OSError, LookupError, TypeError, ValueError, SQLAlchemyError)
+# Fixed member timestamp so identical vault contents always produce byte-identical archives.
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def stable_json(data: object) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+
+
+def collect_archive_payload(db: Session) -> tuple[dict[str, Any], list[Document]]:
+    providers = db.scalars(select(InsuranceProvider).order_by(InsuranceProvider.id.asc())).all()
+    policies = db.scalars(select(Policy).order_by(Policy.id.asc())).all()
+    appointments = db.scalars(select(Appointment).order_by(Appointment.id.asc())).all()
+    series = db.scalars(select(AppointmentSeries).order_by(AppointmentSeries.id.asc())).all()
+    expenses = db.scalars(select(ExpenseLineItem).order_by(ExpenseLineItem.id.asc())).all()
+    docs = list(db.scalars(select(Document).order_by(Document.id.asc())).all())
+
+    payload = {
+        "providers": [
+            {
+                "id": p.id,
+                "name": p.name,
+                "specialty": p.specialty,
+                "selector_color": p.selector_color,
+                "estimated_copay_cents": p.estimated_copay_cents,
+                "adapter_type": p.adapter_type.value,
+            }
+            for p in providers
+        ],
+        "policies": [
+            {
+                "id": p.id,
+                "provider_id": p.provider_id,
+                "plan_type": p.plan_type.value,
+                "monthly_premium_cents": p.monthly_premium_cents,
+            }
+            for p in policies
+        ],
+        "expenses": [{"id": e.id, "amount_cents": e.amount_cents, "incurred_at": e.incurred_at.isoformat()} for e in expenses],
+        "appointments": [
+            {
+                "id": a.id,
+                "provider_id": a.provider_id,
+                "scheduled_at": a.scheduled_at.isoformat(timespec="minutes"),
+                "estimated_invoice_cents": a.estimated_invoice_cents,
+                "series_id": a.series_id,
+            }
+            for a in appointments
+        ],
+        "appointment_series": [
+            {
+                "id": s.id,
+                "provider_id": s.provider_id,
+                "rrule": s.rrule,
+                "dtstart": s.dtstart.isoformat(timespec="minutes"),
+                "estimated_invoice_cents": s.estimated_invoice_cents,
+            }
+            for s in series
+        ],
+    }
+    return payload, docs
+
+
+def source_fingerprint(payload: dict[str, Any], docs: list[Document]) -> str:
+    h = hashlib.sha256(stable_json(payload))
+    for doc in docs:
+        h.update(f"|{doc.id}:{doc.filename}:{doc.sha256_ciphertext}".encode())
+    return h.hexdigest()
+
+
+def write_archive(target: BinaryIO, payload: dict[str, Any], docs: list[Document], docs_dir: Path) -> None:
+    with ZipFile(target, "w", compression=ZIP_DEFLATED) as zf:
+        zf.writestr(ZipInfo("data.json", date_time=_ZIP_EPOCH), stable_json(payload), compress_type=ZIP_DEFLATED)
+        for doc in docs:
+            path = docs_dir / doc.storage_path
+            if not path.exists():
+                continue
+            info = ZipInfo(str(Path("documents") / f"{doc.id}-{doc.filename}.bin"), date_time=_ZIP_EPOCH)
+            with path.open("rb") as src, zf.open(info, "w") as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    dst.write(chunk)
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExportJobQueue:
+    """Builds export artifacts on a background worker so requests only enqueue and poll."""
+
+    def __init__(self, settings: Settings, max_workers: int = 1) -> None:
+        self.settings = settings
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cb-export")
+            return self._executor
+
+    def artifact_path(self, job: ExportJob) -> Path | None:
+        if not job.artifact_name:
+            return None
+        return self.settings.exports_dir / job.artifact_name
+
+    def create_job(self, db: Session, user_id: int | None, kind: str = KIND_ARCHIVE) -> ExportJob:
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"Unknown export kind: {kind}")
+        job = ExportJob(requested_by_user_id=user_id, kind=kind, status="queued")
+        db.add(job)
+        db.flush()
+        return job
+
+    def submit(self, job_id: int) -> None:
+        self._get_executor().submit(self._run, job_id)
+
+    def _reusable_artifact(self, db: Session, job: ExportJob, fingerprint: str) -> ExportJob | None:
+        cached = db.scalar(
+            select(ExportJob)
+            .where(
+                ExportJob.kind == job.kind,
+                ExportJob.status == "done",
+                ExportJob.source_sha256 == fingerprint,
+                ExportJob.expires_at > _utcnow(),
+            )
+            .order_by(ExportJob.id.desc())
+            .limit(1)
+        )
+        if cached is None:
+            return None
+        path = self.artifact_path(cached)
+        if path is None or not path.exists():
+            return None
+        return cached
+
+    def _build_archive(self, db: Session, job: ExportJob) -> None:
+        payload, docs = collect_archive_payload(db)
+        fingerprint = source_fingerprint(payload, docs)
+        job.source_sha256 = fingerprint
+
+        cached = self._reusable_artifact(db, job, fingerprint)
+        if cached is not None:
+            job.artifact_name = cached.artifact_name
+            job.artifact_sha256 = cached.artifact_sha256
+            job.size_bytes = cached.size_bytes
+            # expire_artifacts keeps files that pending jobs name.
+            db.commit()
+            return
+
+        tmp = self.settings.exports_dir / f"job-{job.id}.zip.tmp"
+        try:
+            with tmp.open("wb") as f:
+                write_archive(f, payload, docs, self.settings.docs_dir)
+                f.flush()
+                os.fsync(f.fileno())
+            digest = _sha256_file(tmp)
+            final = self.settings.exports_dir / f"{digest}.zip"
+            # Name the artifact before it appears, so expire_artifacts never deletes it mid-build.
+            job.artifact_name = final.name
+            db.commit()
+            os.replace(tmp, final)
+        finally:
+            tmp.unlink(missing_ok=True)
+        job.artifact_name = final.name
+        job.artifact_sha256 = digest
+        job.size_bytes = final.stat().st_size
+
+    def _run(self, job_id: int) -> None:
+        with db_session() as db:
+            job = db.get(ExportJob, job_id)
+            if job is None or job.status not in PENDING_STATUSES:
+                return
+            job.status = "running"
+            db.commit()
+            try:
+                self._build_archive(db, job)
+            except EXPORT_ERRORS as exc:
+                logger.warning("Export job %s failed (%s)", job_id, type(exc).__name__)
+                self._mark_failed(db, job_id, exc)
+                return
+            except Exception as exc:
+                # Still marked failed: a job left "running" would never finish or be cleaned up.
+                logger.exception("Export job %s failed unexpectedly", job_id)
+                self._mark_failed(db, job_id, exc)
+                return
+            now = _utcnow()
+            job.status = "done"
+            job.finished_at = now
+            job.expires_at = now + timedelta(hours=self.settings.export_ttl_hours)
+
+    @staticmethod
+    def _mark_failed(db: Session, job_id: int, exc: Exception) -> None:
+        db.rollback()
+        job = db.get(ExportJob, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = type(exc).__name__
+            job.finished_at = _utcnow()
+
+    def resume_pending(self) -> int:
+        """Requeue jobs interrupted by a restart; the worker rebuilds them from scratch."""
+        with db_session() as db:
+            jobs = db.scalars(select(ExportJob).where(ExportJob.status.in_(PENDING_STATUSES))).all()
+            job_ids = []
+            for job in jobs:
+                job.status = "queued"
+                job_ids.append(job.id)
+        for job_id in job_ids:
+            self.submit(job_id)
+        return len(job_ids)
+
+    def expire_artifacts(self) -> int:
+        """Expire finished jobs past their TTL and delete artifacts no live job references.
+
+        Pending jobs count as live: a worker names its artifact on the job before moving the file
+        into place, so a build in progress keeps its own file and nothing else.
+        """
+        with db_session() as db:
+            expired = db.scalars(
+                select(ExportJob).where(ExportJob.status == "done", ExportJob.expires_at <= _utcnow())
+            ).all()
+            for job in expired:
+                job.status = "expired"
+            db.flush()
+            live = set(
+                db.scalars(
+                    select(ExportJob.artifact_name).where(
+                        ExportJob.status.in_(("done", *PENDING_STATUSES)), ExportJob.artifact_name.is_not(None)
+                    )
+                ).all()
+            )
+        for path in self.settings.exports_dir.glob("*.zip"):
+            if path.name not in live:
+                path.unlink(missing_ok=True)
+        return len(expired)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1 @@
+# ledger package
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.audit import write_audit_events
+from app.db.models import ExpenseLineItem, PatientPayment, ServiceEvent
+from app.services.reporting.accumulators import apply_event_payments
+from app.services.reporting.rollups import apply_expense_delta
+from app.services.sync.dedupe import make_idempotency_key
+
+# Rows per transaction; keeps each IN (...) under SQLite's default 32766 bound-parameter limit.
+CHUNK_SIZE = 5000
+MAX_ROWS = 100_000
+
+STATUS_CREATED = "created"
+STATUS_DUPLICATE = "duplicate"
+STATUS_UPDATED = "updated"
+STATUS_ERROR = "error"
+
+
+@dataclass(frozen=True, slots=True)
+class NewExpense:
+    amount_cents: int
+    incurred_at: date
+    category: str = "medical"
+    memo: str = ""
+    service_event_id: int | None = None
+    # Sources with their own stable transaction ids key on those instead of the row contents.
+    idempotency_key: str | None = None
+    # Card last four for the PatientPayment row, when a payment source is given.
+    last4: str | None = None
+
+
+@dataclass(slots=True)
+class IngestResult:
+    index: int
+    status: str
+    id: int | None = None
+    error: str | None = None
+
+
+def expense_key(payload: NewExpense) -> str:
+    """Same key the single-row API uses, so bulk and one-off writes dedupe against each other."""
+    if payload.idempotency_key:
+        return payload.idempotency_key
+    return make_idempotency_key(payload.incurred_at.isoformat(), str(payload.amount_cents), payload.category, payload.memo)
+
+
+def parse_json_array(body: bytes) -> list[Any]:
+    data = json.loads(body)
+    if not isinstance(data, list):
+        raise TypeError("Expected a JSON array of expenses")
+    return data
+
+
+def iter_ndjson(lines: Iterable[bytes]) -> Iterator[Any]:
+    """Decode one JSON document per line; unparseable lines come through as ValueError instances."""
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield exc
+
+
+def _known_service_events(db: Session, rows: list[tuple[int, NewExpense]]) -> set[int]:
+    wanted = sorted({payload.service_event_id for _, payload in rows if payload.service_event_id is not None})
+    known: set[int] = set()
+    for start in range(0, len(wanted), CHUNK_SIZE):
+        known.update(db.scalars(select(ServiceEvent.id).where(ServiceEvent.id.in_(wanted[start : start + CHUNK_SIZE]))).all())
+    return known
+
+
+def _update_changed(
+    db: Session,
+    rows: list[tuple[int, NewExpense, str]],
+    existing: dict[str, int],
+    user_id: int | None,
+    payment_source: str | None,
+) -> set[int]:
+    """Write new amounts, dates and categories onto existing rows; returns the input indexes that changed."""
+    ids = [existing[key] for _, _, key in rows]
+    current = {
+        expense_id: (amount, incurred_at, category, event_id)
+        for expense_id, amount, incurred_at, category, event_id in db.execute(
+            select(
+                ExpenseLineItem.id,
+                ExpenseLineItem.amount_cents,
+                ExpenseLineItem.incurred_at,
+                ExpenseLineItem.category,
+                ExpenseLineItem.service_event_id,
+            ).where(ExpenseLineItem.id.in_(ids))
+        ).tuples()
+    }
+    changed = [
+        (index, payload, key)
+        for index, payload, key in rows
+        if (payload.amount_cents, payload.incurred_at, payload.category) != current[existing[key]][:3]
+    ]
+    if not changed:
+        return set()
+
+    db.execute(
+        update(ExpenseLineItem),
+        [
+            {
+                "id": existing[key],
+                "amount_cents": payload.amount_cents,
+                "incurred_at": payload.incurred_at,
+                "category": payload.category,
+            }
+            for _, payload, key in changed
+        ],
+    )
+    if payment_source is not None:
+        db.connection().execute(
+            update(PatientPayment)
+            .where(PatientPayment.expense_id == bindparam("b_expense_id"))
+            .values(
+                paid_at=bindparam("b_paid_at"),
+                amount_cents=bindparam("b_amount_cents"),
+                last4=bindparam("b_last4"),
+                payee=bindparam("b_payee"),
+            ),
+            [
+                {
+                    "b_expense_id": existing[key],
+                    "b_paid_at": payload.incurred_at,
+                    "b_amount_cents": payload.amount_cents,
+                    "b_last4": payload.last4,
+                    "b_payee": payload.memo[:255] or None,
+                }
+                for _, payload, key in changed
+            ],
+        )
+
+    # Back the old values out of their month and event, then add the new ones.
+    months: dict[tuple[int, int], tuple[int, int]] = {}
+    payments: dict[int, int] = {}
+    for _, payload, key in changed:
+        amount, incurred_at, _, event_id = current[existing[key]]
+        for day, cents, count in ((incurred_at, -amount, -1), (payload.incurred_at, payload.amount_cents, 1)):
+            bucket = (day.year, day.month)
+            count_delta, total = months.get(bucket, (0, 0))
+            months[bucket] = (count_delta + count, total + cents)
+        if event_id is not None:
+            payments[event_id] = payments.get(event_id, 0) + payload.amount_cents - amount
+    for (year, month), (count, total) in sorted(months.items()):
+        if count or total:
+            apply_expense_delta(db, date(year, month, 1), total, count)
+    for event_id, amount in sorted(payments.items()):
+        if amount:
+            apply_event_payments(db, event_id, amount)
+    write_audit_events(
+        db,
+        "update",
+        "expense",
+        user_id,
+        (
+            (key, {"amount_cents": payload.amount_cents, "previous_amount_cents": current[existing[key]][0]})
+            for _, payload, key in changed
+        ),
+    )
+    return {index for index, _, _ in changed}
+
+
+def _ingest_chunk(
+    db: Session,
+    chunk: list[tuple[int, NewExpense, str]],
+    user_id: int | None,
+    results: list[IngestResult],
+    payment_source: str | None,
+    update_existing: bool,
+) -> None:
+    keys = list({key for _, _, key in chunk})
+    existing: dict[str, int] = {
+        key: expense_id
+        for key, expense_id in db.execute(
+            select(ExpenseLineItem.idempotency_key, ExpenseLineItem.id).where(ExpenseLineItem.idempotency_key.in_(keys))
+        ).all()
+    }
+
+    pending: dict[str, tuple[int, NewExpense]] = {}
+    duplicates: list[tuple[int, str]] = []
+    replays: list[tuple[int, NewExpense, str]] = []
+    for index, payload, key in chunk:
+        if key in existing:
+            duplicates.append((index, key))
+            replays.append((index, payload, key))
+        elif key in pending:
+            duplicates.append((index, key))
+        else:
+            pending[key] = (index, payload)
+
+    if pending:
+        # Core insert on the session's connection: executemany with RETURNING, no ORM bookkeeping.
+        # A concurrent request may commit one of these keys after the lookup above; ON CONFLICT
+        # skips those rows instead of failing the chunk, and they are reported as duplicates.
+        inserted = db.connection().execute(
+            sqlite_insert(ExpenseLineItem)
+            .on_conflict_do_nothing(index_elements=[ExpenseLineItem.idempotency_key])
+            .returning(ExpenseLineItem.idempotency_key, ExpenseLineItem.id),
+            [
+                {
+                    "amount_cents": payload.amount_cents,
+                    "incurred_at": payload.incurred_at,
+                    "category": payload.category,
+                    "idempotency_key": key,
+                    "service_event_id": payload.service_event_id,
+                    "reconciled": False,
+                }
+                for key, (_, payload) in pending.items()
+            ],
+        ).tuples()
+        created: dict[str, int] = {key: expense_id for key, expense_id in inserted if key is not None}
+        raced = [key for key in pending if key not in created]
+        if raced:
+            existing.update(
+                (key, expense_id)
+                for key, expense_id in db.execute(
+                    select(ExpenseLineItem.idempotency_key, ExpenseLineItem.id).where(ExpenseLineItem.idempotency_key.in_(raced))
+                ).tuples()
+                if key is not None
+            )
+            for key in raced:
+                index, payload = pending.pop(key)
+                duplicates.append((index, key))
+                replays.append((index, payload, key))
+
+    if pending:
+        if payment_source is not None:
+            db.connection().execute(
+                insert(PatientPayment),
+                [
+                    {
+                        "expense_id": created[key],
+                        "paid_at": payload.incurred_at,
+                        "amount_cents": payload.amount_cents,
+                        "source": payment_source,
+                        "last4": payload.last4,
+                        "payee": payload.memo[:255] or None,
+                    }
+                    for key, (_, payload) in pending.items()
+                ],
+            )
+
+        months: dict[tuple[int, int], tuple[int, int]] = {}
+        payments: dict[int, int] = {}
+        for key, (index, payload) in pending.items():
+            results.append(IngestResult(index, STATUS_CREATED, id=created[key]))
+            bucket = (payload.incurred_at.year, payload.incurred_at.month)
+            count, total = months.get(bucket, (0, 0))
+            months[bucket] = (count + 1, total + payload.amount_cents)
+            if payload.service_event_id is not None:
+                payments[payload.service_event_id] = payments.get(payload.service_event_id, 0) + payload.amount_cents
+        # One rollup upsert per touched month and one accumulator upsert per service event.
+        for (year, month), (count, total) in sorted(months.items()):
+            apply_expense_delta(db, date(year, month, 1), total, count)
+        for event_id, amount in sorted(payments.items()):
+            apply_event_payments(db, event_id, amount)
+        write_audit_events(
+            db,
+            "create",
+            "expense",
+            user_id,
+            ((key, {"amount_cents": payload.amount_cents}) for key, (_, payload) in pending.items()),
+        )
+        existing.update(created)
+
+    updated = _update_changed(db, replays, existing, user_id, payment_source) if update_existing and replays else set()
+    for index, key in duplicates:
+        results.append(IngestResult(index, STATUS_UPDATED if index in updated else STATUS_DUPLICATE, id=existing[key]))
+
+
+def ingest_expenses(
+    db: Session,
+    rows: Iterable[tuple[int, NewExpense]],
+    user_id: int | None,
+    payment_source: str | None = None,
+    update_existing: bool = False,
+) -> list[IngestResult]:
+    """Insert many (input index, expense) rows, skipping ones whose idempotency key already exists.
+
+    With `payment_source`, each new expense also gets a PatientPayment row for the full amount.
+    With `update_existing`, a row whose key exists but whose amount, date or category differs
+    overwrites the stored expense (and its PatientPayment) and is reported as updated; sources
+    with stable transaction ids use this to pick up corrections.
+
+    Each chunk is committed on its own, so a failure part-way keeps the earlier chunks;
+    re-sending the same batch is safe because committed rows come back as duplicates.
+    Results are returned in input order.
+    """
+    valid = list(rows)
+    known_events = _known_service_events(db, valid)
+    results: list[IngestResult] = []
+    keyed: list[tuple[int, NewExpense, str]] = []
+    for index, payload in valid:
+        if payload.service_event_id is not None and payload.service_event_id not in known_events:
+            results.append(IngestResult(index, STATUS_ERROR, error="Unknown service event"))
+            continue
+        keyed.append((index, payload, expense_key(payload)))
+
+    for start in range(0, len(keyed), CHUNK_SIZE):
+        _ingest_chunk(db, keyed[start : start + CHUNK_SIZE], user_id, results, payment_source, update_existing)
+        db.commit()
+    results.sort(key=lambda result: result.index)
+    return results
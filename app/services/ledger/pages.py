@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.models import Document, ExpenseLineItem
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerFilters:
+    category: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+
+    def query_params(self) -> dict[str, str]:
+        params: dict[str, str] = {}
+        if self.category:
+            params["category"] = self.category
+        if self.date_from:
+            params["date_from"] = self.date_from.isoformat()
+        if self.date_to:
+            params["date_to"] = self.date_to.isoformat()
+        return params
+
+
+@dataclass(frozen=True, slots=True)
+class ReceiptRef:
+    id: int
+    filename: str
+
+
+@dataclass(slots=True)
+class LedgerPage:
+    rows: list[tuple[ExpenseLineItem, ReceiptRef | None]] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(incurred_at: date, expense_id: int) -> str:
+    return f"{incurred_at.isoformat()}_{expense_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    raw_date, sep, raw_id = cursor.partition("_")
+    if not sep:
+        raise ValueError("Malformed ledger cursor")
+    return date.fromisoformat(raw_date), int(raw_id)
+
+
+def list_categories(db: Session) -> list[str]:
+    return list(db.scalars(select(ExpenseLineItem.category).distinct().order_by(ExpenseLineItem.category.asc())).all())
+
+
+def ledger_page(
+    db: Session,
+    filters: LedgerFilters,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> LedgerPage:
+    """One page of expenses, newest first, keyed on (incurred_at, id) so deep pages cost the same as the first."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Newest receipt per expense, resolved by the (expense_id, created_at) index without loading key material.
+    receipt_id = (
+        select(Document.id)
+        .where(Document.expense_id == ExpenseLineItem.id)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+        .limit(1)
+        .correlate(ExpenseLineItem)
+        .scalar_subquery()
+    )
+    stmt = select(ExpenseLineItem, receipt_id.label("receipt_id"))
+    if filters.category:
+        stmt = stmt.where(ExpenseLineItem.category == filters.category)
+    if filters.date_from:
+        stmt = stmt.where(ExpenseLineItem.incurred_at >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(ExpenseLineItem.incurred_at <= filters.date_to)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(ExpenseLineItem.incurred_at, ExpenseLineItem.id) < tuple_(literal(after_date), literal(after_id)))
+    stmt = stmt.order_by(ExpenseLineItem.incurred_at.desc(), ExpenseLineItem.id.desc()).limit(limit + 1)
+
+    fetched = db.execute(stmt).all()
+    has_more = len(fetched) > limit
+    fetched = fetched[:limit]
+
+    receipt_ids = [rid for _, rid in fetched if rid is not None]
+    filenames: dict[int, str] = (
+        dict(db.execute(select(Document.id, Document.filename).where(Document.id.in_(receipt_ids))).tuples().all())
+        if receipt_ids
+        else {}
+    )
+    page = LedgerPage(
+        rows=[
+            (expense, ReceiptRef(rid, filenames.get(rid, "")) if rid is not None else None)
+            for expense, rid in fetched
+        ]
+    )
+    if has_more and fetched:
+        last = fetched[-1][0]
+        page.next_cursor = encode_cursor(last.incurred_at, last.id)
+    return page
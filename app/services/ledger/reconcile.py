@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from difflib import SequenceMatcher
+
+from sqlalchemy import DateTime, exists, func, or_, select, type_coerce, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    DB_NOW,
+    EOB,
+    Claim,
+    ExpenseLineItem,
+    PatientPayment,
+    ReconciliationMatch,
+    ReconciliationRun,
+    ServiceEvent,
+)
+from app.domain.enums import ClaimStatus
+from app.services.reporting.accumulators import apply_expense
+
+# Payments usually follow the visit (bill or EOB first) but copays can be paid a little before it is recorded.
+DAYS_BEFORE_SERVICE = 7
+DAYS_AFTER_SERVICE = 180
+MIN_CONFIDENCE = 0.6
+MAX_SUGGESTIONS_PER_PAYMENT = 3
+AMOUNT_WEIGHT, DATE_WEIGHT, NAME_WEIGHT = 0.5, 0.3, 0.2
+IN_CHUNK = 500
+
+STATUS_SUGGESTED = "suggested"
+STATUS_ACCEPTED = "accepted"
+STATUS_REJECTED = "rejected"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NAME_NOISE = {"the", "of", "and", "inc", "llc", "pc", "pa", "md", "dds", "do", "group", "co", "sq", "pos", "ach"}
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentSide:
+    expense_id: int
+    payment_id: int | None
+    amount_cents: int
+    paid_on: date
+    payee: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Obligation:
+    claim_id: int
+    eob_id: int | None
+    amount_cents: int
+    service_date: date
+    provider_name: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    payment: PaymentSide
+    obligation: Obligation
+    confidence: float
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _name_tokens(name: str) -> set[str]:
+    return {token for token in _TOKEN_RE.findall(name.lower()) if token not in _NAME_NOISE}
+
+
+def name_similarity(payee: str, provider_name: str) -> float:
+    """0..1 similarity of a statement payee and a provider name, tolerant of truncation and store numbers."""
+    left, right = _name_tokens(payee), _name_tokens(provider_name)
+    if not left or not right:
+        return 0.0
+    jaccard = len(left & right) / len(left | right)
+    ratio = SequenceMatcher(None, " ".join(sorted(left)), " ".join(sorted(right))).ratio()
+    return max(jaccard, ratio)
+
+
+def score(payment: PaymentSide, obligation: Obligation) -> float:
+    """Confidence for an exact-amount pair; the caller already limited it to the date window."""
+    gap = (payment.paid_on - obligation.service_date).days
+    window = DAYS_AFTER_SERVICE if gap >= 0 else DAYS_BEFORE_SERVICE
+    date_score = max(0.0, 1.0 - abs(gap) / window)
+    return round(
+        AMOUNT_WEIGHT + DATE_WEIGHT * date_score + NAME_WEIGHT * name_similarity(payment.payee, obligation.provider_name), 4
+    )
+
+
+def match(payments: Iterable[PaymentSide], obligations: Iterable[Obligation]) -> list[Suggestion]:
+    """Pair payments with obligations of the same amount whose service date is in the payment's window.
+
+    Obligations are bucketed by amount and sorted by date inside each bucket, so every payment only
+    bisects into its own bucket's window instead of comparing against every obligation.
+    """
+    buckets: dict[int, list[Obligation]] = {}
+    for obligation in obligations:
+        buckets.setdefault(obligation.amount_cents, []).append(obligation)
+    dates: dict[int, list[date]] = {}
+    for amount, bucket in buckets.items():
+        bucket.sort(key=lambda item: (item.service_date, item.claim_id))
+        dates[amount] = [item.service_date for item in bucket]
+
+    suggestions: list[Suggestion] = []
+    for payment in payments:
+        candidates = buckets.get(payment.amount_cents)
+        if not candidates:
+            continue
+        bucket_dates = dates[payment.amount_cents]
+        lo = bisect_left(bucket_dates, payment.paid_on - timedelta(days=DAYS_AFTER_SERVICE))
+        hi = bisect_right(bucket_dates, payment.paid_on + timedelta(days=DAYS_BEFORE_SERVICE))
+        scored = [Suggestion(payment, obligation, score(payment, obligation)) for obligation in candidates[lo:hi]]
+        scored = [item for item in scored if item.confidence >= MIN_CONFIDENCE]
+        scored.sort(key=lambda item: (-item.confidence, item.obligation.claim_id))
+        suggestions.extend(scored[:MAX_SUGGESTIONS_PER_PAYMENT])
+    return suggestions
+
+
+def _chunks(values: Iterable[int]) -> list[list[int]]:
+    ordered = sorted(set(values))
+    return [ordered[start : start + IN_CHUNK] for start in range(0, len(ordered), IN_CHUNK)]
+
+
+def load_payments(
+    db: Session,
+    changed_since: datetime | None = None,
+    amounts: Iterable[int] | None = None,
+) -> list[PaymentSide]:
+    """Unreconciled expenses (one side per recorded payment, or the expense itself when it has none).
+
+    With `changed_since`, only expenses stamped at or after it are returned.
+    """
+    amount = func.coalesce(PatientPayment.amount_cents, ExpenseLineItem.amount_cents)
+    base = (
+        select(
+            ExpenseLineItem.id,
+            PatientPayment.id,
+            amount,
+            func.coalesce(PatientPayment.paid_at, ExpenseLineItem.incurred_at),
+            func.coalesce(PatientPayment.payee, ""),
+        )
+        .outerjoin(PatientPayment, PatientPayment.expense_id == ExpenseLineItem.id)
+        .where(ExpenseLineItem.reconciled.is_(False), amount > 0)
+    )
+    if changed_since is not None:
+        base = base.where(ExpenseLineItem.updated_at >= changed_since)
+    statements = [base] if amounts is None else [base.where(amount.in_(chunk)) for chunk in _chunks(amounts)]
+    return [PaymentSide(*row) for stmt in statements for row in db.execute(stmt).all()]
+
+
+def load_obligations(
+    db: Session,
+    changed_since: datetime | None = None,
+    amounts: Iterable[int] | None = None,
+) -> list[Obligation]:
+    """EOB patient responsibilities, plus the allowed-minus-paid estimate for settled claims with no EOB yet.
+
+    With `changed_since`, only obligations whose EOB or claim was stamped at or after it are returned.
+    """
+    amount_chunks: list[list[int] | None] = [None]
+    if amounts is not None:
+        amount_chunks = [chunk for chunk in _chunks(amounts)]
+    obligations: list[Obligation] = []
+    estimate = Claim.allowed_amount_cents - Claim.paid_amount_cents
+    settled = select(ReconciliationMatch.claim_id).where(ReconciliationMatch.status == STATUS_ACCEPTED)
+    for chunk in amount_chunks:
+        eobs = (
+            select(EOB.claim_id, EOB.id, EOB.patient_responsibility_cents, ServiceEvent.service_date, ServiceEvent.provider_name)
+            .join(Claim, EOB.claim_id == Claim.id)
+            .join(ServiceEvent, Claim.service_event_id == ServiceEvent.id)
+            .where(EOB.patient_responsibility_cents > 0, EOB.claim_id.not_in(settled))
+        )
+        claims = (
+            select(Claim.id, estimate, ServiceEvent.service_date, ServiceEvent.provider_name)
+            .join(ServiceEvent, Claim.service_event_id == ServiceEvent.id)
+            .where(
+                Claim.claim_status == ClaimStatus.PAID,
+                estimate > 0,
+                ~exists().where(EOB.claim_id == Claim.id),
+                Claim.id.not_in(settled),
+            )
+        )
+        if changed_since is not None:
+            eobs = eobs.where(or_(EOB.updated_at >= changed_since, Claim.updated_at >= changed_since))
+            claims = claims.where(Claim.updated_at >= changed_since)
+        if chunk is not None:
+            eobs = eobs.where(EOB.patient_responsibility_cents.in_(chunk))
+            claims = claims.where(estimate.in_(chunk))
+        obligations.extend(Obligation(claim_id, eob_id, amount, day, name) for claim_id, eob_id, amount, day, name in db.execute(eobs))
+        obligations.extend(Obligation(claim_id, None, amount, day, name) for claim_id, amount, day, name in db.execute(claims))
+    return obligations
+
+
+def _store(db: Session, suggestions: list[Suggestion]) -> int:
+    """Upsert suggestions; decided matches keep their status and score."""
+    best: dict[tuple[int, int], Suggestion] = {}
+    for item in suggestions:
+        key = (item.payment.expense_id, item.obligation.claim_id)
+        if key not in best or item.confidence > best[key].confidence:
+            best[key] = item
+    if not best:
+        return 0
+    now = _utcnow()
+    rows = [
+        {
+            "expense_id": item.payment.expense_id,
+            "payment_id": item.payment.payment_id,
+            "claim_id": item.obligation.claim_id,
+            "eob_id": item.obligation.eob_id,
+            "amount_cents": item.obligation.amount_cents,
+            "confidence": item.confidence,
+            "status": STATUS_SUGGESTED,
+            "created_at": now,
+        }
+        for item in best.values()
+    ]
+    stmt = insert(ReconciliationMatch)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReconciliationMatch.expense_id, ReconciliationMatch.claim_id],
+        set_={
+            "payment_id": stmt.excluded.payment_id,
+            "eob_id": stmt.excluded.eob_id,
+            "amount_cents": stmt.excluded.amount_cents,
+            "confidence": stmt.excluded.confidence,
+        },
+        where=ReconciliationMatch.status == STATUS_SUGGESTED,
+    )
+    db.connection().execute(stmt, rows)
+    return len(rows)
+
+
+def reconcile(db: Session, full: bool = False) -> ReconciliationRun:
+    """Write match suggestions for rows added or changed since the previous run (or for everything with `full`).
+
+    Expenses, claims and EOBs carry updated_at stamps from the database clock. The run row is
+    written before its start is read, so the run holds the write lock: every row stamped before
+    that start is already committed, and anything stamped later is left for the next run.
+    """
+    previous = None if full else db.scalar(
+        select(ReconciliationRun).where(ReconciliationRun.finished_at.is_not(None)).order_by(ReconciliationRun.id.desc()).limit(1)
+    )
+    run = ReconciliationRun(full=previous is None, started_at=_utcnow())
+    db.add(run)
+    db.flush()
+    run.started_at = db.scalar(select(type_coerce(DB_NOW, DateTime()))) or run.started_at
+    if previous is None:
+        suggestions = match(load_payments(db), load_obligations(db))
+    else:
+        # Changed payments against every open obligation of the same amounts, then changed
+        # obligations against every other unreconciled payment of theirs; both sides are narrowed
+        # by amount in SQL.
+        changed_payments = load_payments(db, changed_since=previous.started_at)
+        suggestions = match(changed_payments, load_obligations(db, amounts=[p.amount_cents for p in changed_payments]))
+        changed_obligations = load_obligations(db, changed_since=previous.started_at)
+        seen = {p.expense_id for p in changed_payments}
+        other_payments = load_payments(db, amounts=[o.amount_cents for o in changed_obligations])
+        suggestions += match([p for p in other_payments if p.expense_id not in seen], changed_obligations)
+    run.suggestions = _store(db, suggestions)
+    run.finished_at = _utcnow()
+    db.flush()
+    return run
+
+
+def accept_match(db: Session, match_row: ReconciliationMatch) -> None:
+    """Mark the expense reconciled, attach it to the claim's service event and retire competing suggestions.
+
+    Competing suggestions are the expense's other candidate claims and other expenses suggested for the claim.
+    """
+    expense = db.get(ExpenseLineItem, match_row.expense_id)
+    claim = db.get(Claim, match_row.claim_id)
+    if expense is None or claim is None:
+        raise ValueError("Match refers to a deleted expense or claim")
+    match_row.status = STATUS_ACCEPTED
+    expense.reconciled = True
+    if expense.service_event_id is None:
+        expense.service_event_id = claim.service_event_id
+        db.flush()
+        apply_expense(db, expense)
+    db.execute(
+        update(ReconciliationMatch)
+        .where(
+            or_(ReconciliationMatch.expense_id == match_row.expense_id, ReconciliationMatch.claim_id == match_row.claim_id),
+            ReconciliationMatch.id != match_row.id,
+            ReconciliationMatch.status == STATUS_SUGGESTED,
+        )
+        .values(status=STATUS_REJECTED)
+    )
+
+
+def reject_match(db: Session, match_row: ReconciliationMatch) -> None:
+    match_row.status = STATUS_REJECTED
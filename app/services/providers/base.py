@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable, Iterator
 from dataclasses import dataclass
 from typing import Any
 
@@ -12,6 +14,13 @@ class ProviderRecord:
     payload: dict[str, Any]
 
 
+@dataclass(slots=True)
+class ProviderPage:
+    records: Iterable[ProviderRecord]
+    # Opaque token for the page after this one; None when the source is exhausted.
+    next_cursor: str | None = None
+
+
 class ProviderAdapter(ABC):
     name: str
 
@@ -19,6 +28,49 @@ class ProviderAdapter(ABC):
     def refresh(self) -> list[ProviderRecord]:
         raise NotImplementedError
 
+    def iter_records(self) -> Iterator[ProviderRecord]:
+        """Stream records; adapters backed by large sources override this to avoid building a list."""
+        yield from self.refresh()
+
+    def fetch_page(self, cursor: str | None = None) -> ProviderPage:
+        """One page starting at `cursor` (None for the first page).
+
+        Paginated adapters override this so a sync can commit after each page and resume from the
+        last committed cursor; the default treats the whole stream as a single page.
+        """
+        return ProviderPage(self.iter_records(), None)
+
+    def iter_pages(self, cursor: str | None = None) -> Iterator[ProviderPage]:
+        while True:
+            page = self.fetch_page(cursor)
+            yield page
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    async def afetch_page(self, cursor: str | None = None) -> ProviderPage:
+        """Async fetch_page; the default runs the blocking call (records included) in a worker thread."""
+
+        def fetch() -> ProviderPage:
+            page = self.fetch_page(cursor)
+            return ProviderPage(list(page.records), page.next_cursor)
+
+        return await asyncio.to_thread(fetch)
+
+    async def aiter_pages(self, cursor: str | None = None) -> AsyncIterator[ProviderPage]:
+        while True:
+            page = await self.afetch_page(cursor)
+            yield page
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def close(self) -> None:
+        """Release pooled connections; sync runs call this when they are done with the adapter."""
+
+    async def aclose(self) -> None:
+        self.close()
+
     @abstractmethod
     def healthcheck(self) -> dict[str, Any]:
         raise NotImplementedError
@@ -0,0 +1,96 @@
+"""Adapter for insurer claims APIs that page with an opaque cursor.
+
+Speaks the protocol of the local mock insurer: GET /v1/claims?cursor=&limit= returns
+{"items": [...], "next_cursor": ...}. Each claim, with its EOB when one exists, becomes one
+record keyed by the insurer's claim id. HTTP errors propagate so the sync engine retries and
+trips its circuit breaker.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+from app.services.providers.base import ProviderAdapter, ProviderPage, ProviderRecord
+from app.services.providers.registry import registry
+
+CLAIMS_PATH = "/v1/claims"
+
+
+def _page(body: dict[str, Any]) -> ProviderPage:
+    records = [ProviderRecord(external_id=item["id"], name=item.get("provider_name", ""), payload=item) for item in body["items"]]
+    return ProviderPage(records, body.get("next_cursor"))
+
+
+class HttpInsurerAdapter(ProviderAdapter):
+    name = "insurer_http"
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        page_size: int | None = None,
+        client: httpx.Client | None = None,
+        async_client: httpx.AsyncClient | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.base_url = (base_url if base_url is not None else settings.insurer_api_url).rstrip("/")
+        self.page_size = page_size or settings.insurer_api_page_size
+        self.timeout = settings.insurer_api_timeout_seconds
+        self._client = client
+        self._async_client = async_client
+
+    def _params(self, cursor: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {"limit": self.page_size}
+        if cursor is not None:
+            params["cursor"] = cursor
+        return params
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            if not self.base_url:
+                raise RuntimeError("CB_INSURER_API_URL is not configured")
+            # One pooled client per adapter, so pages reuse the keep-alive connection.
+            self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout)
+        return self._client
+
+    def fetch_page(self, cursor: str | None = None) -> ProviderPage:
+        response = self._sync_client().get(CLAIMS_PATH, params=self._params(cursor))
+        response.raise_for_status()
+        return _page(response.json())
+
+    async def afetch_page(self, cursor: str | None = None) -> ProviderPage:
+        if self._async_client is None:
+            if not self.base_url:
+                raise RuntimeError("CB_INSURER_API_URL is not configured")
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        response = await self._async_client.get(CLAIMS_PATH, params=self._params(cursor))
+        response.raise_for_status()
+        return _page(response.json())
+
+    def refresh(self) -> list[ProviderRecord]:
+        return [record for page in self.iter_pages() for record in page.records]
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def healthcheck(self) -> dict[str, Any]:
+        if not self.base_url and self._client is None:
+            return {"status": "unconfigured", "adapter": self.name}
+        try:
+            response = self._sync_client().get("/v1/health")
+        except httpx.HTTPError:
+            return {"status": "unreachable", "adapter": self.name}
+        return {"status": "ok" if response.is_success else "error", "adapter": self.name}
+
+
+registry.register("insurer_http", HttpInsurerAdapter)
@@ -1,26 +1,234 @@
 from __future__ import annotations
 
 import csv
+import io
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from datetime import datetime
-from io import StringIO
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import IO
+
+from sqlalchemy.orm import Session
+
+from app.domain.money import parse_money_to_cents
+from app.services.ledger.ingest import (
+    STATUS_CREATED,
+    STATUS_DUPLICATE,
+    NewExpense,
+    expense_key,
+    ingest_expenses,
+)
+
+PAYMENT_SOURCE = "csv_import"
+SAMPLE_ROWS = 50
+PREVIEW_ROWS = 20
+BATCH_ROWS = 5000
+# Ties go to the earlier entry, so ISO and US month-first win over day-first when both fit.
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y/%m/%d", "%m-%d-%Y", "%d-%b-%Y", "%b %d, %Y", "%d %b %Y")
+COLUMN_HINTS = {
+    "date": ("date", "paid on", "posted", "posting date", "transaction date", "payment date", "service date"),
+    "amount": ("amount", "payment", "paid", "amount paid", "debit", "charge", "total"),
+    "description": ("description", "memo", "payee", "merchant", "details", "name", "provider"),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnMapping:
+    date: str
+    amount: str
+    description: str | None = None
 
 
 @dataclass(slots=True)
 class PaymentImportRow:
-    date: datetime
+    line: int
+    paid_at: date
     amount_cents: int
     description: str
+    category: str
     idempotency_key: str
 
 
-def parse_payment_csv(text: str, date_col: str, amount_col: str, desc_col: str) -> list[PaymentImportRow]:
-    rows = list(csv.DictReader(StringIO(text)))
-    parsed: list[PaymentImportRow] = []
+@dataclass(slots=True)
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass(slots=True)
+class ImportSummary:
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    updated: int = 0
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.replace("_", " ").strip().lower().split())
+
+
+def detect_columns(header: list[str]) -> ColumnMapping:
+    """Guess the date/amount/description columns from header names; raises ValueError if one is missing."""
+    normalized = {_normalize(name): name for name in header}
+    found: dict[str, str] = {}
+    for role, hints in COLUMN_HINTS.items():
+        free = {norm: name for norm, name in normalized.items() if name not in found.values()}
+        # Exact header matches beat substring matches, e.g. "Date" over "Date of Birth".
+        match = next((free[hint] for hint in hints if hint in free), None)
+        match = match or next((name for hint in hints for norm, name in free.items() if hint in norm), None)
+        if match is not None:
+            found[role] = match
+    if "date" not in found or "amount" not in found:
+        raise ValueError("Could not find date and amount columns; choose them manually")
+    return ColumnMapping(date=found["date"], amount=found["amount"], description=found.get("description"))
+
+
+def _parses(value: str, fmt: str) -> bool:
+    try:
+        datetime.strptime(value, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def detect_date_format(values: Iterable[str]) -> str:
+    """The format that parses the most sampled values, so one bad row does not defeat detection."""
+    samples = [value.strip() for value in values if value and value.strip()]
+    if not samples:
+        raise ValueError("No dates to detect a format from")
+    scores = [sum(_parses(value, fmt) for value in samples) for fmt in DATE_FORMATS]
+    best = max(scores)
+    if best == 0:
+        raise ValueError(f"Unrecognized date format: {samples[0]!r}")
+    return DATE_FORMATS[scores.index(best)]
+
+
+def parse_amount_cents(raw: str) -> int:
+    """Exact signed cents for exported amounts like "$1,234.50", "-12.00", "(12.00)" or "12.00 USD"."""
+    value = raw.strip().upper().removesuffix("USD").strip()
+    negative = value.startswith("(") and value.endswith(")")
+    if negative:
+        value = value[1:-1].strip()
+    # The minus may lead, follow the currency symbol or trail: "-$12.00", "$-12.00", "12.00-".
+    negative = negative or "-" in value
+    value = value.strip("+- ").removeprefix("$").strip("+- ")
+    cents = parse_money_to_cents(value)
+    return -cents if negative else cents
+
+
+def detect_payment_sign(values: Iterable[str]) -> int:
+    """1 or -1: the sign most sampled amounts carry, since bank exports often sign payments as debits."""
+    signs = []
+    for value in values:
+        try:
+            cents = parse_amount_cents(value)
+        except ValueError:
+            continue
+        if cents:
+            signs.append(cents > 0)
+    return -1 if signs.count(False) > signs.count(True) else 1
+
+
+class PaymentCsv:
+    """Lazily parsed payment export: only a small sample is read up front for detection."""
+
+    def __init__(self, stream: IO[bytes], category: str = "medical") -> None:
+        self._text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        self._reader = csv.DictReader(self._text)
+        self.header = [name for name in (self._reader.fieldnames or []) if name]
+        if not self.header:
+            raise ValueError("The file has no header row")
+        self._rows = self._numbered()
+        self._sample = list(islice(self._rows, SAMPLE_ROWS))
+        self.category = category
+        self.mapping: ColumnMapping | None = None
+        self.date_format: str | None = None
+        # Amounts with this sign are payments; opposite-sign rows (refunds, credits) are flagged.
+        self.payment_sign = 1
+
+    def configure(
+        self,
+        mapping: ColumnMapping | None = None,
+        date_format: str | None = None,
+        payment_sign: int | None = None,
+    ) -> None:
+        """Use the given mapping/format/sign, detecting whichever is missing; raises ValueError if that fails."""
+        mapping = mapping or detect_columns(self.header)
+        for column in (mapping.date, mapping.amount, mapping.description):
+            if column is not None and column not in self.header:
+                raise ValueError(f"Unknown column: {column}")
+        self.mapping = mapping
+        self.date_format = date_format or detect_date_format(row.get(mapping.date) or "" for _, row in self._sample)
+        self.payment_sign = payment_sign or detect_payment_sign(row.get(mapping.amount) or "" for _, row in self._sample)
+
+    def _numbered(self) -> Iterator[tuple[int, dict[str, str]]]:
+        for row in self._reader:
+            # Physical line where the record ends, so quoted multi-line fields still point at the file.
+            yield self._reader.line_num, row
+
+    def _convert(self, line: int, row: dict[str, str]) -> PaymentImportRow | RowError:
+        if self.mapping is None or self.date_format is None:
+            raise ValueError("Call configure() before reading rows")
+        try:
+            paid_at = datetime.strptime((row.get(self.mapping.date) or "").strip(), self.date_format).date()
+        except ValueError:
+            return RowError(line, f"Invalid date: {row.get(self.mapping.date)!r}")
+        try:
+            cents = parse_amount_cents(row.get(self.mapping.amount) or "")
+        except ValueError:
+            return RowError(line, f"Invalid amount: {row.get(self.mapping.amount)!r}")
+        if cents * self.payment_sign < 0:
+            return RowError(line, f"Refund or credit, not imported: {row.get(self.mapping.amount)!r}")
+        cents = abs(cents)
+        description = (row.get(self.mapping.description) or "").strip() if self.mapping.description else ""
+        key = expense_key(NewExpense(amount_cents=cents, incurred_at=paid_at, category=self.category, memo=description))
+        return PaymentImportRow(line, paid_at, cents, description, self.category, key)
+
+    def __iter__(self) -> Iterator[PaymentImportRow | RowError]:
+        for line, row in chain(self._sample, self._rows):
+            yield self._convert(line, row)
+
+    def preview(self, limit: int = PREVIEW_ROWS) -> list[PaymentImportRow | RowError]:
+        return [self._convert(line, row) for line, row in self._sample[:limit]]
+
+
+def import_payment_rows(
+    db: Session,
+    rows: Iterable[PaymentImportRow | RowError],
+    user_id: int | None,
+) -> ImportSummary:
+    """Record each row as an expense plus its patient payment, in batches; existing keys are skipped."""
+    summary = ImportSummary()
+
+    def flush(batch: list[tuple[int, NewExpense]]) -> None:
+        for result in ingest_expenses(db, batch, user_id, payment_source=PAYMENT_SOURCE):
+            if result.status == STATUS_CREATED:
+                summary.created += 1
+            elif result.status == STATUS_DUPLICATE:
+                summary.duplicates += 1
+            else:
+                summary.errors += 1
+
+    batch: list[tuple[int, NewExpense]] = []
     for row in rows:
-        date = datetime.strptime(row[date_col], "%Y-%m-%d")
-        amount_cents = int(round(float(row[amount_col]) * 100))
-        desc = row.get(desc_col, "")
-        idem = f"{date.date().isoformat()}|{amount_cents}|{desc.strip().lower()}"
-        parsed.append(PaymentImportRow(date=date, amount_cents=amount_cents, description=desc, idempotency_key=idem))
-    return parsed
+        if isinstance(row, RowError):
+            summary.errors += 1
+            continue
+        expense = NewExpense(amount_cents=row.amount_cents, incurred_at=row.paid_at, category=row.category, memo=row.description)
+        batch.append((row.line, expense))
+        if len(batch) >= BATCH_ROWS:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
+
+
+def parse_payment_csv(text: str, date_col: str, amount_col: str, desc_col: str) -> list[PaymentImportRow]:
+    csv_file = PaymentCsv(io.BytesIO(text.encode("utf-8")))
+    csv_file.configure(ColumnMapping(date_col, amount_col, desc_col), "%Y-%m-%d")
+    rows = list(csv_file)
+    errors = [row for row in rows if isinstance(row, RowError)]
+    if errors:
+        raise ValueError(f"Line {errors[0].line}: {errors[0].message}")
+    return [row for row in rows if isinstance(row, PaymentImportRow)]
@@ -0,0 +1,125 @@
+"""Local stand-in for an insurer claims API, for exercising adapters at scale.
+
+Members, claims and their EOBs are derived from (seed, index), so any page can be served without
+storing the dataset and repeated runs see identical records. Latency and transient 503s are
+injected per request. Never mounted into the organizer app itself; run it with
+scripts/mock_insurer.py or build it in tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Query
+
+PROVIDER_NAMES = (
+    "Lakeside Family Medicine",
+    "Riverside Dental Group",
+    "Northside Imaging",
+    "Elm Street Pharmacy",
+    "Summit Orthopedics",
+    "Harbor Urgent Care",
+    "Valley Pediatrics",
+    "Quest Diagnostics",
+)
+CLAIM_STATUSES = ("submitted", "processing", "paid", "paid", "paid", "denied")
+
+
+@dataclass(slots=True)
+class MockInsurerConfig:
+    claims: int = 10_000
+    members: int = 4
+    page_size: int = 500
+    max_page_size: int = 5000
+    latency_ms: float = 0.0
+    # Extra uniform latency on top of latency_ms, for realistic spread.
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 7
+    start_date: date = date(2020, 1, 1)
+
+
+def member(config: MockInsurerConfig, index: int) -> dict[str, Any]:
+    return {
+        "id": f"M{index:04d}",
+        "full_name": f"Member {index}",
+        "relationship": "self" if index == 0 else ("spouse" if index == 1 else "child"),
+    }
+
+
+def claim(config: MockInsurerConfig, index: int) -> dict[str, Any]:
+    rng = random.Random(config.seed * 1_000_003 + index)
+    service_date = config.start_date + timedelta(days=index * 1825 // max(config.claims, 1))
+    billed = rng.randrange(2_000, 400_000)
+    status = rng.choice(CLAIM_STATUSES)
+    allowed = billed * rng.randrange(40, 90) // 100
+    paid = allowed * rng.randrange(50, 95) // 100 if status == "paid" else 0
+    record: dict[str, Any] = {
+        "id": f"CLM{index:08d}",
+        "member_id": f"M{rng.randrange(config.members):04d}",
+        "provider_name": rng.choice(PROVIDER_NAMES),
+        "service_date": service_date.isoformat(),
+        "status": status,
+        "billed_cents": billed,
+        "allowed_cents": allowed,
+        "paid_cents": paid,
+        "eob": None,
+    }
+    if status in {"paid", "denied"}:
+        record["eob"] = {
+            "id": f"EOB{index:08d}",
+            "issued_date": (service_date + timedelta(days=rng.randrange(14, 45))).isoformat(),
+            "patient_responsibility_cents": (allowed - paid) if status == "paid" else billed,
+        }
+    return record
+
+
+def create_mock_insurer_app(config: MockInsurerConfig | None = None) -> FastAPI:
+    config = config or MockInsurerConfig()
+    faults = random.Random(config.seed)
+    app = FastAPI(title="Mock insurer")
+    app.state.config = config
+    app.state.requests = 0
+    app.state.errors = 0
+
+    async def simulate() -> None:
+        app.state.requests += 1
+        delay = config.latency_ms + (faults.uniform(0, config.latency_jitter_ms) if config.latency_jitter_ms else 0.0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if config.error_rate and faults.random() < config.error_rate:
+            app.state.errors += 1
+            raise HTTPException(status_code=503, detail="Injected fault")
+
+    def page(total: int, cursor: str | None, limit: int | None, build) -> dict[str, Any]:
+        try:
+            start = int(cursor or 0)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+        size = min(limit or config.page_size, config.max_page_size)
+        end = min(start + size, total)
+        return {
+            "items": [build(config, index) for index in range(start, end)],
+            "next_cursor": str(end) if end < total else None,
+            "total": total,
+        }
+
+    @app.get("/v1/members")
+    async def list_members(cursor: str | None = None, limit: int | None = Query(None, ge=1)) -> dict[str, Any]:
+        await simulate()
+        return page(config.members, cursor, limit, member)
+
+    @app.get("/v1/claims")
+    async def list_claims(cursor: str | None = None, limit: int | None = Query(None, ge=1)) -> dict[str, Any]:
+        await simulate()
+        return page(config.claims, cursor, limit, claim)
+
+    @app.get("/v1/health")
+    async def health() -> dict[str, Any]:
+        return {"status": "ok", "claims": config.claims}
+
+    return app
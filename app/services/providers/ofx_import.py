@@ -0,0 +1,214 @@
+"""OFX/QFX statement import adapter.
+
+Reads statements dropped into the imports directory and emits the medical debits.
+Both OFX 1.x (SGML, leaf elements left unclosed) and OFX 2.x (XML) go through the
+same tag tokenizer, which reads fixed-size chunks so multi-year exports stay in
+bounded memory.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from pathlib import Path
+from typing import IO, Any
+
+from app.core.config import get_settings
+from app.services.providers.base import ProviderAdapter, ProviderPage, ProviderRecord
+from app.services.providers.registry import registry
+from app.services.sync.dedupe import make_idempotency_key
+
+STATEMENT_SUFFIXES = {".ofx", ".qfx"}
+CHUNK_SIZE = 64 * 1024
+# A single tag or value larger than this means the file is not OFX.
+MAX_TOKEN_CHARS = 1024 * 1024
+
+# SIC 8000-8099 covers health services; the rest are pharmacies, medical supply and ambulance codes.
+MEDICAL_SIC_RANGES = ((8000, 8099),)
+MEDICAL_SIC_CODES = {4119, 5047, 5122, 5912, 5975, 5976}
+MEDICAL_KEYWORDS = re.compile(
+    r"\b(?:pharmacy|pharm|cvs|walgreens|rite aid|rx|clinic|hospital|medical|medic|health|dental|dentist|"
+    r"orthodont\w*|optometr\w*|optical|vision|pediatric\w*|dermatolog\w*|urgent care|labcorp|quest diag\w*|"
+    r"radiology|imaging|physical therapy|chiropract\w*|copay|physician|surgery|surgical|md|dds)\b",
+    re.IGNORECASE,
+)
+TAX_ADVANTAGED_NAME = re.compile(r"(?:^|[^a-z])(?:hsa|fsa)(?:[^a-z]|$)")
+
+
+@dataclass(frozen=True, slots=True)
+class OfxTransaction:
+    account_id: str
+    fitid: str
+    posted: date
+    # Signed as in the statement: debits are negative.
+    amount_cents: int
+    trntype: str = ""
+    name: str = ""
+    memo: str = ""
+    sic: int | None = None
+
+
+def iter_ofx_tokens(stream: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, str]]:
+    """Yield ("open", TAG), ("close", TAG) and ("text", value) events from an OFX byte stream."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += decoder.decode(chunk, final=not chunk)
+        pos = 0
+        while True:
+            start = buffer.find("<", pos)
+            end = buffer.find(">", start) if start != -1 else -1
+            if end == -1:
+                break
+            text = buffer[pos:start].strip()
+            if text:
+                yield "text", text
+            tag = buffer[start + 1 : end].strip()
+            pos = end + 1
+            if not tag or tag[0] in "?!":
+                # XML declaration, OFX 2 processing instruction or comment.
+                continue
+            if tag[0] == "/":
+                yield "close", tag[1:].strip().upper()
+                continue
+            name = tag.rstrip("/").split()[0].upper()
+            yield "open", name
+            if tag.endswith("/"):
+                yield "close", name
+        buffer = buffer[pos:]
+        if not chunk:
+            return
+        if len(buffer) > MAX_TOKEN_CHARS:
+            raise ValueError("Statement is not OFX: unterminated tag or oversized value")
+
+
+def _amount_cents(raw: str) -> int:
+    value = raw.strip()
+    # OFX allows a comma as the decimal separator; it never uses thousands separators.
+    value = value.replace(",", ".") if "." not in value else value.replace(",", "")
+    try:
+        return int((Decimal(value) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation as exc:
+        raise ValueError(f"Invalid TRNAMT: {raw!r}") from exc
+
+
+def _transaction(account_id: str, fields: dict[str, str]) -> OfxTransaction | None:
+    fitid, posted, amount = fields.get("FITID"), fields.get("DTPOSTED", ""), fields.get("TRNAMT")
+    if not fitid or amount is None:
+        return None
+    try:
+        posted_on = date(int(posted[0:4]), int(posted[4:6]), int(posted[6:8]))
+        cents = _amount_cents(amount)
+    except ValueError:
+        return None
+    sic = fields.get("SIC", "")
+    return OfxTransaction(
+        account_id=account_id,
+        fitid=fitid,
+        posted=posted_on,
+        amount_cents=cents,
+        trntype=fields.get("TRNTYPE", "").upper(),
+        name=fields.get("NAME", ""),
+        memo=fields.get("MEMO", ""),
+        sic=int(sic) if sic.isdigit() else None,
+    )
+
+
+def iter_ofx_transactions(stream: IO[bytes]) -> Iterator[OfxTransaction]:
+    """Yield STMTTRN entries one at a time; malformed entries are skipped."""
+    account_id = ""
+    current: dict[str, str] | None = None
+    field: str | None = None
+    for kind, value in iter_ofx_tokens(stream):
+        if kind == "open":
+            if value == "STMTTRN":
+                current = {}
+            field = value
+        elif kind == "text":
+            if field is None:
+                continue
+            if current is not None:
+                current.setdefault(field, value)
+            elif field == "ACCTID":
+                account_id = value
+            field = None
+        else:
+            field = None
+            if value == "STMTTRN" and current is not None:
+                transaction = _transaction(account_id, current)
+                current = None
+                if transaction is not None:
+                    yield transaction
+
+
+def is_medical(transaction: OfxTransaction, tax_advantaged: bool = False) -> bool:
+    """Debits from an HSA/FSA account, or debits whose SIC code or payee looks medical."""
+    if transaction.amount_cents >= 0:
+        return False
+    if tax_advantaged:
+        return True
+    if transaction.sic is not None and (
+        transaction.sic in MEDICAL_SIC_CODES or any(low <= transaction.sic <= high for low, high in MEDICAL_SIC_RANGES)
+    ):
+        return True
+    return bool(MEDICAL_KEYWORDS.search(f"{transaction.name} {transaction.memo}"))
+
+
+class OfxImportAdapter(ProviderAdapter):
+    name = "ofx_import"
+
+    def __init__(self, inbox: Path | None = None) -> None:
+        self.inbox = inbox or get_settings().imports_dir
+
+    def statement_files(self) -> list[Path]:
+        if not self.inbox.is_dir():
+            return []
+        return sorted(path for path in self.inbox.iterdir() if path.is_file() and path.suffix.lower() in STATEMENT_SUFFIXES)
+
+    def _file_records(self, path: Path) -> Iterator[ProviderRecord]:
+        tax_advantaged = bool(TAX_ADVANTAGED_NAME.search(path.stem.lower()))
+        with path.open("rb") as statement:
+            for transaction in iter_ofx_transactions(statement):
+                if not is_medical(transaction, tax_advantaged):
+                    continue
+                payload: dict[str, Any] = {
+                    "posted": transaction.posted.isoformat(),
+                    "amount_cents": -transaction.amount_cents,
+                    "name": transaction.name,
+                    "memo": transaction.memo,
+                    "last4": transaction.account_id[-4:] or None,
+                }
+                yield ProviderRecord(
+                    # Hashed so full account numbers never leave the statement file.
+                    external_id=make_idempotency_key(transaction.account_id, transaction.fitid),
+                    name=transaction.name,
+                    payload=payload,
+                )
+
+    def iter_records(self) -> Iterator[ProviderRecord]:
+        """Medical debits from every statement in the inbox; re-reading a file is safe since ids are stable."""
+        for path in self.statement_files():
+            yield from self._file_records(path)
+
+    def fetch_page(self, cursor: str | None = None) -> ProviderPage:
+        """One statement file per page; the cursor is the name of the file to read next."""
+        files = [path for path in self.statement_files() if cursor is None or path.name >= cursor]
+        if not files:
+            return ProviderPage([], None)
+        return ProviderPage(self._file_records(files[0]), files[1].name if len(files) > 1 else None)
+
+    def refresh(self) -> list[ProviderRecord]:
+        return list(self.iter_records())
+
+    def healthcheck(self) -> dict[str, Any]:
+        if not self.inbox.is_dir():
+            return {"status": "missing_inbox", "adapter": self.name}
+        return {"status": "ok", "adapter": self.name, "pending_files": len(self.statement_files())}
+
+
+registry.register("ofx_import", OfxImportAdapter)
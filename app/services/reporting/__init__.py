@@ -0,0 +1 @@
+# reporting package
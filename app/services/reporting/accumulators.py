@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import Any
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    EOB,
+    Claim,
+    ExpenseLineItem,
+    Policy,
+    PolicyAccumulator,
+    PolicyCoverageTerm,
+    ServiceEvent,
+)
+from app.domain.enums import ClaimStatus, NetworkTier
+
+ACCUMULATOR_COLUMNS = ("patient_responsibility_cents", "expense_paid_cents", "eob_count")
+NO_TERM = 0
+
+
+@dataclass(slots=True)
+class AccumulatorTotals:
+    patient_responsibility_cents: int = 0
+    expense_paid_cents: int = 0
+    eob_count: int = 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _upsert(db: Session, policy_id: int, term_id: int, deltas: dict[str, int]) -> None:
+    if not any(deltas.values()):
+        return
+    values = {column: deltas.get(column, 0) for column in ACCUMULATOR_COLUMNS}
+    stmt = insert(PolicyAccumulator).values(policy_id=policy_id, coverage_term_id=term_id, updated_at=_utcnow(), **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PolicyAccumulator.policy_id, PolicyAccumulator.coverage_term_id],
+        set_={
+            **{column: getattr(PolicyAccumulator, column) + getattr(stmt.excluded, column) for column in deltas},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+
+
+def resolve_term_id(db: Session, policy_id: int, service_date: date) -> int:
+    """In-network coverage term covering the service date; claims do not record a network tier."""
+    term_id = db.scalar(
+        select(PolicyCoverageTerm.id)
+        .where(
+            PolicyCoverageTerm.policy_id == policy_id,
+            PolicyCoverageTerm.network_tier == NetworkTier.IN_NETWORK,
+            PolicyCoverageTerm.start_date <= service_date,
+            or_(PolicyCoverageTerm.end_date.is_(None), PolicyCoverageTerm.end_date >= service_date),
+        )
+        .order_by(PolicyCoverageTerm.start_date.desc(), PolicyCoverageTerm.id.desc())
+        .limit(1)
+    )
+    return term_id or NO_TERM
+
+
+def claim_estimate_cents(status: ClaimStatus, allowed_cents: int, paid_cents: int) -> int:
+    """Responsibility implied by a settled claim before its EOB arrives."""
+    if status != ClaimStatus.PAID:
+        return 0
+    return max(0, allowed_cents - paid_cents)
+
+
+def _claim_bucket(db: Session, claim: Claim) -> tuple[int, int]:
+    service_date = db.scalar(select(ServiceEvent.service_date).where(ServiceEvent.id == claim.service_event_id))
+    return claim.policy_id, resolve_term_id(db, claim.policy_id, service_date or date.today())
+
+
+def _eob_count(db: Session, claim_id: int) -> int:
+    return db.scalar(select(func.count()).select_from(EOB).where(EOB.claim_id == claim_id)) or 0
+
+
+def apply_claim_change(
+    db: Session,
+    claim: Claim,
+    before: tuple[ClaimStatus, int, int] | None = None,
+) -> None:
+    """Adjust for a created (flushed) or edited claim; pass the prior (status, allowed, paid) when editing.
+
+    Claims with an EOB contribute through the EOB instead, so their amounts are ignored here.
+    Moving a claim to another policy or service event needs a rebuild.
+    """
+    policy_id, term_id = _claim_bucket(db, claim)
+    deltas: dict[str, int] = {}
+    if before is None:
+        first_claim_id = db.scalar(
+            select(func.min(Claim.id)).where(Claim.service_event_id == claim.service_event_id)
+        )
+        if first_claim_id == claim.id:
+            # Payments recorded before the claim existed now have a policy to count toward.
+            deltas["expense_paid_cents"] = db.scalar(
+                select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
+                    ExpenseLineItem.service_event_id == claim.service_event_id
+                )
+            ) or 0
+    if not _eob_count(db, claim.id):
+        old = claim_estimate_cents(*before) if before is not None else 0
+        new = claim_estimate_cents(claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents)
+        deltas["patient_responsibility_cents"] = new - old
+    _upsert(db, policy_id, term_id, deltas)
+
+
+def apply_eob(db: Session, eob: EOB, sign: int = 1) -> None:
+    """Count an EOB (sign=1, after it is flushed) or back it out (sign=-1, before it is deleted)."""
+    claim = db.get(Claim, eob.claim_id)
+    if claim is None:
+        return
+    policy_id, term_id = _claim_bucket(db, claim)
+    deltas = {"patient_responsibility_cents": sign * eob.patient_responsibility_cents, "eob_count": sign}
+    # The first EOB supersedes the claim-level estimate; removing the last one restores it.
+    if _eob_count(db, claim.id) == 1:
+        estimate = claim_estimate_cents(claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents)
+        deltas["patient_responsibility_cents"] -= sign * estimate
+    _upsert(db, policy_id, term_id, deltas)
+
+
+def apply_event_payments(db: Session, service_event_id: int, amount_cents: int) -> None:
+    """Attribute payments for one service event to the policy of its first claim, if any."""
+    claim = db.scalar(
+        select(Claim).where(Claim.service_event_id == service_event_id).order_by(Claim.id.asc()).limit(1)
+    )
+    if claim is None:
+        return
+    policy_id, term_id = _claim_bucket(db, claim)
+    _upsert(db, policy_id, term_id, {"expense_paid_cents": amount_cents})
+
+
+def apply_expense(db: Session, expense: ExpenseLineItem, sign: int = 1) -> None:
+    if expense.service_event_id is None:
+        return
+    apply_event_payments(db, expense.service_event_id, sign * expense.amount_cents)
+
+
+def compute_accumulators(db: Session) -> dict[tuple[int, int], AccumulatorTotals]:
+    """Recompute every accumulator from claims, EOBs and expenses."""
+    terms: dict[int, list[tuple[date, date | None, int]]] = {}
+    for term in db.scalars(
+        select(PolicyCoverageTerm)
+        .where(PolicyCoverageTerm.network_tier == NetworkTier.IN_NETWORK)
+        .order_by(PolicyCoverageTerm.start_date.desc(), PolicyCoverageTerm.id.desc())
+    ).all():
+        terms.setdefault(term.policy_id, []).append((term.start_date, term.end_date, term.id))
+
+    def term_for(policy_id: int, service_date: date) -> int:
+        for start, end, term_id in terms.get(policy_id, []):
+            if start <= service_date and (end is None or end >= service_date):
+                return term_id
+        return NO_TERM
+
+    eob_rows: dict[int, tuple[int, int]] = {
+        claim_id: (int(total), int(count))
+        for claim_id, total, count in db.execute(
+            select(EOB.claim_id, func.coalesce(func.sum(EOB.patient_responsibility_cents), 0), func.count()).group_by(EOB.claim_id)
+        ).all()
+    }
+    buckets: dict[tuple[int, int], AccumulatorTotals] = {}
+    claim_buckets: dict[int, tuple[int, int]] = {}
+    first_claim_by_event: dict[int, int] = {}
+    for claim, service_date in db.execute(
+        select(Claim, ServiceEvent.service_date)
+        .join(ServiceEvent, Claim.service_event_id == ServiceEvent.id)
+        .order_by(Claim.id.asc())
+    ).all():
+        key = (claim.policy_id, term_for(claim.policy_id, service_date))
+        claim_buckets[claim.id] = key
+        first_claim_by_event.setdefault(claim.service_event_id, claim.id)
+        bucket = buckets.setdefault(key, AccumulatorTotals())
+        if claim.id in eob_rows:
+            total, count = eob_rows[claim.id]
+            bucket.patient_responsibility_cents += total
+            bucket.eob_count += count
+        else:
+            bucket.patient_responsibility_cents += claim_estimate_cents(
+                claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents
+            )
+
+    for event_id, amount in db.execute(
+        select(ExpenseLineItem.service_event_id, func.sum(ExpenseLineItem.amount_cents))
+        .where(ExpenseLineItem.service_event_id.is_not(None))
+        .group_by(ExpenseLineItem.service_event_id)
+    ).all():
+        claim_id = first_claim_by_event.get(event_id)
+        if claim_id is not None:
+            buckets.setdefault(claim_buckets[claim_id], AccumulatorTotals()).expense_paid_cents += int(amount)
+    return buckets
+
+
+def _stored_accumulators(db: Session) -> dict[tuple[int, int], AccumulatorTotals]:
+    return {
+        (row.policy_id, row.coverage_term_id): AccumulatorTotals(*(getattr(row, column) for column in ACCUMULATOR_COLUMNS))
+        for row in db.scalars(select(PolicyAccumulator)).all()
+    }
+
+
+def rebuild_accumulators(db: Session) -> int:
+    """Replace every accumulator with a fresh scan; returns the bucket count."""
+    buckets = compute_accumulators(db)
+    db.execute(delete(PolicyAccumulator))
+    now = _utcnow()
+    for (policy_id, term_id), totals in sorted(buckets.items()):
+        db.add(
+            PolicyAccumulator(
+                policy_id=policy_id,
+                coverage_term_id=term_id,
+                updated_at=now,
+                **{column: getattr(totals, column) for column in ACCUMULATOR_COLUMNS},
+            )
+        )
+    db.flush()
+    return len(buckets)
+
+
+def verify_accumulators(db: Session) -> list[str]:
+    expected = compute_accumulators(db)
+    stored = _stored_accumulators(db)
+    failures: list[str] = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, AccumulatorTotals()) != stored.get(key, AccumulatorTotals()):
+            failures.append(f"accumulator_mismatch:policy={key[0]}:term={key[1]}")
+    return failures
+
+
+def ensure_accumulators(db: Session) -> bool:
+    """Seed accumulators on first start after upgrading; returns True if they were rebuilt."""
+    if db.scalar(select(PolicyAccumulator.id).limit(1)) is not None:
+        return False
+    if db.scalar(select(Claim.id).limit(1)) is None:
+        return False
+    rebuild_accumulators(db)
+    return True
+
+
+def policy_progress(db: Session, as_of: date) -> list[dict[str, Any]]:
+    """Deductible and OOP-max progress for each policy's term covering `as_of`."""
+    stored = _stored_accumulators(db)
+    progress: list[dict[str, Any]] = []
+    for policy in db.scalars(select(Policy).order_by(Policy.id.asc())).all():
+        term_id = resolve_term_id(db, policy.id, as_of)
+        term = db.get(PolicyCoverageTerm, term_id) if term_id else None
+        limits = term or policy
+        totals = stored.get((policy.id, term_id), AccumulatorTotals())
+        responsibility = totals.patient_responsibility_cents
+        progress.append(
+            {
+                "policy_id": policy.id,
+                "plan_type": policy.plan_type.value,
+                "term_start": term.start_date if term else None,
+                "deductible_cents": limits.deductible_cents,
+                "deductible_met_cents": min(responsibility, limits.deductible_cents),
+                "oop_max_cents": limits.oop_max_cents,
+                "oop_met_cents": min(responsibility, limits.oop_max_cents) if limits.oop_max_cents else responsibility,
+                "expense_paid_cents": totals.expense_paid_cents,
+                "eob_count": totals.eob_count,
+            }
+        )
+    return progress
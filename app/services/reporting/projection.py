@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import date
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import MonthlyRollup, Policy, PolicyCoverageTerm
+from app.domain.enums import NetworkTier
+from app.services.calendar.recurrence import series_occurrences
+from app.services.calendar.versions import POLICIES_KEY, SERIES_KEY, read_counters
+
+SEASONALITY_YEARS = 3
+FULL_SHARE_BPS = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class PlanTerms:
+    deductible_cents: int = 0
+    # 0 means uncapped.
+    oop_max_cents: int = 0
+    # Patient share of charges past the deductible, in basis points; 10000 treats every expense as paid in full.
+    coinsurance_bps: int = FULL_SHARE_BPS
+    monthly_premium_cents: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class MonthProjection:
+    month: int
+    actual: bool
+    expense_cents: int
+    appointment_cents: int
+    patient_cents: int
+    premium_cents: int
+
+
+@dataclass(frozen=True, slots=True)
+class YearProjection:
+    year: int
+    plan: PlanTerms
+    months: tuple[MonthProjection, ...]
+
+    @property
+    def gross_cents(self) -> int:
+        return sum(m.expense_cents + m.appointment_cents for m in self.months)
+
+    @property
+    def patient_cents(self) -> int:
+        return sum(m.patient_cents for m in self.months)
+
+    @property
+    def premium_cents(self) -> int:
+        return sum(m.premium_cents for m in self.months)
+
+    @property
+    def total_cents(self) -> int:
+        return self.patient_cents + self.premium_cents
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerSnapshot:
+    version: tuple[int, int, int, int]
+    as_of: date
+    # (year, month) -> (expense_total_cents, appointment_invoice_cents), the latter including the
+    # virtual occurrences of recurring series from SEASONALITY_YEARS back through next year.
+    history: dict[tuple[int, int], tuple[int, int]]
+    plan: PlanTerms
+
+
+def ledger_version(db: Session) -> tuple[int, int, int, int]:
+    """Changes whenever a rollup month, a policy or a series changes; rollup revisions only ever grow."""
+    revision_sum, months = db.execute(
+        select(func.coalesce(func.sum(MonthlyRollup.revision), 0), func.count()).select_from(MonthlyRollup)
+    ).one()
+    counters = read_counters(db, [POLICIES_KEY, SERIES_KEY])
+    return int(revision_sum), int(months), counters[POLICIES_KEY], counters[SERIES_KEY]
+
+
+def _with_series_occurrences(
+    db: Session, history: dict[tuple[int, int], tuple[int, int]], as_of: date
+) -> dict[tuple[int, int], tuple[int, int]]:
+    """Adds virtual series occurrences to the appointment spend, as the dashboard's month counts do.
+
+    Rollups only count stored rows. The window covers the seasonality years, the trailing run
+    rate and the year after as_of, which is every month a projection near as_of reads.
+    """
+    window_start = date(as_of.year - SEASONALITY_YEARS, 1, 1)
+    window_end = date(as_of.year + 1, 12, 31)
+    merged = dict(history)
+    for series, occurrence in series_occurrences(db, window_start, window_end):
+        key = (occurrence.year, occurrence.month)
+        expense, appointment = merged.get(key, (0, 0))
+        merged[key] = (expense, appointment + series.estimated_invoice_cents)
+    return merged
+
+
+def current_plan_terms(db: Session, as_of: date) -> PlanTerms:
+    """Premiums summed over all policies; caps from the newest policy's active in-network term."""
+    premium = db.scalar(select(func.coalesce(func.sum(Policy.monthly_premium_cents), 0))) or 0
+    policy = db.scalar(select(Policy).order_by(Policy.id.desc()).limit(1))
+    if policy is None:
+        return PlanTerms(monthly_premium_cents=premium)
+    term = db.scalar(
+        select(PolicyCoverageTerm)
+        .where(
+            PolicyCoverageTerm.policy_id == policy.id,
+            PolicyCoverageTerm.network_tier == NetworkTier.IN_NETWORK,
+            PolicyCoverageTerm.start_date <= as_of,
+            or_(PolicyCoverageTerm.end_date.is_(None), PolicyCoverageTerm.end_date >= as_of),
+        )
+        .order_by(PolicyCoverageTerm.start_date.desc())
+        .limit(1)
+    )
+    source = term or policy
+    return PlanTerms(
+        deductible_cents=source.deductible_cents,
+        oop_max_cents=source.oop_max_cents,
+        monthly_premium_cents=premium,
+    )
+
+
+def _seasonality(history: dict[tuple[int, int], tuple[int, int]], year: int) -> list[float]:
+    """Per-calendar-month spend factors from up to SEASONALITY_YEARS prior years, shrunk toward 1.0."""
+    years = [y for y in range(year - SEASONALITY_YEARS, year) if any((y, m) in history for m in range(1, 13))]
+    if not years:
+        return [1.0] * 12
+    by_month = [sum(sum(history.get((y, m), (0, 0))) for y in years) / len(years) for m in range(1, 13)]
+    mean = sum(by_month) / 12
+    if mean <= 0:
+        return [1.0] * 12
+    weight = len(years) / (len(years) + 1)
+    return [1.0 + weight * (value / mean - 1.0) for value in by_month]
+
+
+def _run_rate(history: dict[tuple[int, int], tuple[int, int]], as_of: date) -> tuple[float, float]:
+    """Average monthly (expense, appointment) spend over the trailing twelve complete months."""
+    months: list[tuple[int, int]] = []
+    year, month = as_of.year, as_of.month
+    for _ in range(12):
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        months.append((year, month))
+    first_seen = min(history) if history else None
+    window = [key for key in months if first_seen is not None and key >= first_seen]
+    if not window:
+        return 0.0, 0.0
+    expenses = sum(history.get(key, (0, 0))[0] for key in window)
+    appointments = sum(history.get(key, (0, 0))[1] for key in window)
+    return expenses / len(window), appointments / len(window)
+
+
+def apply_plan(gross: list[int], plan: PlanTerms) -> list[int]:
+    """Patient responsibility per month: deductible first, then coinsurance, capped at the OOP max."""
+    deductible_left = plan.deductible_cents
+    oop_left = plan.oop_max_cents
+    shares: list[int] = []
+    for charges in gross:
+        toward_deductible = min(charges, deductible_left)
+        deductible_left -= toward_deductible
+        share = toward_deductible + (charges - toward_deductible) * plan.coinsurance_bps // FULL_SHARE_BPS
+        if plan.oop_max_cents > 0:
+            share = min(share, oop_left)
+            oop_left -= share
+        shares.append(share)
+    return shares
+
+
+def project_year(snapshot: LedgerSnapshot, year: int, as_of: date, plan: PlanTerms | None = None) -> YearProjection:
+    plan = plan or snapshot.plan
+    history = snapshot.history
+    factors = _seasonality(history, year)
+    expense_rate, appointment_rate = _run_rate(history, as_of)
+
+    expense_cents: list[int] = []
+    appointment_cents: list[int] = []
+    actual_flags: list[bool] = []
+    for month in range(1, 13):
+        booked_expense, booked_appointment = history.get((year, month), (0, 0))
+        if (year, month) < (as_of.year, as_of.month):
+            expense_cents.append(booked_expense)
+            appointment_cents.append(booked_appointment)
+            actual_flags.append(True)
+            continue
+        # Future-dated rows already in the ledger are a floor for the projection.
+        expense_cents.append(max(booked_expense, round(expense_rate * factors[month - 1])))
+        appointment_cents.append(max(booked_appointment, round(appointment_rate * factors[month - 1])))
+        actual_flags.append(False)
+
+    gross = [e + a for e, a in zip(expense_cents, appointment_cents, strict=True)]
+    patient = apply_plan(gross, plan)
+    months = tuple(
+        MonthProjection(
+            month=index + 1,
+            actual=actual_flags[index],
+            expense_cents=expense_cents[index],
+            appointment_cents=appointment_cents[index],
+            patient_cents=patient[index],
+            premium_cents=plan.monthly_premium_cents,
+        )
+        for index in range(12)
+    )
+    return YearProjection(year=year, plan=plan, months=months)
+
+
+class ProjectionEngine:
+    """Caches the ledger snapshot and projections until the ledger version moves."""
+
+    def __init__(self, max_results: int = 256) -> None:
+        self.max_results = max_results
+        self._snapshot: LedgerSnapshot | None = None
+        self._results: OrderedDict[tuple[object, ...], YearProjection] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def snapshot(self, db: Session, as_of: date) -> LedgerSnapshot:
+        version = ledger_version(db)
+        with self._lock:
+            if self._snapshot is not None and (self._snapshot.version, self._snapshot.as_of) == (version, as_of):
+                return self._snapshot
+        rows = db.execute(
+            select(
+                MonthlyRollup.year,
+                MonthlyRollup.month,
+                MonthlyRollup.expense_total_cents,
+                MonthlyRollup.appointment_invoice_cents,
+            )
+        ).all()
+        snapshot = LedgerSnapshot(
+            version=version,
+            as_of=as_of,
+            history=_with_series_occurrences(
+                db, {(y, m): (expense, appointment) for y, m, expense, appointment in rows}, as_of
+            ),
+            plan=current_plan_terms(db, as_of),
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._results.clear()
+        return snapshot
+
+    def project(self, db: Session, year: int, as_of: date, plan: PlanTerms | None = None) -> YearProjection:
+        snapshot = self.snapshot(db, as_of)
+        key = (snapshot.version, as_of, year, plan)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+        result = project_year(snapshot, year, as_of, plan)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def what_if(self, db: Session, year: int, as_of: date, **changes: int) -> tuple[YearProjection, YearProjection]:
+        """Project the year under the current plan and under the current plan with `changes` applied."""
+        baseline = self.project(db, year, as_of)
+        scenario = self.project(db, year, as_of, replace(baseline.plan, **changes))
+        return baseline, scenario
+
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+
+from sqlalchemy import Integer, cast, delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Appointment, ExpenseLineItem, MonthlyRollup
+
+ROLLUP_COLUMNS = ("expense_count", "expense_total_cents", "appointment_count", "appointment_invoice_cents")
+
+
+@dataclass(slots=True)
+class RollupTotals:
+    expense_count: int = 0
+    expense_total_cents: int = 0
+    appointment_count: int = 0
+    appointment_invoice_cents: int = 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _upsert(db: Session, year: int, month: int, deltas: dict[str, int]) -> None:
+    values = {column: deltas.get(column, 0) for column in ROLLUP_COLUMNS}
+    stmt = insert(MonthlyRollup).values(year=year, month=month, revision=1, updated_at=_utcnow(), **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.year, MonthlyRollup.month],
+        set_={
+            **{column: getattr(MonthlyRollup, column) + getattr(stmt.excluded, column) for column in deltas},
+            "revision": MonthlyRollup.revision + 1,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+
+
+def apply_expense_delta(db: Session, incurred_at: date, amount_cents: int, count: int = 1) -> None:
+    """Adjust the month bucket for an expense write inside the caller's transaction.
+
+    Pass negative values to back out a removed or edited expense.
+    """
+    _upsert(db, incurred_at.year, incurred_at.month, {"expense_count": count, "expense_total_cents": amount_cents})
+
+
+def apply_appointment_delta(db: Session, scheduled_at: datetime, invoice_cents: int, count: int = 1) -> None:
+    _upsert(
+        db,
+        scheduled_at.year,
+        scheduled_at.month,
+        {"appointment_count": count, "appointment_invoice_cents": invoice_cents},
+    )
+
+
+def back_out_provider_appointments(db: Session, provider_id: int) -> None:
+    """Subtract a provider's appointments before they are bulk-deleted."""
+    year_col = cast(func.strftime("%Y", Appointment.scheduled_at), Integer)
+    month_col = cast(func.strftime("%m", Appointment.scheduled_at), Integer)
+    rows = db.execute(
+        select(year_col, month_col, func.count(), func.coalesce(func.sum(Appointment.estimated_invoice_cents), 0))
+        .where(Appointment.provider_id == provider_id)
+        .group_by(year_col, month_col)
+    ).all()
+    for year, month, count, invoice in rows:
+        _upsert(db, int(year), int(month), {"appointment_count": -int(count), "appointment_invoice_cents": -int(invoice)})
+
+
+def get_rollup(db: Session, year: int, month: int) -> RollupTotals:
+    row = db.scalar(select(MonthlyRollup).where(MonthlyRollup.year == year, MonthlyRollup.month == month))
+    if row is None:
+        return RollupTotals()
+    return RollupTotals(*(getattr(row, column) for column in ROLLUP_COLUMNS))
+
+
+def get_revisions(db: Session, months: Iterable[tuple[int, int]]) -> dict[tuple[int, int], int]:
+    wanted = set(months)
+    if not wanted:
+        return {}
+    rows = db.execute(
+        select(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.revision).where(
+            MonthlyRollup.year.in_({year for year, _ in wanted}),
+            MonthlyRollup.month.in_({month for _, month in wanted}),
+        )
+    ).all()
+    return {(year, month): revision for year, month, revision in rows if (year, month) in wanted}
+
+
+def get_year_rollups(db: Session, year: int) -> dict[int, RollupTotals]:
+    rows = db.scalars(select(MonthlyRollup).where(MonthlyRollup.year == year)).all()
+    return {row.month: RollupTotals(*(getattr(row, column) for column in ROLLUP_COLUMNS)) for row in rows}
+
+
+def sum_rollups(rollups: Iterable[RollupTotals]) -> RollupTotals:
+    total = RollupTotals()
+    for item in rollups:
+        total.expense_count += item.expense_count
+        total.expense_total_cents += item.expense_total_cents
+        total.appointment_count += item.appointment_count
+        total.appointment_invoice_cents += item.appointment_invoice_cents
+    return total
+
+
+def compute_rollups(db: Session) -> dict[tuple[int, int], RollupTotals]:
+    """Aggregate every month straight from the base tables."""
+    buckets: dict[tuple[int, int], RollupTotals] = {}
+
+    expense_year = cast(func.strftime("%Y", ExpenseLineItem.incurred_at), Integer)
+    expense_month = cast(func.strftime("%m", ExpenseLineItem.incurred_at), Integer)
+    for year, month, count, total in db.execute(
+        select(expense_year, expense_month, func.count(), func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0))
+        .group_by(expense_year, expense_month)
+    ).all():
+        bucket = buckets.setdefault((int(year), int(month)), RollupTotals())
+        bucket.expense_count = int(count)
+        bucket.expense_total_cents = int(total)
+
+    appt_year = cast(func.strftime("%Y", Appointment.scheduled_at), Integer)
+    appt_month = cast(func.strftime("%m", Appointment.scheduled_at), Integer)
+    for year, month, count, invoice in db.execute(
+        select(appt_year, appt_month, func.count(), func.coalesce(func.sum(Appointment.estimated_invoice_cents), 0))
+        .group_by(appt_year, appt_month)
+    ).all():
+        bucket = buckets.setdefault((int(year), int(month)), RollupTotals())
+        bucket.appointment_count = int(count)
+        bucket.appointment_invoice_cents = int(invoice)
+    return buckets
+
+
+def rebuild_monthly_rollups(db: Session) -> int:
+    """Replace the rollup table with totals recomputed from scratch; returns the month count."""
+    buckets = compute_rollups(db)
+    # Revisions must never move backwards, or clients could revalidate a stale calendar month.
+    revisions = {(row.year, row.month): row.revision for row in db.scalars(select(MonthlyRollup)).all()}
+    db.execute(delete(MonthlyRollup))
+    now = _utcnow()
+    for year, month in sorted(set(buckets) | set(revisions)):
+        totals = buckets.get((year, month), RollupTotals())
+        db.add(
+            MonthlyRollup(
+                year=year,
+                month=month,
+                revision=revisions.get((year, month), 0) + 1,
+                updated_at=now,
+                **{column: getattr(totals, column) for column in ROLLUP_COLUMNS},
+            )
+        )
+    db.flush()
+    return len(buckets)
+
+
+def verify_monthly_rollups(db: Session) -> list[str]:
+    """Compare maintained rollups with a fresh aggregate; returns mismatching months."""
+    expected = compute_rollups(db)
+    stored = {
+        (row.year, row.month): RollupTotals(*(getattr(row, column) for column in ROLLUP_COLUMNS))
+        for row in db.scalars(select(MonthlyRollup)).all()
+    }
+    failures: list[str] = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, RollupTotals()) != stored.get(key, RollupTotals()):
+            failures.append(f"rollup_mismatch:{key[0]:04d}-{key[1]:02d}")
+    return failures
+
+
+def ensure_monthly_rollups(db: Session) -> bool:
+    """Seed the rollup table on first start after upgrading; returns True if it was rebuilt."""
+    if db.scalar(select(MonthlyRollup.id).limit(1)) is not None:
+        return False
+    has_rows = db.scalar(select(ExpenseLineItem.id).limit(1)) is not None
+    has_rows = has_rows or db.scalar(select(Appointment.id).limit(1)) is not None
+    if not has_rows:
+        return False
+    rebuild_monthly_rollups(db)
+    return True
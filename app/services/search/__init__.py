@@ -0,0 +1 @@
+# search package
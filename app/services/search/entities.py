@@ -0,0 +1,230 @@
+"""What goes into the search index, and turning index hits back into results.
+
+Writers call the `index_*` helpers in the same transaction as the change, so the index never
+lags the vault; `ensure_search_index` backfills rows written before the index existed. Document
+text is indexed by the extraction queue. Queries only match whole words: the blind tokens leave
+no way to do prefix or fuzzy matching.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models import Appointment, AppointmentSeries, Document, DocumentText, InsuranceProvider
+from app.services.search.index import (
+    KIND_APPOINTMENT,
+    KIND_DOCUMENT,
+    KIND_PROVIDER,
+    KIND_SERIES,
+    SEARCH_TABLE,
+    BlindIndex,
+    blind_index,
+    index_entry,
+    match_entries,
+    rowid_for,
+    words,
+)
+
+KIND_LABELS = {
+    KIND_DOCUMENT: "document",
+    KIND_APPOINTMENT: "appointment",
+    KIND_SERIES: "appointment_series",
+    KIND_PROVIDER: "provider",
+}
+SNIPPET_WORDS = 24
+MAX_RESULTS = 100
+_TEXT_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(slots=True)
+class SearchHit:
+    kind: str
+    id: int
+    title: str
+    # HTML-escaped excerpt with the matched words wrapped in <mark>.
+    snippet: str
+    url: str
+    rank: float
+    when: datetime | None = None
+
+
+def _join(*parts: str | None) -> str:
+    return "\n".join(part for part in parts if part)
+
+
+def appointment_text(appointment: Appointment | AppointmentSeries) -> str:
+    return _join(appointment.notes, appointment.prep_notes)
+
+
+def provider_text(provider: InsuranceProvider) -> str:
+    return _join(provider.name, provider.specialty, provider.notes)
+
+
+def index_appointment(db: Session, appointment: Appointment, index: BlindIndex | None = None) -> None:
+    index_entry(db, KIND_APPOINTMENT, appointment.id, appointment_text(appointment), index)
+
+
+def index_series(db: Session, series: AppointmentSeries, index: BlindIndex | None = None) -> None:
+    index_entry(db, KIND_SERIES, series.id, appointment_text(series), index)
+
+
+def index_provider(db: Session, provider: InsuranceProvider, index: BlindIndex | None = None) -> None:
+    index_entry(db, KIND_PROVIDER, provider.id, provider_text(provider), index)
+
+
+def ensure_search_index(db: Session, index: BlindIndex | None = None) -> int:
+    """Index appointments, series and providers that have no entry yet; returns how many were added."""
+    indexed = set(db.scalars(text(f"SELECT rowid FROM {SEARCH_TABLE}")))
+    added = 0
+    for appointment in db.scalars(
+        select(Appointment).where(or_(Appointment.notes.is_not(None), Appointment.prep_notes.is_not(None)))
+    ):
+        if rowid_for(KIND_APPOINTMENT, appointment.id) not in indexed:
+            index_appointment(db, appointment, index)
+            added += 1
+    for series in db.scalars(
+        select(AppointmentSeries).where(or_(AppointmentSeries.notes.is_not(None), AppointmentSeries.prep_notes.is_not(None)))
+    ):
+        if rowid_for(KIND_SERIES, series.id) not in indexed:
+            index_series(db, series, index)
+            added += 1
+    for provider in db.scalars(select(InsuranceProvider)):
+        if rowid_for(KIND_PROVIDER, provider.id) not in indexed:
+            index_provider(db, provider, index)
+            added += 1
+    return added
+
+
+def snippet(value: str, terms: Iterable[str], size: int = SNIPPET_WORDS) -> str:
+    """Window of `size` words starting a little before the first matched term, escaped for HTML, matches in <mark>."""
+    wanted = set(terms)
+    found = list(_TEXT_WORD_RE.finditer(value))
+    if not found:
+        return ""
+    first = next((pos for pos, word in enumerate(found) if word.group().lower() in wanted), 0)
+    start = max(0, min(first - size // 4, len(found) - size))
+    parts = ["… "] if start > 0 else []
+    previous_end: int | None = None
+    for word in found[start : start + size]:
+        if previous_end is not None:
+            parts.append(html.escape(_SPACE_RE.sub(" ", value[previous_end : word.start()])))
+        token = html.escape(word.group())
+        parts.append(f"<mark>{token}</mark>" if word.group().lower() in wanted else token)
+        previous_end = word.end()
+    if start + size < len(found):
+        parts.append(" …")
+    return "".join(parts)
+
+
+def _documents(db: Session, ids: list[int], terms: list[str], index: BlindIndex) -> dict[int, SearchHit]:
+    rows = db.execute(
+        select(Document.id, Document.filename, Document.created_at, DocumentText.text_enc)
+        .outerjoin(DocumentText, DocumentText.document_id == Document.id)
+        .where(Document.id.in_(ids))
+    ).all()
+    encryptor = index.encryptor() if any(row.text_enc for row in rows) else None
+    hits = {}
+    for doc_id, filename, created_at, text_enc in rows:
+        body = encryptor.decrypt(text_enc) if encryptor is not None and text_enc else ""
+        hits[doc_id] = SearchHit(
+            kind=KIND_LABELS[KIND_DOCUMENT],
+            id=doc_id,
+            title=filename,
+            snippet=snippet(body, terms) or snippet(filename, terms),
+            url=f"/policies/documents/{doc_id}/view",
+            rank=0.0,
+            when=created_at,
+        )
+    return hits
+
+
+def _appointments(db: Session, ids: list[int], terms: list[str]) -> dict[int, SearchHit]:
+    rows = db.execute(
+        select(Appointment, InsuranceProvider.name)
+        .join(InsuranceProvider, Appointment.provider_id == InsuranceProvider.id)
+        .where(Appointment.id.in_(ids))
+    ).all()
+    return {
+        appointment.id: SearchHit(
+            kind=KIND_LABELS[KIND_APPOINTMENT],
+            id=appointment.id,
+            title=f"{name} · {appointment.scheduled_at:%Y-%m-%d %H:%M}",
+            snippet=snippet(appointment_text(appointment), terms),
+            url=f"/?year={appointment.scheduled_at.year}&month={appointment.scheduled_at.month}",
+            rank=0.0,
+            when=appointment.scheduled_at,
+        )
+        for appointment, name in rows
+    }
+
+
+def _series(db: Session, ids: list[int], terms: list[str]) -> dict[int, SearchHit]:
+    rows = db.execute(
+        select(AppointmentSeries, InsuranceProvider.name)
+        .join(InsuranceProvider, AppointmentSeries.provider_id == InsuranceProvider.id)
+        .where(AppointmentSeries.id.in_(ids))
+    ).all()
+    return {
+        series.id: SearchHit(
+            kind=KIND_LABELS[KIND_SERIES],
+            id=series.id,
+            title=f"{name} · recurring from {series.dtstart:%Y-%m-%d}",
+            snippet=snippet(appointment_text(series), terms),
+            url=f"/?year={series.dtstart.year}&month={series.dtstart.month}",
+            rank=0.0,
+            when=series.dtstart,
+        )
+        for series, name in rows
+    }
+
+
+def _providers(db: Session, ids: list[int], terms: list[str]) -> dict[int, SearchHit]:
+    return {
+        provider.id: SearchHit(
+            kind=KIND_LABELS[KIND_PROVIDER],
+            id=provider.id,
+            title=provider.name,
+            snippet=snippet(provider_text(provider), terms),
+            url="/providers",
+            rank=0.0,
+        )
+        for provider in db.scalars(select(InsuranceProvider).where(InsuranceProvider.id.in_(ids)))
+    }
+
+
+def search(db: Session, query: str, limit: int = 20, index: BlindIndex | None = None) -> list[SearchHit]:
+    """Best-ranked entities containing every word of `query`.
+
+    The FTS query does the ranking; results are then loaded with one IN query per kind, and only
+    the returned page of documents is decrypted for snippets. Entries whose row has gone are dropped.
+    """
+    index = index or blind_index
+    limit = max(1, min(limit, MAX_RESULTS))
+    matches = match_entries(db, query, limit=limit, index=index)
+    if not matches:
+        return []
+    by_kind: dict[int, list[int]] = {}
+    for kind, ref_id, _ in matches:
+        by_kind.setdefault(kind, []).append(ref_id)
+    terms = words(query)
+    loaded: dict[int, dict[int, SearchHit]] = {
+        KIND_DOCUMENT: _documents(db, by_kind[KIND_DOCUMENT], terms, index) if KIND_DOCUMENT in by_kind else {},
+        KIND_APPOINTMENT: _appointments(db, by_kind[KIND_APPOINTMENT], terms) if KIND_APPOINTMENT in by_kind else {},
+        KIND_SERIES: _series(db, by_kind[KIND_SERIES], terms) if KIND_SERIES in by_kind else {},
+        KIND_PROVIDER: _providers(db, by_kind[KIND_PROVIDER], terms) if KIND_PROVIDER in by_kind else {},
+    }
+    hits = []
+    for kind, ref_id, rank in matches:
+        hit = loaded.get(kind, {}).get(ref_id)
+        if hit is not None:
+            hit.rank = rank
+            hits.append(hit)
+    return hits
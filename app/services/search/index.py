@@ -0,0 +1,113 @@
+"""Encrypted-at-rest full-text index.
+
+The FTS5 table never sees plaintext: every word is replaced by a keyed HMAC ("blind index"
+token) before it is written, and queries are tokenized the same way. Word order and counts are
+preserved, so MATCH, phrase queries and bm25 ranking still work. The key derives from the vault
+KEK, so the index has to be rebuilt if the KEK ever changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import re
+import threading
+from collections.abc import Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.crypto import FieldEncryptor, KekSource, KeyManager, UnlockedKeyManager
+
+SEARCH_TABLE = "search_index"
+KIND_DOCUMENT = 1
+KIND_APPOINTMENT = 2
+KIND_PROVIDER = 3
+KIND_SERIES = 4
+# rowid = ref_id << KIND_BITS | kind, so an entry is replaced or removed by primary key.
+KIND_BITS = 4
+TOKEN_HEX_CHARS = 16
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_KEY_CONTEXT = b"cb-organizer search index v1"
+
+
+def rowid_for(kind: int, ref_id: int) -> int:
+    return (ref_id << KIND_BITS) | kind
+
+
+def split_rowid(rowid: int) -> tuple[int, int]:
+    return rowid & ((1 << KIND_BITS) - 1), rowid >> KIND_BITS
+
+
+def words(value: str) -> list[str]:
+    return _WORD_RE.findall(value.lower())
+
+
+class BlindIndex:
+    def __init__(self, key_manager: KekSource | None = None) -> None:
+        self._key_manager = key_manager
+        # (KEK, index key), unwrapped on first use.
+        self._keys: tuple[bytes, bytes] | None = None
+        self._lock = threading.Lock()
+
+    def _unlocked(self) -> tuple[bytes, bytes]:
+        with self._lock:
+            if self._keys is None:
+                kek = (self._key_manager or KeyManager()).get_or_create_kek()
+                self._keys = (kek, hmac.new(kek, _KEY_CONTEXT, hashlib.sha256).digest())
+            return self._keys
+
+    def _index_key(self) -> bytes:
+        return self._unlocked()[1]
+
+    def encryptor(self) -> FieldEncryptor:
+        """Field encryptor sharing the unlocked KEK; snippets decrypt many rows per query."""
+        return FieldEncryptor(UnlockedKeyManager(self._unlocked()[0]))
+
+    def token(self, word: str) -> str:
+        return hmac.new(self._index_key(), word.encode("utf-8"), hashlib.sha256).hexdigest()[:TOKEN_HEX_CHARS]
+
+    def tokens(self, value: str) -> list[str]:
+        cache: dict[str, str] = {}
+        out = []
+        for word in words(value):
+            if word not in cache:
+                cache[word] = self.token(word)
+            out.append(cache[word])
+        return out
+
+
+blind_index = BlindIndex()
+
+
+def index_entry(db: Session, kind: int, ref_id: int, value: str, index: BlindIndex | None = None) -> None:
+    """Replace the indexed text of one entity; empty text just removes it."""
+    rowid = rowid_for(kind, ref_id)
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": rowid})
+    tokens = (index or blind_index).tokens(value)
+    if tokens:
+        db.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, tokens) VALUES (:rowid, :tokens)"), {"rowid": rowid, "tokens": " ".join(tokens)})
+
+
+def remove_entry(db: Session, kind: int, ref_id: int) -> None:
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": rowid_for(kind, ref_id)})
+
+
+def remove_entries(db: Session, kind: int, ref_ids: Sequence[int]) -> None:
+    if ref_ids:
+        db.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+            [{"rowid": rowid_for(kind, ref_id)} for ref_id in ref_ids],
+        )
+
+
+def match_entries(db: Session, query: str, limit: int = 20, index: BlindIndex | None = None) -> list[tuple[int, int, float]]:
+    """(kind, ref_id, bm25 rank) of entries containing every query word, best first."""
+    tokens = (index or blind_index).tokens(query)
+    if not tokens:
+        return []
+    rows = db.execute(
+        text(f"SELECT rowid, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query ORDER BY rank LIMIT :limit"),
+        {"query": " ".join(f'"{token}"' for token in tokens), "limit": limit},
+    )
+    return [(*split_rowid(rowid), rank) for rowid, rank in rows]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from sqlalchemy import case, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import SyncCursor
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class SyncCursorStore:
+    """Durable page cursors per (adapter, scope).
+
+    save() commits the session, so whatever the sink wrote for the page becomes durable together
+    with the cursor that follows it. A finished pass clears the cursor and the next run starts over.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def load(self, adapter_key: str, scope: str = "") -> str | None:
+        return self.db.scalar(select(SyncCursor.cursor).where(SyncCursor.adapter_key == adapter_key, SyncCursor.scope == scope))
+
+    def save(self, adapter_key: str, scope: str, cursor: str | None, records: int) -> None:
+        now = _utcnow()
+        stmt = insert(SyncCursor).values(
+            adapter_key=adapter_key,
+            scope=scope,
+            cursor=cursor,
+            records=records,
+            updated_at=now,
+            completed_at=None if cursor else now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SyncCursor.adapter_key, SyncCursor.scope],
+            set_={
+                "cursor": stmt.excluded.cursor,
+                # Records of the pass in progress; a pass that restarts from the top starts counting again.
+                "records": case((SyncCursor.cursor.is_(None), 0), else_=SyncCursor.records) + stmt.excluded.records,
+                "updated_at": stmt.excluded.updated_at,
+                "completed_at": stmt.excluded.completed_at,
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Iterable
+import json
+from collections.abc import Iterable
+from typing import Any
 
 
 def make_idempotency_key(*parts: str) -> str:
@@ -17,3 +19,9 @@ def dedupe_keys(keys: Iterable[str]) -> list[str]:
             seen.add(key)
             out.append(key)
     return out
+
+
+def payload_hash(payload: dict[str, Any]) -> str:
+    """Stable digest of a record payload; key order and whitespace do not change it."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
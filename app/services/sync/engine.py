@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import random
 import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass, field
-from typing import Callable
+from typing import TYPE_CHECKING
 
 from app.services.providers.registry import registry
 
+if TYPE_CHECKING:
+    from app.services.providers.base import ProviderAdapter
+    from app.services.sync.cursors import SyncCursorStore
+    from app.services.sync.records import SyncRecordLedger
+
 
 @dataclass(slots=True)
 class ProviderCircuit:
@@ -17,26 +24,97 @@ class ProviderCircuit:
 class SyncEngine:
     max_failures: int = 3
     cooldown_seconds: int = 120
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.2
+    backoff_cap_seconds: float = 5.0
     circuits: dict[str, ProviderCircuit] = field(default_factory=dict)
 
-    def run_once(self, adapter_key: str, sink: Callable[[dict], None]) -> int:
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, so adapters failing together do not retry in lockstep."""
+        return random.uniform(0, min(self.backoff_cap_seconds, self.backoff_base_seconds * (2**attempt)))
+
+    def run_once(
+        self,
+        adapter_key: str,
+        sink: Callable[[dict], None],
+        cursors: SyncCursorStore | None = None,
+        scope: str = "",
+        ledger: SyncRecordLedger | None = None,
+    ) -> int:
+        """Sink records page by page and return how many were sunk, or 0 if the run failed.
+
+        Retries continue from the last completed page. With a cursor store, the position is also
+        committed after each page (after flushing the sink, if it buffers), so a run interrupted by
+        a crash or an open circuit resumes there next time. With a record ledger, only new or
+        changed records reach the sink; the ledger notes them once the sink has taken the page, in
+        the transaction the cursor commits. A pass that ran from the first page to the last
+        soft-deletes the records it no longer saw.
+        """
         circuit = self.circuits.setdefault(adapter_key, ProviderCircuit())
         now = time.time()
         if now < circuit.opened_until:
             return 0
 
         adapter = registry.create(adapter_key)
-        for attempt in range(1, 4):
-            try:
-                records = adapter.refresh()
-                for record in records:
-                    sink({"adapter": adapter_key, "external_id": record.external_id, "payload": record.payload})
-                circuit.failures = 0
-                return len(records)
-            except Exception:
-                time.sleep(0.2 * (2**attempt))
+        try:
+            count = self._run_pages(adapter, adapter_key, sink, cursors, scope, ledger)
+        finally:
+            adapter.close()
+        if count is not None:
+            circuit.failures = 0
+            return count
 
         circuit.failures += 1
         if circuit.failures >= self.max_failures:
             circuit.opened_until = now + self.cooldown_seconds
         return 0
+
+    def _run_pages(
+        self,
+        adapter: ProviderAdapter,
+        adapter_key: str,
+        sink: Callable[[dict], None],
+        cursors: SyncCursorStore | None,
+        scope: str,
+        ledger: SyncRecordLedger | None,
+    ) -> int | None:
+        """Records sunk by a complete pass, or None once every attempt failed."""
+        flush = getattr(sink, "flush", None)
+        cursor = cursors.load(adapter_key, scope) if cursors is not None else None
+        complete_pass = cursor is None
+        seen: set[str] = set()
+        count = 0
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                while True:
+                    page = adapter.fetch_page(cursor)
+                    records: Iterable[dict] = (
+                        {"adapter": adapter_key, "external_id": record.external_id, "payload": record.payload}
+                        for record in page.records
+                    )
+                    ledger_rows: list[dict] = []
+                    if ledger is not None:
+                        fetched = list(records)
+                        seen.update(record["external_id"] for record in fetched)
+                        records, ledger_rows = ledger.changed(adapter_key, scope, fetched)
+                    page_count = 0
+                    for record in records:
+                        sink(record)
+                        page_count += 1
+                    if flush is not None and (cursors is not None or ledger is not None):
+                        flush()
+                    if ledger is not None:
+                        # Only now that the sink has the page; a failed page is offered again on retry.
+                        ledger.record(ledger_rows)
+                        if page.next_cursor is None and complete_pass:
+                            ledger.sweep(adapter_key, scope, seen)
+                    if cursors is not None:
+                        cursors.save(adapter_key, scope, page.next_cursor, page_count)
+                    cursor = page.next_cursor
+                    count += page_count
+                    if cursor is None:
+                        return count
+            except Exception:
+                if attempt < self.max_attempts:
+                    time.sleep(self.backoff_delay(attempt))
+        return None
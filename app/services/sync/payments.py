@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.services.ledger.ingest import (
+    STATUS_CREATED,
+    STATUS_DUPLICATE,
+    STATUS_UPDATED,
+    NewExpense,
+    ingest_expenses,
+)
+from app.services.providers.manual_import import BATCH_ROWS, ImportSummary
+from app.services.sync.dedupe import make_idempotency_key
+
+
+class PaymentSink:
+    """SyncEngine sink that records payment records as expenses with a PatientPayment each.
+
+    Records are buffered and written through the bulk ingest path, so call flush() once the
+    run is over. Keys derive from (adapter, external_id): a replay is a duplicate, and a record
+    that comes back with a different amount, date or category updates the stored expense.
+    """
+
+    def __init__(self, db: Session, source: str, user_id: int | None = None, batch_size: int = BATCH_ROWS) -> None:
+        self.db = db
+        self.source = source
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.summary = ImportSummary()
+        self._batch: list[tuple[int, NewExpense]] = []
+        self._received = 0
+
+    def __call__(self, record: dict[str, Any]) -> None:
+        payload = record["payload"]
+        expense = NewExpense(
+            amount_cents=int(payload["amount_cents"]),
+            incurred_at=date.fromisoformat(payload["posted"]),
+            category=payload.get("category", "medical"),
+            memo=payload.get("name", ""),
+            idempotency_key=make_idempotency_key(record["adapter"], record["external_id"]),
+            last4=payload.get("last4"),
+        )
+        self._batch.append((self._received, expense))
+        self._received += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> ImportSummary:
+        batch, self._batch = self._batch, []
+        if batch:
+            for result in ingest_expenses(self.db, batch, self.user_id, payment_source=self.source, update_existing=True):
+                if result.status == STATUS_CREATED:
+                    self.summary.created += 1
+                elif result.status == STATUS_UPDATED:
+                    self.summary.updated += 1
+                elif result.status == STATUS_DUPLICATE:
+                    self.summary.duplicates += 1
+                else:
+                    self.summary.errors += 1
+        return self.summary
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import SyncRecord
+from app.services.sync.dedupe import payload_hash
+
+# A page normally fits in one lookup; larger pages are split to stay under SQLite's variable limit.
+LOOKUP_CHUNK = 5000
+
+CHANGE_CREATED = "created"
+CHANGE_UPDATED = "updated"
+CHANGE_RESTORED = "restored"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class SyncRecordLedger:
+    """Record-level change detection for adapter syncs, keyed by (adapter, scope, external_id).
+
+    changed() does one indexed lookup per page and returns only new, changed or reappearing
+    records, plus the ledger rows for them. The caller writes those rows with record() once the
+    sink has accepted the page, so a failed sink leaves the records pending for the retry. A
+    re-sync of unchanged data costs reads only. Like the cursor store, it leaves committing to
+    the caller.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def changed(self, adapter_key: str, scope: str, records: Iterable[dict]) -> tuple[list[dict], list[dict]]:
+        """The records worth sinking, each tagged with "change", and the ledger rows to record() for them."""
+        latest: dict[str, tuple[dict, str]] = {}
+        for record in records:
+            latest[record["external_id"]] = (record, payload_hash(record["payload"]))
+        if not latest:
+            return [], []
+        ids = list(latest)
+        known: dict[str, tuple[str, datetime | None]] = {}
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            found = self.db.execute(
+                select(SyncRecord.external_id, SyncRecord.payload_hash, SyncRecord.deleted_at).where(
+                    SyncRecord.adapter_key == adapter_key,
+                    SyncRecord.scope == scope,
+                    SyncRecord.external_id.in_(ids[start : start + LOOKUP_CHUNK]),
+                )
+            )
+            known.update((external_id, (digest, deleted_at)) for external_id, digest, deleted_at in found)
+
+        changed: list[dict] = []
+        rows: list[dict] = []
+        now = _utcnow()
+        for external_id, (record, digest) in latest.items():
+            previous = known.get(external_id)
+            if previous is None:
+                change = CHANGE_CREATED
+            elif previous[1] is not None:
+                change = CHANGE_RESTORED
+            elif previous[0] != digest:
+                change = CHANGE_UPDATED
+            else:
+                continue
+            changed.append({**record, "change": change})
+            rows.append(
+                {
+                    "adapter_key": adapter_key,
+                    "scope": scope,
+                    "external_id": external_id,
+                    "payload_hash": digest,
+                    "first_seen_at": now,
+                    "changed_at": now,
+                    "deleted_at": None,
+                }
+            )
+        return changed, rows
+
+    def record(self, rows: list[dict]) -> None:
+        """Write the ledger rows changed() returned, once their records have been sunk."""
+        if not rows:
+            return
+        stmt = insert(SyncRecord)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SyncRecord.adapter_key, SyncRecord.scope, SyncRecord.external_id],
+            set_={"payload_hash": stmt.excluded.payload_hash, "changed_at": stmt.excluded.changed_at, "deleted_at": None},
+        )
+        self.db.connection().execute(stmt, rows)
+
+    def sweep(self, adapter_key: str, scope: str, seen: set[str]) -> int:
+        """Soft-delete live records that a complete pass did not return; returns how many."""
+        live = self.db.scalars(
+            select(SyncRecord.external_id).where(
+                SyncRecord.adapter_key == adapter_key,
+                SyncRecord.scope == scope,
+                SyncRecord.deleted_at.is_(None),
+            )
+        ).all()
+        missing = [external_id for external_id in live if external_id not in seen]
+        now = _utcnow()
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            self.db.execute(
+                update(SyncRecord)
+                .where(
+                    SyncRecord.adapter_key == adapter_key,
+                    SyncRecord.scope == scope,
+                    SyncRecord.external_id.in_(missing[start : start + LOOKUP_CHUNK]),
+                )
+                .values(deleted_at=now)
+            )
+        return len(missing)
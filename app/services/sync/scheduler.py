@@ -0,0 +1,216 @@
+"""Concurrent provider sync.
+
+Every active provider whose adapter type maps to a registered adapter is synced once per run.
+Pages come from ProviderAdapter.afetch_page, which runs blocking adapters in a worker thread,
+so the event loop only waits. Retries resume from the last committed cursor and back off with
+asyncio.sleep instead of blocking the scheduler thread. Circuit state lives on the provider
+row, so an open circuit survives restarts.
+
+Without a sink nothing would store the records, so a run only fetches each provider's first
+page to check the adapter and leaves the record ledger and cursors alone; once a sink is
+configured, its first run still sees every record. Such a probe sets the provider's
+last_checked_at but not last_sync_at, which only moves when a sink took the records.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import app.services.providers.aggregator_stub  # registers the adapter
+import app.services.providers.portal_automation  # noqa: F401  (registers the adapter)
+from app.core.logging import get_logger
+from app.db.base import db_session
+from app.db.models import InsuranceProvider
+from app.domain.enums import ProviderAdapterType
+from app.services.providers.base import ProviderAdapter
+from app.services.providers.registry import registry
+from app.services.sync.cursors import SyncCursorStore
+from app.services.sync.engine import SyncEngine
+from app.services.sync.records import SyncRecordLedger
+
+logger = get_logger()
+
+ADAPTER_KEYS = {
+    ProviderAdapterType.AGGREGATOR: "aggregator_stub",
+    ProviderAdapterType.PORTAL_AUTOMATION: "portal_automation",
+}
+PER_ADAPTER_LIMIT = 2
+MAX_CONCURRENCY = 8
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+# Failures that count against a provider's circuit; anything else is a bug and propagates.
+SYNC_ERRORS = (httpx.HTTPError, OSError, RuntimeError, LookupError, ValueError, SQLAlchemyError)
+
+
+@dataclass(slots=True)
+class SyncTarget:
+    provider_id: int
+    adapter_key: str
+    open_until: datetime | None = None
+
+
+@dataclass(slots=True)
+class SyncOutcome:
+    provider_id: int
+    adapter_key: str
+    status: str
+    records: int = 0
+    error: str | None = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _naive(value: datetime | None) -> datetime | None:
+    return value.astimezone(UTC).replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+class ProviderSyncScheduler:
+    def __init__(
+        self,
+        engine: SyncEngine | None = None,
+        sink: Callable[[dict], None] | None = None,
+        per_adapter_limit: int = PER_ADAPTER_LIMIT,
+        max_concurrency: int = MAX_CONCURRENCY,
+        adapter_keys: dict[ProviderAdapterType, str] | None = None,
+    ) -> None:
+        self.engine = engine or SyncEngine()
+        self.sink = sink
+        self.per_adapter_limit = per_adapter_limit
+        self.max_concurrency = max_concurrency
+        self.adapter_keys = adapter_keys or ADAPTER_KEYS
+
+    def targets(self, db: Session, provider_ids: Iterable[int] | None = None) -> list[SyncTarget]:
+        stmt = select(InsuranceProvider).where(
+            InsuranceProvider.status == "active",
+            InsuranceProvider.adapter_type.in_(list(self.adapter_keys)),
+        )
+        if provider_ids is not None:
+            stmt = stmt.where(InsuranceProvider.id.in_(list(provider_ids)))
+        known = set(registry.list_adapters())
+        return [
+            SyncTarget(provider.id, self.adapter_keys[provider.adapter_type], _naive(provider.circuit_open_until))
+            for provider in db.scalars(stmt.order_by(InsuranceProvider.id)).all()
+            if self.adapter_keys[provider.adapter_type] in known
+        ]
+
+    async def _sync(
+        self,
+        target: SyncTarget,
+        now: datetime,
+        limit: asyncio.Semaphore,
+        adapter_limit: asyncio.Semaphore,
+        cursors: SyncCursorStore,
+        ledger: SyncRecordLedger,
+    ) -> SyncOutcome:
+        if target.open_until is not None and now < target.open_until:
+            return SyncOutcome(target.provider_id, target.adapter_key, STATUS_SKIPPED)
+        adapter = registry.create(target.adapter_key)
+        try:
+            return await self._sync_pages(target, adapter, limit, adapter_limit, cursors, ledger)
+        finally:
+            await adapter.aclose()
+
+    async def _sync_pages(
+        self,
+        target: SyncTarget,
+        adapter: ProviderAdapter,
+        limit: asyncio.Semaphore,
+        adapter_limit: asyncio.Semaphore,
+        cursors: SyncCursorStore,
+        ledger: SyncRecordLedger,
+    ) -> SyncOutcome:
+        scope = f"provider:{target.provider_id}"
+        flush = getattr(self.sink, "flush", None)
+        cursor = cursors.load(target.adapter_key, scope)
+        complete_pass = cursor is None
+        seen: set[str] = set()
+        count = 0
+        error: Exception | None = None
+        for attempt in range(1, self.engine.max_attempts + 1):
+            try:
+                while True:
+                    # Slots are held per page only, so a provider backing off does not starve the others.
+                    async with limit, adapter_limit:
+                        page = await adapter.afetch_page(cursor)
+                    if self.sink is None:
+                        return SyncOutcome(target.provider_id, target.adapter_key, STATUS_OK)
+                    fetched: list[dict] = [
+                        {"adapter": target.adapter_key, "external_id": record.external_id, "payload": record.payload}
+                        for record in page.records
+                    ]
+                    seen.update(record["external_id"] for record in fetched)
+                    records, ledger_rows = ledger.changed(target.adapter_key, scope, fetched)
+                    for record in records:
+                        self.sink(record)
+                    if flush is not None:
+                        flush()
+                    ledger.record(ledger_rows)
+                    if page.next_cursor is None and complete_pass:
+                        ledger.sweep(target.adapter_key, scope, seen)
+                    cursors.save(target.adapter_key, scope, page.next_cursor, len(records))
+                    cursor = page.next_cursor
+                    count += len(records)
+                    if cursor is None:
+                        return SyncOutcome(target.provider_id, target.adapter_key, STATUS_OK, records=count)
+            except SYNC_ERRORS as exc:
+                error = exc
+            if attempt < self.engine.max_attempts:
+                await asyncio.sleep(self.engine.backoff_delay(attempt))
+        logger.warning("Provider %s sync via %s failed: %s", target.provider_id, target.adapter_key, type(error).__name__)
+        return SyncOutcome(target.provider_id, target.adapter_key, STATUS_FAILED, records=count, error=type(error).__name__)
+
+    def _persist(self, db: Session, outcomes: list[SyncOutcome], now: datetime) -> None:
+        for outcome in outcomes:
+            if outcome.status == STATUS_SKIPPED:
+                continue
+            provider = db.get(InsuranceProvider, outcome.provider_id)
+            if provider is None:
+                continue
+            if outcome.status == STATUS_OK:
+                provider.last_checked_at = now
+                if self.sink is not None:
+                    provider.last_sync_at = now
+                provider.circuit_failures = 0
+                provider.circuit_open_until = None
+            else:
+                provider.circuit_failures = (provider.circuit_failures or 0) + 1
+                if provider.circuit_failures >= self.engine.max_failures:
+                    provider.circuit_open_until = now + timedelta(seconds=self.engine.cooldown_seconds)
+        db.flush()
+
+    async def run_all(self, db: Session, provider_ids: Iterable[int] | None = None) -> list[SyncOutcome]:
+        """Sync every eligible provider concurrently and record the results on the provider rows.
+
+        Cursors are committed after every page. The session is only touched from the event loop,
+        never from the worker threads that run blocking adapter calls.
+        """
+        targets = self.targets(db, provider_ids)
+        now = _utcnow()
+        limit = asyncio.Semaphore(self.max_concurrency)
+        adapter_limits = {key: asyncio.Semaphore(self.per_adapter_limit) for key in {t.adapter_key for t in targets}}
+        cursors, ledger = SyncCursorStore(db), SyncRecordLedger(db)
+        outcomes = list(
+            await asyncio.gather(
+                *(self._sync(t, now, limit, adapter_limits[t.adapter_key], cursors, ledger) for t in targets)
+            )
+        )
+        self._persist(db, outcomes, _utcnow())
+        return outcomes
+
+    def run(self) -> list[SyncOutcome]:
+        """Entry point for the background scheduler thread, which has no event loop of its own."""
+        with db_session() as db:
+            return asyncio.run(self.run_all(db))
@@ -0,0 +1,136 @@
+"""Measure per-request CSRF middleware overhead for GET pages and static files.
+
+Serves the login page template and a static file through three otherwise identical apps: no
+middleware, the CSRF logic as `@app.middleware("http")` (BaseHTTPMiddleware, as before), and
+`CsrfMiddleware`. Requests are driven straight through ASGI, so the numbers are middleware and
+framework cost only:
+
+    python scripts/bench_middleware.py --requests 5000
+"""
+
+# No `from __future__ import annotations`: FastAPI must see the real Request class on the
+# route defined inside build_apps().
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    return parser.parse_args()
+
+
+def build_apps():
+    from fastapi import FastAPI, Request
+    from fastapi.staticfiles import StaticFiles
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from app.api.middleware import CsrfMiddleware, security
+    from app.core.security import set_csrf_cookie
+    from app.main import templates
+
+    async def http_middleware(request: Request, call_next):
+        # The former @app.middleware("http") handler, minus the unsafe-method branch GETs never take.
+        cookie_token = request.cookies.get("cb_csrf")
+        request.state.csrf_token = cookie_token or security.new_csrf_token()
+        response = await call_next(request)
+        if not cookie_token:
+            set_csrf_cookie(response, request.state.csrf_token)
+        return response
+
+    static_dir = pathlib.Path(_PROJECT_ROOT) / "app" / "ui" / "static"
+    apps = {}
+    for name in ("none", "http", "asgi"):
+        bench = FastAPI()
+        if name == "http":
+            bench.add_middleware(BaseHTTPMiddleware, dispatch=http_middleware)
+        elif name == "asgi":
+            bench.add_middleware(CsrfMiddleware)
+        bench.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+
+        @bench.get("/page")
+        def page(request: Request):
+            return templates.TemplateResponse("login.html", {"request": request, "error": None})
+
+        apps[name] = bench
+    return apps
+
+
+async def call(app, path: str, cookie: bool) -> int:
+    headers = [(b"host", b"bench"), (b"accept", b"text/html")]
+    if cookie:
+        headers.append((b"cookie", b"cb_csrf=bench-token"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def time_requests(app, path: str, cookie: bool, count: int) -> float:
+    """Mean microseconds per request."""
+    assert await call(app, path, cookie) == 200
+    started = time.perf_counter()
+    for _ in range(count):
+        await call(app, path, cookie)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def run(args: argparse.Namespace) -> None:
+    apps = build_apps()
+    cases = [
+        ("page", "/page", True),
+        ("page, new client", "/page", False),
+        ("static", "/static/csrf.js", True),
+    ]
+    print(f"{'case':<18} {'none':>9} {'http':>9} {'asgi':>9} {'removed':>9}  (µs/request, median of {args.rounds})")
+    for label, path, cookie in cases:
+        medians = {}
+        for name, app in apps.items():
+            rounds = [await time_requests(app, path, cookie, args.requests) for _ in range(args.rounds)]
+            medians[name] = statistics.median(rounds)
+        removed = medians["http"] - medians["asgi"]
+        print(f"{label:<18} {medians['none']:>9.1f} {medians['http']:>9.1f} {medians['asgi']:>9.1f} {removed:>9.1f}")
+
+
+def main() -> int:
+    args = parse_args()
+    os.environ["CB_DATA_DIR"] = tempfile.mkdtemp(prefix="cb-bench-")
+    os.environ["CB_DISABLE_KEYRING"] = "1"
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+"""Measure /search latency on a synthetic vault.
+
+Builds appointments, providers and indexed documents in a throwaway data directory, then times
+`search()` for common, rare and missing words:
+
+    python scripts/bench_search.py --items 100000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+VOCABULARY = 5000
+WORDS_PER_ITEM = 15
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    data_dir = tempfile.mkdtemp(prefix="cb-bench-")
+    os.environ["CB_DATA_DIR"] = data_dir
+    os.environ.setdefault("CB_ORGANIZER_PASSPHRASE", "bench-passphrase")
+    os.environ["CB_DISABLE_KEYRING"] = "1"
+
+    # Imported after the environment points at the scratch directory.
+    from sqlalchemy import insert, text
+
+    from app.db.base import Base, db_session, engine, ensure_runtime_schema
+    from app.db.models import Appointment, Document, DocumentText, InsuranceProvider, User
+    from app.domain.enums import ProviderAdapterType
+    from app.services.search.entities import provider_text, search
+    from app.services.search.index import (
+        KIND_APPOINTMENT,
+        KIND_DOCUMENT,
+        KIND_PROVIDER,
+        SEARCH_TABLE,
+        blind_index,
+        rowid_for,
+    )
+
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema()
+    rng = random.Random(args.seed)
+    vocabulary = [f"term{i}" for i in range(VOCABULARY)]
+    tokens = {word: blind_index.token(word) for word in vocabulary}
+    providers = max(1, args.items // 100)
+    documents = args.items // 10
+    appointments = args.items - providers - documents
+    started = time.perf_counter()
+    with db_session() as db:
+        owner = User(email="bench", password_hash="")
+        db.add(owner)
+        db.flush()
+        provider_rows = [
+            {"id": i, "name": f"Provider {i}", "specialty": rng.choice(vocabulary), "adapter_type": ProviderAdapterType.MANUAL}
+            for i in range(1, providers + 1)
+        ]
+        db.execute(insert(InsuranceProvider), provider_rows)
+        entries = [
+            {"rowid": rowid_for(KIND_PROVIDER, row["id"]), "tokens": " ".join(blind_index.tokens(provider_text(InsuranceProvider(**row))))}
+            for row in provider_rows
+        ]
+        start = datetime(2020, 1, 1)
+        appointment_rows = []
+        for i in range(1, appointments + 1):
+            words = rng.choices(vocabulary, k=WORDS_PER_ITEM)
+            appointment_rows.append(
+                {"id": i, "provider_id": rng.randint(1, providers), "scheduled_at": start + timedelta(hours=i), "notes": " ".join(words)}
+            )
+            entries.append({"rowid": rowid_for(KIND_APPOINTMENT, i), "tokens": " ".join(tokens[word] for word in words)})
+        db.execute(insert(Appointment), appointment_rows)
+        encryptor = blind_index.encryptor()
+        document_rows, text_rows = [], []
+        for i in range(1, documents + 1):
+            words = rng.choices(vocabulary, k=WORDS_PER_ITEM * 20)
+            document_rows.append(
+                {
+                    "id": i,
+                    "owner_user_id": owner.id,
+                    "filename": f"statement-{i}.pdf",
+                    "storage_path": f"bench/{i}",
+                    "nonce": b"",
+                    "wrapped_dek": b"",
+                    "sha256_plaintext": "",
+                    "sha256_ciphertext": "",
+                    "size_bytes": 0,
+                }
+            )
+            text_rows.append({"document_id": i, "status": "done", "text_enc": encryptor.encrypt(" ".join(words))})
+            entries.append({"rowid": rowid_for(KIND_DOCUMENT, i), "tokens": " ".join(tokens[word] for word in words)})
+        db.execute(insert(Document), document_rows)
+        db.execute(insert(DocumentText), text_rows)
+        db.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, tokens) VALUES (:rowid, :tokens)"), entries)
+    print(f"data dir {data_dir}; {providers} providers, {appointments} appointments, {documents} documents "
+          f"built in {time.perf_counter() - started:.1f}s")
+
+    queries = {
+        "one common word": lambda: rng.choice(vocabulary),
+        "two words": lambda: " ".join(rng.sample(vocabulary, 2)),
+        "missing word": lambda: f"absent{rng.randint(0, 10**6)}",
+    }
+    with db_session() as db:
+        search(db, vocabulary[0], limit=args.limit)
+        for label, make_query in queries.items():
+            timings, found = [], 0
+            for _ in range(args.queries):
+                query = make_query()
+                began = time.perf_counter()
+                found += len(search(db, query, limit=args.limit))
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            print(
+                f"{label:>16}: p50 {statistics.median(timings):6.2f}ms  p95 {timings[int(len(timings) * 0.95) - 1]:6.2f}ms  "
+                f"max {timings[-1]:6.2f}ms  ({found / args.queries:.1f} results/query)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
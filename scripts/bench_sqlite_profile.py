@@ -0,0 +1,192 @@
+"""Compare SQLite connection profiles on the dashboard and expenses queries.
+
+Builds a synthetic ledger (expenses, appointments, receipts) in a throwaway data directory, then
+runs the queries behind the dashboard and the expenses page on a fresh engine for each profile
+in app/db/base.py:
+
+    python scripts/bench_sqlite_profile.py --expenses 300000 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+CATEGORIES = ("medical", "pharmacy", "dental", "vision", "therapy", "lab")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=300_000)
+    parser.add_argument("--appointments", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def build(args: argparse.Namespace) -> None:
+    from sqlalchemy import insert
+
+    from app.db.base import Base, db_session, engine, ensure_runtime_schema
+    from app.db.models import Appointment, Document, ExpenseLineItem, InsuranceProvider, User
+    from app.domain.enums import ProviderAdapterType
+    from app.services.reporting.rollups import rebuild_monthly_rollups
+
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    first_day = date(2016, 1, 1)
+    with db_session() as db:
+        owner = User(email="bench", password_hash="")
+        db.add(owner)
+        db.flush()
+        db.execute(
+            insert(InsuranceProvider),
+            [{"id": i, "name": f"Provider {i}", "adapter_type": ProviderAdapterType.MANUAL} for i in range(1, 201)],
+        )
+        db.execute(
+            insert(ExpenseLineItem),
+            [
+                {
+                    "id": i,
+                    "category": rng.choice(CATEGORIES),
+                    "amount_cents": rng.randint(500, 90_000),
+                    "incurred_at": first_day + timedelta(days=rng.randint(0, 365 * 10)),
+                }
+                for i in range(1, args.expenses + 1)
+            ],
+        )
+        db.execute(
+            insert(Document),
+            [
+                {
+                    "owner_user_id": owner.id,
+                    "expense_id": i,
+                    "filename": f"receipt-{i}.pdf",
+                    "storage_path": f"bench/{i}",
+                    "nonce": b"",
+                    "wrapped_dek": b"",
+                    "sha256_plaintext": "",
+                    "sha256_ciphertext": "",
+                    "size_bytes": 0,
+                }
+                for i in range(1, args.expenses + 1, 3)
+            ],
+        )
+        db.execute(
+            insert(Appointment),
+            [
+                {
+                    "provider_id": rng.randint(1, 200),
+                    "scheduled_at": datetime(2016, 1, 1, 8) + timedelta(hours=rng.randint(0, 24 * 365 * 10)),
+                    "estimated_invoice_cents": rng.randint(0, 40_000),
+                    "notes": "follow-up visit " * rng.randint(1, 8),
+                }
+                for _ in range(args.appointments)
+            ],
+        )
+        rebuild_monthly_rollups(db)
+    engine.dispose()
+    print(f"{args.expenses} expenses, {args.appointments} appointments built in {time.perf_counter() - started:.1f}s")
+
+
+def workloads():
+    from sqlalchemy import func, select
+
+    from app.db.models import Document, ExpenseLineItem, InsuranceProvider
+    from app.services.calendar.grid import build_month_grid
+    from app.services.ledger.pages import LedgerFilters, ledger_page, list_categories
+    from app.services.reporting.rollups import get_rollup, get_year_rollups
+
+    def dashboard(db, rng: random.Random) -> None:
+        year, month = rng.randint(2016, 2025), rng.randint(1, 12)
+        db.scalar(select(func.count()).select_from(InsuranceProvider))
+        db.scalar(select(func.count()).select_from(Document))
+        db.scalars(select(InsuranceProvider).order_by(InsuranceProvider.name.asc())).all()
+        db.scalars(select(ExpenseLineItem).order_by(ExpenseLineItem.id.desc()).limit(8)).all()
+        build_month_grid(db, year, month)
+        get_rollup(db, year, month)
+
+    def expenses(db, rng: random.Random) -> None:
+        year = rng.randint(2016, 2025)
+        get_year_rollups(db, year)
+        db.scalar(
+            select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
+                ExpenseLineItem.incurred_at > date(year, 6, 10), ExpenseLineItem.incurred_at < date(year, 7, 1)
+            )
+        )
+        list_categories(db)
+        # The first page, then scrolling ten pages deep, then a filtered view.
+        page = ledger_page(db, LedgerFilters())
+        for _ in range(10):
+            if not page.next_cursor:
+                break
+            page = ledger_page(db, LedgerFilters(), page.next_cursor)
+        ledger_page(db, LedgerFilters(category=rng.choice(CATEGORIES), date_from=date(year, 1, 1), date_to=date(year, 12, 31)))
+
+    return {"dashboard": dashboard, "expenses": expenses}
+
+
+def profile_engine(url: str, profile, connections: int):
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine(url, connect_args={"check_same_thread": False, "cached_statements": profile.cached_statements})
+
+    @event.listens_for(engine, "connect")
+    def apply_profile(dbapi_connection, connection_record) -> None:
+        # Runs after the app-wide listener, so this profile's values win. The cache is sized as
+        # for one of the app's pooled connections, although the benchmark only uses one.
+        cursor = dbapi_connection.cursor()
+        for pragma in profile.pragmas(connections):
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+def main() -> int:
+    args = parse_args()
+    data_dir = tempfile.mkdtemp(prefix="cb-bench-")
+    os.environ["CB_DATA_DIR"] = data_dir
+    os.environ["CB_DISABLE_KEYRING"] = "1"
+    build(args)
+
+    from sqlalchemy.orm import Session
+
+    from app.db.base import SQLITE_PROFILES, pool_connections, settings
+
+    for label, workload in workloads().items():
+        print(f"{label}:")
+        for name, profile in SQLITE_PROFILES.items():
+            engine = profile_engine(settings.db_url, profile, pool_connections)
+            rng = random.Random(args.seed)
+            timings = []
+            with Session(engine) as db:
+                workload(db, rng)
+                for _ in range(args.repeat):
+                    began = time.perf_counter()
+                    workload(db, rng)
+                    timings.append((time.perf_counter() - began) * 1000)
+                    db.expunge_all()
+            engine.dispose()
+            timings.sort()
+            print(
+                f"  {name:>12}: p50 {statistics.median(timings):7.2f}ms  p95 {timings[int(len(timings) * 0.95) - 1]:7.2f}ms  "
+                f"max {timings[-1]:7.2f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
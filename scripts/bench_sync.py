@@ -0,0 +1,111 @@
+"""Measure SyncEngine throughput and circuit-breaker behaviour against the local mock insurer.
+
+Runs against a throwaway data directory, so it never touches the real ledger:
+
+    python scripts/bench_sync.py --claims 50000 --page-size 1000 --latency-ms 20 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+
+import uvicorn
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--claims", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fault rate during the throughput runs.")
+    parser.add_argument("--fault-error-rate", type=float, default=0.9, help="Fault rate during the circuit-breaker phase.")
+    parser.add_argument("--fault-runs", type=int, default=8)
+    return parser.parse_args()
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main() -> int:
+    args = parse_args()
+    data_dir = tempfile.mkdtemp(prefix="cb-bench-")
+    os.environ["CB_DATA_DIR"] = data_dir
+    os.environ["CB_INSURER_API_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["CB_INSURER_API_PAGE_SIZE"] = str(args.page_size)
+
+    # Imported after the environment points at the scratch directory.
+    from app.db.base import Base, db_session, engine
+    from app.services.providers.insurer_http import HttpInsurerAdapter
+    from app.services.providers.mock_insurer import MockInsurerConfig, create_mock_insurer_app
+    from app.services.sync.cursors import SyncCursorStore
+    from app.services.sync.engine import SyncEngine
+    from app.services.sync.records import SyncRecordLedger
+
+    Base.metadata.create_all(bind=engine)
+    config = MockInsurerConfig(claims=args.claims, page_size=args.page_size, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    app = create_mock_insurer_app(config)
+    server = serve(app, args.port)
+    key = HttpInsurerAdapter.name
+    sink_count = 0
+
+    def sink(record: dict) -> None:
+        nonlocal sink_count
+        sink_count += 1
+
+    print(f"data dir {data_dir}; {args.claims} claims, page size {args.page_size}, latency {args.latency_ms}ms")
+    try:
+        runs = (("plain", "plain", False), ("ledger, first pass", "ledger", True), ("ledger, unchanged", "ledger", True))
+        for label, scope, use_ledger in runs:
+            sync = SyncEngine(max_attempts=5, backoff_base_seconds=0.05)
+            sink_count, requests, errors = 0, app.state.requests, app.state.errors
+            started = time.perf_counter()
+            with db_session() as db:
+                ledger = SyncRecordLedger(db) if use_ledger else None
+                sunk = sync.run_once(key, sink, cursors=SyncCursorStore(db), scope=scope, ledger=ledger)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{label:>20}: {sunk:>7} sunk in {elapsed:6.2f}s "
+                f"({args.claims / elapsed:9.0f} records/s), {app.state.requests - requests} requests, "
+                f"{app.state.errors - errors} injected faults"
+            )
+
+        config.error_rate = args.fault_error_rate
+        sync = SyncEngine(max_attempts=2, max_failures=2, cooldown_seconds=3600, backoff_base_seconds=0.01)
+        outcomes: list[str] = []
+        with db_session() as db:
+            cursors = SyncCursorStore(db)
+            for _ in range(args.fault_runs):
+                requests = app.state.requests
+                sunk = sync.run_once(key, sink, cursors=cursors, scope="faults")
+                if app.state.requests == requests:
+                    outcomes.append("skipped")
+                else:
+                    outcomes.append("ok" if sunk else "failed")
+            resume_at = cursors.load(key, "faults")
+        circuit = sync.circuits[key]
+        print(
+            f"{'faults':>20}: error rate {args.fault_error_rate:.0%}, runs {' '.join(outcomes)}; "
+            f"circuit failures {circuit.failures}, open {circuit.opened_until > time.time()}, resume cursor {resume_at}"
+        )
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
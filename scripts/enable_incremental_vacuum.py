@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import pathlib
+import sys
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+from app.db.base import ensure_incremental_vacuum
+
+
+def main() -> int:
+    # Rebuilds the whole file under the write lock; run it while the app is stopped.
+    if ensure_incremental_vacuum():
+        print("Rebuilt the database with incremental auto-vacuum")
+    else:
+        print("Incremental auto-vacuum is already enabled")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+
+import uvicorn
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+from app.services.providers.mock_insurer import MockInsurerConfig, create_mock_insurer_app
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve synthetic claims, EOBs and members for adapter testing.")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--claims", type=int, default=10_000)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> MockInsurerConfig:
+    return MockInsurerConfig(
+        claims=args.claims,
+        members=args.members,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"Mock insurer on http://127.0.0.1:{args.port} (set CB_INSURER_API_URL to use it)")
+    uvicorn.run(create_mock_insurer_app(config_from_args(args)), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+
+_PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parent.parent)
+sys.path.insert(0, _PROJECT_ROOT)
+
+from app.db import models  # noqa: F401
+from app.db.base import Base, db_session, engine, ensure_runtime_schema
+from app.services.reporting.accumulators import rebuild_accumulators, verify_accumulators
+from app.services.reporting.rollups import rebuild_monthly_rollups, verify_monthly_rollups
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify materialized ledger aggregates.")
+    parser.add_argument("--verify", action="store_true", help="Only compare maintained aggregates with a fresh scan.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema()
+    with db_session() as db:
+        if args.verify:
+            failures = verify_monthly_rollups(db) + verify_accumulators(db)
+            for failure in failures:
+                print(failure)
+            print("OK" if not failures else f"FAIL:{len(failures)}")
+            return 1 if failures else 0
+        months = rebuild_monthly_rollups(db)
+        print(f"Rebuilt monthly rollups for {months} months")
+        buckets = rebuild_accumulators(db)
+        print(f"Rebuilt deductible/OOP accumulators for {buckets} policy terms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import func, select
+
+from app.core.integrity import verify_audit_chain
+from app.db.base import SessionLocal
+from app.db.models import ExpenseLineItem
+from app.services.reporting.rollups import get_rollup, verify_monthly_rollups
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def test_bulk_json_and_ndjson_ingest_dedupes_and_reports_per_row(client) -> None:
+    _login(client)
+    category = "bulk-ingest"
+    rows = [
+        {"amount_cents": 1000 + i, "incurred_at": f"1987-0{1 + i % 3}-1{i % 9}", "category": category}
+        for i in range(1200)
+    ]
+    rows.append(dict(rows[0]))
+    rows.append({"amount_cents": -5, "incurred_at": "1987-01-01", "category": category})
+    rows.append({"amount_cents": 5, "incurred_at": "1987-01-01", "category": category, "service_event_id": 999999})
+
+    first = client.post("/expenses/api/bulk", json=rows, headers=_csrf_headers(client))
+    assert first.status_code == 200
+    body = first.json()
+    assert (body["created"], body["duplicates"], body["errors"]) == (1200, 1, 2)
+    results = body["results"]
+    assert [r["index"] for r in results] == list(range(len(rows)))
+    assert results[1200] == {"index": 1200, "status": "duplicate", "id": results[0]["id"], "error": None}
+    assert results[1201]["status"] == "error" and results[1201]["error"].startswith("amount_cents")
+    assert results[1202]["error"] == "Unknown service event"
+
+    ndjson = "\n".join(json.dumps(row) for row in rows[:3]) + "\n{not json\n\n"
+    ndjson += json.dumps({"amount_cents": 77, "incurred_at": "1987-03-30", "category": category})
+    second = client.post(
+        "/expenses/api/bulk",
+        content=ndjson.encode(),
+        headers={**_csrf_headers(client), "content-type": "application/x-ndjson"},
+    )
+    assert second.status_code == 200
+    body = second.json()
+    assert (body["created"], body["duplicates"], body["errors"]) == (1, 3, 1)
+    assert [r["status"] for r in body["results"]] == ["duplicate", "duplicate", "duplicate", "error", "created"]
+
+    bad = client.post("/expenses/api/bulk", content=b'{"amount_cents": 1}', headers=_csrf_headers(client))
+    assert bad.status_code == 400
+
+    with SessionLocal() as db:
+        count, total = db.execute(
+            select(func.count(), func.sum(ExpenseLineItem.amount_cents)).where(ExpenseLineItem.category == category)
+        ).one()
+        assert count == 1201
+        assert total == sum(row["amount_cents"] for row in rows[:1200]) + 77
+        assert get_rollup(db, 1987, 3).expense_count == 401
+        assert verify_monthly_rollups(db) == []
+        assert verify_audit_chain(db) == []
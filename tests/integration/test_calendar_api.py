@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from app.db.base import SessionLocal
+from app.db.models import InsuranceProvider
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def _add_provider(client, name: str) -> int:
+    client.post(
+        "/providers/add",
+        data={"name": name, "selector_color": "#00897B", "estimated_copay_cents": 1500, "adapter_key": "aggregator_stub"},
+        headers=_csrf_headers(client),
+    )
+    with SessionLocal() as db:
+        provider_id = db.scalar(select(InsuranceProvider.id).where(InsuranceProvider.name == name))
+    assert provider_id is not None
+    return provider_id
+
+
+def test_calendar_month_api_revalidates_with_etag(client) -> None:
+    _login(client)
+    provider_id = _add_provider(client, "Calendar ETag Clinic")
+
+    first = client.get("/api/calendar/2033/3")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    body = first.json()
+    assert body["label"] == "March 2033"
+    assert body["prev"] == {"year": 2033, "month": 2}
+    assert all(len(week) == 7 for week in body["weeks"])
+
+    cached = client.get("/api/calendar/2033/3", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    # A spill-over day from the next month also changes this month's tag.
+    client.post(
+        "/appointments/add",
+        data={"provider_id": provider_id, "appointment_date": "2033-04-01", "appointment_time": "08:15"},
+        headers=_csrf_headers(client),
+    )
+    refreshed = client.get("/api/calendar/2033/3", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    days = {day["date"]: day for week in refreshed.json()["weeks"] for day in week}
+    assert days["2033-04-01"]["appointments"][0]["provider_id"] == provider_id
+
+    assert client.get("/api/calendar/2033/13").status_code == 404
+
+
+def test_calendar_grid_partial_swaps_summary(client) -> None:
+    _login(client)
+    partial = client.get("/calendar/grid?year=2033&month=3")
+    assert partial.status_code == 200
+    assert 'id="calendar-grid"' in partial.text
+    assert 'hx-swap-oob="true"' in partial.text
+    assert client.get("/calendar/grid?year=2033&month=3", headers={"If-None-Match": partial.headers["etag"]}).status_code == 304
+
+
+def _month_visits(client, year: int, month: int) -> list[dict]:
+    body = client.get(f"/api/calendar/{year}/{month}").json()
+    return [
+        appt
+        for week in body["weeks"]
+        for day in week
+        if day["in_month"]
+        for appt in day["appointments"]
+    ]
+
+
+def test_recurring_series_expands_lazily_and_materializes_on_edit(client) -> None:
+    _login(client)
+    provider_id = _add_provider(client, "Weekly Therapy Clinic")
+    client.post(
+        "/appointments/add",
+        data={
+            "provider_id": provider_id,
+            "appointment_date": "2034-02-06",
+            "appointment_time": "17:00",
+            "estimated_invoice_cents": 4000,
+            "repeat": "WEEKLY",
+            "repeat_count": 6,
+        },
+        headers=_csrf_headers(client),
+    )
+
+    february = _month_visits(client, 2034, 2)
+    assert [visit["scheduled_date"] for visit in february] == ["2034-02-06", "2034-02-13", "2034-02-20", "2034-02-27"]
+    assert all(visit["id"] is None and visit["series_id"] for visit in february)
+    assert len(_month_visits(client, 2034, 3)) == 2
+
+    etag = client.get("/api/calendar/2034/2").headers["etag"]
+    second = february[1]
+    client.post(
+        "/appointments/update",
+        data={
+            "series_id": second["series_id"],
+            "occurrence_at": second["occurrence_at"],
+            "provider_id": provider_id,
+            "appointment_date": "2034-02-14",
+            "appointment_time": "18:00",
+            "estimated_invoice_cents": 4000,
+        },
+        headers=_csrf_headers(client),
+    )
+    client.post(
+        "/appointments/delete",
+        data={"series_id": february[2]["series_id"], "occurrence_at": february[2]["occurrence_at"]},
+        headers=_csrf_headers(client),
+    )
+
+    assert client.get("/api/calendar/2034/2", headers={"If-None-Match": etag}).status_code == 200
+    february = _month_visits(client, 2034, 2)
+    assert [visit["scheduled_date"] for visit in february] == ["2034-02-06", "2034-02-14", "2034-02-27"]
+    edited = february[1]
+    assert edited["id"] is not None and edited["scheduled_time"] == "18:00"
+
+    dashboard = client.get("/?year=2034&month=2")
+    assert "<strong>Month Appointments</strong><div>3</div>" in dashboard.text
@@ -15,3 +15,45 @@ def test_csrf_rejects_mismatched_token(client) -> None:
         headers={'x-csrf-token': 'mismatched-token'},
     )
     assert response.status_code == 403
+
+
+def test_csrf_token_read_from_form_fields(client) -> None:
+    client.get('/auth/login')
+    token = client.cookies.get('cb_csrf')
+    response = client.post('/auth/login', data={'csrf_token': token, 'pin': '1224'}, follow_redirects=False)
+    assert response.headers['location'] == '/'
+
+
+def test_csrf_token_read_from_leading_multipart_field(client) -> None:
+    client.get('/auth/login')
+    token = client.cookies.get('cb_csrf')
+    files = {'csv_file': ('payments.csv', b'x' * (256 * 1024), 'text/csv')}
+    # Past the CSRF check, the route itself then asks for a login.
+    response = client.post('/expenses/import/preview', data={'csrf_token': token}, files=files)
+    assert response.status_code == 401
+    # A token that only appears after a large file part is not scanned for.
+    files = [('csv_file', ('payments.csv', b'x' * (256 * 1024), 'text/csv')), ('csrf_token', (None, token))]
+    response = client.post('/expenses/import/preview', files=files)
+    assert response.status_code == 403
+
+
+def test_new_clients_get_the_csrf_cookie_the_page_renders(client) -> None:
+    response = client.get('/auth/login')
+    token = response.cookies.get('cb_csrf')
+    assert token and f'content="{token}"' in response.text
+    # Known clients keep their cookie.
+    assert 'cb_csrf' not in client.get('/static/csrf.js').cookies
+
+
+def test_browser_csrf_failure_redirects_back_with_a_new_token(client) -> None:
+    client.get('/auth/login')
+    old = client.cookies.get('cb_csrf')
+    response = client.post(
+        '/providers/add',
+        data={'name': 'x'},
+        headers={'accept': 'text/html', 'referer': 'http://testserver/providers?tab=2'},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert response.headers['location'] == '/providers?tab=2'
+    assert response.cookies.get('cb_csrf') not in (None, old)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import io
+import time
+
+from reportlab.pdfgen import canvas
+from sqlalchemy import select
+
+from app.core.crypto import FieldEncryptor
+from app.db.base import SessionLocal
+from app.db.models import Document, DocumentText
+from app.services.search.index import KIND_DOCUMENT, match_entries
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def _wait_for_text(document_id: int, timeout: float = 60.0) -> DocumentText:
+    deadline = time.monotonic() + timeout
+    while True:
+        with SessionLocal() as db:
+            job = db.scalar(select(DocumentText).where(DocumentText.document_id == document_id))
+            if job is not None and job.status not in {"queued", "running"}:
+                return job
+        assert time.monotonic() < deadline, "text extraction did not finish"
+        time.sleep(0.1)
+
+
+def test_uploaded_pdf_text_is_extracted_encrypted_and_indexed(client) -> None:
+    _login(client)
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf)
+    pdf.drawString(72, 720, "Explanation of Benefits for a zygomorphic MRI study")
+    pdf.drawString(72, 700, "Patient responsibility 412.50")
+    pdf.save()
+
+    response = client.post(
+        "/policies/documents/upload",
+        files={"file": ("mri-eob.pdf", buf.getvalue(), "application/pdf")},
+        data={"doc_type": "eob"},
+        headers=_csrf_headers(client),
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    with SessionLocal() as db:
+        document_id = db.scalar(select(Document.id).where(Document.filename == "mri-eob.pdf").order_by(Document.id.desc()))
+
+    job = _wait_for_text(document_id)
+    assert job.status == "done" and job.method == "pdf_text"
+    assert "zygomorphic" not in (job.text_enc or "")
+    assert "zygomorphic MRI" in FieldEncryptor().decrypt(job.text_enc or "")
+
+    with SessionLocal() as db:
+        assert (KIND_DOCUMENT, document_id) in [(kind, ref) for kind, ref, _ in match_entries(db, "Zygomorphic mri")]
+        assert match_entries(db, "zygomorphic nonexistentword") == []
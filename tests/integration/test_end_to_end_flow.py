@@ -351,3 +351,9 @@ def test_expense_receipt_upload_and_summary_cards(client) -> None:
     receipt_resp = client.get(f"/policies/documents/{receipt_doc_id}/view")
     assert receipt_resp.status_code == 200
     assert receipt_resp.headers.get("content-type", "").startswith("application/pdf")
+
+    what_if = client.get("/expenses/projection", params={"deductible_usd": "3000.00", "coinsurance_pct": 20})
+    assert what_if.status_code == 200
+    body = what_if.json()
+    assert body["scenario"]["deductible_cents"] == 300000
+    assert body["delta_cents"] == body["scenario"]["total_cents"] - body["baseline"]["total_cents"]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import io
+import time
+import zipfile
+
+from app.api.routes_exports import export_jobs
+from app.db.base import db_session
+from app.db.models import ExportJob
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def _wait_for_job(client, job_id: int) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = client.get(f"/exports/jobs/{job_id}").json()
+        if status["status"] not in {"queued", "running"}:
+            return status
+        time.sleep(0.05)
+    raise AssertionError("export job did not finish")
+
+
+def test_export_job_builds_artifact_and_serves_ranges(client) -> None:
+    _login(client)
+    client.post(
+        "/policies/documents/upload",
+        files={"file": ("eob.pdf", b"fake-eob-for-export-job", "application/pdf")},
+        data={"doc_type": "eob"},
+        headers=_csrf_headers(client),
+    )
+
+    created = client.post("/exports/jobs", data={"kind": "archive"}, headers=_csrf_headers(client))
+    assert created.status_code == 202
+    status = _wait_for_job(client, created.json()["id"])
+    assert status["status"] == "done"
+    assert status["sha256"]
+
+    full = client.get(status["download_url"])
+    assert full.status_code == 200
+    assert full.headers["etag"] == f'"{status["sha256"]}"'
+    assert "data.json" in zipfile.ZipFile(io.BytesIO(full.content)).namelist()
+
+    partial = client.get(status["download_url"], headers={"Range": "bytes=10-", "If-Range": full.headers["etag"]})
+    assert partial.status_code == 206
+    assert partial.content == full.content[10:]
+    assert partial.headers["content-range"] == f"bytes 10-{len(full.content) - 1}/{len(full.content)}"
+
+    not_modified = client.get(status["download_url"], headers={"If-None-Match": full.headers["etag"]})
+    assert not_modified.status_code == 304
+
+    unsatisfiable = client.get(status["download_url"], headers={"Range": f"bytes={len(full.content) + 5}-"})
+    assert unsatisfiable.status_code == 416
+
+
+def test_export_job_reuses_artifact_for_unchanged_vault(client) -> None:
+    _login(client)
+    first = _wait_for_job(client, client.post("/exports/jobs", headers=_csrf_headers(client)).json()["id"])
+    second = _wait_for_job(client, client.post("/exports/jobs", headers=_csrf_headers(client)).json()["id"])
+    assert first["status"] == second["status"] == "done"
+    assert first["sha256"] == second["sha256"]
+
+
+def test_unexpected_failure_marks_job_failed_and_cleanup_continues(client, monkeypatch) -> None:
+    class ArchiveBug(Exception):
+        pass
+
+    def broken(db, job) -> None:
+        raise ArchiveBug
+
+    with db_session() as db:
+        failing = export_jobs.create_job(db, None).id
+        stuck = export_jobs.create_job(db, None)
+        stuck.status = "running"
+        stuck_id = stuck.id
+    monkeypatch.setattr(export_jobs, "_build_archive", broken)
+    export_jobs._run(failing)
+    orphan = export_jobs.settings.exports_dir / f"{'0' * 64}.zip"
+    orphan.write_bytes(b"stale")
+    try:
+        export_jobs.expire_artifacts()
+        assert not orphan.exists()
+    finally:
+        orphan.unlink(missing_ok=True)
+        with db_session() as db:
+            db.get(ExportJob, stuck_id).status = "failed"
+    with db_session() as db:
+        job = db.get(ExportJob, failing)
+        assert (job.status, job.error) == ("failed", "ArchiveBug")
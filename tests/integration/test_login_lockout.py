@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core.security import login_limiter
+from app.db.base import db_session
+from app.db.models import User
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _attempt(client, pin: str):
+    return client.post("/auth/login", data={"pin": pin}, headers=_csrf_headers(client), follow_redirects=False)
+
+
+def test_repeated_wrong_pins_lock_out_the_source(client) -> None:
+    client.get("/auth/login")
+    try:
+        locations = [_attempt(client, "0000").headers["location"] for _ in range(login_limiter.max_failures)]
+        assert locations[:-1] == ["/auth/login?error=invalid"] * (login_limiter.max_failures - 1)
+        assert locations[-1] == "/auth/login?error=locked"
+        # Even the right PIN is refused until the window passes.
+        assert _attempt(client, "1224").headers["location"] == "/auth/login?error=locked"
+        assert "Too many incorrect PINs" in client.get("/auth/login?error=locked").text
+    finally:
+        login_limiter.clear()
+    assert _attempt(client, "1224").headers["location"] == "/"
+
+
+def _pin_hash() -> str:
+    with db_session() as db:
+        return db.scalar(select(User.password_hash).order_by(User.id.asc()).limit(1))
+
+
+def test_restart_keeps_a_current_pin_hash() -> None:
+    from app.main import app
+
+    with TestClient(app):
+        before = _pin_hash()
+    with TestClient(app):
+        assert _pin_hash() == before
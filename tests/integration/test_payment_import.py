@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from app.db.base import SessionLocal
+from app.db.models import ExpenseLineItem, PatientPayment
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+CSV = (
+    "Transaction Date,Description,Amount\n"
+    "03/01/1986,Pharmacy,-$12.34\n"
+    "03/02/1986,Clinic copay,-$40.00\n"
+    "03/03/1986,Broken,n/a\n"
+)
+
+
+def test_csv_preview_then_import_dedupes_on_reupload(client) -> None:
+    _login(client)
+    files = {"csv_file": ("payments.csv", CSV.encode(), "text/csv")}
+    data = {"category": "csv-import-test"}
+
+    preview = client.post("/expenses/import/preview", data=data, files=files, headers=_csrf_headers(client))
+    assert preview.status_code == 200
+    assert 'value="Transaction Date" selected' in preview.text
+    assert 'value="%m/%d/%Y" selected' in preview.text
+    assert "$12.34" in preview.text and "Invalid amount" in preview.text
+
+    for expected in ("imported=2&duplicates=0&import_errors=1", "imported=0&duplicates=2&import_errors=1"):
+        response = client.post(
+            "/expenses/import",
+            data={**data, "date_column": "Transaction Date", "amount_column": "Amount", "date_format": "%m/%d/%Y"},
+            files=files,
+            headers=_csrf_headers(client),
+            follow_redirects=False,
+        )
+        assert response.status_code == 303
+        assert response.headers["location"] == f"/expenses?{expected}"
+
+    with SessionLocal() as db:
+        total = db.scalar(
+            select(func.sum(PatientPayment.amount_cents))
+            .join(ExpenseLineItem, PatientPayment.expense_id == ExpenseLineItem.id)
+            .where(ExpenseLineItem.category == "csv-import-test", PatientPayment.source == "csv_import")
+        )
+        assert total == 5234
+
+    bad = client.post(
+        "/expenses/import",
+        data={**data, "date_column": "Missing", "amount_column": "Amount"},
+        files=files,
+        headers=_csrf_headers(client),
+        follow_redirects=False,
+    )
+    assert bad.headers["location"] == "/expenses?import=invalid"
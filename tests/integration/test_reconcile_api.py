@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db.base import SessionLocal
+from app.db.models import (
+    Claim,
+    ExpenseLineItem,
+    InsuranceProvider,
+    Member,
+    PatientPayment,
+    Policy,
+    ReconciliationMatch,
+    ServiceEvent,
+)
+from app.domain.enums import PlanType, ProviderAdapterType
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def test_reconcile_endpoints_run_and_decide(client) -> None:
+    _login(client)
+    run = client.post("/expenses/reconcile?full=true", headers=_csrf_headers(client))
+    assert run.status_code == 200
+    assert run.json()["full"] is True
+
+    listed = client.get("/expenses/reconcile/matches")
+    assert listed.status_code == 200
+    assert all(item["status"] == "suggested" for item in listed.json())
+
+    assert client.post("/expenses/reconcile/matches/999999/accept", headers=_csrf_headers(client)).status_code == 404
+    assert client.post("/expenses/reconcile/matches/1/maybe", headers=_csrf_headers(client)).status_code == 404
+
+    with SessionLocal() as db:
+        expense = ExpenseLineItem(amount_cents=61_903, incurred_at=date(1984, 8, 1), category="reconcile-api")
+        db.add(expense)
+        db.flush()
+        db.add(PatientPayment(expense_id=expense.id, paid_at=date(1984, 8, 1), amount_cents=61_903, source="manual"))
+        provider = InsuranceProvider(name="Reconcile API Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        member = Member(policy_id=policy.id, full_name="Pat", dob_enc="x", member_id_enc="x")
+        db.add(member)
+        db.flush()
+        visit = ServiceEvent(member_id=member.id, service_date=date(1984, 7, 20), provider_name="Clinic", description="Visit")
+        db.add(visit)
+        db.flush()
+        claim = Claim(service_event_id=visit.id, policy_id=policy.id, insurer_claim_id_enc="x")
+        db.add(claim)
+        db.flush()
+        match = ReconciliationMatch(expense_id=expense.id, claim_id=claim.id, amount_cents=61_903, confidence=0.7)
+        db.add(match)
+        db.commit()
+        match_id = match.id
+
+    rejected = client.post(f"/expenses/reconcile/matches/{match_id}/reject", headers=_csrf_headers(client))
+    assert rejected.status_code == 200 and rejected.json()["status"] == "rejected"
+    again = client.post(f"/expenses/reconcile/matches/{match_id}/accept", headers=_csrf_headers(client))
+    assert again.status_code == 409
+
+    with SessionLocal() as db:
+        assert db.scalar(select(ReconciliationMatch.status).where(ReconciliationMatch.id == match_id)) == "rejected"
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from app.db.base import SessionLocal
+from app.db.models import Appointment, InsuranceProvider
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def _kinds(client, query: str) -> list[tuple[str, int]]:
+    response = client.get("/search", params={"q": query})
+    assert response.status_code == 200
+    return [(item["kind"], item["id"]) for item in response.json()["results"]]
+
+
+def test_search_follows_provider_and_appointment_writes(client) -> None:
+    assert client.get("/search", params={"q": "anything"}).status_code == 401
+    _login(client)
+    client.post(
+        "/providers/add",
+        data={"name": "Quillfeather Imaging", "specialty": "Radiology", "adapter_key": "manual"},
+        headers=_csrf_headers(client),
+    )
+    with SessionLocal() as db:
+        provider_id = db.scalar(select(InsuranceProvider.id).where(InsuranceProvider.name == "Quillfeather Imaging"))
+    assert ("provider", provider_id) in _kinds(client, "quillfeather radiology")
+
+    client.post(
+        "/appointments/add",
+        data={
+            "provider_id": provider_id,
+            "appointment_date": "2034-03-09",
+            "appointment_time": "09:30",
+            "notes": "MRI of the left knee",
+            "prep_notes": "Bring the zanderwick referral",
+        },
+        headers=_csrf_headers(client),
+    )
+    with SessionLocal() as db:
+        appointment_id = db.scalar(select(Appointment.id).where(Appointment.provider_id == provider_id))
+    body = client.get("/search", params={"q": "zanderwick"}).json()
+    assert body["results"][0]["kind"] == "appointment"
+    assert body["results"][0]["id"] == appointment_id
+    assert "<mark>zanderwick</mark>" in body["results"][0]["snippet"]
+    assert body["results"][0]["url"] == "/?year=2034&month=3"
+
+    client.post(
+        "/appointments/update",
+        data={
+            "appointment_id": appointment_id,
+            "provider_id": provider_id,
+            "appointment_date": "2034-03-09",
+            "appointment_time": "09:30",
+            "notes": "Follow-up for the brambleton scan",
+        },
+        headers=_csrf_headers(client),
+    )
+    assert _kinds(client, "zanderwick") == []
+    assert _kinds(client, "brambleton") == [("appointment", appointment_id)]
+
+    client.post("/providers/delete", data={"provider_id": provider_id}, headers=_csrf_headers(client))
+    assert _kinds(client, "brambleton") == []
+    assert _kinds(client, "quillfeather") == []
+    assert client.get("/search", params={"q": ""}).json()["results"] == []
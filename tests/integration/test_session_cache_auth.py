@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from sqlalchemy import event
+
+from app.core.security import SecurityManager
+from app.core.session_cache import session_cache
+from app.db.base import engine
+
+
+def _csrf_headers(client) -> dict[str, str]:
+    return {"x-csrf-token": client.cookies.get("cb_csrf", "")}
+
+
+def _login(client) -> None:
+    client.get("/auth/login")
+    client.post("/auth/login", data={"pin": "1224"}, headers=_csrf_headers(client))
+
+
+def test_cached_session_skips_auth_queries_until_logout(client) -> None:
+    _login(client)
+    assert client.get("/api/calendar/2036/1").status_code == 200
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.get("/api/calendar/2036/2").status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert not [sql for sql in statements if "FROM sessions" in sql or "FROM users" in sql]
+
+    token = client.cookies.get("cb_session")
+    client.post("/auth/logout", headers=_csrf_headers(client))
+    client.cookies.set("cb_session", token)
+    assert client.get("/api/calendar/2036/2").status_code == 401
+
+
+def test_logout_wins_over_a_request_that_cached_the_session_meanwhile(client) -> None:
+    _login(client)
+    token = client.cookies.get("cb_session")
+    token_hash = SecurityManager().hash_token(token)
+    assert client.get("/api/calendar/2036/3").status_code == 200
+    cached = session_cache.get(token_hash, datetime.now(UTC).replace(tzinfo=None))
+    assert cached is not None
+    refilled: list[bool] = []
+
+    def refill(conn, cursor, statement, parameters, context, executemany) -> None:
+        # Another request read the still-present row and cached it while logout was deleting it.
+        if statement.startswith("DELETE FROM sessions") and not refilled:
+            refilled.append(True)
+            session_cache.put(token_hash, cached)
+
+    event.listen(engine, "before_cursor_execute", refill)
+    try:
+        client.post("/auth/logout", headers=_csrf_headers(client))
+    finally:
+        event.remove(engine, "before_cursor_execute", refill)
+    assert refilled
+    client.cookies.set("cb_session", token)
+    assert client.get("/api/calendar/2036/3").status_code == 401
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.db.base import Base, db_session, engine
+from app.db.models import (
+    EOB,
+    Claim,
+    ExpenseLineItem,
+    InsuranceProvider,
+    Member,
+    Policy,
+    PolicyCoverageTerm,
+    ServiceEvent,
+)
+from app.domain.enums import ClaimStatus, NetworkTier, PlanType, ProviderAdapterType
+from app.services.reporting.accumulators import (
+    apply_claim_change,
+    apply_eob,
+    apply_expense,
+    policy_progress,
+    rebuild_accumulators,
+    verify_accumulators,
+)
+
+
+def test_incremental_accumulators_match_rebuild() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        rebuild_accumulators(db)
+        provider = InsuranceProvider(name="Accumulator Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.HDHP, policy_number_enc="x", deductible_cents=9, oop_max_cents=9)
+        db.add(policy)
+        db.flush()
+        term = PolicyCoverageTerm(
+            policy_id=policy.id,
+            network_tier=NetworkTier.IN_NETWORK,
+            start_date=date(2037, 1, 1),
+            end_date=date(2037, 12, 31),
+            deductible_cents=150_000,
+            oop_max_cents=400_000,
+        )
+        member = Member(policy_id=policy.id, full_name="Pat", dob_enc="x", member_id_enc="x")
+        db.add_all([term, member])
+        db.flush()
+
+        visit = ServiceEvent(member_id=member.id, service_date=date(2037, 3, 4), provider_name="Lab", description="Panel")
+        db.add(visit)
+        db.flush()
+        early_payment = ExpenseLineItem(amount_cents=2_000, incurred_at=date(2037, 3, 4), service_event_id=visit.id)
+        db.add(early_payment)
+        db.flush()
+        apply_expense(db, early_payment)  # no claim yet, so nothing to attribute
+
+        claim = Claim(
+            service_event_id=visit.id,
+            policy_id=policy.id,
+            claim_status=ClaimStatus.PROCESSING,
+            insurer_claim_id_enc="x",
+            allowed_amount_cents=80_000,
+            paid_amount_cents=0,
+        )
+        db.add(claim)
+        db.flush()
+        apply_claim_change(db, claim)
+
+        before = (claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents)
+        claim.claim_status = ClaimStatus.PAID
+        claim.paid_amount_cents = 30_000
+        db.flush()
+        apply_claim_change(db, claim, before)
+        assert verify_accumulators(db) == []
+        assert policy_progress(db, date(2037, 6, 1))[-1]["deductible_met_cents"] == 50_000
+
+        eob = EOB(claim_id=claim.id, issued_date=date(2037, 3, 20), patient_responsibility_cents=45_000)
+        db.add(eob)
+        db.flush()
+        apply_eob(db, eob)
+        payment = ExpenseLineItem(amount_cents=43_000, incurred_at=date(2037, 3, 25), service_event_id=visit.id)
+        db.add(payment)
+        db.flush()
+        apply_expense(db, payment)
+        assert verify_accumulators(db) == []
+
+        progress = policy_progress(db, date(2037, 6, 1))[-1]
+        assert progress["policy_id"] == policy.id
+        assert progress["deductible_cents"] == 150_000
+        assert progress["deductible_met_cents"] == 45_000
+        assert progress["expense_paid_cents"] == 45_000
+        assert progress["eob_count"] == 1
+
+        apply_eob(db, eob, sign=-1)
+        db.delete(eob)
+        db.flush()
+        assert verify_accumulators(db) == []
+        assert policy_progress(db, date(2037, 6, 1))[-1]["deductible_met_cents"] == 50_000
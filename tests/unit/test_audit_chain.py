@@ -1,4 +1,4 @@
-from app.core.audit import write_audit_event
+from app.core.audit import write_audit_event, write_audit_events
 from app.core.integrity import verify_audit_chain
 from app.db.base import Base, engine, db_session
 
@@ -10,3 +10,13 @@ def test_audit_hash_chain_continuity() -> None:
         write_audit_event(db, "update", "x", "1", None, {"b": 2})
     with db_session() as db:
         assert verify_audit_chain(db) == []
+
+
+def test_batched_audit_events_extend_the_chain() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        write_audit_event(db, "create", "x", "2", None, {"a": 1})
+        assert write_audit_events(db, "create", "x", None, [(str(i), {"n": i}) for i in range(5)]) == 5
+        write_audit_event(db, "update", "x", "2", None, {"b": 2})
+    with db_session() as db:
+        assert verify_audit_chain(db) == []
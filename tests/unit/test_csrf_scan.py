@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.csrf import PENDING, multipart_token, read_body_token, urlencoded_token
+
+BOUNDARY = b"----cbboundary"
+
+
+def _multipart(*parts: tuple[str, bytes]) -> bytes:
+    body = b""
+    for name, value in parts:
+        body += b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="' + name.encode() + b'"\r\n\r\n' + value + b"\r\n"
+    return body + b"--" + BOUNDARY + b"--\r\n"
+
+
+def _receive(body: bytes, chunk: int):
+    messages = [
+        {"type": "http.request", "body": body[start : start + chunk], "more_body": start + chunk < len(body)}
+        for start in range(0, len(body), chunk)
+    ]
+    reads: list[int] = []
+
+    async def receive():
+        reads.append(1)
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    return receive, reads
+
+
+async def _drain(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+def test_urlencoded_token_waits_for_the_end_of_the_value() -> None:
+    assert urlencoded_token(b"a=1&csrf_token=ab", final=False) is PENDING
+    assert urlencoded_token(b"a=1&csrf_token=ab%2Bc&pin=1", final=False) == "ab+c"
+    assert urlencoded_token(b"xcsrf_token=no", final=True) is None
+    assert urlencoded_token(b"csrf_token=tok", final=True) == "tok"
+
+
+def test_multipart_token_found_in_any_leading_part() -> None:
+    body = _multipart(("policy_id", b"3"), ("csrf_token", b"tok-123"), ("file", b"data"))
+    assert multipart_token(body, BOUNDARY, final=True) == "tok-123"
+    assert multipart_token(body[: body.index(b"tok-") + 3], BOUNDARY, final=False) is PENDING
+    assert multipart_token(_multipart(("file", b"csrf_token")), BOUNDARY, final=True) is None
+
+
+def test_read_body_token_stops_early_and_replays_the_whole_body() -> None:
+    body = _multipart(("csrf_token", b"tok-123"), ("file", b"z" * 500_000))
+    receive, reads = _receive(body, chunk=4096)
+    content_type = "multipart/form-data; boundary=" + BOUNDARY.decode()
+
+    async def run():
+        token, replay = await read_body_token(receive, content_type)
+        scanned = len(reads)
+        return token, scanned, await _drain(replay)
+
+    token, scanned, replayed = asyncio.run(run())
+    assert token == "tok-123"
+    assert scanned == 1
+    assert replayed == body
+
+
+def test_read_body_token_gives_up_at_the_scan_limit() -> None:
+    body = b"note=" + b"n" * 10_000 + b"&csrf_token=late"
+    receive, reads = _receive(body, chunk=1000)
+
+    async def run():
+        token, replay = await read_body_token(receive, "application/x-www-form-urlencoded", limit=4000)
+        return token, len(reads), await _drain(replay)
+
+    token, scanned, replayed = asyncio.run(run())
+    assert token is None
+    assert scanned == 4
+    assert replayed == body
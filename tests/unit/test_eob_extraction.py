@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.core.crypto import FieldEncryptor
+from app.db.base import Base, db_session, engine
+from app.db.models import (
+    EOB,
+    Claim,
+    Document,
+    DocumentText,
+    EobExtraction,
+    InsuranceProvider,
+    Member,
+    Policy,
+    PolicyAccumulator,
+    ServiceEvent,
+    User,
+)
+from app.domain.enums import ClaimStatus, DocumentType, PlanType, ProviderAdapterType
+from app.services.documents.eob_jobs import (
+    STATUS_APPLIED,
+    STATUS_FAILED,
+    STATUS_NEEDS_REVIEW,
+    EobExtractionBatch,
+)
+
+EOB_TEXT = """Aetna Explanation of Benefits
+Statement date: 02/02/2031
+Member: Robin Extraction
+Claim number: EX31000777
+Provider: Harborview Imaging
+Date of service: 01/14/2031
+Amount billed: $900.00
+Negotiated amount: $500.00
+Aetna paid: $400.00
+Your share: $100.00
+"""
+
+
+def _document(db, owner_id: int, policy_id: int | None, name: str, text: str) -> int:
+    doc = Document(
+        owner_user_id=owner_id,
+        policy_id=policy_id,
+        doc_type=DocumentType.EOB,
+        filename=name,
+        storage_path=f"eob-extraction-test/{name}",
+        nonce=b"",
+        wrapped_dek=b"",
+        sha256_plaintext="",
+        sha256_ciphertext="",
+        size_bytes=0,
+    )
+    db.add(doc)
+    db.flush()
+    db.add(DocumentText(document_id=doc.id, status="done", text_enc=FieldEncryptor().encrypt(text), confidence=1.0))
+    return doc.id
+
+
+def test_batch_creates_claim_then_updates_it_from_a_revised_eob() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        owner = User(email="eob-extraction-test", password_hash="")
+        provider = InsuranceProvider(name="EOB Extraction Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add_all([owner, provider])
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        db.add_all(
+            [
+                Member(policy_id=policy.id, full_name="Robin Extraction", dob_enc="x", member_id_enc="x"),
+                Member(policy_id=policy.id, full_name="Sam Other", dob_enc="x", member_id_enc="x"),
+            ]
+        )
+        first = _document(db, owner.id, policy.id, "eob-1.pdf", EOB_TEXT)
+        unreadable = _document(db, owner.id, policy.id, "eob-scan.pdf", "Aetna\nthanks for your business")
+        policy_id = policy.id
+
+    batch = EobExtractionBatch(executor=ThreadPoolExecutor(max_workers=2))
+    with db_session() as db:
+        assert batch.run_batch(db) >= 2
+    with db_session() as db:
+        applied = db.scalar(select(EobExtraction).where(EobExtraction.document_id == first))
+        assert applied.status == STATUS_APPLIED
+        assert applied.template == "aetna"
+        assert applied.fields["patient_responsibility_cents"] == {"value": 10000, "confidence": 1.0}
+        assert applied.fields["insurer_claim_id"]["value"] is None
+        claim = db.get(Claim, applied.claim_id)
+        assert claim.policy_id == policy_id
+        assert (claim.claim_status, claim.allowed_amount_cents, claim.paid_amount_cents) == (ClaimStatus.PAID, 50000, 40000)
+        assert FieldEncryptor().decrypt(claim.insurer_claim_id_enc) == "EX31000777"
+        event = db.get(ServiceEvent, claim.service_event_id)
+        assert (event.provider_name, event.total_billed_cents) == ("Harborview Imaging", 90000)
+        assert db.get(Member, event.member_id).full_name == "Robin Extraction"
+        assert db.get(EOB, applied.eob_id).patient_responsibility_cents == 10000
+        review = db.scalar(select(EobExtraction).where(EobExtraction.document_id == unreadable))
+        assert (review.status, review.error, review.claim_id) == (STATUS_NEEDS_REVIEW, "missing_fields", None)
+        owner_id = db.scalar(select(User.id).where(User.email == "eob-extraction-test"))
+        revised = _document(
+            db, owner_id, policy_id, "eob-2.pdf", EOB_TEXT.replace("$400.00", "$450.00").replace("Your share: $100.00", "Your share: $50.00")
+        )
+        claim_id = claim.id
+
+    with db_session() as db:
+        assert batch.run_batch(db) == 1
+        assert batch.run_batch(db) == 0
+    with db_session() as db:
+        second = db.scalar(select(EobExtraction).where(EobExtraction.document_id == revised))
+        assert second.claim_id == claim_id
+        assert db.get(Claim, claim_id).paid_amount_cents == 45000
+        assert db.scalar(select(EOB.id).where(EOB.claim_id == claim_id).order_by(EOB.id.desc())) == second.eob_id
+        totals = db.scalars(select(PolicyAccumulator).where(PolicyAccumulator.policy_id == policy_id)).all()
+        assert sum(row.patient_responsibility_cents for row in totals) == 15000
+        assert sum(row.eob_count for row in totals) == 2
+    batch.shutdown()
+
+
+def test_eobs_for_one_new_claim_in_the_same_batch_share_the_claim() -> None:
+    Base.metadata.create_all(bind=engine)
+    text = EOB_TEXT.replace("Robin Extraction", "Robin Sameclaim").replace("EX31000777", "EX31000888")
+    with db_session() as db:
+        owner = User(email="eob-extraction-sameclaim-test", password_hash="")
+        provider = InsuranceProvider(name="EOB Same Claim Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add_all([owner, provider])
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        db.add(Member(policy_id=policy.id, full_name="Robin Sameclaim", dob_enc="x", member_id_enc="x"))
+        documents = [
+            _document(db, owner.id, policy.id, "eob-same-1.pdf", text),
+            _document(db, owner.id, policy.id, "eob-same-2.pdf", text.replace("$400.00", "$450.00")),
+        ]
+
+    batch = EobExtractionBatch(executor=ThreadPoolExecutor(max_workers=2))
+    with db_session() as db:
+        batch.run_batch(db)
+    batch.shutdown()
+    with db_session() as db:
+        rows = db.scalars(select(EobExtraction).where(EobExtraction.document_id.in_(documents))).all()
+        assert [row.status for row in rows] == [STATUS_APPLIED, STATUS_APPLIED]
+        assert rows[0].claim_id == rows[1].claim_id
+        assert db.get(Claim, rows[0].claim_id).paid_amount_cents == 45000
+
+
+def test_corrupt_text_fails_only_its_own_document() -> None:
+    Base.metadata.create_all(bind=engine)
+    text = EOB_TEXT.replace("Robin Extraction", "Robin Corrupt").replace("EX31000777", "EX31000999")
+    with db_session() as db:
+        owner = User(email="eob-extraction-corrupt-test", password_hash="")
+        provider = InsuranceProvider(name="EOB Corrupt Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add_all([owner, provider])
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        db.add(Member(policy_id=policy.id, full_name="Robin Corrupt", dob_enc="x", member_id_enc="x"))
+        corrupt = _document(db, owner.id, policy.id, "eob-corrupt.pdf", text)
+        db.flush()
+        db.scalar(select(DocumentText).where(DocumentText.document_id == corrupt)).text_enc = "not-ciphertext"
+        readable = _document(db, owner.id, policy.id, "eob-readable.pdf", text)
+
+    batch = EobExtractionBatch(executor=ThreadPoolExecutor(max_workers=2))
+    with db_session() as db:
+        batch.run_batch(db)
+    batch.shutdown()
+    with db_session() as db:
+        rows = {row.document_id: row for row in db.scalars(select(EobExtraction).where(EobExtraction.document_id.in_([corrupt, readable])))}
+        assert rows[corrupt].status == STATUS_FAILED
+        assert rows[readable].status == STATUS_APPLIED
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.services.documents.eob_parse import (
+    CONFIDENCE_NEXT_LINE,
+    CONFIDENCE_TEMPLATE,
+    FIELD_ALLOWED,
+    FIELD_BILLED,
+    FIELD_CLAIM_ID,
+    FIELD_MEMBER,
+    FIELD_PAID,
+    FIELD_PATIENT,
+    FIELD_PROVIDER,
+    FIELD_SERVICE_DATE,
+    parse_eob,
+)
+
+AETNA_EOB = """Aetna Explanation of Benefits
+Statement date: 04/02/2024
+Member: Jane Q Doe          Member ID: W123456789
+Claim number: EA1234567890
+Provider: Lakeside Imaging Center
+Date of service: 03/14/2024
+Amount billed: $1,250.00
+Negotiated amount: $640.00
+Aetna paid: $512.00
+Your share: $128.00
+"""
+
+TABLE_EOB = """BlueCross BlueShield of Illinois
+Claim ID: 77-55512
+Patient name: John Roe
+Rendering provider: North Shore Ortho PC
+Service dates
+2024-05-01 - 2024-05-01
+Service      Billed       Allowed      Plan paid    You owe
+99213        $220.00      $140.00      $100.00      $40.00
+73030        $180.00      $60.00       $60.00       $0.00
+Total        $400.00      $200.00      $160.00      $40.00
+"""
+
+
+def test_insurer_template_labels_and_consistency() -> None:
+    parsed = parse_eob(AETNA_EOB)
+    assert parsed.template == "aetna"
+    assert parsed.value(FIELD_CLAIM_ID) == "EA1234567890"
+    assert parsed.value(FIELD_MEMBER) == "Jane Q Doe"
+    assert parsed.value(FIELD_PROVIDER) == "Lakeside Imaging Center"
+    assert parsed.value(FIELD_SERVICE_DATE) == date(2024, 3, 14)
+    assert (parsed.value(FIELD_BILLED), parsed.value(FIELD_ALLOWED), parsed.value(FIELD_PAID), parsed.value(FIELD_PATIENT)) == (
+        125000,
+        64000,
+        51200,
+        12800,
+    )
+    # Template labels plus allowed - paid == owed.
+    assert parsed.fields[FIELD_PATIENT].confidence == 1.0
+    assert parsed.fields[FIELD_BILLED].confidence < CONFIDENCE_TEMPLATE
+
+
+def test_table_totals_and_stacked_labels() -> None:
+    parsed = parse_eob(TABLE_EOB, source_confidence=0.7)
+    assert parsed.template == "bcbs"
+    assert parsed.value(FIELD_SERVICE_DATE) == date(2024, 5, 1)
+    assert parsed.fields[FIELD_SERVICE_DATE].confidence == round(CONFIDENCE_NEXT_LINE * 0.7, 4)
+    assert parsed.value(FIELD_BILLED) == 40000
+    assert parsed.value(FIELD_PATIENT) == 4000
+    assert parsed.value(FIELD_PAID) == 16000
+
+
+def test_inconsistent_amounts_lower_confidence() -> None:
+    parsed = parse_eob(AETNA_EOB.replace("Your share: $128.00", "Your share: $28.00"))
+    assert parsed.fields[FIELD_PATIENT].confidence < 0.7
+    assert parse_eob("Nothing to see here").fields == {}
+    assert parse_eob("Claim denied: service not covered").denied
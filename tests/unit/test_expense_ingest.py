@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import event, insert
+
+from app.db.base import Base, SessionLocal, engine
+from app.db.models import ExpenseLineItem
+from app.services.ledger.ingest import (
+    STATUS_CREATED,
+    STATUS_DUPLICATE,
+    NewExpense,
+    expense_key,
+    ingest_expenses,
+)
+
+
+def test_key_committed_by_a_concurrent_request_comes_back_as_duplicate() -> None:
+    Base.metadata.create_all(bind=engine)
+    raced = NewExpense(amount_cents=4100, incurred_at=date(1986, 4, 1), category="ingest-race")
+    fresh = NewExpense(amount_cents=4200, incurred_at=date(1986, 4, 2), category="ingest-race")
+    committed: list[int] = []
+    raced_once: list[bool] = []
+
+    def commit_first(conn, cursor, statement, parameters, context, executemany) -> None:
+        # Another request commits the same key between the duplicate lookup and the insert.
+        if raced_once or not statement.startswith("INSERT INTO expense_line_items"):
+            return
+        raced_once.append(True)
+        with engine.begin() as other:
+            committed.append(
+                other.execute(
+                    insert(ExpenseLineItem).returning(ExpenseLineItem.id),
+                    {
+                        "amount_cents": raced.amount_cents,
+                        "incurred_at": raced.incurred_at,
+                        "category": raced.category,
+                        "idempotency_key": expense_key(raced),
+                    },
+                ).scalar_one()
+            )
+
+    event.listen(engine, "before_cursor_execute", commit_first)
+    try:
+        with SessionLocal() as db:
+            results = ingest_expenses(db, [(0, raced), (1, fresh)], user_id=None)
+    finally:
+        event.remove(engine, "before_cursor_execute", commit_first)
+
+    assert [(r.index, r.status) for r in results] == [(0, STATUS_DUPLICATE), (1, STATUS_CREATED)]
+    assert results[0].id == committed[0]
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.services.providers.insurer_http import HttpInsurerAdapter
+from app.services.providers.mock_insurer import MockInsurerConfig, claim, create_mock_insurer_app
+from app.services.providers.registry import registry
+from app.services.sync.engine import SyncEngine
+
+CONFIG = MockInsurerConfig(claims=1000, page_size=100, error_rate=0.2, seed=11)
+MOCK = create_mock_insurer_app(CONFIG)
+
+
+class _MockBackedAdapter(HttpInsurerAdapter):
+    name = "test_insurer_http"
+
+    def __init__(self) -> None:
+        super().__init__(base_url="http://mock", page_size=150, client=TestClient(MOCK))
+
+
+registry.register("test_insurer_http", _MockBackedAdapter)
+
+
+def test_synthetic_claims_are_deterministic() -> None:
+    assert claim(CONFIG, 42) == claim(CONFIG, 42)
+    assert claim(CONFIG, 42) != claim(MockInsurerConfig(seed=12), 42)
+    paid = claim(CONFIG, next(i for i in range(100) if claim(CONFIG, i)["status"] == "paid"))
+    assert paid["eob"]["patient_responsibility_cents"] == paid["allowed_cents"] - paid["paid_cents"]
+
+
+def test_sync_survives_injected_faults_then_circuit_opens() -> None:
+    received: list[str] = []
+    sync = SyncEngine(max_attempts=8, max_failures=2, cooldown_seconds=600, backoff_base_seconds=0.0)
+    assert sync.run_once("test_insurer_http", lambda record: received.append(record["external_id"])) == 1000
+    assert len(set(received)) == 1000
+    assert MOCK.state.errors > 0
+
+    CONFIG.error_rate = 1.0
+    try:
+        assert [sync.run_once("test_insurer_http", received.append) for _ in range(2)] == [0, 0]
+        requests = MOCK.state.requests
+        assert sync.run_once("test_insurer_http", received.append) == 0
+        assert MOCK.state.requests == requests  # open circuit: the insurer was not called
+    finally:
+        CONFIG.error_rate = 0.2
+
+
+def test_async_pages_use_async_client() -> None:
+    async def collect() -> list[int]:
+        transport = httpx.ASGITransport(app=create_mock_insurer_app(MockInsurerConfig(claims=250, seed=3)))
+        async with httpx.AsyncClient(transport=transport, base_url="http://mock") as client:
+            adapter = HttpInsurerAdapter(base_url="http://mock", page_size=100, async_client=client)
+            return [len(page.records) async for page in adapter.aiter_pages()]
+
+    assert asyncio.run(collect()) == [100, 100, 50]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.db.base import Base, db_session, engine
+from app.db.models import Document, ExpenseLineItem, User
+from app.domain.enums import DocumentType
+from app.services.ledger.pages import LedgerFilters, ledger_page
+from app.services.reporting.rollups import apply_expense_delta
+
+
+def test_keyset_pages_walk_ties_and_filters_without_gaps() -> None:
+    Base.metadata.create_all(bind=engine)
+    category = "ledger-keyset"
+    days = [date(2035, 5, 3), date(2035, 5, 3), date(2035, 5, 3), date(2035, 4, 20), date(2035, 3, 1)]
+    with db_session() as db:
+        expenses = [ExpenseLineItem(amount_cents=100 + i, incurred_at=day, category=category) for i, day in enumerate(days)]
+        db.add_all(expenses)
+        db.flush()
+        for expense in expenses:
+            apply_expense_delta(db, expense.incurred_at, expense.amount_cents)
+        owner = db.query(User).first()
+        if owner is None:
+            owner = User(email="ledger-owner@local", password_hash="x")
+            db.add(owner)
+            db.flush()
+        db.add(
+            Document(
+                owner_user_id=owner.id,
+                expense_id=expenses[3].id,
+                doc_type=DocumentType.RECEIPT,
+                filename="ledger-receipt.pdf",
+                storage_path="ledger-keyset-receipt.bin",
+                nonce=b"n",
+                wrapped_dek=b"k",
+                sha256_plaintext="0" * 64,
+                sha256_ciphertext="1" * 64,
+                size_bytes=1,
+            )
+        )
+        expected = sorted(expenses, key=lambda e: (e.incurred_at, e.id), reverse=True)
+        expected_ids = [e.id for e in expected]
+        receipt_expense_id = expenses[3].id
+
+    with db_session() as db:
+        filters = LedgerFilters(category=category)
+        seen: list[int] = []
+        receipts: dict[int, str] = {}
+        cursor = None
+        while True:
+            page = ledger_page(db, filters, cursor, limit=2)
+            for expense, receipt in page.rows:
+                seen.append(expense.id)
+                if receipt is not None:
+                    receipts[expense.id] = receipt.filename
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        assert seen == expected_ids
+        assert receipts == {receipt_expense_id: "ledger-receipt.pdf"}
+
+        april = ledger_page(db, LedgerFilters(category=category, date_from=date(2035, 4, 1), date_to=date(2035, 4, 30)))
+        assert [expense.id for expense, _ in april.rows] == [receipt_expense_id]
+        assert april.next_cursor is None
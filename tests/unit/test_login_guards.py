@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.core.hashing_pool import HashingPool, HashingPoolBusy
+from app.core.rate_limit import FailedLoginLimiter
+
+
+def test_hashing_pool_refuses_work_beyond_its_queue() -> None:
+    pool = HashingPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Barrier(3)
+    results: list[str] = []
+
+    def slow(label: str) -> str:
+        release.wait(5)
+        return label
+
+    def submit(label: str) -> None:
+        started.wait()
+        results.append(pool.run(slow, label))
+
+    threads = [threading.Thread(target=submit, args=(label,)) for label in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    # Both slots are taken once the two callers have submitted.
+    for _ in range(100):
+        if pool._slots._value == 0:
+            break
+        threading.Event().wait(0.01)
+    with pytest.raises(HashingPoolBusy):
+        pool.run(slow, "c")
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(results) == ["a", "b"]
+    assert pool.rejected == 1
+    assert pool.run(str.upper, "d") == "D"
+    pool.shutdown()
+
+
+def test_failed_login_limiter_blocks_within_window_and_resets() -> None:
+    limiter = FailedLoginLimiter(max_failures=3, window_seconds=60)
+    for at in (0.0, 10.0, 20.0):
+        assert limiter.retry_after("10.0.0.1", now=at) == 0
+        limiter.record_failure("10.0.0.1", now=at)
+    assert limiter.retry_after("10.0.0.1", now=30.0) == 30.0
+    assert limiter.retry_after("10.0.0.2", now=30.0) == 0
+    # The first failure leaves the window at 60s.
+    assert limiter.retry_after("10.0.0.1", now=61.0) == 0
+    limiter.record_failure("10.0.0.1", now=62.0)
+    assert limiter.retry_after("10.0.0.1", now=63.0) == 7.0
+    limiter.reset("10.0.0.1")
+    assert limiter.retry_after("10.0.0.1", now=63.0) == 0
+
+
+def test_attempts_in_flight_count_against_the_limit() -> None:
+    limiter = FailedLoginLimiter(max_failures=3, window_seconds=60)
+    # Nothing has failed yet, but three checks are already running for this source.
+    attempts = [limiter.begin_attempt("10.0.0.3", now=at) for at in (0.0, 0.1, 0.2)]
+    assert limiter.begin_attempt("10.0.0.3", now=0.3) is None
+    # One of them never reached the password check, which frees its slot.
+    limiter.cancel_attempt("10.0.0.3", attempts[1])
+    assert limiter.begin_attempt("10.0.0.3", now=0.4) == 0.4
+    limiter.reset("10.0.0.3")
+    assert limiter.begin_attempt("10.0.0.3", now=0.5) == 0.5
+
+
+def test_failed_login_limiter_bounds_tracked_sources() -> None:
+    limiter = FailedLoginLimiter(max_failures=2, window_seconds=60, max_sources=2)
+    limiter.record_failure("a", now=0.0)
+    limiter.record_failure("b", now=1.0)
+    limiter.record_failure("c", now=2.0)
+    assert set(limiter._failures) == {"b", "c"}
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import io
+from datetime import date
+
+import pytest
+
+from app.services.providers.manual_import import (
+    PaymentCsv,
+    PaymentImportRow,
+    RowError,
+    detect_columns,
+    detect_date_format,
+    parse_amount_cents,
+    parse_payment_csv,
+)
+
+
+def test_amounts_are_exact_signed_cents() -> None:
+    assert parse_amount_cents("$1,234.50") == 123450
+    assert parse_amount_cents("-0.10") == -10
+    assert parse_amount_cents("(12.00)") == -1200
+    assert parse_amount_cents("$-3.00") == parse_amount_cents("3.00-") == -300
+    assert parse_amount_cents("19.99 USD") == 1999
+    assert parse_amount_cents("0.29") == 29
+    with pytest.raises(ValueError):
+        parse_amount_cents("12.345")
+    with pytest.raises(ValueError):
+        parse_amount_cents("1-2")
+
+
+def test_opposite_sign_rows_are_flagged_not_imported() -> None:
+    text = "Date,Memo,Amount\n01/02/2024,Copay,-25.00\n01/03/2024,Lab,-40.00\n01/04/2024,Refund,15.00\n"
+    csv_file = PaymentCsv(io.BytesIO(text.encode("utf-8")), category="import-unit")
+    csv_file.configure()
+    assert csv_file.payment_sign == -1
+    rows = list(csv_file)
+    assert [row.amount_cents for row in rows if isinstance(row, PaymentImportRow)] == [2500, 4000]
+    assert isinstance(rows[2], RowError) and "Refund or credit" in rows[2].message
+
+    credits_positive = PaymentCsv(io.BytesIO(text.encode("utf-8")))
+    credits_positive.configure(payment_sign=1)
+    assert [type(row) for row in credits_positive] == [RowError, RowError, PaymentImportRow]
+
+
+def test_detects_columns_and_date_formats() -> None:
+    mapping = detect_columns(["Posting Date", "Payee Name", "Amount Paid", "Date of Birth"])
+    assert (mapping.date, mapping.amount, mapping.description) == ("Posting Date", "Amount Paid", "Payee Name")
+    assert detect_columns(["Date", "Date of Birth", "Amount"]).date == "Date"
+    with pytest.raises(ValueError):
+        detect_columns(["When", "How much"])
+
+    assert detect_date_format(["03/04/2024", "12/31/2024"]) == "%m/%d/%Y"
+    assert detect_date_format(["13/04/2024"]) == "%d/%m/%Y"
+    assert detect_date_format(["Mar 4, 2024"]) == "%b %d, %Y"
+
+
+def test_payment_csv_streams_rows_with_line_numbers() -> None:
+    text = "﻿Date,Memo,Amount\n01/02/2024,Copay,$25.00\n01/03/2024,\"Lab\nwork\",abc\n02/30/2024,Bad,1.00\n"
+    csv_file = PaymentCsv(io.BytesIO(text.encode("utf-8")), category="import-unit")
+    assert csv_file.header == ["Date", "Memo", "Amount"]
+    csv_file.configure()
+    rows = list(csv_file)
+    assert isinstance(rows[0], PaymentImportRow)
+    assert (rows[0].line, rows[0].paid_at, rows[0].amount_cents, rows[0].description) == (2, date(2024, 1, 2), 2500, "Copay")
+    assert isinstance(rows[1], RowError) and rows[1].line == 4 and "amount" in rows[1].message
+    assert isinstance(rows[2], RowError) and "date" in rows[2].message
+    assert csv_file.preview(1) == rows[:1]
+
+    legacy = parse_payment_csv("d,a,m\n2024-05-06,10.10,x\n", "d", "a", "m")
+    assert legacy[0].amount_cents == 1010
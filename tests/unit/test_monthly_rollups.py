@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import delete
+
+from app.db.base import Base, db_session, engine
+from app.db.models import Appointment, ExpenseLineItem, InsuranceProvider, MonthlyRollup
+from app.domain.enums import ProviderAdapterType
+from app.services.reporting.rollups import (
+    apply_appointment_delta,
+    apply_expense_delta,
+    get_rollup,
+    rebuild_monthly_rollups,
+    verify_monthly_rollups,
+)
+
+
+def test_incremental_rollups_match_rebuild() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        rebuild_monthly_rollups(db)
+        provider = InsuranceProvider(name="Rollup Clinic", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+
+        for amount, day in ((1500, date(2031, 3, 2)), (2500, date(2031, 3, 28)), (700, date(2031, 4, 1))):
+            db.add(ExpenseLineItem(amount_cents=amount, incurred_at=day, category="medical"))
+            apply_expense_delta(db, day, amount)
+
+        appt = Appointment(provider_id=provider.id, scheduled_at=datetime(2031, 3, 5, 9, 0), estimated_invoice_cents=4000)
+        db.add(appt)
+        apply_appointment_delta(db, appt.scheduled_at, 4000)
+        db.flush()
+
+        march = get_rollup(db, 2031, 3)
+        assert (march.expense_count, march.expense_total_cents) == (2, 4000)
+        assert (march.appointment_count, march.appointment_invoice_cents) == (1, 4000)
+
+        apply_appointment_delta(db, appt.scheduled_at, -4000, count=-1)
+        appt.scheduled_at = datetime(2031, 4, 9, 9, 0)
+        apply_appointment_delta(db, appt.scheduled_at, 4000)
+        db.flush()
+
+        assert get_rollup(db, 2031, 3).appointment_count == 0
+        assert get_rollup(db, 2031, 4).appointment_invoice_cents == 4000
+        assert verify_monthly_rollups(db) == []
+
+    with db_session() as db:
+        db.execute(delete(MonthlyRollup).where(MonthlyRollup.year == 2031))
+        assert "rollup_mismatch:2031-03" in verify_monthly_rollups(db)
+        rebuild_monthly_rollups(db)
+        assert verify_monthly_rollups(db) == []
+        assert get_rollup(db, 2031, 4).expense_total_cents == 700
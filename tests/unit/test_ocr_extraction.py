@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import io
+import subprocess
+import zlib
+
+from reportlab.pdfgen import canvas
+
+from app.services.documents import ocr
+from app.services.documents.ocr import (
+    METHOD_NONE,
+    METHOD_PDF_TEXT,
+    extract_text_locally,
+    pdf_text_layer,
+)
+
+
+def _reportlab_pdf(*pages: list[str]) -> bytes:
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf)
+    for lines in pages:
+        for offset, line in enumerate(lines):
+            pdf.drawString(72, 720 - offset * 20, line)
+        pdf.showPage()
+    pdf.save()
+    return buf.getvalue()
+
+
+def test_text_layer_from_generated_pdf() -> None:
+    payload = _reportlab_pdf(
+        ["Explanation of Benefits - Northside Imaging", "MRI lumbar spine (March 3) responsibility $412.50"],
+        ["Claim (CLM-7) \\ page two"],
+    )
+    result = extract_text_locally(payload)
+    assert result.method == METHOD_PDF_TEXT and result.pages == 2 and result.confidence == 1.0
+    assert result.text.splitlines() == [
+        "Explanation of Benefits - Northside Imaging",
+        "MRI lumbar spine (March 3) responsibility $412.50",
+        "Claim (CLM-7) \\ page two",
+    ]
+
+
+def test_tj_arrays_hex_strings_and_flate_streams() -> None:
+    content = b"BT /F1 12 Tf 72 720 Td [(Amount)-250(due)] TJ 0 -14 Td <24313230> Tj T* (Paid \\(in full\\)) Tj ET"
+    compressed = zlib.compress(content)
+    header = f"<< /Length {len(compressed)} /Filter /FlateDecode >>".encode()
+    payload = (
+        b"%PDF-1.4\n1 0 obj\n<< /Type /Page >>\nendobj\n2 0 obj\n"
+        + header
+        + b"\nstream\n"
+        + compressed
+        + b"\nendstream\nendobj\n%%EOF"
+    )
+    text, pages = pdf_text_layer(payload)
+    assert text.splitlines() == ["Amount due", "$120", "Paid (in full)"]
+    assert pages == 1
+
+
+def test_unreadable_inputs_return_empty_result() -> None:
+    assert extract_text_locally(b"%PDF-1.4\n%%EOF").method == METHOD_NONE
+    assert extract_text_locally(b"plain bytes", "application/octet-stream").text == ""
+
+
+def test_failing_ocr_tools_fall_back_to_the_text_layer(monkeypatch) -> None:
+    calls: list[list[str]] = []
+
+    def timed_out(args, **kwargs):
+        calls.append(args)
+        # The document is piped in, never passed as a file name.
+        assert kwargs["input"].startswith(b"%PDF") or args[0] == "tesseract"
+        raise subprocess.TimeoutExpired(args, kwargs["timeout"])
+
+    monkeypatch.setattr(ocr.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(ocr.subprocess, "run", timed_out)
+    result = extract_text_locally(_reportlab_pdf(["Scan"]))
+    assert (result.method, result.text) == (METHOD_PDF_TEXT, "Scan")
+    assert calls[0][0] == "pdftoppm" and calls[0][-1] == "-"
+    assert extract_text_locally(b"\x89PNG", "image/png").text == ""
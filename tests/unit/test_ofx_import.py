@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import io
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.core.config import get_settings
+from app.db.base import Base, db_session, engine
+from app.db.models import ExpenseLineItem, PatientPayment
+from app.services.providers.ofx_import import (
+    OfxImportAdapter,
+    is_medical,
+    iter_ofx_tokens,
+    iter_ofx_transactions,
+)
+from app.services.sync.engine import SyncEngine
+from app.services.sync.payments import PaymentSink
+
+SGML_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+CHARSET:1252
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD
+<BANKACCTFROM><BANKID>121000248<ACCTID>000123456789<ACCTTYPE>CHECKING</BANKACCTFROM>
+<BANKTRANLIST><DTSTART>19850101<DTEND>19851231
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>19850214120000.000[-5:EST]<TRNAMT>-23,45<FITID>A1<NAME>CVS PHARMACY #123</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>19850215<TRNAMT>-80.00<FITID>A2<NAME>GROCERY OUTLET</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>19850216<TRNAMT>-150.00<FITID>A3<NAME>SQ *RIVERSIDE<SIC>8011</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>19850217<TRNAMT>40.00<FITID>A4<NAME>CLINIC REFUND</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>bogus<TRNAMT>-1.00<FITID>A5<NAME>CLINIC</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+XML_STATEMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<?OFX OFXHEADER="200" VERSION="220"?>
+<OFX><CREDITCARDMSGSRSV1><CCSTMTTRNRS><CCSTMTRS>
+<CCACCTFROM><ACCTID>4111222233334444</ACCTID></CCACCTFROM>
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>19850301</DTPOSTED><TRNAMT>-12.00</TRNAMT><FITID>X1</FITID><NAME>Coffee</NAME></STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>19850302</DTPOSTED><TRNAMT>-60.10</TRNAMT><FITID>X2</FITID><NAME>Eye Care</NAME><MEMO/></STMTTRN>
+</BANKTRANLIST></CCSTMTRS></CCSTMTTRNRS></CREDITCARDMSGSRSV1></OFX>
+"""
+
+
+def test_tokenizer_handles_tags_split_across_chunks() -> None:
+    whole = list(iter_ofx_tokens(io.BytesIO(SGML_STATEMENT.encode())))
+    tiny = list(iter_ofx_tokens(io.BytesIO(SGML_STATEMENT.encode()), chunk_size=3))
+    assert tiny == whole
+    assert ("open", "STMTTRN") in whole and ("text", "CVS PHARMACY #123") in whole
+
+
+def test_parses_sgml_and_xml_statements_and_classifies() -> None:
+    sgml = list(iter_ofx_transactions(io.BytesIO(SGML_STATEMENT.encode())))
+    assert [t.fitid for t in sgml] == ["A1", "A2", "A3", "A4"]
+    assert (sgml[0].account_id, sgml[0].posted, sgml[0].amount_cents) == ("000123456789", date(1985, 2, 14), -2345)
+    assert [is_medical(t) for t in sgml] == [True, False, True, False]
+
+    xml = list(iter_ofx_transactions(io.BytesIO(XML_STATEMENT.encode())))
+    assert [(t.fitid, t.amount_cents) for t in xml] == [("X1", -1200), ("X2", -6010)]
+    assert [is_medical(t) for t in xml] == [False, False]
+    assert [is_medical(t, tax_advantaged=True) for t in xml] == [True, True]
+
+
+def test_inbox_statements_sync_into_patient_payments() -> None:
+    Base.metadata.create_all(bind=engine)
+    inbox = get_settings().imports_dir
+    statements = [inbox / "checking.ofx", inbox / "my-hsa-card.qfx", inbox / "notes.txt"]
+    for path, text in zip(statements, (SGML_STATEMENT, XML_STATEMENT, "ignored"), strict=True):
+        path.write_text(text)
+    try:
+        _sync_inbox_twice()
+    finally:
+        for path in statements:
+            path.unlink(missing_ok=True)
+
+
+def _sync_inbox_twice() -> None:
+    adapter = OfxImportAdapter()
+    assert adapter.healthcheck()["pending_files"] == 2
+    records = adapter.refresh()
+    assert len(records) == 4
+    assert all("000123456789" not in r.external_id for r in records)
+
+    for expected_created in (4, 0):
+        with db_session() as db:
+            sink = PaymentSink(db, source=OfxImportAdapter.name, batch_size=3)
+            assert SyncEngine().run_once(OfxImportAdapter.name, sink) == 4
+            summary = sink.flush()
+        assert (summary.created, summary.duplicates) == (expected_created, 4 - expected_created)
+
+    with db_session() as db:
+        rows = db.execute(
+            select(PatientPayment.amount_cents, PatientPayment.last4)
+            .join(ExpenseLineItem, PatientPayment.expense_id == ExpenseLineItem.id)
+            .where(PatientPayment.source == OfxImportAdapter.name, ExpenseLineItem.incurred_at < date(1986, 1, 1))
+            .order_by(PatientPayment.amount_cents)
+        ).all()
+        assert rows == [(1200, "4444"), (2345, "6789"), (6010, "4444"), (15000, "6789")]
+        assert db.scalar(select(func.count()).select_from(ExpenseLineItem).where(ExpenseLineItem.incurred_at == date(1985, 2, 15))) == 0
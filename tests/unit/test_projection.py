@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from app.db.base import Base, engine
+from app.db.models import AppointmentSeries, InsuranceProvider
+from app.domain.enums import ProviderAdapterType
+from app.services.reporting.projection import (
+    LedgerSnapshot,
+    PlanTerms,
+    ProjectionEngine,
+    apply_plan,
+    project_year,
+)
+from app.services.reporting.rollups import apply_expense_delta
+
+
+def _snapshot(history: dict[tuple[int, int], tuple[int, int]], plan: PlanTerms | None = None) -> LedgerSnapshot:
+    return LedgerSnapshot(version=(0, 0, 0, 0), as_of=date(2036, 7, 15), history=history, plan=plan or PlanTerms())
+
+
+def test_apply_plan_fills_deductible_then_coinsurance_then_caps() -> None:
+    plan = PlanTerms(deductible_cents=1000, oop_max_cents=1500, coinsurance_bps=2000)
+    assert apply_plan([600, 600, 2000, 5000, 100], plan) == [600, 440, 400, 60, 0]
+    assert apply_plan([700, 900], PlanTerms(oop_max_cents=1000)) == [700, 300]
+
+
+def test_projection_uses_actuals_seasonality_and_booked_floor() -> None:
+    history = {(2035, m): (1000, 0) for m in range(1, 13)}
+    history[(2035, 12)] = (4000, 0)
+    history.update({(2036, m): (1200, 0) for m in range(1, 7)})
+    history[(2036, 9)] = (0, 9000)
+    result = project_year(_snapshot(history), 2036, date(2036, 7, 15))
+
+    assert [m.actual for m in result.months] == [True] * 6 + [False] * 6
+    assert sum(m.expense_cents for m in result.months[:6]) == 7200
+    # December carried a spike last year, so it projects above a regular month.
+    assert result.months[11].expense_cents > result.months[7].expense_cents
+    assert result.months[8].appointment_cents == 9000
+    assert result.patient_cents == result.gross_cents
+
+
+def test_plan_caps_bound_patient_cost_and_premiums_add_on() -> None:
+    history = {(2036, m): (50_000, 0) for m in range(1, 7)}
+    hdhp = PlanTerms(deductible_cents=300_000, oop_max_cents=400_000, coinsurance_bps=2000, monthly_premium_cents=15_000)
+    result = project_year(_snapshot(history), 2036, date(2036, 7, 15), hdhp)
+    assert result.patient_cents == 300_000 + (600_000 - 300_000) * 2000 // 10_000
+    assert result.premium_cents == 180_000
+    assert result.total_cents == result.patient_cents + result.premium_cents
+
+
+def test_engine_memoizes_until_ledger_version_changes() -> None:
+    Base.metadata.create_all(bind=engine)
+    projections = ProjectionEngine()
+    as_of = date(2036, 7, 15)
+    # Rolled back at the end so the 2036-03 rollup row does not leak into the shared database.
+    with Session(engine) as db:
+        first = projections.project(db, 2036, as_of)
+        assert projections.project(db, 2036, as_of) is first
+        baseline, scenario = projections.what_if(db, 2036, as_of, monthly_premium_cents=first.plan.monthly_premium_cents + 100)
+        assert baseline is first
+        assert scenario.premium_cents == first.premium_cents + 1200
+
+        apply_expense_delta(db, date(2036, 3, 3), 2500)
+        db.flush()
+        refreshed = projections.project(db, 2036, as_of)
+        assert refreshed is not first
+        assert refreshed.months[2].expense_cents == first.months[2].expense_cents + 2500
+        db.rollback()
+
+
+def test_snapshot_counts_virtual_series_occurrences() -> None:
+    Base.metadata.create_all(bind=engine)
+    as_of = date(2041, 1, 10)
+    with Session(engine) as db:
+        before = ProjectionEngine().project(db, 2041, as_of)
+        provider = InsuranceProvider(name="Projection Series Clinic", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        db.add(
+            AppointmentSeries(
+                provider_id=provider.id,
+                rrule="FREQ=WEEKLY;BYDAY=MO;COUNT=3",
+                dtstart=datetime(2041, 3, 4, 9),
+                estimated_invoice_cents=7000,
+            )
+        )
+        db.flush()
+        after = ProjectionEngine().project(db, 2041, as_of)
+        db.rollback()
+    # Three future Monday visits in March 2041 are a floor for that month.
+    assert after.months[2].appointment_cents >= max(before.months[2].appointment_cents, 21_000)
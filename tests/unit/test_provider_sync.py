@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from sqlalchemy import select
+
+from app.db.base import Base, db_session, engine
+from app.db.models import InsuranceProvider, SyncCursor, SyncRecord
+from app.domain.enums import ProviderAdapterType
+from app.services.providers.base import ProviderAdapter, ProviderRecord
+from app.services.providers.registry import registry
+from app.services.sync.engine import SyncEngine
+from app.services.sync.scheduler import (
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_SKIPPED,
+    ProviderSyncScheduler,
+)
+
+_active = 0
+_peak = 0
+_lock = threading.Lock()
+
+
+class _SlowAdapter(ProviderAdapter):
+    name = "test_slow"
+
+    def refresh(self) -> list[ProviderRecord]:
+        global _active, _peak
+        with _lock:
+            _active += 1
+            _peak = max(_peak, _active)
+        time.sleep(0.05)
+        with _lock:
+            _active -= 1
+        return [ProviderRecord(external_id="r1", name="Slow", payload={})]
+
+    def healthcheck(self) -> dict[str, str]:
+        return {"status": "ok"}
+
+
+class _BrokenAdapter(ProviderAdapter):
+    name = "test_broken"
+
+    def refresh(self) -> list[ProviderRecord]:
+        raise ConnectionError("portal down")
+
+    def healthcheck(self) -> dict[str, str]:
+        return {"status": "down"}
+
+
+registry.register("test_slow", _SlowAdapter)
+registry.register("test_broken", _BrokenAdapter)
+
+
+def _providers(db, prefix: str, adapter_type: ProviderAdapterType, count: int) -> list[int]:
+    providers = [InsuranceProvider(name=f"{prefix} {i}", adapter_type=adapter_type) for i in range(count)]
+    db.add_all(providers)
+    db.flush()
+    return [provider.id for provider in providers]
+
+
+def test_providers_sync_concurrently_within_adapter_limit() -> None:
+    Base.metadata.create_all(bind=engine)
+    received: list[dict] = []
+    scheduler = ProviderSyncScheduler(
+        sink=received.append,
+        per_adapter_limit=2,
+        adapter_keys={ProviderAdapterType.AGGREGATOR: "test_slow"},
+    )
+    with db_session() as db:
+        ids = _providers(db, "Concurrent Sync", ProviderAdapterType.AGGREGATOR, 4)
+        outcomes = asyncio.run(scheduler.run_all(db, provider_ids=ids))
+
+        assert [(o.provider_id, o.status, o.records) for o in outcomes] == [(i, STATUS_OK, 1) for i in ids]
+        assert _peak == 2  # fetches overlapped, but never more than the adapter limit
+        assert len(received) == 4
+        assert all(db.get(InsuranceProvider, i).last_sync_at is not None for i in ids)
+
+
+def test_failures_persist_circuit_state_and_open_it() -> None:
+    Base.metadata.create_all(bind=engine)
+    scheduler = ProviderSyncScheduler(
+        engine=SyncEngine(max_failures=2, cooldown_seconds=600, backoff_base_seconds=0.001),
+        adapter_keys={ProviderAdapterType.PORTAL_AUTOMATION: "test_broken"},
+    )
+    with db_session() as db:
+        ids = _providers(db, "Broken Sync", ProviderAdapterType.PORTAL_AUTOMATION, 1)
+        statuses = [asyncio.run(scheduler.run_all(db, provider_ids=ids))[0].status for _ in range(3)]
+        provider = db.get(InsuranceProvider, ids[0])
+
+        assert statuses == [STATUS_FAILED, STATUS_FAILED, STATUS_SKIPPED]
+        assert provider.circuit_failures == 2
+        assert provider.circuit_open_until is not None
+        assert provider.last_sync_at is None
+
+
+def test_runs_without_a_sink_only_probe_and_write_no_sync_state() -> None:
+    Base.metadata.create_all(bind=engine)
+    scheduler = ProviderSyncScheduler(adapter_keys={ProviderAdapterType.AGGREGATOR: "test_slow"})
+    with db_session() as db:
+        ids = _providers(db, "Probe Sync", ProviderAdapterType.AGGREGATOR, 1)
+        outcomes = asyncio.run(scheduler.run_all(db, provider_ids=ids))
+        scope = f"provider:{ids[0]}"
+
+        assert [(o.status, o.records) for o in outcomes] == [(STATUS_OK, 0)]
+        provider = db.get(InsuranceProvider, ids[0])
+        assert (provider.last_sync_at, provider.last_checked_at is not None) == (None, True)
+        assert db.scalars(select(SyncCursor).where(SyncCursor.scope == scope)).all() == []
+        assert db.scalars(select(SyncRecord).where(SyncRecord.scope == scope)).all() == []
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import Integer, cast, create_engine, event, func, select, text
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
+from sqlalchemy.orm import Session
+
+import app.db.base as db_base
+from app.db.models import Appointment, Document, ExpenseLineItem, InsuranceProvider
+from app.services.ledger.pages import LedgerFilters, ledger_page
+
+
+@pytest.fixture()
+def plan_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'plans.db'}", connect_args={"check_same_thread": False})
+    db_base.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_base, "engine", engine)
+    db_base.ensure_runtime_schema()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, stmt) -> str:
+    compiled = stmt.compile(dialect=SQLiteDialect_pysqlite(paramstyle="named"), compile_kwargs={"render_postcompile": True})
+    params = {key: value.isoformat() if isinstance(value, (date, datetime)) else value for key, value in compiled.params.items()}
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"), params).fetchall()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def test_expense_range_sum_uses_covering_index(plan_engine) -> None:
+    stmt = select(func.coalesce(func.sum(ExpenseLineItem.amount_cents), 0)).where(
+        ExpenseLineItem.incurred_at > date(2030, 1, 10),
+        ExpenseLineItem.incurred_at < date(2030, 2, 1),
+    )
+    assert "USING COVERING INDEX ix_expense_line_items_incurred_amount" in _plan(plan_engine, stmt)
+
+
+def test_expense_month_aggregate_scans_covering_index(plan_engine) -> None:
+    year_col = cast(func.strftime("%Y", ExpenseLineItem.incurred_at), Integer)
+    stmt = select(year_col, func.sum(ExpenseLineItem.amount_cents)).group_by(year_col)
+    assert "COVERING INDEX ix_expense_line_items_incurred_amount" in _plan(plan_engine, stmt)
+
+
+def test_calendar_window_searches_appointment_index(plan_engine) -> None:
+    stmt = (
+        select(Appointment, InsuranceProvider)
+        .join(InsuranceProvider, Appointment.provider_id == InsuranceProvider.id)
+        .where(Appointment.scheduled_at >= datetime(2030, 1, 1), Appointment.scheduled_at < datetime(2030, 2, 12))
+        .order_by(Appointment.scheduled_at.asc())
+    )
+    plan = _plan(plan_engine, stmt)
+    assert "SEARCH appointments USING INDEX ix_appointments_scheduled_provider_invoice" in plan
+    assert "SCAN appointments" not in plan
+
+
+def test_appointment_month_aggregate_scans_covering_index(plan_engine) -> None:
+    month_col = cast(func.strftime("%m", Appointment.scheduled_at), Integer)
+    stmt = select(month_col, func.count(), func.sum(Appointment.estimated_invoice_cents)).group_by(month_col)
+    assert "COVERING INDEX ix_appointments_scheduled_provider_invoice" in _plan(plan_engine, stmt)
+
+
+def test_receipt_lookup_searches_expense_created_index(plan_engine) -> None:
+    stmt = select(Document.id).where(Document.expense_id.in_([1, 2, 3])).order_by(Document.created_at.desc())
+    plan = _plan(plan_engine, stmt)
+    assert "ix_documents_expense_created" in plan
+    assert "SCAN documents" not in plan
+
+
+def test_superseded_single_column_indexes_are_dropped(plan_engine) -> None:
+    with plan_engine.connect() as conn:
+        names = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).fetchall()}
+    assert "ix_appointments_scheduled_at" not in names
+    assert "ix_documents_expense_id" not in names
+
+
+def test_ledger_keyset_page_walks_index_without_sorting(plan_engine) -> None:
+    statements: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append((statement, parameters))
+
+    for filters in (LedgerFilters(), LedgerFilters(category="pharmacy")):
+        event.listen(plan_engine, "before_cursor_execute", capture)
+        try:
+            with Session(plan_engine) as db:
+                ledger_page(db, filters, "2030-01-10_42")
+        finally:
+            event.remove(plan_engine, "before_cursor_execute", capture)
+        statement, parameters = statements.pop(0)
+        statements.clear()
+        with plan_engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plan = "\n".join(str(row[-1]) for row in rows)
+        assert "SCAN expense_line_items\n" not in plan + "\n"
+        # Only ties within one day may be sorted by id; the walk itself follows the index.
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+        assert "COVERING INDEX ix_documents_expense_created" in plan
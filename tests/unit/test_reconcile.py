@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db.base import Base, db_session, engine
+from app.db.models import (
+    EOB,
+    Claim,
+    ExpenseLineItem,
+    InsuranceProvider,
+    Member,
+    PatientPayment,
+    Policy,
+    ReconciliationMatch,
+    ServiceEvent,
+)
+from app.domain.enums import ClaimStatus, PlanType, ProviderAdapterType
+from app.services.ledger.reconcile import (
+    STATUS_ACCEPTED,
+    STATUS_REJECTED,
+    STATUS_SUGGESTED,
+    Obligation,
+    PaymentSide,
+    accept_match,
+    match,
+    name_similarity,
+    reconcile,
+)
+
+
+def test_match_buckets_by_amount_and_respects_date_window() -> None:
+    obligations = [
+        Obligation(1, 10, 4_500, date(1984, 3, 1), "Riverside Dental Group"),
+        Obligation(2, 11, 4_500, date(1983, 1, 1), "Riverside Dental Group"),
+        Obligation(3, 12, 4_501, date(1984, 3, 1), "Riverside Dental Group"),
+        Obligation(4, 13, 4_500, date(1984, 3, 20), "Elm Street Pharmacy"),
+    ]
+    payment = PaymentSide(expense_id=7, payment_id=8, amount_cents=4_500, paid_on=date(1984, 3, 15), payee="RIVERSIDE DENTAL #0042")
+
+    suggestions = match([payment], obligations)
+
+    assert [item.obligation.claim_id for item in suggestions] == [1, 4]
+    assert suggestions[0].confidence > suggestions[1].confidence
+    assert name_similarity("RIVERSIDE DENTAL #0042", "Riverside Dental Group") > name_similarity("RIVERSIDE DENTAL", "Elm Street Pharmacy")
+
+
+def _claim(db, member: Member, policy: Policy, day: date, provider_name: str, responsibility: int) -> Claim:
+    visit = ServiceEvent(member_id=member.id, service_date=day, provider_name=provider_name, description="Visit")
+    db.add(visit)
+    db.flush()
+    claim = Claim(
+        service_event_id=visit.id,
+        policy_id=policy.id,
+        claim_status=ClaimStatus.PAID,
+        insurer_claim_id_enc="x",
+        allowed_amount_cents=responsibility * 3,
+        paid_amount_cents=responsibility * 2,
+    )
+    db.add(claim)
+    db.flush()
+    db.add(EOB(claim_id=claim.id, issued_date=day, patient_responsibility_cents=responsibility, raw_json={}))
+    db.flush()
+    return claim
+
+
+def _payment(db, day: date, amount: int, payee: str) -> ExpenseLineItem:
+    expense = ExpenseLineItem(amount_cents=amount, incurred_at=day, category="reconcile-test")
+    db.add(expense)
+    db.flush()
+    db.add(PatientPayment(expense_id=expense.id, paid_at=day, amount_cents=amount, source="csv_import", payee=payee))
+    db.flush()
+    return expense
+
+
+def test_incremental_reconcile_suggests_and_accepts_matches() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        reconcile(db)
+        provider = InsuranceProvider(name="Reconcile Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        member = Member(policy_id=policy.id, full_name="Pat", dob_enc="x", member_id_enc="x")
+        db.add(member)
+        db.flush()
+
+        claim = _claim(db, member, policy, date(1984, 5, 2), "Lakeside Orthopedics", 83_117)
+        expense = _payment(db, date(1984, 5, 30), 83_117, "LAKESIDE ORTHO")
+        first = reconcile(db)
+        assert not first.full
+
+        suggested = db.scalars(select(ReconciliationMatch).where(ReconciliationMatch.expense_id == expense.id)).all()
+        assert [(row.claim_id, row.status) for row in suggested] == [(claim.id, STATUS_SUGGESTED)]
+        assert 0.6 <= suggested[0].confidence <= 1.0
+
+        # An obligation added after the payment is matched against it on the next incremental run.
+        later_claim = _claim(db, member, policy, date(1984, 5, 20), "Lakeside Orthopedics", 83_117)
+        assert reconcile(db).suggestions == 1
+        candidates = db.scalars(
+            select(ReconciliationMatch).where(ReconciliationMatch.expense_id == expense.id).order_by(ReconciliationMatch.claim_id)
+        ).all()
+        assert [row.claim_id for row in candidates] == [claim.id, later_claim.id]
+        assert reconcile(db).suggestions == 0
+
+        # A second payment of the same amount competes for both claims.
+        rival = _payment(db, date(1984, 5, 29), 83_117, "LAKESIDE ORTHO")
+        assert reconcile(db).suggestions == 2
+
+        accept_match(db, candidates[1])
+        db.flush()
+        db.refresh(candidates[0])
+        assert expense.reconciled and expense.service_event_id == later_claim.service_event_id
+        assert (candidates[0].status, candidates[1].status) == (STATUS_REJECTED, STATUS_ACCEPTED)
+        rival_rows = db.scalars(select(ReconciliationMatch).where(ReconciliationMatch.expense_id == rival.id)).all()
+        assert {row.claim_id: row.status for row in rival_rows} == {claim.id: STATUS_SUGGESTED, later_claim.id: STATUS_REJECTED}
+
+        # A full rescan neither resurrects decided rows nor re-suggests the reconciled expense.
+        reconcile(db, full=True)
+        db.refresh(candidates[0])
+        assert candidates[0].status == STATUS_REJECTED
+
+
+def test_incremental_reconcile_picks_up_edited_eobs() -> None:
+    Base.metadata.create_all(bind=engine)
+    with db_session() as db:
+        provider = InsuranceProvider(name="Reconcile Edits Mutual", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        policy = Policy(provider_id=provider.id, plan_type=PlanType.PPO, policy_number_enc="x")
+        db.add(policy)
+        db.flush()
+        member = Member(policy_id=policy.id, full_name="Sam", dob_enc="x", member_id_enc="x")
+        db.add(member)
+        db.flush()
+
+        claim = _claim(db, member, policy, date(1982, 9, 3), "Harbor Imaging", 61_003)
+        expense = _payment(db, date(1982, 9, 20), 61_041, "HARBOR IMAGING")
+        reconcile(db)
+        assert db.scalars(select(ReconciliationMatch).where(ReconciliationMatch.expense_id == expense.id)).all() == []
+
+        # A corrected EOB amount now matches the payment; both rows predate the last run.
+        eob = db.scalars(select(EOB).where(EOB.claim_id == claim.id)).one()
+        eob.patient_responsibility_cents = 61_041
+        db.flush()
+        assert reconcile(db).suggestions == 1
+        suggested = db.scalars(select(ReconciliationMatch).where(ReconciliationMatch.expense_id == expense.id)).all()
+        assert [row.claim_id for row in suggested] == [claim.id]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db.base import Base, engine
+from app.db.models import AppointmentSeries, InsuranceProvider
+from app.domain.enums import ProviderAdapterType
+from app.services.calendar import series_totals as totals_module
+from app.services.calendar.recurrence import expand_month, iter_occurrences, parse_rrule
+from app.services.calendar.series_totals import SeriesTotals
+from app.services.calendar.versions import SERIES_KEY, bump_counter
+
+
+def test_parse_rrule_round_trips_and_rejects_unsupported_parts() -> None:
+    rule = parse_rrule("FREQ=WEEKLY;INTERVAL=2;BYDAY=TH,MO;COUNT=6")
+    assert rule.byday == (0, 3)
+    assert rule.to_text() == "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=6"
+    with pytest.raises(ValueError):
+        parse_rrule("FREQ=HOURLY")
+    with pytest.raises(ValueError):
+        parse_rrule("FREQ=MONTHLY;BYDAY=MO")
+    with pytest.raises(ValueError):
+        parse_rrule("FREQ=DAILY;BYSETPOS=1")
+
+
+def test_weekly_byday_with_count_stops_after_count() -> None:
+    start = datetime(2032, 1, 6, 14, 0)  # Tuesday
+    rule = parse_rrule("FREQ=WEEKLY;BYDAY=MO,TU,TH;COUNT=4")
+    got = list(iter_occurrences(rule, start, date(2032, 1, 1), date(2032, 12, 31)))
+    assert got == [
+        datetime(2032, 1, 6, 14, 0),
+        datetime(2032, 1, 8, 14, 0),
+        datetime(2032, 1, 12, 14, 0),
+        datetime(2032, 1, 13, 14, 0),
+    ]
+
+
+def test_monthly_rule_skips_missing_days_and_honours_until() -> None:
+    start = datetime(2032, 1, 31, 9, 0)
+    rule = parse_rrule("FREQ=MONTHLY;UNTIL=20320701")
+    got = [occ.date() for occ in iter_occurrences(rule, start, date(2032, 1, 1), date(2033, 1, 1))]
+    assert got == [date(2032, 1, 31), date(2032, 3, 31), date(2032, 5, 31)]
+
+
+def test_open_ended_expansion_jumps_to_window() -> None:
+    start = datetime(2000, 1, 3, 8, 30)
+    got = expand_month("FREQ=WEEKLY;INTERVAL=1", start, 2040, 2)
+    assert [occ.day for occ in got] == [6, 13, 20, 27]
+    assert all(occ.weekday() == 0 and occ.hour == 8 for occ in got)
+    assert expand_month("FREQ=WEEKLY;INTERVAL=1", start, 2040, 2) is got
+
+
+def test_series_totals_expand_once_per_counter_value(monkeypatch: pytest.MonkeyPatch) -> None:
+    Base.metadata.create_all(bind=engine)
+    expansions: list[int] = []
+    real_occurrences = totals_module.series_occurrences
+
+    def counting_occurrences(db: Session, start: date, end: date) -> list[tuple[AppointmentSeries, datetime]]:
+        expansions.append(start.year)
+        return real_occurrences(db, start, end)
+
+    monkeypatch.setattr(totals_module, "series_occurrences", counting_occurrences)
+    totals = SeriesTotals()
+    # Rolled back at the end so the series and counter bumps do not leak into the shared database.
+    with Session(engine) as db:
+        provider = InsuranceProvider(name="Series Totals Clinic", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        db.add(
+            AppointmentSeries(
+                provider_id=provider.id,
+                rrule="FREQ=WEEKLY;BYDAY=MO;COUNT=3",
+                dtstart=datetime(2043, 3, 2, 9),
+                estimated_invoice_cents=7000,
+            )
+        )
+        bump_counter(db, SERIES_KEY)
+        db.flush()
+        before = totals.month(db, 2043, 3)
+        assert totals.month(db, 2043, 4) == totals.year(db, 2043)[3]
+        assert expansions == [2043]
+
+        db.add(
+            AppointmentSeries(
+                provider_id=provider.id,
+                rrule="FREQ=WEEKLY;BYDAY=TU;COUNT=2",
+                dtstart=datetime(2043, 3, 3, 9),
+                estimated_invoice_cents=5000,
+            )
+        )
+        bump_counter(db, SERIES_KEY)
+        db.flush()
+        after = totals.month(db, 2043, 3)
+        assert expansions == [2043, 2043]
+        db.rollback()
+    assert after == (before[0] + 2, before[1] + 10_000)
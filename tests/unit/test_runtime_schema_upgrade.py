@@ -38,7 +38,7 @@ def test_ensure_runtime_schema_upgrades_legacy_appointments_table(tmp_path, monk
     db_base.ensure_runtime_schema()
 
     columns = _columns_for(legacy_engine, 'appointments')
-    assert {'location_name', 'facility_address', 'prep_notes', 'notes'}.issubset(columns)
+    assert {'location_name', 'facility_address', 'prep_notes', 'notes', 'series_id', 'series_occurrence_at'}.issubset(columns)
 
     legacy_engine.dispose()
 
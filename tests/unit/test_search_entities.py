@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.db.base import Base, db_session, engine, ensure_runtime_schema
+from app.db.models import Appointment, InsuranceProvider
+from app.domain.enums import ProviderAdapterType
+from app.services.search.entities import ensure_search_index, index_appointment, search, snippet
+from app.services.search.index import KIND_APPOINTMENT, SEARCH_TABLE, rowid_for
+
+
+def test_snippet_escapes_and_marks_terms() -> None:
+    value = "Prior auth <pending> for the MRI; " + " ".join(f"filler{i}" for i in range(40)) + " and the MRI again"
+    out = snippet(value, ["mri"], size=8)
+    assert out.startswith("… for the <mark>MRI</mark>; filler0")
+    assert out.endswith(" …")
+    tail = snippet("one two three four five six seven eight nine ten eleven twelve target", ["target"], size=4)
+    assert tail == "… ten eleven twelve <mark>target</mark>"
+    assert snippet("Prior auth <pending> for MRI", ["mri"]) == "Prior auth &lt;pending&gt; for <mark>MRI</mark>"
+    assert snippet("", ["mri"]) == ""
+
+
+def test_search_ranks_backfills_and_drops_stale_entries() -> None:
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema()
+    with db_session() as db:
+        provider = InsuranceProvider(name="Search Unit Clinic", adapter_type=ProviderAdapterType.MANUAL)
+        db.add(provider)
+        db.flush()
+        strong = Appointment(provider_id=provider.id, scheduled_at=datetime(2035, 5, 1, 9), notes="glimmerfen glimmerfen glimmerfen")
+        weak = Appointment(
+            provider_id=provider.id,
+            scheduled_at=datetime(2035, 5, 2, 9),
+            notes="glimmerfen " + " ".join(f"word{i}" for i in range(30)),
+        )
+        db.add_all([strong, weak])
+        db.flush()
+        # Written without the index helpers, like rows from before the index existed.
+        assert ensure_search_index(db) >= 3
+        assert ensure_search_index(db) == 0
+        ids = (strong.id, weak.id)
+
+    with db_session() as db:
+        hits = search(db, "Glimmerfen")
+        assert [(hit.kind, hit.id) for hit in hits] == [("appointment", ids[0]), ("appointment", ids[1])]
+        assert hits[0].title == "Search Unit Clinic · 2035-05-01 09:00"
+        assert hits[0].rank <= hits[1].rank
+
+        db.execute(text("DELETE FROM appointments WHERE id = :id"), {"id": ids[0]})
+        assert [hit.id for hit in search(db, "glimmerfen")] == [ids[1]]
+
+        weak_row = db.get(Appointment, ids[1])
+        weak_row.notes = "rescheduled"
+        index_appointment(db, weak_row)
+        assert search(db, "glimmerfen") == []
+        remaining = db.scalar(text(f"SELECT count(*) FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": rowid_for(KIND_APPOINTMENT, ids[1])})
+        assert remaining == 1
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from app.core.session_cache import CachedSession, SessionCache
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+
+def _entry(user_id: int, expires_in: timedelta = timedelta(hours=1)) -> CachedSession:
+    return CachedSession(user_id=user_id, user=object(), expires_at=NOW + expires_in)
+
+
+def test_hits_expire_with_ttl_or_session_and_are_counted() -> None:
+    cache = SessionCache(ttl_seconds=0.05)
+    assert cache.get("a", NOW) is None
+    cache.put("a", _entry(1))
+    assert cache.get("a", NOW).user_id == 1
+    # Never trusted past the session's own expiry, even inside the TTL.
+    assert cache.get("a", NOW + timedelta(hours=2)) is None
+    cache.put("b", _entry(1))
+    time.sleep(0.06)
+    assert cache.get("b", NOW) is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 3, 0)
+    assert stats.hit_rate == 0.25
+
+
+def test_invalidation_and_eviction() -> None:
+    cache = SessionCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", _entry(1))
+    cache.put("b", _entry(2))
+    cache.get("a", NOW)
+    cache.put("c", _entry(2))
+    assert cache.get("b", NOW) is None  # least recently used
+    cache.invalidate_user(2)
+    assert cache.get("c", NOW) is None
+    cache.invalidate("a")
+    assert cache.get("a", NOW) is None
+    stats = cache.stats()
+    assert (stats.evictions, stats.invalidations, stats.size) == (1, 2, 0)
+    SessionCache(ttl_seconds=0).put("x", _entry(1))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, text
+
+import app.db.base as db_base
+from app.core.session_cache import CachedSession, SessionCache
+from app.core.session_reaper import SessionReaper, session_counts
+from app.db.base import Base, db_session, engine
+from app.db.models import Session as UserSession
+from app.db.models import User
+
+NOW = datetime(2033, 6, 1, 12, 0)
+
+
+def _user_with_sessions(email: str, expired: int, active: int) -> int:
+    with db_session() as db:
+        user = User(email=email, password_hash="x", mfa_enabled=False)
+        db.add(user)
+        db.flush()
+        for index in range(expired + active):
+            offset = timedelta(days=-1 - index) if index < expired else timedelta(days=index)
+            db.add(
+                UserSession(
+                    user_id=user.id,
+                    token_hash=f"{email}-{index}",
+                    csrf_token="c",
+                    expires_at=NOW + offset,
+                    created_at=NOW - timedelta(days=14) + timedelta(minutes=index),
+                )
+            )
+        return user.id
+
+
+def test_reaper_deletes_expired_in_batches_and_keeps_newest_per_user() -> None:
+    Base.metadata.create_all(bind=engine)
+    user_id = _user_with_sessions("reaper-user@example.test", expired=7, active=5)
+    cache = SessionCache(ttl_seconds=60)
+    # The oldest active session is cached; trimming it must stop it authenticating.
+    cache.put("reaper-user@example.test-7", CachedSession(user_id, object(), NOW + timedelta(days=7)))
+
+    result = SessionReaper(max_per_user=3, batch_size=2, cache=cache).run(now=NOW)
+
+    with db_session() as db:
+        left = db.scalars(select(UserSession.token_hash).where(UserSession.user_id == user_id).order_by(UserSession.id)).all()
+        counts = session_counts(db, NOW)
+    assert left == [f"reaper-user@example.test-{index}" for index in (9, 10, 11)]
+    assert result.expired >= 7 and result.over_limit >= 2
+    assert counts.expired == 0
+    assert cache.get("reaper-user@example.test-7", NOW) is None
+    assert cache.stats().invalidations == 1
+
+
+def test_incremental_vacuum_after_upgrading_auto_vacuum_mode(tmp_path, monkeypatch) -> None:
+    legacy_engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'legacy.db'}", connect_args={"check_same_thread": False})
+    with legacy_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE filler (blob BLOB)"))
+        for _ in range(200):
+            conn.execute(text("INSERT INTO filler VALUES (randomblob(2000))"))
+    monkeypatch.setattr(db_base, "engine", legacy_engine)
+
+    assert db_base.ensure_incremental_vacuum() is True
+    assert db_base.ensure_incremental_vacuum() is False
+    with legacy_engine.begin() as conn:
+        conn.execute(text("DELETE FROM filler"))
+    with legacy_engine.connect() as conn:
+        free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+    assert free_pages > 50
+    assert db_base.incremental_vacuum(10) == 10
+    assert db_base.incremental_vacuum() == free_pages - 10
+
+
+def test_reaper_switches_auto_vacuum_mode_on_its_first_run_only(monkeypatch) -> None:
+    Base.metadata.create_all(bind=engine)
+    checks: list[bool] = []
+    monkeypatch.setattr(
+        "app.core.session_reaper.ensure_incremental_vacuum", lambda max_bytes: checks.append(max_bytes is not None) or False
+    )
+    reaper = SessionReaper(max_per_user=0)
+
+    reaper.run(now=NOW)
+    reaper.run(now=NOW)
+
+    assert checks == [True]
+
+
+def test_large_database_is_left_for_the_offline_conversion(tmp_path, monkeypatch) -> None:
+    legacy_engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'large.db'}", connect_args={"check_same_thread": False})
+    with legacy_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE filler (blob BLOB)"))
+        for _ in range(50):
+            conn.execute(text("INSERT INTO filler VALUES (randomblob(2000))"))
+    monkeypatch.setattr(db_base, "engine", legacy_engine)
+
+    assert db_base.ensure_incremental_vacuum(max_bytes=4096) is False
+    assert db_base.incremental_vacuum_enabled() is False
+    assert db_base.ensure_incremental_vacuum() is True
+    assert db_base.incremental_vacuum_enabled() is True
+
+
+def test_reaper_skips_the_vacuum_pragma_without_incremental_mode(monkeypatch) -> None:
+    Base.metadata.create_all(bind=engine)
+    vacuums: list[bool] = []
+    monkeypatch.setattr("app.core.session_reaper.ensure_incremental_vacuum", lambda max_bytes: False)
+    monkeypatch.setattr("app.core.session_reaper.incremental_vacuum_enabled", lambda: False)
+    monkeypatch.setattr("app.core.session_reaper.incremental_vacuum", lambda: vacuums.append(True) or 0)
+    _user_with_sessions("reaper-novacuum@example.test", expired=1, active=0)
+
+    result = SessionReaper(max_per_user=0).run(now=NOW)
+
+    assert result.expired >= 1 and result.pages_freed == 0
+    assert vacuums == []
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+import app.db.base as db_base
+
+
+def test_connections_get_the_configured_profile() -> None:
+    profile = db_base.sqlite_profile(db_base.settings.sqlite_profile)
+    with db_base.engine.connect() as conn:
+        values = [conn.execute(text(f"PRAGMA {name}")).scalar() for name in ("mmap_size", "cache_size", "temp_store", "wal_autocheckpoint")]
+    assert values == [profile.mmap_size, profile.cache_size(db_base.pool_connections), 2, profile.wal_autocheckpoint]
+    assert db_base.engine.pool.size() == db_base.settings.db_pool_size
+
+
+def test_page_cache_budget_is_shared_by_the_pool() -> None:
+    profile = db_base.sqlite_profile("performance")
+    assert profile.cache_size(1) == -profile.cache_budget_kib
+    assert profile.cache_size(50) * 50 >= -profile.cache_budget_kib
+    # Never below SQLite's own default, however large the pool.
+    assert profile.cache_size(10_000) == -db_base.MIN_CACHE_KIB
+    assert db_base.sqlite_profile("minimal").cache_size(1) == -db_base.MIN_CACHE_KIB
+
+
+def test_unknown_profile_is_rejected() -> None:
+    with pytest.raises(ValueError, match="minimal, balanced, performance"):
+        db_base.sqlite_profile("turbo")
+
+
+def test_pooled_connections_optimize_what_they_queried(tmp_path, monkeypatch) -> None:
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'optimize.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "checkin", db_base.optimize_periodically)
+    monkeypatch.setattr(db_base, "OPTIMIZE_INTERVAL_SECONDS", 0)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE visits (clinic INTEGER, cents INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_visits_clinic ON visits(clinic)"))
+        conn.execute(text("INSERT INTO visits VALUES (:clinic, :cents)"), [{"clinic": i % 40, "cents": i} for i in range(5000)])
+    with engine.connect() as conn:
+        conn.execute(text("SELECT sum(cents) FROM visits WHERE clinic = 3")).scalar()
+    with engine.connect() as conn:
+        stats = conn.execute(text("SELECT tbl, idx FROM sqlite_stat1")).all()
+        assert conn.execute(text("PRAGMA analysis_limit")).scalar() == 0
+    engine.dispose()
+    assert ("visits", "ix_visits_clinic") in stats
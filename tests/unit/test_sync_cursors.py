@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+from typing import ClassVar
+
+from sqlalchemy import select
+
+from app.db.base import Base, db_session, engine
+from app.db.models import SyncCursor
+from app.services.providers.aggregator_stub import AggregatorStubAdapter
+from app.services.providers.base import ProviderAdapter, ProviderPage, ProviderRecord
+from app.services.providers.registry import registry
+from app.services.sync.cursors import SyncCursorStore
+from app.services.sync.engine import SyncEngine
+
+PAGES = 5
+PAGE_SIZE = 3
+
+
+class _PagedAdapter(ProviderAdapter):
+    name = "test_paged"
+    fail_at: str | None = None
+    fetched: ClassVar[list[str | None]] = []
+
+    def fetch_page(self, cursor: str | None = None) -> ProviderPage:
+        type(self).fetched.append(cursor)
+        if cursor is not None and cursor == type(self).fail_at:
+            raise TimeoutError("upstream timed out")
+        page = int(cursor or 0)
+        records = [ProviderRecord(f"{page}-{i}", "Paged", {"page": page}) for i in range(PAGE_SIZE)]
+        return ProviderPage(records, str(page + 1) if page + 1 < PAGES else None)
+
+    def refresh(self) -> list[ProviderRecord]:
+        return [record for page in self.iter_pages() for record in page.records]
+
+    def healthcheck(self) -> dict[str, str]:
+        return {"status": "ok"}
+
+
+registry.register("test_paged", _PagedAdapter)
+
+
+def test_run_resumes_from_last_committed_page_after_circuit_opens() -> None:
+    Base.metadata.create_all(bind=engine)
+    sunk: list[str] = []
+    sync = SyncEngine(max_attempts=2, max_failures=1, cooldown_seconds=0, backoff_base_seconds=0.001)
+    _PagedAdapter.fail_at = "3"
+    with db_session() as db:
+        cursors = SyncCursorStore(db)
+        assert sync.run_once("test_paged", lambda r: sunk.append(r["external_id"]), cursors, scope="resume-test") == 0
+        assert cursors.load("test_paged", "resume-test") == "3"
+        assert _PagedAdapter.fetched == [None, "1", "2", "3", "3"]  # the retry did not restart from the top
+
+        _PagedAdapter.fail_at = None
+        assert sync.run_once("test_paged", lambda r: sunk.append(r["external_id"]), cursors, scope="resume-test") == 2 * PAGE_SIZE
+        assert _PagedAdapter.fetched[-2:] == ["3", "4"]
+        assert len(sunk) == len(set(sunk)) == PAGES * PAGE_SIZE
+
+        row = db.scalar(select(SyncCursor).where(SyncCursor.adapter_key == "test_paged", SyncCursor.scope == "resume-test"))
+        assert row.cursor is None and row.completed_at is not None
+        assert row.records == PAGES * PAGE_SIZE
+
+
+def test_default_pages_wrap_refresh_for_sync_and_async_callers() -> None:
+    adapter = AggregatorStubAdapter()
+    pages = list(adapter.iter_pages())
+    assert len(pages) == 1 and pages[0].next_cursor is None
+    assert [r.external_id for r in pages[0].records] == ["stub-1"]
+
+    async def collect() -> list[ProviderPage]:
+        return [page async for page in adapter.aiter_pages()]
+
+    async_pages = asyncio.run(collect())
+    assert [[r.external_id for r in page.records] for page in async_pages] == [["stub-1"]]
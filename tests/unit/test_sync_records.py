@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from sqlalchemy import event, select
+
+from app.db.base import Base, db_session, engine
+from app.db.models import ExpenseLineItem, PatientPayment, SyncRecord
+from app.services.providers.base import ProviderAdapter, ProviderPage, ProviderRecord
+from app.services.providers.registry import registry
+from app.services.sync.cursors import SyncCursorStore
+from app.services.sync.dedupe import payload_hash
+from app.services.sync.engine import SyncEngine
+from app.services.sync.payments import PaymentSink
+from app.services.sync.records import (
+    CHANGE_CREATED,
+    CHANGE_RESTORED,
+    CHANGE_UPDATED,
+    SyncRecordLedger,
+)
+
+PAGE_SIZE = 1000
+
+
+class _ClaimsAdapter(ProviderAdapter):
+    name = "test_claims"
+    claims: ClassVar[dict[str, dict]] = {}
+
+    def fetch_page(self, cursor: str | None = None) -> ProviderPage:
+        ids = sorted(type(self).claims)
+        start = int(cursor or 0)
+        page = [ProviderRecord(i, "Claim", dict(type(self).claims[i])) for i in ids[start : start + PAGE_SIZE]]
+        return ProviderPage(page, str(start + PAGE_SIZE) if start + PAGE_SIZE < len(ids) else None)
+
+    def refresh(self) -> list[ProviderRecord]:
+        return [record for page in self.iter_pages() for record in page.records]
+
+    def healthcheck(self) -> dict[str, str]:
+        return {"status": "ok"}
+
+
+registry.register("test_claims", _ClaimsAdapter)
+
+
+def test_payload_hash_ignores_key_order() -> None:
+    assert payload_hash({"a": 1, "b": [1, 2]}) == payload_hash({"b": [1, 2], "a": 1})
+    assert payload_hash({"a": 1}) != payload_hash({"a": 2})
+
+
+def test_resync_skips_unchanged_and_soft_deletes_missing() -> None:
+    Base.metadata.create_all(bind=engine)
+    _ClaimsAdapter.claims = {f"c{i:05d}": {"status": "paid", "allowed": i} for i in range(10_000)}
+    sync = SyncEngine()
+    changes: list[tuple[str, str]] = []
+
+    def sink(record: dict) -> None:
+        changes.append((record["external_id"], record["change"]))
+
+    def run() -> int:
+        with db_session() as db:
+            return sync.run_once("test_claims", sink, SyncCursorStore(db), scope="ledger-test", ledger=SyncRecordLedger(db))
+
+    assert run() == 10_000
+    assert {change for _, change in changes} == {CHANGE_CREATED}
+
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "sync_records" in statement:
+            statements.append(statement.split()[0].upper())
+
+    changes.clear()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert run() == 0
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert changes == []
+    # One lookup per page plus the sweep's read of live ids; nothing is written.
+    assert statements == ["SELECT"] * 11
+
+    _ClaimsAdapter.claims["c00007"] = {"status": "denied", "allowed": 7}
+    removed = _ClaimsAdapter.claims.pop("c00042")
+    assert run() == 1
+    assert changes == [("c00007", CHANGE_UPDATED)]
+
+    with db_session() as db:
+        deleted = db.scalar(
+            select(SyncRecord.deleted_at).where(SyncRecord.scope == "ledger-test", SyncRecord.external_id == "c00042")
+        )
+        assert deleted is not None
+
+    _ClaimsAdapter.claims["c00042"] = removed
+    changes.clear()
+    assert run() == 1
+    assert changes == [("c00042", CHANGE_RESTORED)]
+
+
+def test_records_a_failed_sink_rejected_are_delivered_on_retry() -> None:
+    Base.metadata.create_all(bind=engine)
+    _ClaimsAdapter.claims = {f"r{i:04d}": {"status": "paid", "allowed": i} for i in range(1500)}
+    delivered: list[str] = []
+    failures = [ConnectionError("sink unavailable")]
+
+    def sink(record: dict) -> None:
+        if failures and len(delivered) == 1200:
+            raise failures.pop()
+        delivered.append(record["external_id"])
+
+    with db_session() as db:
+        sync = SyncEngine(backoff_base_seconds=0.001)
+        count = sync.run_once("test_claims", sink, SyncCursorStore(db), scope="ledger-retry", ledger=SyncRecordLedger(db))
+
+    # The first page went through, the second failed part-way and was offered again in full.
+    assert not failures
+    assert count == 1500
+    assert set(delivered) == set(_ClaimsAdapter.claims)
+
+
+def test_changed_payment_updates_the_stored_expense() -> None:
+    Base.metadata.create_all(bind=engine)
+    _ClaimsAdapter.claims = {
+        "p1": {"amount_cents": 2500, "posted": "1984-03-02", "name": "Ledger Clinic"},
+        "p2": {"amount_cents": 900, "posted": "1984-03-03", "name": "Ledger Pharmacy"},
+    }
+
+    def run() -> PaymentSink:
+        with db_session() as db:
+            sink = PaymentSink(db, source="test_claims")
+            SyncEngine().run_once("test_claims", sink, SyncCursorStore(db), scope="ledger-payments", ledger=SyncRecordLedger(db))
+            return sink
+
+    assert run().summary.created == 2
+    _ClaimsAdapter.claims["p1"] = {"amount_cents": 2750, "posted": "1984-03-02", "name": "Ledger Clinic"}
+    summary = run().summary
+    assert (summary.created, summary.updated, summary.duplicates) == (0, 1, 0)
+
+    with db_session() as db:
+        amounts = db.execute(
+            select(ExpenseLineItem.amount_cents, PatientPayment.amount_cents)
+            .join(PatientPayment, PatientPayment.expense_id == ExpenseLineItem.id)
+            .where(PatientPayment.source == "test_claims", PatientPayment.payee == "Ledger Clinic")
+        ).all()
+    assert amounts == [(2750, 2750)]
+    # The ledger now holds the new hash, so the next run has nothing to do.
+    assert run().summary.updated == 0